@@ -33,6 +33,7 @@ try:
     from skymarshal.data_manager import DataManager
     from skymarshal.ui import UIManager
     from skymarshal.models import ContentItem, UserSettings, console
+    from skymarshal.text_features import text_features
 except ImportError as e:
     print(f"❌ Failed to import Skymarshal modules: {e}")
     print("💡 Make sure you're running this from the skymarshal directory")
@@ -329,7 +330,7 @@ class ContentCleanupLoner:
 
         # Group posts by text
         for post in posts:
-            text = post.get('text', '').strip().lower()
+            text = text_features(post.get('text')).normalized
             if len(text) > 5:  # Ignore very short text
                 if text not in text_groups:
                     text_groups[text] = []
@@ -348,28 +349,26 @@ class ContentCleanupLoner:
     def _find_bot_content(self, posts: List[Dict]) -> List[Dict]:
         """Find bot-like content."""
         bot_content = []
-        import re
 
         for post in posts:
-            text = post.get('text', '')
+            features = text_features(post.get('text'))
 
             # Check for multiple URLs
-            urls = re.findall(r'http[s]?://\S+', text)
-            if len(urls) >= 3:
-                post['cleanup_reason'] = f"Multiple URLs ({len(urls)} links)"
+            url_count = features.url_count
+            if url_count >= 3:
+                post['cleanup_reason'] = f"Multiple URLs ({url_count} links)"
                 bot_content.append(post)
                 continue
 
             # Check for excessive hashtags
-            hashtags = re.findall(r'#\w+', text)
-            if len(hashtags) >= 8:
-                post['cleanup_reason'] = f"Excessive hashtags ({len(hashtags)} tags)"
+            hashtag_count = len(features.hashtags)
+            if hashtag_count >= 8:
+                post['cleanup_reason'] = f"Excessive hashtags ({hashtag_count} tags)"
                 bot_content.append(post)
                 continue
 
             # Check for repetitive patterns
-            words = text.split()
-            if len(words) >= 5 and len(set(words)) <= 3:
+            if features.word_count >= 5 and features.distinct_words <= 3:
                 post['cleanup_reason'] = "Repetitive word pattern"
                 bot_content.append(post)
 
@@ -654,7 +653,6 @@ class ContentCleanupLoner:
 
     def _apply_custom_cleanup_rules(self, min_len: int, max_len: int, max_hashtags: int, max_urls: int, keywords: str) -> List[Dict]:
         """Apply custom cleanup rules."""
-        import re
         candidates = []
         posts = [item for item in self.current_data if item.get('type') == 'post']
 
@@ -662,6 +660,7 @@ class ContentCleanupLoner:
 
         for post in posts:
             text = post.get('text', '')
+            features = text_features(text)
             matched = False
             reasons = []
 
@@ -676,21 +675,21 @@ class ContentCleanupLoner:
 
             # Check hashtags
             if max_hashtags > 0:
-                hashtags = re.findall(r'#\w+', text)
+                hashtags = features.hashtags
                 if len(hashtags) > max_hashtags:
                     reasons.append(f"Too many hashtags ({len(hashtags)} > {max_hashtags})")
                     matched = True
 
             # Check URLs
             if max_urls > 0:
-                urls = re.findall(r'http[s]?://\S+', text)
+                urls = features.urls
                 if len(urls) > max_urls:
                     reasons.append(f"Too many URLs ({len(urls)} > {max_urls})")
                     matched = True
 
             # Check keywords
             if keywords_list:
-                text_lower = text.lower()
+                text_lower = features.lowered
                 found_keywords = [kw for kw in keywords_list if kw in text_lower]
                 if found_keywords:
                     reasons.append(f"Contains keywords: {', '.join(found_keywords)}")
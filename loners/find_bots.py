@@ -9,6 +9,7 @@ import os
 import sys
 import json
 from pathlib import Path
+from collections import Counter
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -33,6 +34,7 @@ try:
     from skymarshal.data_manager import DataManager
     from skymarshal.ui import UIManager
     from skymarshal.models import ContentItem, UserSettings, console
+    from skymarshal.text_features import text_features
 except ImportError as e:
     print(f"❌ Failed to import Skymarshal modules: {e}")
     print("💡 Make sure you're running this from the skymarshal directory")
@@ -274,7 +276,7 @@ class BotDetectionLoner:
         # Check for repetitive content
         text_frequency = {}
         for post in posts:
-            text = post.get('text', '').strip().lower()
+            text = text_features(post.get('text')).normalized
             if len(text) > 10:  # Ignore very short posts
                 text_frequency[text] = text_frequency.get(text, 0) + 1
 
@@ -283,7 +285,7 @@ class BotDetectionLoner:
             if count >= 3:  # Same text posted 3+ times
                 bot_indicators['repetitive_content'] += count
                 for post in posts:
-                    if post.get('text', '').strip().lower() == text:
+                    if text_features(post.get('text')).normalized == text:
                         post['bot_reason'] = f"Repetitive content (posted {count} times)"
                         potential_bots.append(post)
 
@@ -340,30 +342,27 @@ class BotDetectionLoner:
 
     def _check_automated_patterns(self, posts: List[Dict], potential_bots: List[Dict], indicators: Dict):
         """Check for automated content patterns."""
-        import re
-
         for post in posts:
-            text = post.get('text', '')
+            features = text_features(post.get('text'))
 
             # Check for URL-heavy content
-            urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', text)
-            if len(urls) >= 2:
+            url_count = features.url_count
+            if url_count >= 2:
                 indicators['automated_patterns'] += 1
-                post['bot_reason'] = f"Multiple URLs ({len(urls)} links)"
+                post['bot_reason'] = f"Multiple URLs ({url_count} links)"
                 if post not in potential_bots:
                     potential_bots.append(post)
 
             # Check for excessive hashtags
-            hashtags = re.findall(r'#\w+', text)
-            if len(hashtags) >= 5:
+            hashtag_count = len(features.hashtags)
+            if hashtag_count >= 5:
                 indicators['automated_patterns'] += 1
-                post['bot_reason'] = f"Excessive hashtags ({len(hashtags)} tags)"
+                post['bot_reason'] = f"Excessive hashtags ({hashtag_count} tags)"
                 if post not in potential_bots:
                     potential_bots.append(post)
 
             # Check for very short, repetitive words
-            words = text.split()
-            if len(words) >= 3 and len(set(words)) <= 2:
+            if features.word_count >= 3 and features.distinct_words <= 2:
                 indicators['automated_patterns'] += 1
                 post['bot_reason'] = "Repetitive word pattern"
                 if post not in potential_bots:
@@ -445,9 +444,11 @@ class BotDetectionLoner:
         }[sensitivity]
 
         scored_posts = []
+        # Count each text once instead of rescanning every post per post
+        text_counts = Counter(text_features(post.get('text')).normalized for post in posts)
 
         for post in posts:
-            confidence_score = self._calculate_bot_confidence(post) * confidence_multiplier
+            confidence_score = self._calculate_bot_confidence(post, text_counts) * confidence_multiplier
 
             if confidence_score >= min_confidence:
                 post['bot_confidence'] = confidence_score
@@ -463,35 +464,40 @@ class BotDetectionLoner:
             'total_analyzed': len(posts)
         }
 
-    def _calculate_bot_confidence(self, post: Dict) -> float:
-        """Calculate bot confidence score for a post."""
+    def _calculate_bot_confidence(self, post: Dict, text_counts: Optional[Counter] = None) -> float:
+        """Calculate bot confidence score for a post.
+
+        Args:
+            post: Post dict
+            text_counts: Posts per normalized text, if already counted
+        """
         confidence = 0.0
-        text = post.get('text', '')
+        text = post.get('text') or ''
+        features = text_features(text)
 
         # Factor 1: Repetitive content (check against other posts)
-        posts = [item for item in self.current_data if item.get('type') == 'post']
-        same_text_count = sum(1 for p in posts if p.get('text', '').strip().lower() == text.strip().lower())
+        if text_counts is None:
+            posts = [item for item in self.current_data if item.get('type') == 'post']
+            text_counts = Counter(text_features(p.get('text')).normalized for p in posts)
+        same_text_count = text_counts[features.normalized]
         if same_text_count >= 3:
             confidence += 0.4
 
         # Factor 2: URL density
-        import re
-        urls = re.findall(r'http[s]?://\S+', text)
-        if len(urls) >= 2:
+        if features.url_count >= 2:
             confidence += 0.3
 
         # Factor 3: Hashtag spam
-        hashtags = re.findall(r'#\w+', text)
-        if len(hashtags) >= 5:
+        hashtag_count = len(features.hashtags)
+        if hashtag_count >= 5:
             confidence += 0.2
-        elif len(hashtags) >= 3:
+        elif hashtag_count >= 3:
             confidence += 0.1
 
         # Factor 4: Text quality
-        words = text.split()
-        if len(words) > 0:
-            unique_words = len(set(words))
-            repetition_ratio = 1 - (unique_words / len(words))
+        if features.word_count > 0:
+            unique_words = features.distinct_words
+            repetition_ratio = 1 - (unique_words / features.word_count)
             if repetition_ratio > 0.5:
                 confidence += 0.2
 
@@ -563,19 +569,19 @@ class BotDetectionLoner:
 
     def _apply_custom_rules(self, min_reps: int, max_urls: int, max_hashtags: int, check_timing: bool) -> Dict[str, Any]:
         """Apply custom detection rules."""
-        import re
         posts = [item for item in self.current_data if item.get('type') == 'post']
         flagged_posts = []
 
         # Check repetitions
         text_counts = {}
         for post in posts:
-            text = post.get('text', '').strip().lower()
+            text = text_features(post.get('text')).normalized
             if len(text) > 10:
                 text_counts[text] = text_counts.get(text, 0) + 1
 
         for post in posts:
-            text = post.get('text', '').strip().lower()
+            features = text_features(post.get('text'))
+            text = features.normalized
             flagged = False
 
             # Check repetition threshold
@@ -584,13 +590,13 @@ class BotDetectionLoner:
                 flagged = True
 
             # Check URL count
-            urls = re.findall(r'http[s]?://\S+', post.get('text', ''))
+            urls = features.urls
             if len(urls) > max_urls:
                 post['custom_flag_reason'] = f"Too many URLs ({len(urls)})"
                 flagged = True
 
             # Check hashtag count
-            hashtags = re.findall(r'#\w+', post.get('text', ''))
+            hashtags = features.hashtags
             if len(hashtags) > max_hashtags:
                 post['custom_flag_reason'] = f"Too many hashtags ({len(hashtags)})"
                 flagged = True
@@ -665,21 +671,19 @@ class BotDetectionLoner:
         # Analyze text repetition
         text_frequency = {}
         for post in posts:
-            text = post.get('text', '').strip().lower()
+            text = text_features(post.get('text')).normalized
             if len(text) > 10:
                 text_frequency[text] = text_frequency.get(text, 0) + 1
 
         patterns['repetitive_text'] = sum(1 for count in text_frequency.values() if count >= 3)
 
         # Analyze URL patterns
-        import re
         for post in posts:
-            urls = re.findall(r'http[s]?://\S+', post.get('text', ''))
-            if len(urls) >= 2:
+            features = text_features(post.get('text'))
+            if features.url_count >= 2:
                 patterns['url_spam'] += 1
 
-            hashtags = re.findall(r'#\w+', post.get('text', ''))
-            if len(hashtags) >= 5:
+            if len(features.hashtags) >= 5:
                 patterns['hashtag_spam'] += 1
 
         # Generate insights
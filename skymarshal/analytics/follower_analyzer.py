@@ -25,6 +25,7 @@ from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
 from ..models import console
+from ..rate_budget import PUBLIC_API, budget_for
 
 
 class FollowerAnalyzer:
@@ -217,6 +218,7 @@ class FollowerAnalyzer:
                     params['cursor'] = cursor
                     
                 try:
+                    await budget_for(PUBLIC_API).acquire_async()
                     async with session.get(url, headers=headers, params=params) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -267,6 +269,7 @@ class FollowerAnalyzer:
             
             async with aiohttp.ClientSession() as session:
                 try:
+                    await budget_for(PUBLIC_API).acquire_async()
                     async with session.get(url, headers=headers, params=params) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -23,6 +23,8 @@ import threading
 import requests
 
 from ..models import console
+from ..concurrency import account_did
+from ..rate_budget import AUTHENTICATED_API, budget_for
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
@@ -239,6 +241,7 @@ class PostAnalyzer:
         
         # Get author profile first
         try:
+            await budget_for(AUTHENTICATED_API, account=account_did(self.client)).acquire_async()
             profile = await self.client.get_profile(author_handle)
             self.cache_profile({
                 'did': profile.did,
@@ -279,6 +282,7 @@ class PostAnalyzer:
                         params['cursor'] = cursor
                     
                     # Make API request
+                    await budget_for(AUTHENTICATED_API, account=account_did(self.client)).acquire_async()
                     response = await self.client.get_author_feed(
                         actor=author_handle,
                         limit=batch_size,
@@ -11,6 +11,8 @@ import logging
 from flask import Blueprint, jsonify, request, session
 
 from skymarshal.api import get_services
+from skymarshal.concurrency import pds_call
+from skymarshal.rate_budget import DELETE_POINTS, PDS_WRITES, budget_for
 from skymarshal.services import ContentService
 
 logger = logging.getLogger(__name__)
@@ -102,7 +104,7 @@ def unfollow():
             # Find the follow record to delete
             # The follow record URI is at://ego-did/app.bsky.graph.follow/<rkey>
             # We need to find the rkey for this specific follow
-            resp = client.get_follows(service.auth.current_handle, limit=100)
+            resp = pds_call(client, client.get_follows, service.auth.current_handle, limit=100)
             target_follow = None
             cursor = None
 
@@ -121,11 +123,20 @@ def unfollow():
                 cursor = resp.cursor
                 if not cursor:
                     break
-                resp = client.get_follows(service.auth.current_handle, cursor=cursor, limit=100)
+                resp = pds_call(
+                    client,
+                    client.get_follows,
+                    service.auth.current_handle,
+                    cursor=cursor,
+                    limit=100,
+                )
 
             if target_follow:
                 # Delete the follow record
                 rkey = target_follow.split("/")[-1]
+                budget_for(PDS_WRITES, account=service.auth.current_did).acquire(
+                    DELETE_POINTS, consumer=service.auth.current_handle
+                )
                 client.delete_record(
                     repo=service.auth.current_did,
                     collection="app.bsky.graph.follow",
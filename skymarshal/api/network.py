@@ -19,6 +19,7 @@ from skymarshal.network.analysis import GraphAnalytics
 from skymarshal.network.cache import NetworkCache
 from skymarshal.network.client import BlueskyClient
 from skymarshal.network.fetcher import NetworkFetcher
+from skymarshal.rate_budget import BACKGROUND, budget_scope
 from skymarshal.services import ContentService
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,10 @@ network_bp = Blueprint("network", __name__)
 # In-memory job tracking
 _jobs: Dict[str, Dict[str, Any]] = {}
 
+# Running job per cache key, so identical fetches join the job in flight
+_running_jobs: Dict[str, str] = {}
+_running_jobs_lock = threading.Lock()
+
 # Shared instances (initialized lazily)
 _cache: NetworkCache | None = None
 
@@ -81,7 +86,8 @@ def fetch_network():
         "max_following": 500,
         "bypass_cache": false
     }
-    Returns: {"job_id": "..."}
+    Returns: {"job_id": "..."} (with "shared": true when an identical job
+    was already running and its id is returned instead)
     """
     service = _require_service()
     data = request.get_json(silent=True) or {}
@@ -118,20 +124,28 @@ def fetch_network():
             }
             return jsonify({"success": True, "job_id": job_id, "cached": True})
 
-    job_id = secrets.token_hex(8)
-    _jobs[job_id] = {
-        "status": "running",
-        "handle": handle,
-        "progress": 0,
-        "message": "Starting network fetch...",
-        "result": None,
-        "error": None,
-    }
+    # An identical job already running is as fresh as a new one would be
+    with _running_jobs_lock:
+        running_id = _running_jobs.get(cache_key)
+        if running_id is not None:
+            return jsonify({"success": True, "job_id": running_id, "shared": True})
+        job_id = secrets.token_hex(8)
+        _jobs[job_id] = {
+            "status": "running",
+            "handle": handle,
+            "progress": 0,
+            "message": "Starting network fetch...",
+            "result": None,
+            "error": None,
+        }
+        _running_jobs[cache_key] = job_id
+
+    consumer = service.auth.current_handle
 
     def _run_fetch():
         try:
-            # Create a dedicated client for this fetch
-            client = BlueskyClient()
+            # A dedicated client, spending this user's share of the shared budget
+            client = BlueskyClient(consumer=consumer)
             analytics = GraphAnalytics()
             fetcher = NetworkFetcher(client, analytics=analytics)
 
@@ -169,7 +183,16 @@ def fetch_network():
             _jobs[job_id]["message"] = f"Error: {exc}"
             socketio.emit("job:progress", {"job_id": job_id, **_jobs[job_id]})
 
-    thread = threading.Thread(target=_run_fetch, daemon=True)
+        finally:
+            with _running_jobs_lock:
+                if _running_jobs.get(cache_key) == job_id:
+                    del _running_jobs[cache_key]
+
+    def _run_in_background_lane():
+        with budget_scope(BACKGROUND, consumer=consumer):
+            _run_fetch()
+
+    thread = threading.Thread(target=_run_in_background_lane, daemon=True)
     thread.start()
 
     return jsonify({"success": True, "job_id": job_id})
@@ -12,7 +12,9 @@ import logging
 from flask import Blueprint, jsonify, request, session
 
 from skymarshal.api import get_services
+from skymarshal.concurrency import account_did, pds_call
 from skymarshal.services import ContentService
+from skymarshal.single_flight import PROFILE_LOOKUPS, flight_group
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,17 @@ def _require_service() -> ContentService:
     return service
 
 
+def _lookup_profile(client, actor: str):
+    """client.get_profile(actor), shared with identical lookups in flight.
+
+    Authenticated profiles carry the viewer's own state (following, muted,
+    blocked), and a failure may be the session's own, so only lookups made
+    by the same account share a call.
+    """
+    key = ("getProfile", account_did(client), actor)
+    return flight_group(PROFILE_LOOKUPS).do(key, pds_call, client, client.get_profile, actor)
+
+
 def _auth_guard(f):
     from functools import wraps
 
@@ -58,7 +71,7 @@ def my_profile():
         return jsonify({"success": False, "error": "Not authenticated"}), 401
 
     try:
-        profile = client.get_profile(handle)
+        profile = _lookup_profile(client, handle)
         return jsonify({
             "success": True,
             "profile": {
@@ -98,7 +111,7 @@ def get_profile(handle: str):
 
     try:
         normalized = service.auth.normalize_handle(handle)
-        profile = client.get_profile(normalized)
+        profile = _lookup_profile(client, normalized)
         return jsonify({
             "success": True,
             "profile": {
@@ -138,7 +151,7 @@ def get_followers(handle: str):
 
     try:
         normalized = service.auth.normalize_handle(handle)
-        resp = client.get_followers(normalized, cursor=cursor, limit=limit)
+        resp = pds_call(client, client.get_followers, normalized, cursor=cursor, limit=limit)
         followers = []
         for f in resp.followers:
             followers.append({
@@ -173,7 +186,7 @@ def get_following(handle: str):
 
     try:
         normalized = service.auth.normalize_handle(handle)
-        resp = client.get_follows(normalized, cursor=cursor, limit=limit)
+        resp = pds_call(client, client.get_follows, normalized, cursor=cursor, limit=limit)
         following = []
         for f in resp.follows:
             following.append({
@@ -28,7 +28,7 @@ from .models import (
     DeleteMode,
     SearchFilters,
     console,
-    parse_datetime,
+    utc_hour_and_weekday,
 )
 from .search import SearchManager
 from .settings import SettingsManager
@@ -1673,9 +1673,9 @@ class InteractiveContentManager:
         by_day = {d: 0 for d in range(7)}
 
         for it in items:
-            dt = parse_datetime(it.created_at)
-            if not dt:
+            if it.created_ts is None:
                 continue
+            hour, weekday = utc_hour_and_weekday(it.created_ts)
             # Use engagement_score if available and non-zero, otherwise calculate manually
             if hasattr(it, "engagement_score") and it.engagement_score > 0:
                 eng = it.engagement_score
@@ -1685,8 +1685,8 @@ class InteractiveContentManager:
                     + 2 * int(it.repost_count or 0)
                     + 2.5 * int(it.reply_count or 0)
                 )
-            by_hour[dt.hour] += eng
-            by_day[dt.weekday()] += eng
+            by_hour[hour] += eng
+            by_day[weekday] += eng
 
         hours_sorted = sorted(by_hour.items(), key=lambda kv: kv[1], reverse=True)
         top_hours = {h for h, _ in hours_sorted[:5]}
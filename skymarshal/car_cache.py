@@ -0,0 +1,186 @@
+"""
+Skymarshal Parsed CAR Cache
+
+File Purpose: Reuse decoded CAR record sets across imports of the same backup
+Primary Functions/Classes: ParsedCarCache
+Inputs and Outputs (I/O): Compact record lists in, JSON cache files under
+    ~/.skymarshal/car_cache out
+
+Importing the same backup twice (e.g. re-running the web setup with different
+categories) used to decode every record block again. ParsedCarCache stores the
+compact records of each collection keyed by the SHA-256 of the CAR file, so a
+repeat import goes straight to filtering and export. Entries are evicted
+least-recently-used once the cache grows past its size cap.
+
+The key is never taken from the CAR header: the header's root CID is not
+checked against the blocks, so an uploaded CAR could claim another repo's root
+(or a path like ``../x``) and poison or escape the cache.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .car_reader import CarReader, CompactRecord
+
+# Cache keys: "sha256-" plus the hex digest of the CAR file's bytes
+CACHE_KEY_RE = re.compile(r"sha256-[0-9a-f]{64}")
+
+
+class ParsedCarCache:
+    """On-disk LRU cache of compact CAR records, one JSON file per repo snapshot."""
+
+    VERSION = 2
+
+    def __init__(
+        self, cache_dir: Optional[Path] = None, max_bytes: int = 256 * 1024 * 1024
+    ):
+        """Initialize the parsed CAR cache.
+
+        Args:
+            cache_dir: Directory for cache files. Defaults to ~/.skymarshal/car_cache
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        if cache_dir is None:
+            cache_dir = Path.home() / ".skymarshal" / "car_cache"
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def cache_key(reader: CarReader) -> str:
+        """Content key for a CAR: the SHA-256 of the file."""
+        digest = hashlib.sha256()
+        with open(reader.path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return "sha256-" + digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        if not CACHE_KEY_RE.fullmatch(key):
+            raise ValueError(f"Invalid CAR cache key: {key!r}")
+        return self.cache_dir / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._load(self._entry_path(key))
+
+    def _load(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                data: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != self.VERSION:
+            return None
+        return data
+
+    def get(
+        self, key: str, collections: set
+    ) -> Tuple[Optional[str], Dict[str, List[CompactRecord]]]:
+        """Return cached records for whichever of ``collections`` are present.
+
+        Returns:
+            Tuple of (repo DID or None, dict mapping collection to its records)
+        """
+        data = self._read(key)
+        if data is None:
+            return None, {}
+
+        cached = data.get("collections") or {}
+        found = {
+            collection: [
+                (collection, path, cid, record)
+                for path, cid, record in cached[collection]
+            ]
+            for collection in collections
+            if collection in cached
+        }
+        if found:
+            # Bump mtime so eviction treats this entry as recently used
+            try:
+                os.utime(self._entry_path(key))
+            except OSError:
+                pass
+        return data.get("did"), found
+
+    def put(
+        self, key: str, did: Optional[str], collections: Dict[str, List[CompactRecord]]
+    ) -> None:
+        """Store records for ``collections``, merged with those cached for ``key``."""
+        data = self._read(key) or {"version": self.VERSION, "collections": {}}
+        data["did"] = did or data.get("did")
+        for collection, records in collections.items():
+            data["collections"][collection] = [
+                [path, cid, record] for _, path, cid, record in records
+            ]
+
+        path = self._entry_path(key)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in ``max_bytes``.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def clear(self) -> int:
+        """Remove every cached entry."""
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def remove_did(self, did: str) -> int:
+        """Remove every cached entry belonging to ``did``."""
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            data = self._load(path)
+            if data and data.get("did") == did:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and total size of the cache."""
+        sizes = [p.stat().st_size for p in self.cache_dir.glob("*.json")]
+        return {
+            "entries": len(sizes),
+            "total_bytes": sum(sizes),
+            "max_bytes": self.max_bytes,
+        }
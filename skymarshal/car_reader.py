@@ -0,0 +1,648 @@
+"""
+Skymarshal CAR Reader
+
+File Purpose: Stream blocks out of ATProto repository CAR files without loading them
+    whole
+Primary Functions/Classes: CarReader, CarIndex, cbor_decode, decode_mst_entries,
+    decode_entries_parallel, car_quick_stats
+Inputs and Outputs (I/O): CAR files on disk (memory-mapped), index sidecars, decoded
+    DAG-CBOR blocks
+
+A CAR v1 file is a varint-prefixed DAG-CBOR header followed by a sequence of
+``varint(len) | CID | block`` sections. CarReader memory-maps the file and walks
+those sections one at a time, so callers can decode and discard each block
+instead of materialising the whole repository in memory. CarIndex walks the
+repo's Merkle Search Tree once and records where every record lives, so later
+reads can jump straight to the blocks they need. For very large repos the
+indexed record blocks can be split into byte-range chunks and decoded across a
+process pool (decode_entries_parallel). car_quick_stats counts records from the
+index alone, peeking at post blocks only far enough to spot replies.
+"""
+
+import base64
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    # Try new libipld-based approach first (atproto >= 0.0.26)
+    from libipld import decode_dag_cbor
+
+    cbor_decode = decode_dag_cbor
+except ImportError:
+    try:
+        # Fallback to older atproto_core.cbor approach
+        from atproto_core import cbor as at_cbor
+
+        cbor_decode = at_cbor.loads
+    except (ImportError, AttributeError):
+        try:
+            # Last resort: standard cbor2 library
+            import cbor2
+
+            cbor_decode = cbor2.loads
+        except ImportError:
+            cbor_decode = None  # type: ignore[assignment]
+
+from .exceptions import FileError
+
+# Record collections Skymarshal imports, keyed by export category
+RECORD_COLLECTIONS = {
+    "posts": "app.bsky.feed.post",
+    "likes": "app.bsky.feed.like",
+    "reposts": "app.bsky.feed.repost",
+}
+
+# Below this many records a process pool costs more to start than it saves
+PARALLEL_DECODE_MIN_RECORDS = 20000
+
+# Chunks handed out per worker; more than one keeps workers busy when chunks are uneven
+CHUNKS_PER_WORKER = 4
+
+# A scanned record: (collection, record path, record CID, compact record)
+CompactRecord = Tuple[str, Optional[str], str, Dict[str, Any]]
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    """Read an unsigned LEB128 varint from ``buf`` at ``pos``."""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise FileError("Truncated CAR file", "varint runs past end of data")
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _read_cid(buf, pos: int) -> Tuple[bytes, int]:
+    """Read a binary CID (v0 or v1) from ``buf`` at ``pos``."""
+    start = pos
+    # CIDv0 is a bare sha2-256 multihash: 0x12 0x20 + 32 byte digest
+    if buf[pos] == 0x12 and buf[pos + 1] == 0x20:
+        return bytes(buf[pos : pos + 34]), pos + 34
+    _, pos = _read_varint(buf, pos)  # version
+    _, pos = _read_varint(buf, pos)  # codec
+    _, pos = _read_varint(buf, pos)  # multihash code
+    digest_len, pos = _read_varint(buf, pos)
+    pos += digest_len
+    return bytes(buf[start:pos]), pos
+
+
+def cid_to_str(cid: Any) -> str:
+    """Render a binary CID as the base32 string form used in AT URIs and exports."""
+    if isinstance(cid, str):
+        return cid
+    if isinstance(cid, (bytes, bytearray)):
+        raw = bytes(cid)
+        if raw[:1] == b"\x00":
+            # Some decoders keep the multibase identity prefix on links
+            raw = raw[1:]
+        return "b" + base64.b32encode(raw).decode("ascii").lower().rstrip("=")
+    return str(cid)
+
+
+def is_commit(obj: Any) -> bool:
+    """Return True if a decoded block looks like a signed repo commit."""
+    if not isinstance(obj, dict):
+        return False
+    if obj.get("$type") in ("com.atproto.repo.commit", "com.atproto.repo#commit"):
+        return True
+    return "did" in obj and "data" in obj and "version" in obj
+
+
+def is_mst_node(obj: Any) -> bool:
+    """Return True if a decoded block is a Merkle Search Tree node."""
+    return isinstance(obj, dict) and isinstance(obj.get("e"), list) and "l" in obj
+
+
+def decode_mst_entries(node: Dict[str, Any]) -> List[Tuple[str, str, Optional[str]]]:
+    """Expand the prefix-compressed entries of an MST node.
+
+    Returns:
+        List of ``(key, value_cid, right_subtree_cid)`` tuples in key order, where
+        ``key`` is the ``collection/rkey`` record path.
+    """
+    entries = []
+    last_key = b""
+    for entry in node.get("e") or []:
+        try:
+            prefix_len = int(entry.get("p") or 0)
+            suffix = entry.get("k") or b""
+            if isinstance(suffix, str):
+                suffix = suffix.encode("utf-8")
+            key_bytes = last_key[:prefix_len] + bytes(suffix)
+            last_key = key_bytes
+            subtree = entry.get("t")
+            entries.append(
+                (
+                    key_bytes.decode("utf-8", errors="replace"),
+                    cid_to_str(entry.get("v")),
+                    cid_to_str(subtree) if subtree else None,
+                )
+            )
+        except Exception:
+            continue
+    return entries
+
+
+def compact_record(rtype: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the record fields the export needs."""
+    created = obj.get("createdAt") or obj.get("created_at")
+    if rtype == "app.bsky.feed.post":
+        return {
+            "text": obj.get("text"),
+            "created_at": created,
+            "reply": bool(obj.get("reply")),
+        }
+    subj = obj.get("subject") or {}
+    if not isinstance(subj, dict):
+        subj = {}
+    return {
+        "created_at": created,
+        "subject_uri": subj.get("uri"),
+        "subject_cid": subj.get("cid"),
+    }
+
+
+def _cbor_head(buf, pos: int) -> Tuple[int, int, int]:
+    """Parse a CBOR item head; returns ``(major_type, argument, next_pos)``."""
+    initial = buf[pos]
+    major, info = initial >> 5, initial & 0x1F
+    pos += 1
+    if info < 24:
+        return major, info, pos
+    size = {24: 1, 25: 2, 26: 4, 27: 8}.get(info)
+    if size is None:
+        raise ValueError("indefinite-length CBOR is not valid DAG-CBOR")
+    return major, int.from_bytes(buf[pos : pos + size], "big"), pos + size
+
+
+def _skip_cbor_item(buf, pos: int) -> int:
+    """Return the offset just past the CBOR item starting at ``pos``."""
+    major, arg, pos = _cbor_head(buf, pos)
+    if major in (2, 3):
+        return pos + arg
+    if major in (4, 5):
+        for _ in range(arg * (2 if major == 5 else 1)):
+            pos = _skip_cbor_item(buf, pos)
+        return pos
+    if major == 6:
+        return _skip_cbor_item(buf, pos)
+    # Integers and simple values/floats carry everything in the head
+    return pos
+
+
+def record_has_key(block: bytes, key: str) -> bool:
+    """Whether a DAG-CBOR map has a non-null top-level ``key``, without decoding it.
+
+    Only map keys are read; every value other than the one asked about is skipped
+    by length, so a post's text, facets and embeds are never materialised.
+    """
+    try:
+        major, count, pos = _cbor_head(block, 0)
+        if major != 5:
+            return False
+        target = key.encode("utf-8")
+        for _ in range(count):
+            key_major, key_len, pos = _cbor_head(block, pos)
+            if key_major != 3:
+                return False
+            found = block[pos : pos + key_len] == target
+            pos += key_len
+            if found:
+                # 0xf6 / 0xf7 are CBOR null / undefined
+                return block[pos] not in (0xF6, 0xF7)
+            pos = _skip_cbor_item(block, pos)
+    except (IndexError, ValueError):
+        pass
+    return False
+
+
+class CarReader:
+    """Incremental reader over a memory-mapped CAR v1 file.
+
+    Blocks are sliced out of the mapping one section at a time, so the resident
+    cost of a scan is a single block plus whatever the caller keeps.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self.size = self.path.stat().st_size
+            if self.size == 0:
+                raise FileError("Empty CAR file", str(self.path))
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.roots: List[str] = []
+            self._data_start = self._read_header()
+        except BaseException:
+            # A bad CAR must not leak the handle (or the mapping)
+            self.close()
+            raise
+
+    def _read_header(self) -> int:
+        header_len, pos = _read_varint(self._buf, 0)
+        end = pos + header_len
+        if end > self.size:
+            raise FileError("Invalid CAR file", "header runs past end of file")
+        header = cbor_decode(self._buf[pos:end]) if cbor_decode is not None else {}
+        roots = header.get("roots") if isinstance(header, dict) else None
+        self.roots = [cid_to_str(r) for r in roots or []]
+        return end
+
+    def __enter__(self) -> "CarReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        try:
+            # Unset if __init__ failed before mapping the file
+            buf = getattr(self, "_buf", None)
+            if buf is not None:
+                buf.close()
+        finally:
+            self._file.close()
+
+    @property
+    def root(self) -> Optional[str]:
+        """CID of the most relevant commit (first header root), if any."""
+        return self.roots[0] if self.roots else None
+
+    def iter_sections(self) -> Iterator[Tuple[str, int, int]]:
+        """Yield ``(cid, block_offset, block_length)`` for every section.
+
+        Only section headers are parsed; block bodies are never touched.
+        """
+        buf = self._buf
+        pos = self._data_start
+        while pos < self.size:
+            section_len, body = _read_varint(buf, pos)
+            if section_len == 0:
+                break
+            section_end = body + section_len
+            if section_end > self.size:
+                raise FileError("Truncated CAR file", f"section at byte {pos}")
+            cid, block_start = _read_cid(buf, body)
+            yield cid_to_str(cid), block_start, section_end - block_start
+            pos = section_end
+
+    def read_block(self, offset: int, length: int) -> bytes:
+        """Return the raw bytes of a block located by :meth:`iter_sections`."""
+        return self._buf[offset : offset + length]
+
+    def decode_block(self, offset: int, length: int) -> Any:
+        """Decode a single DAG-CBOR block."""
+        return cbor_decode(self.read_block(offset, length))
+
+    def iter_blocks(self) -> Iterator[Tuple[str, bytes, int]]:
+        """Yield ``(cid, block_bytes, end_offset)`` for every block, in file order."""
+        for cid, offset, length in self.iter_sections():
+            yield cid, self.read_block(offset, length), offset + length
+
+
+class CarIndex:
+    """Record index for a repo CAR, built by walking the MST from the root commit.
+
+    Maps each ``collection/rkey`` path to its record CID and the byte range of the
+    record block, so single records or whole collections can be decoded without
+    touching the rest of the archive. The index is persisted as a JSON sidecar
+    (``<name>.car.idx.json``) and reused while the CAR's size and mtime match.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        did: Optional[str],
+        root: Optional[str],
+        records: Dict[str, Tuple[str, int, int]],
+        car_size: int = 0,
+        car_mtime_ns: int = 0,
+        stats: Optional[Dict[str, int]] = None,
+    ):
+        self.did = did
+        self.root = root
+        self.records = records
+        self.car_size = car_size
+        self.car_mtime_ns = car_mtime_ns
+        # Filled in by car_quick_stats and persisted with the sidecar
+        self.stats = stats
+
+    @staticmethod
+    def sidecar_path(car_path: Path) -> Path:
+        """Location of the index sidecar for ``car_path``."""
+        car_path = Path(car_path)
+        return car_path.with_name(car_path.name + ".idx.json")
+
+    @classmethod
+    def build(cls, reader: CarReader) -> Optional["CarIndex"]:
+        """Walk the repo MST; returns None if the CAR has no usable commit root."""
+        offsets = {
+            cid: (offset, length) for cid, offset, length in reader.iter_sections()
+        }
+        root = reader.root
+        if not root or root not in offsets:
+            return None
+
+        commit = reader.decode_block(*offsets[root])
+        if not is_commit(commit) or not commit.get("data"):
+            return None
+
+        records: Dict[str, Tuple[str, int, int]] = {}
+        stack = [cid_to_str(commit["data"])]
+        seen = set()
+        while stack:
+            node_cid = stack.pop()
+            if node_cid in seen or node_cid not in offsets:
+                continue
+            seen.add(node_cid)
+            try:
+                node = reader.decode_block(*offsets[node_cid])
+            except Exception:
+                continue
+            if not is_mst_node(node):
+                continue
+            if node.get("l"):
+                stack.append(cid_to_str(node["l"]))
+            for key, value_cid, subtree in decode_mst_entries(node):
+                location = offsets.get(value_cid)
+                if location:
+                    records[key] = (value_cid, location[0], location[1])
+                if subtree:
+                    stack.append(subtree)
+
+        stat = reader.path.stat()
+        return cls(
+            did=commit.get("did"),
+            root=root,
+            records=records,
+            car_size=stat.st_size,
+            car_mtime_ns=stat.st_mtime_ns,
+        )
+
+    @classmethod
+    def load_or_build(cls, reader: CarReader) -> Optional["CarIndex"]:
+        """The sidecar index for ``reader`` if fresh, otherwise build and save it."""
+        sidecar = cls.sidecar_path(reader.path)
+        stat = reader.path.stat()
+        if sidecar.exists():
+            try:
+                with open(sidecar, "r") as f:
+                    data = json.load(f)
+                if (
+                    data.get("version") == cls.VERSION
+                    and data.get("car_size") == stat.st_size
+                    and data.get("car_mtime_ns") == stat.st_mtime_ns
+                ):
+                    records = {
+                        f"{collection}/{rkey}": (cid, offset, length)
+                        for collection, rows in (data.get("collections") or {}).items()
+                        for rkey, cid, offset, length in rows
+                    }
+                    return cls(
+                        did=data.get("did"),
+                        root=data.get("root"),
+                        records=records,
+                        car_size=stat.st_size,
+                        car_mtime_ns=stat.st_mtime_ns,
+                        stats=data.get("stats"),
+                    )
+            except Exception:
+                pass
+
+        index = cls.build(reader)
+        if index is not None:
+            try:
+                index.save(sidecar)
+            except OSError:
+                pass
+        return index
+
+    def save(self, path: Path) -> None:
+        """Write the index sidecar, grouping rows by collection to keep it small."""
+        collections: Dict[str, List[List[Any]]] = {}
+        for key, (cid, offset, length) in self.records.items():
+            collection, _, rkey = key.partition("/")
+            collections.setdefault(collection, []).append([rkey, cid, offset, length])
+        data: Dict[str, Any] = {
+            "version": self.VERSION,
+            "car_size": self.car_size,
+            "car_mtime_ns": self.car_mtime_ns,
+            "root": self.root,
+            "did": self.did,
+            "collections": collections,
+        }
+        if self.stats is not None:
+            data["stats"] = self.stats
+        tmp = Path(path).with_name(Path(path).name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def collections(self) -> Dict[str, int]:
+        """Return record counts per collection."""
+        counts: Dict[str, int] = {}
+        for key in self.records:
+            collection = key.split("/", 1)[0]
+            counts[collection] = counts.get(collection, 0) + 1
+        return counts
+
+    def entries(self, collection: str) -> List[Tuple[str, str, int, int]]:
+        """Return ``(path, cid, offset, length)`` for every record in ``collection``."""
+        prefix = collection + "/"
+        return [
+            (key, cid, offset, length)
+            for key, (cid, offset, length) in self.records.items()
+            if key.startswith(prefix)
+        ]
+
+    def lookup(self, path: str) -> Optional[Tuple[str, int, int]]:
+        """Return ``(cid, offset, length)`` for a single record path."""
+        return self.records.get(path)
+
+
+def decode_entries(
+    reader: CarReader,
+    entries: Iterable[Tuple[str, str, int, int]],
+    wanted: set,
+) -> Iterator[CompactRecord]:
+    """Decode indexed record blocks; yield compact records of ``wanted`` collections."""
+    for path, cid, offset, length in entries:
+        try:
+            obj = reader.decode_block(offset, length)
+        except Exception:
+            continue
+        if isinstance(obj, dict):
+            rtype = obj.get("$type") or path.split("/", 1)[0]
+            if rtype in wanted:
+                yield rtype, path, cid, compact_record(rtype, obj)
+
+
+def _decode_chunk(
+    car_path: str, entries: List[Tuple[str, str, int, int]], wanted: set
+) -> List[CompactRecord]:
+    """Process-pool worker: map the CAR and decode one chunk of entries."""
+    with CarReader(Path(car_path)) as reader:
+        return list(decode_entries(reader, entries, wanted))
+
+
+def chunk_entries(
+    entries: List[Tuple[str, str, int, int]], chunks: int
+) -> List[List[Tuple[str, str, int, int]]]:
+    """Split offset-sorted entries into contiguous byte ranges of roughly equal size."""
+    if not entries:
+        return []
+    chunks = max(1, min(chunks, len(entries)))
+    target = sum(length for _, _, _, length in entries) / chunks
+    result: List[List[Tuple[str, str, int, int]]] = []
+    current: List[Tuple[str, str, int, int]] = []
+    current_bytes = 0
+    for entry in entries:
+        current.append(entry)
+        current_bytes += entry[3]
+        if current_bytes >= target and len(result) < chunks - 1:
+            result.append(current)
+            current = []
+            current_bytes = 0
+    if current:
+        result.append(current)
+    return result
+
+
+def decode_entries_parallel(
+    car_path: Path,
+    entries: List[Tuple[str, str, int, int]],
+    wanted: set,
+    workers: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[CompactRecord]:
+    """Decode indexed record blocks across a process pool.
+
+    Each worker opens its own memory map and returns only compact record tuples,
+    so the full decoded records never cross the process boundary. Results are
+    returned in file order regardless of which chunk finishes first.
+
+    Args:
+        car_path: CAR file the entries were indexed from
+        entries: ``(path, cid, offset, length)`` rows sorted by offset
+        wanted: Collections to keep
+        workers: Number of worker processes
+        progress: Optional callable taking ``(entries_done, total_entries)``
+    """
+    chunks = chunk_entries(entries, workers * CHUNKS_PER_WORKER)
+    results: List[Optional[List[CompactRecord]]] = [None] * len(chunks)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_decode_chunk, str(car_path), chunk, wanted): i
+            for i, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            done += len(chunks[i])
+            if progress:
+                progress(done, len(entries))
+    return [record for chunk in results for record in chunk or []]
+
+
+# CARs whose quick stats are kept in memory (each CAR also caches them in
+# its index sidecar, so an evicted one is still cheap to recount)
+QUICK_STATS_CACHE_SIZE = 32
+
+# LRU of (resolved path, size, mtime_ns) -> stats; timestamped backups
+# would otherwise accumulate an entry per file for the process lifetime
+_QUICK_STATS_CACHE: "OrderedDict[Tuple[str, int, int], Dict[str, int]]" = OrderedDict()
+_QUICK_STATS_LOCK = threading.Lock()
+
+
+def car_quick_stats(car_path: Path) -> Dict[str, int]:
+    """Count posts, replies, likes and reposts in a CAR without decoding record bodies.
+
+    Counts come from the MST index (see CarIndex). Posts are split into replies by
+    peeking at each post block's top-level keys. Results are cached in memory and
+    in the index sidecar, both keyed by the CAR's size and mtime. CARs without a
+    walkable MST fall back to decoding each block.
+
+    Returns:
+        Dict with ``posts``, ``replies``, ``likes``, ``reposts``, ``other`` and
+        ``total``
+    """
+    car_path = Path(car_path)
+    stat = car_path.stat()
+    key = (str(car_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    with _QUICK_STATS_LOCK:
+        cached = _QUICK_STATS_CACHE.get(key)
+        if cached is not None:
+            _QUICK_STATS_CACHE.move_to_end(key)
+            return dict(cached)
+
+    stats = {"posts": 0, "replies": 0, "likes": 0, "reposts": 0, "other": 0, "total": 0}
+    with CarReader(car_path) as reader:
+        index = CarIndex.load_or_build(reader)
+        if index is not None and index.stats is not None:
+            stats = dict(index.stats)
+        elif index is not None:
+            for collection, count in index.collections().items():
+                if collection == RECORD_COLLECTIONS["posts"]:
+                    replies = sum(
+                        1
+                        for _, _, offset, length in index.entries(collection)
+                        if record_has_key(reader.read_block(offset, length), "reply")
+                    )
+                    stats["replies"] += replies
+                    stats["posts"] += count - replies
+                elif collection == RECORD_COLLECTIONS["likes"]:
+                    stats["likes"] += count
+                elif collection == RECORD_COLLECTIONS["reposts"]:
+                    stats["reposts"] += count
+                else:
+                    stats["other"] += count
+            stats["total"] = (
+                stats["posts"] + stats["replies"] + stats["likes"] + stats["reposts"]
+            )
+            index.stats = dict(stats)
+            try:
+                index.save(CarIndex.sidecar_path(car_path))
+            except OSError:
+                pass
+        else:
+            counted = {
+                RECORD_COLLECTIONS["likes"]: "likes",
+                RECORD_COLLECTIONS["reposts"]: "reposts",
+            }
+            for _, block, _ in reader.iter_blocks():
+                try:
+                    obj = cbor_decode(block)
+                except Exception:
+                    continue
+                rtype = obj.get("$type") if isinstance(obj, dict) else None
+                if not rtype:
+                    continue
+                if rtype == RECORD_COLLECTIONS["posts"]:
+                    stats["replies" if obj.get("reply") else "posts"] += 1
+                elif rtype in counted:
+                    stats[counted[rtype]] += 1
+                else:
+                    stats["other"] += 1
+                    continue
+                stats["total"] += 1
+
+    with _QUICK_STATS_LOCK:
+        _QUICK_STATS_CACHE[key] = dict(stats)
+        _QUICK_STATS_CACHE.move_to_end(key)
+        while len(_QUICK_STATS_CACHE) > QUICK_STATS_CACHE_SIZE:
+            _QUICK_STATS_CACHE.popitem(last=False)
+    return stats
@@ -0,0 +1,139 @@
+"""
+Skymarshal Binary Export
+
+File Purpose: Compact DAG-CBOR serialization of the export schema
+Primary Functions/Classes: write_cbor_export, read_cbor_export, normalize_export_data
+Inputs and Outputs (I/O): Export dicts in, ``<handle>.cbor`` files out (and back)
+
+A ``.cbor`` export holds exactly the structure DataManager._build_export_data
+produces (handle, did, export_time, posts, likes, reposts), encoded as DAG-CBOR
+with the libipld codec we already depend on for CAR files. Files are always
+written in the normalized layout, so loading never needs the legacy-format
+handling JSON exports go through; that runs once, when converting.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+try:
+    # libipld ships with atproto and is the fastest codec available
+    from libipld import decode_dag_cbor as _cbor_loads
+    from libipld import encode_dag_cbor as _cbor_dumps
+except ImportError:
+    try:
+        import cbor2
+
+        _cbor_loads = cbor2.loads
+        _cbor_dumps = cbor2.dumps
+    except ImportError:
+        _cbor_loads = None  # type: ignore[assignment]
+        _cbor_dumps = None  # type: ignore[assignment]
+
+from .exceptions import DataError
+
+FORMAT_NAME = "skymarshal-export"
+FORMAT_VERSION = 1
+
+CATEGORIES = ("posts", "likes", "reposts")
+
+
+def _coerce_list(value: Any) -> List[Dict[str, Any]]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        return list(value.values())
+    return []
+
+
+def _category_for(record: Dict[str, Any]) -> str:
+    kind = record.get("content_type") or record.get("type")
+    if kind == "like":
+        return "likes"
+    if kind == "repost":
+        return "reposts"
+    return "posts"
+
+
+def normalize_export_data(raw_data: Any) -> Dict[str, Any]:
+    """Convert any historical export layout into the current export dict.
+
+    Handles flat item arrays, ``{"data": {...}}`` wrappers and the
+    ``processed_posts`` / ``primary_items`` / ``processed_likes`` /
+    ``processed_reposts`` section names used by older versions.
+    """
+    export: Dict[str, Any] = {"posts": [], "likes": [], "reposts": []}
+
+    if isinstance(raw_data, list):
+        # Flat array format - sort items into sections by their type
+        for record in raw_data:
+            if isinstance(record, dict):
+                export[_category_for(record)].append(record)
+        return export
+
+    if not isinstance(raw_data, dict):
+        return export
+
+    # Structured format with separate sections
+    if "posts" not in raw_data and isinstance(raw_data.get("data"), dict):
+        data = raw_data["data"]
+    else:
+        data = raw_data
+
+    for key in ("handle", "did", "export_time"):
+        if raw_data.get(key) is not None:
+            export[key] = raw_data[key]
+
+    export["posts"] = _coerce_list(
+        data.get("posts") or data.get("processed_posts") or data.get("primary_items")
+    )
+    export["likes"] = _coerce_list(data.get("likes") or data.get("processed_likes"))
+    export["reposts"] = _coerce_list(
+        data.get("reposts") or data.get("processed_reposts")
+    )
+    for category in CATEGORIES:
+        export[category] = [r for r in export[category] if isinstance(r, dict)]
+    return export
+
+
+def write_cbor_export(path: Path, export_data: Dict[str, Any]) -> None:
+    """Encode an export dict as DAG-CBOR and write it atomically."""
+    if _cbor_dumps is None:
+        raise DataError(
+            "No CBOR encoder available", "Install libipld or cbor2: pip install libipld"
+        )
+
+    payload = dict(export_data)
+    payload["format"] = FORMAT_NAME
+    payload["version"] = FORMAT_VERSION
+    try:
+        encoded = _cbor_dumps(payload)
+    except (TypeError, ValueError, OverflowError):
+        # Values DAG-CBOR can't carry (datetimes, NaN, non-string keys) are
+        # stringified the same way the JSON export does
+        encoded = _cbor_dumps(json.loads(json.dumps(payload, default=str)))
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(encoded)
+    os.replace(tmp, path)
+
+
+def read_cbor_export(path: Path) -> Dict[str, Any]:
+    """Read a ``.cbor`` export written by :func:`write_cbor_export`."""
+    if _cbor_loads is None:
+        raise DataError(
+            "No CBOR decoder available", "Install libipld or cbor2: pip install libipld"
+        )
+
+    with open(path, "rb") as f:
+        data = _cbor_loads(f.read())
+    if not isinstance(data, dict) or data.get("format") != FORMAT_NAME:
+        raise DataError("Not a Skymarshal binary export", str(path))
+    for category in CATEGORIES:
+        data.setdefault(category, [])
+    return data
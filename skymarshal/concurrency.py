@@ -0,0 +1,533 @@
+"""
+Skymarshal Adaptive Concurrency
+
+File Purpose: AIMD concurrency limits shared by the API worker pools
+Primary Functions/Classes: ConcurrencyController, controller_for, concurrency_stats
+Inputs and Outputs (I/O): Request outcomes (latency, status, rate-limit headers) in;
+    concurrency slots and monitoring stats out
+
+Hydration, record listing, profile batches and network fetches used fixed
+worker counts, so they either left throughput unused or kept hammering the
+API after it started returning 429s. A ConcurrencyController hands out
+request slots and adjusts how many may be in flight from what the responses
+say, like TCP congestion control:
+
+- additive increase: while latency stays near its observed baseline,
+  errors are rare and at least half the slots are in use, each success
+  adds 1/limit of a slot (a slot every couple of busy rounds)
+- multiplicative decrease: a 429 or 5xx halves the limit, a sustained
+  latency rise or error rate trims it, at most once per round trip so a
+  burst of failures from one round counts once
+- rate-limit headers are honored: ``retry-after`` and an exhausted
+  ``ratelimit-remaining`` pause new requests until ``ratelimit-reset``, and
+  a low remaining budget caps the limit
+
+Controllers are shared process-wide by name, so every pool talking to the
+same service draws on one limit. PDS controllers are named per host
+(pds_controller), so a PDS that starts returning 429s only slows the
+accounts it hosts. Pools are sized to ``max_limit`` and each
+request takes a slot; stats() reports the current limit and recent decisions.
+Shared controllers of services with a rate budget (rate_budget.BUDGETS) also
+spend a budget point before handing out each slot; for PDS controllers that
+is the budget of the account making the call (pds_call, budget_scope).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import urlparse
+
+from .rate_budget import (  # noqa: F401 (service names re-exported)
+    AUTHENTICATED_API,
+    PUBLIC_API,
+    RateBudget,
+    budget_for,
+    budget_scope,
+    has_budget,
+)
+
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 32
+
+# Multiplier applied on a 429 or 5xx
+BACKOFF_FACTOR = 0.5
+
+# Gentler multiplier applied while latency or error rate is unhealthy
+TRIM_FACTOR = 0.9
+
+# Latency (EWMA) above this multiple of the baseline counts as congestion
+LATENCY_TOLERANCE = 2.0
+
+# Error rate (EWMA) above which the limit is trimmed
+ERROR_RATE_LIMIT = 0.25
+
+# EWMA weight of the newest sample
+EWMA_ALPHA = 0.2
+
+# How fast the latency baseline drifts up toward slower samples
+BASELINE_DRIFT = 0.01
+
+# Pause after a 429 that carried no reset or retry-after header (seconds)
+DEFAULT_RATE_LIMIT_PAUSE = 1.0
+
+# Longest pause a response header may impose (seconds)
+MAX_PAUSE = 300.0
+
+# Recent limit decisions kept for stats()
+DECISION_LOG_SIZE = 50
+
+# Sleep between slot checks for asyncio callers (seconds)
+ASYNC_POLL_INTERVAL = 0.01
+
+# Retries per call() after a 429 or 5xx
+CALL_RETRIES = 3
+
+# Wait before a retry when the controller isn't paused (seconds, doubled per attempt)
+RETRY_BACKOFF = 0.5
+
+_RATE_LIMIT_HINTS = ("ratelimitexceeded", "rate limit", "too many requests")
+
+# PDS assumed for clients that don't say which one they talk to
+DEFAULT_PDS_HOST = "bsky.social"
+
+T = TypeVar("T")
+
+
+def _header(headers: Optional[Mapping[str, Any]], name: str) -> Optional[float]:
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        # Plain dicts aren't case-insensitive like httpx/requests headers
+        value = next((v for k, v in headers.items() if k.lower() == name), None)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def response_of(
+    exc: BaseException,
+) -> Tuple[Optional[int], Optional[Mapping[str, Any]]]:
+    """(status, headers) of the HTTP response behind an exception, where known.
+
+    Covers atproto request errors, requests/httpx HTTP errors, and SDK errors
+    that only mention the rate limit in their message.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    headers = getattr(response, "headers", None)
+    if status is None and any(hint in str(exc).lower() for hint in _RATE_LIMIT_HINTS):
+        status = 429
+    return status, headers
+
+
+def is_retryable_status(status: Optional[int]) -> bool:
+    """429s and server errors, which are worth another try after backing off."""
+    return status is not None and (status == 429 or status >= 500)
+
+
+class Slot:
+    """Outcome of one request, filled in by the caller holding the slot."""
+
+    __slots__ = ("status", "headers", "error")
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.headers: Optional[Mapping[str, Any]] = None
+        self.error = False
+
+    def observe(
+        self, status: Optional[int], headers: Optional[Mapping[str, Any]] = None
+    ) -> None:
+        """Record the response status and headers."""
+        self.status = status
+        self.headers = headers
+
+    def observe_error(self, exc: BaseException) -> None:
+        """Record a failed request (status and headers taken from the exception)."""
+        self.status, self.headers = response_of(exc)
+        self.error = True
+
+
+class ConcurrencyController:
+    """AIMD limit on concurrent requests, shared by threads and event loops."""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+        budget: Optional[RateBudget] = None,
+        budget_service: Optional[str] = None,
+    ):
+        """Initialize the controller.
+
+        Args:
+            budget: Rate budget every slot spends from
+            budget_service: Service whose budget_for() budget is looked up
+                per slot instead (per account for PDS services)
+        """
+        self.name = name
+        self._budget = budget
+        self.budget_service = budget_service
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self._clock = clock
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._latency: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._error_rate = 0.0
+        self._last_decrease = float("-inf")
+        self.completed = 0
+        self.increases = 0
+        self.decreases = 0
+        self.pauses = 0
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=DECISION_LOG_SIZE)
+
+    @property
+    def budget(self) -> Optional[RateBudget]:
+        """Budget the next slot spends from (None if slots are free)."""
+        if self._budget is not None:
+            return self._budget
+        return budget_for(self.budget_service) if self.budget_service else None
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight."""
+        return max(self.min_limit, int(self._limit))
+
+    def _can_start(self, now: float) -> bool:
+        return now >= self._paused_until and self.in_flight < self.limit
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free right now."""
+        with self._cond:
+            if not self._can_start(self._clock()):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(
+        self,
+        points: int = 1,
+        lane: Optional[str] = None,
+        consumer: Optional[str] = None,
+    ) -> None:
+        """Block until a slot is free and no rate-limit pause is active.
+
+        Spends ``points`` from the controller's rate budget first, if it has one.
+        """
+        budget = self.budget
+        if budget is not None:
+            budget.acquire(points, lane, consumer)
+        with self._cond:
+            while True:
+                now = self._clock()
+                if self._can_start(now):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(
+                    self._paused_until - now if now < self._paused_until else None
+                )
+
+    async def acquire_async(
+        self,
+        points: int = 1,
+        lane: Optional[str] = None,
+        consumer: Optional[str] = None,
+    ) -> None:
+        """acquire() for coroutines; polls so the event loop never blocks."""
+        budget = self.budget
+        if budget is not None:
+            await budget.acquire_async(points, lane, consumer)
+        while not self.try_acquire():
+            await asyncio.sleep(
+                max(ASYNC_POLL_INTERVAL, self._paused_until - self._clock())
+            )
+
+    def _decide(self, action: str, reason: str) -> None:
+        self.decisions.append(
+            {
+                "time": time.time(),
+                "action": action,
+                "limit": self.limit,
+                "reason": reason,
+            }
+        )
+
+    def _pause(self, seconds: float, reason: str) -> None:
+        until = self._clock() + min(MAX_PAUSE, max(0.0, seconds))
+        if until > self._paused_until:
+            self._paused_until = until
+            self.pauses += 1
+            self._decide("pause", f"{reason} ({seconds:.1f}s)")
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = self._clock()
+        # One decrease per round trip: failures from the same round share it
+        if now - self._last_decrease < (self._latency or 0.0):
+            return
+        self._last_decrease = now
+        before = self.limit
+        self._limit = max(float(self.min_limit), self._limit * factor)
+        if self.limit != before:
+            self.decreases += 1
+            self._decide("decrease", reason)
+
+    def _apply_headers(
+        self, status: Optional[int], headers: Optional[Mapping[str, Any]]
+    ) -> bool:
+        """Honor rate-limit headers; True if they imposed a pause."""
+        retry_after = _header(headers, "retry-after")
+        if retry_after is not None:
+            self._pause(retry_after, "retry-after")
+            return True
+
+        remaining = _header(headers, "ratelimit-remaining")
+        reset = _header(headers, "ratelimit-reset")
+        if remaining is not None and remaining <= 0 and reset is not None:
+            # ratelimit-reset is a Unix timestamp
+            self._pause(reset - time.time(), "rate-limit budget exhausted")
+            return True
+        if status == 429 and reset is not None:
+            self._pause(reset - time.time(), "429 until reset")
+            return True
+        if remaining is not None and remaining < self._limit:
+            before = self.limit
+            self._limit = max(float(self.min_limit), remaining)
+            if self.limit != before:
+                self.decreases += 1
+                self._decide("cap", f"ratelimit-remaining {int(remaining)}")
+        return False
+
+    def release(
+        self,
+        latency: float,
+        status: Optional[int] = None,
+        headers: Optional[Mapping[str, Any]] = None,
+        error: bool = False,
+    ) -> None:
+        """Return a slot and adjust the limit from the request's outcome.
+
+        Args:
+            latency: Seconds the request took
+            status: HTTP status, if a response arrived
+            headers: Response headers (checked for rate-limit fields)
+            error: The request failed (transport error or raised)
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.completed += 1
+            paused = self._apply_headers(status, headers)
+
+            if is_retryable_status(status):
+                self._error_rate += EWMA_ALPHA * (1.0 - self._error_rate)
+                if status == 429 and not paused:
+                    self._pause(DEFAULT_RATE_LIMIT_PAUSE, "429")
+                self._decrease(BACKOFF_FACTOR, f"HTTP {status}")
+            elif error and status is None:
+                # Transport errors and other failures without a response
+                self._error_rate += EWMA_ALPHA * (1.0 - self._error_rate)
+                if self._error_rate > ERROR_RATE_LIMIT:
+                    self._decrease(TRIM_FACTOR, f"error rate {self._error_rate:.2f}")
+            else:
+                # Successes and client errors both say the service is keeping up
+                self._error_rate -= EWMA_ALPHA * self._error_rate
+                self._observe_latency(latency)
+
+            self._cond.notify_all()
+
+    def _observe_latency(self, latency: float) -> None:
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += EWMA_ALPHA * (latency - self._latency)
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline += BASELINE_DRIFT * (latency - self._baseline)
+
+        if self._latency > self._baseline * LATENCY_TOLERANCE:
+            self._decrease(TRIM_FACTOR, "latency above baseline")
+        elif (
+            self._error_rate <= ERROR_RATE_LIMIT
+            and (self.in_flight + 1) * 2 >= self.limit
+        ):
+            # Grow only while the limit is actually in use, or an idle
+            # pool would ratchet it up to max_limit without any evidence
+            before = self.limit
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            if self.limit != before:
+                self.increases += 1
+                self._decide("increase", "healthy")
+
+    @contextmanager
+    def slot(
+        self,
+        points: int = 1,
+        lane: Optional[str] = None,
+        consumer: Optional[str] = None,
+    ) -> Iterator[Slot]:
+        """Hold a slot for one request.
+
+        Call ``observe(status, headers)`` on the yielded Slot once the
+        response arrives; an exception escaping the block is recorded as a
+        failure. ``points``, ``lane`` and ``consumer`` go to the rate budget.
+        """
+        self.acquire(points, lane, consumer)
+        outcome = Slot()
+        start = self._clock()
+        try:
+            yield outcome
+        except BaseException as e:
+            if outcome.status is None:
+                outcome.observe_error(e)
+            else:
+                outcome.error = True
+            raise
+        finally:
+            self.release(
+                self._clock() - start,
+                status=outcome.status,
+                headers=outcome.headers,
+                error=outcome.error,
+            )
+
+    def call(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        retries: int = CALL_RETRIES,
+        **kwargs: Any,
+    ) -> T:
+        """Call ``fn`` in a slot, retrying 429s and server errors.
+
+        Retries wait for any pause the failure imposed, otherwise back off
+        exponentially. Other exceptions propagate immediately.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.slot():
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                status, _ = response_of(e)
+                if attempt >= retries or not is_retryable_status(status):
+                    raise
+            if self._paused_until <= self._clock():
+                time.sleep(RETRY_BACKOFF * (2**attempt))
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, load, latency and recent decisions."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "latency_ms": (
+                    round(self._latency * 1000, 1)
+                    if self._latency is not None
+                    else None
+                ),
+                "baseline_ms": (
+                    round(self._baseline * 1000, 1)
+                    if self._baseline is not None
+                    else None
+                ),
+                "error_rate": round(self._error_rate, 3),
+                "paused_for": round(max(0.0, self._paused_until - self._clock()), 2),
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "pauses": self.pauses,
+                "decisions": list(self.decisions),
+            }
+
+    def __repr__(self) -> str:
+        return (
+            f"ConcurrencyController({self.name!r}, limit={self.limit}, "
+            f"in_flight={self.in_flight})"
+        )
+
+
+_controllers: Dict[str, ConcurrencyController] = {}
+_controllers_lock = threading.Lock()
+
+
+def controller_for(name: str, **kwargs: Any) -> ConcurrencyController:
+    """Process-wide controller for ``name``, created with ``kwargs`` on first use."""
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            if has_budget(name):
+                kwargs.setdefault("budget_service", name)
+            controller = _controllers[name] = ConcurrencyController(name, **kwargs)
+        return controller
+
+
+def pds_host(client: Any) -> str:
+    """Host of the PDS an atproto Client sends its requests to."""
+    base_url = getattr(client, "_base_url", None)
+    return urlparse(str(base_url)).netloc.lower() if base_url else DEFAULT_PDS_HOST
+
+
+def account_did(client: Any) -> Optional[str]:
+    """DID of the account an atproto Client is logged in as, if any."""
+    did = getattr(getattr(client, "me", None), "did", None)
+    if not isinstance(did, str):
+        did = getattr(getattr(client, "_session", None), "did", None)
+    return did if isinstance(did, str) else None
+
+
+def pds_controller(client: Any) -> ConcurrencyController:
+    """Shared controller for the PDS host of atproto ``client``.
+
+    Its slots spend from the AUTHENTICATED_API budget of the account in the
+    enclosing budget_scope (see pds_call).
+    """
+    return controller_for(
+        f"{AUTHENTICATED_API}:{pds_host(client)}", budget_service=AUTHENTICATED_API
+    )
+
+
+def pds_call(client: Any, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """``pds_controller(client).call(fn, ...)``, drawing on its account budget."""
+    with budget_scope(account=account_did(client)):
+        return pds_controller(client).call(fn, *args, **kwargs)
+
+
+def concurrency_stats() -> Dict[str, Dict[str, Any]]:
+    """stats() of every shared controller, by name."""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {c.name: c.stats() for c in controllers}
+
+
+def clear_concurrency_controllers() -> None:
+    """Forget all shared controllers."""
+    with _controllers_lock:
+        _controllers.clear()
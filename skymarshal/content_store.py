@@ -0,0 +1,777 @@
+"""
+Skymarshal Content Store
+
+File Purpose: Columnar SQLite storage for a user's exported posts, likes and reposts
+Primary Functions/Classes: ContentStore, export_suffix
+Inputs and Outputs (I/O): Export dicts / ContentItems in, ``<handle>.db`` SQLite files
+    out
+
+The store holds the same data as the JSON export (see DataManager._build_export_data)
+but one row per record, with each export field in its own column. Loading can
+project only the columns a caller needs, merges upsert by URI instead of
+rewriting the whole file, and the file is a fraction of the pretty-printed JSON.
+
+Text is also indexed in an FTS5 trigram table and type, date and engagement
+columns carry regular indexes, so ContentStore.search answers SearchFilters with
+one SQL query without loading the dataset into Python.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .keyword_index import SearchTerm, parse_search_terms, term_pattern
+from .keyword_plan import keyword_plan_for
+from .models import (
+    CONTENT_TYPE_FILTERS,
+    ContentItem,
+    SearchFilters,
+    compact_raw_data,
+    to_timestamp,
+)
+from .term_matcher import TermMatcher
+
+# File suffix for each export format accepted by UserSettings.export_format
+EXPORT_SUFFIXES = {"sqlite": ".db", "cbor": ".cbor", "json": ".json"}
+
+# Export file suffixes in lookup preference order
+EXPORT_FILE_SUFFIXES = (".db", ".cbor", ".json")
+
+CATEGORIES = ("posts", "likes", "reposts")
+
+# ContentItem fields that map straight onto store columns
+ITEM_COLUMNS = (
+    "uri",
+    "cid",
+    "content_type",
+    "text",
+    "created_at",
+    "like_count",
+    "repost_count",
+    "reply_count",
+    "engagement_score",
+    "raw_data",
+)
+
+_ROW_COLUMNS = (
+    "uri",
+    "category",
+    "cid",
+    "content_type",
+    "text",
+    "created_at",
+    "like_count",
+    "repost_count",
+    "reply_count",
+    "engagement_score",
+    "subject_uri",
+    "subject_cid",
+    "self_repost",
+    "raw_data",
+    "created_ts",
+)
+
+_DEFAULT_TYPES = {"posts": "post", "likes": "like", "reposts": "repost"}
+
+# Stores already checked or migrated by this process: resolved path ->
+# ((inode, mtime_ns), has_fts), so reopening an unchanged one runs no SQL
+_ready_stores: Dict[str, Tuple[Tuple[int, int], bool]] = {}
+_ready_stores_lock = threading.Lock()
+
+
+# Texts with letters that re.IGNORECASE matches to ASCII but FTS5 doesn't fold
+# ("İ", "ı", "ſ", Kelvin "K"); a partial index keeps them cheap to include
+_FOLD_GLOB = "text GLOB '*[\u0130\u0131\u017f\u212a]*'"
+
+
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    """SQLite REGEXP implementation (``value REGEXP pattern``); re caches compiles."""
+    return value is not None and re.search(pattern, value) is not None
+
+
+@lru_cache(maxsize=16)
+def _matcher_for_key(key: str) -> TermMatcher:
+    plan = keyword_plan_for(json.loads(key))
+    # keyword_match() is only emitted for plans that have a matcher
+    assert plan is not None and plan.matcher is not None
+    return plan.matcher
+
+
+def _keyword_match(key: str, value: Optional[str]) -> bool:
+    """SQLite ``keyword_match(keywords_json, text)``: the query's TermMatcher result."""
+    return _matcher_for_key(key).passes(value)
+
+
+def _fts_phrase(text: str) -> Optional[str]:
+    """Trigram MATCH phrase for a term, or None if FTS can't narrow it.
+
+    Trigrams need three characters, and only ASCII terms fold the same way in
+    FTS5 and re.IGNORECASE.
+    """
+    if len(text) < 3 or not text.isascii():
+        return None
+    return '"' + text.replace('"', '""') + '"'
+
+
+def export_suffix(export_format: str) -> str:
+    """File suffix for an export format name, defaulting to the SQLite store."""
+    return EXPORT_SUFFIXES.get((export_format or "").lower(), ".db")
+
+
+def _category_for(content_type: Optional[str]) -> str:
+    if content_type == "like":
+        return "likes"
+    if content_type == "repost":
+        return "reposts"
+    return "posts"
+
+
+class ContentStore:
+    """SQLite-backed export file with one row per post, like or repost."""
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, db_path: Path):
+        """Open (creating if needed) the store at ``db_path``."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.has_fts = False
+        self._init_db()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.db_path.stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _init_db(self):
+        """Bring the schema up to date, once per file per process.
+
+        A store already stamped with the current schema version is only read,
+        so opening one to load or search never writes to it.
+        """
+        key = str(self.db_path.resolve())
+        with _ready_stores_lock:
+            known = _ready_stores.get(key)
+        if known is not None and known[0] == self._file_stamp():
+            self.has_fts = known[1]
+            return
+        with self._get_connection() as conn:
+            has_fts = self._current_schema(conn)
+            if has_fts is None:
+                has_fts = self._migrate(conn)
+        self.has_fts = has_fts
+        stamp = self._file_stamp()
+        if stamp is not None:
+            with _ready_stores_lock:
+                _ready_stores[key] = (stamp, has_fts)
+
+    def _current_schema(self, conn: sqlite3.Connection) -> Optional[bool]:
+        """Whether the FTS index exists if the store is at SCHEMA_VERSION, else None."""
+        try:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None  # no meta table yet
+        if row is None or row["value"] != str(self.SCHEMA_VERSION):
+            return None
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+        ).fetchone()
+        return exists is not None
+
+    def _migrate(self, conn: sqlite3.Connection) -> bool:
+        """Create or upgrade the schema; returns whether the FTS index is available."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                uri TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                cid TEXT,
+                content_type TEXT,
+                text TEXT,
+                created_at TEXT,
+                like_count INTEGER NOT NULL DEFAULT 0,
+                repost_count INTEGER NOT NULL DEFAULT 0,
+                reply_count INTEGER NOT NULL DEFAULT 0,
+                engagement_score REAL NOT NULL DEFAULT 0,
+                subject_uri TEXT,
+                subject_cid TEXT,
+                self_repost INTEGER NOT NULL DEFAULT 0,
+                raw_data TEXT,
+                created_ts INTEGER
+            )
+        """)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(items)")}
+        if "created_ts" not in columns:
+            # Version 1 stores: add and backfill the parsed timestamp column
+            conn.execute("ALTER TABLE items ADD COLUMN created_ts INTEGER")
+            conn.executemany(
+                "UPDATE items SET created_ts = ? WHERE rowid = ?",
+                [
+                    (to_timestamp(row["created_at"]), row["rowid"])
+                    for row in conn.execute("SELECT rowid, created_at FROM items")
+                ],
+            )
+        for column in (
+            "category",
+            "content_type",
+            "created_ts",
+            "like_count",
+            "repost_count",
+            "reply_count",
+        ):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_items_{column} ON items({column})"
+            )
+        has_fts = self._init_fts(conn)
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+            (str(self.SCHEMA_VERSION),),
+        )
+        conn.commit()
+        return has_fts
+
+    def _init_fts(self, conn: sqlite3.Connection) -> bool:
+        """Create the trigram full-text index over ``items.text``, if SQLite can."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+        ).fetchone()
+        if not exists:
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE items_fts USING fts5("
+                    "text, content='items', content_rowid='rowid', tokenize='trigram')"
+                )
+            except sqlite3.OperationalError:
+                # No FTS5 or trigram tokenizer (SQLite < 3.34): search scans instead
+                return False
+            conn.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_items_fold ON items(category) "
+            f"WHERE {_FOLD_GLOB}"
+        )
+        conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts(rowid, text) VALUES (new.rowid, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, text)
+                    VALUES ('delete', old.rowid, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, text)
+                    VALUES ('delete', old.rowid, old.text);
+                INSERT INTO items_fts(rowid, text) VALUES (new.rowid, new.text);
+            END;
+            """)
+        return True
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE only fires the FTS delete trigger with this on
+        conn.execute("PRAGMA recursive_triggers=ON")
+        conn.create_function("regexp", 2, _regexp, deterministic=True)
+        conn.create_function("keyword_match", 2, _keyword_match, deterministic=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Row conversion
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_from_export(category: str, record: Dict[str, Any]) -> Optional[tuple]:
+        """Flatten one export record (nested or flat engagement) into a row tuple."""
+        uri = record.get("uri")
+        if not uri:
+            return None
+        engagement = record.get("engagement") or {}
+        likes = int(engagement.get("likes", record.get("like_count", 0)) or 0)
+        reposts = int(engagement.get("reposts", record.get("repost_count", 0)) or 0)
+        replies = int(engagement.get("replies", record.get("reply_count", 0)) or 0)
+        score = float(engagement.get("score", record.get("engagement_score", 0)) or 0.0)
+        raw = record.get("raw_data")
+        return (
+            uri,
+            category,
+            record.get("cid"),
+            record.get("content_type")
+            or record.get("type")
+            or _DEFAULT_TYPES[category],
+            record.get("text"),
+            record.get("created_at"),
+            likes,
+            reposts,
+            replies,
+            score,
+            record.get("subject_uri"),
+            record.get("subject_cid"),
+            1 if record.get("self_repost") else 0,
+            json.dumps(raw, default=str) if raw is not None else None,
+            to_timestamp(record.get("created_at")),
+        )
+
+    @staticmethod
+    def _row_from_item(item: ContentItem) -> tuple:
+        raw = item.raw_data if isinstance(item.raw_data, dict) else {}
+        # Loaders fall back to the export record itself as raw_data; that is
+        # rebuilt from the columns on load, so don't store a second copy
+        stored_raw = None if raw.get("uri") == item.uri else item.raw_data
+        return (
+            item.uri,
+            _category_for(item.content_type),
+            item.cid,
+            item.content_type,
+            item.text,
+            item.created_at,
+            int(item.like_count or 0),
+            int(item.repost_count or 0),
+            int(item.reply_count or 0),
+            float(item.engagement_score or 0.0),
+            raw.get("subject_uri"),
+            raw.get("subject_cid"),
+            1 if raw.get("self_repost") else 0,
+            json.dumps(stored_raw, default=str) if stored_raw is not None else None,
+            item.created_ts,
+        )
+
+    @staticmethod
+    def _export_from_row(row: Any) -> Dict[str, Any]:
+        """Rebuild the JSON export shape of a record from its row."""
+        category = row["category"]
+        record: Dict[str, Any] = {
+            "uri": row["uri"],
+            "cid": row["cid"],
+            "type": row["content_type"],
+            "created_at": row["created_at"],
+        }
+        if category == "posts":
+            record["text"] = row["text"]
+            record["engagement"] = {
+                "likes": row["like_count"],
+                "reposts": row["repost_count"],
+                "replies": row["reply_count"],
+                "score": row["engagement_score"],
+            }
+            record["raw_data"] = (
+                json.loads(row["raw_data"]) if row["raw_data"] else None
+            )
+        else:
+            record["subject_uri"] = row["subject_uri"]
+            record["subject_cid"] = row["subject_cid"]
+            if category == "reposts":
+                record["self_repost"] = bool(row["self_repost"])
+        return record
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _write_meta(
+        self, conn: sqlite3.Connection, export_data: Dict[str, Any]
+    ) -> None:
+        for key in ("handle", "did", "export_time"):
+            if export_data.get(key) is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (key, str(export_data[key])),
+                )
+
+    def _export_rows(self, export_data: Dict[str, Any]) -> Iterable[tuple]:
+        for category in CATEGORIES:
+            for record in export_data.get(category) or []:
+                if isinstance(record, dict):
+                    row = self._row_from_export(category, record)
+                    if row is not None:
+                        yield row
+
+    def _insert(self, conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+        placeholders = ",".join("?" * len(_ROW_COLUMNS))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO items ({','.join(_ROW_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+
+    def write_export(self, export_data: Dict[str, Any]) -> None:
+        """Replace the store's contents with an export dict, in one transaction."""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM items")
+            self._write_meta(conn, export_data)
+            self._insert(conn, self._export_rows(export_data))
+            conn.commit()
+
+    def upsert_export(self, export_data: Dict[str, Any]) -> None:
+        """Merge an export dict into the store, replacing records with the same URI."""
+        with self._get_connection() as conn:
+            self._write_meta(conn, export_data)
+            self._insert(conn, self._export_rows(export_data))
+            conn.commit()
+
+    def write_items(
+        self, items: Sequence[ContentItem], replace: bool = True, **meta: Any
+    ) -> None:
+        """Store ContentItems (e.g. after hydration), optionally replacing all rows."""
+        with self._get_connection() as conn:
+            if replace:
+                conn.execute("DELETE FROM items")
+            self._write_meta(conn, meta)
+            self._insert(
+                conn, (self._row_from_item(item) for item in items if item.uri)
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def meta(self) -> Dict[str, str]:
+        """Return stored export metadata (handle, did, export_time, schema_version)."""
+        with self._get_connection() as conn:
+            return {
+                row["key"]: row["value"]
+                for row in conn.execute("SELECT key, value FROM meta")
+            }
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of stored records per content type."""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT content_type, COUNT(*) AS n FROM items GROUP BY content_type"
+            ).fetchall()
+        return {row["content_type"]: row["n"] for row in rows}
+
+    def read_export(self) -> Dict[str, Any]:
+        """Return the store as a JSON-export-shaped dict."""
+        export_data: Dict[str, Any] = {
+            key: value for key, value in self.meta().items() if key != "schema_version"
+        }
+        for category in CATEGORIES:
+            export_data[category] = []
+        with self._get_connection() as conn:
+            for row in conn.execute("SELECT * FROM items ORDER BY rowid"):
+                export_data[row["category"]].append(self._export_from_row(row))
+        return export_data
+
+    def get_record(self, uri: str) -> Optional[Dict[str, Any]]:
+        """Return one stored record in export shape, or None if absent."""
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT * FROM items WHERE uri = ?", (uri,)).fetchone()
+        return self._export_from_row(row) if row is not None else None
+
+    def load_items(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+    ) -> List[ContentItem]:
+        """Load stored records as ContentItems.
+
+        Args:
+            columns: ContentItem fields to populate (``uri``, ``cid`` and
+                ``content_type`` are always read). Unlisted fields keep their
+                defaults, so e.g. the text or raw_data of 100k records is never
+                read when it isn't needed.
+            categories: Restrict to some of ``posts``, ``likes``, ``reposts``
+
+        Returns:
+            List of ContentItem in stored order
+        """
+        wanted = set(columns or ITEM_COLUMNS) | {"uri", "cid", "content_type"}
+        unknown = wanted - set(ITEM_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown content columns: {', '.join(sorted(unknown))}")
+
+        select = [c for c in ITEM_COLUMNS if c in wanted and c != "raw_data"]
+        if "raw_data" in wanted:
+            # Without stored raw_data, like/repost subject fields come from columns
+            select = list(_ROW_COLUMNS)
+        sql = f"SELECT {', '.join(select)} FROM items"
+        params: List[str] = []
+        if categories is not None:
+            cats = [c for c in categories if c in CATEGORIES]
+            if not cats:
+                return []
+            sql += f" WHERE category IN ({','.join('?' * len(cats))})"
+            params = cats
+        sql += " ORDER BY rowid"
+
+        with self._get_connection() as conn:
+            # Plain tuples are much cheaper than sqlite3.Row for bulk loads
+            conn.row_factory = None
+            return self._items_from_rows(conn.execute(sql, params), select, wanted)
+
+    def _items_from_rows(
+        self,
+        rows: Iterable[Sequence[Any]],
+        select: Sequence[str],
+        wanted: Optional[Iterable[str]] = None,
+    ) -> List[ContentItem]:
+        """Build ContentItems from row tuples whose leading columns are ``select``."""
+        wanted = set(ITEM_COLUMNS if wanted is None else wanted)
+        has_counts = {"like_count", "repost_count", "reply_count"} <= wanted
+        field_names = [c for c in select if c in ITEM_COLUMNS and c != "raw_data"]
+        positions = [select.index(c) for c in field_names]
+        raw_pos: Optional[int] = None
+        category_pos = 0
+        if "raw_data" in wanted:
+            raw_pos = select.index("raw_data")
+            category_pos = select.index("category")
+        loader = self.get_record
+        items: List[ContentItem] = []
+        for row in rows:
+            item = ContentItem(
+                **dict(zip(field_names, [row[i] for i in positions])),
+                record_loader=loader,
+            )
+            if raw_pos is not None:
+                raw = row[raw_pos]
+                if raw:
+                    item.raw_data = compact_raw_data(json.loads(raw))
+                elif row[category_pos] != "posts":
+                    item.raw_data = compact_raw_data(
+                        self._export_from_row(dict(zip(select, row)))
+                    )
+            if has_counts:
+                item.update_engagement_score()
+            items.append(item)
+        return items
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _keyword_clauses(self, keywords: Sequence[str]) -> Tuple[List[str], List[Any]]:
+        """SQL conditions for the keyword operators understood by SearchManager."""
+        positive, negative, required = parse_search_terms(keywords)
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        def regex_param(term: SearchTerm) -> str:
+            pattern, flags = term_pattern(term)
+            return f"(?i){pattern}" if flags & re.IGNORECASE else pattern
+
+        # Narrow through the trigram index first; REGEXP then checks exact semantics
+        if self.has_fts:
+            match_parts = [p for p in (_fts_phrase(t[1]) for t in required) if p]
+            positive_phrases = [p for p in (_fts_phrase(t[1]) for t in positive) if p]
+            if positive_phrases and len(positive_phrases) == len(positive):
+                match_parts.append("(" + " OR ".join(positive_phrases) + ")")
+            if match_parts:
+                clauses.append(
+                    "(rowid IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?) "
+                    f"OR rowid IN (SELECT rowid FROM items WHERE {_FOLD_GLOB}))"
+                )
+                params.append(" AND ".join(match_parts))
+
+        plan = keyword_plan_for(keywords)
+        if plan is not None and plan.matcher is not None:
+            # One automaton pass per row instead of a REGEXP per term
+            clauses.append("keyword_match(?, text)")
+            params.append(json.dumps(list(keywords)))
+            return clauses, params
+
+        for term in required:
+            clauses.append("text REGEXP ?")
+            params.append(regex_param(term))
+        if positive:
+            clauses.append("(" + " OR ".join("text REGEXP ?" for _ in positive) + ")")
+            params.extend(regex_param(term) for term in positive)
+        for term in negative:
+            clauses.append("NOT coalesce(text REGEXP ?, 0)")
+            params.append(regex_param(term))
+        return clauses, params
+
+    def search(
+        self,
+        filters: SearchFilters,
+        *,
+        content_types: Optional[Iterable[str]] = None,
+        exclude_empty: bool = False,
+        use_subject_engagement: bool = True,
+        newest_first: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[Tuple[Optional[int], str]] = None,
+        total: Optional[int] = None,
+    ) -> Tuple[List[ContentItem], int]:
+        """Answer a SearchFilters query with one SQL statement.
+
+        Results match SearchManager.search_content_with_filters over the same
+        records, without loading the dataset into memory.
+
+        Args:
+            filters: Keywords, engagement ranges, dates, content type, subject URI
+            content_types: Additionally restrict to these ``content_type`` values
+            exclude_empty: Drop records with neither text nor any engagement
+            use_subject_engagement: Judge reposts by their subject's counts
+            newest_first: Sort order by ``created_at``
+            limit: Maximum number of items to return (None for all)
+            offset: Number of matching items to skip
+            after: ``(created_ts, uri)`` of the last item of the previous
+                page; results resume right after it without scanning the
+                skipped rows (``offset`` then counts from there)
+            total: Match count already known from an earlier page; skips
+                the count query
+
+        Returns:
+            (items, total number of matches)
+
+        Raises:
+            ValueError: ``subject_handle_contains`` is set; it needs handle
+                resolution and only the in-memory search supports it
+        """
+        if filters.subject_handle_contains:
+            raise ValueError("subject_handle_contains requires in-memory search")
+
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if filters.keywords:
+            keyword_clauses, keyword_params = self._keyword_clauses(filters.keywords)
+            clauses += keyword_clauses
+            params += keyword_params
+
+        sd_ts, ed_ts = filters.timestamp_range()
+        if sd_ts is not None:
+            clauses.append("created_ts >= ?")
+            params.append(sd_ts)
+        if ed_ts is not None:
+            clauses.append("created_ts <= ?")
+            params.append(ed_ts)
+
+        if use_subject_engagement:
+            likes, reposts, replies = (
+                f"(CASE WHEN content_type = 'repost' THEN "
+                "coalesce(CAST(json_extract(raw_data, "
+                f"'$.subject_{name}_count') AS INTEGER), 0) "
+                f"ELSE {name}_count END)"
+                for name in ("like", "repost", "reply")
+            )
+        else:
+            likes, reposts, replies = "like_count", "repost_count", "reply_count"
+        engagement = f"({likes} + 2 * {reposts} + 2.5 * {replies})"
+        for expr, low, high in (
+            (engagement, filters.min_engagement, filters.max_engagement),
+            (likes, filters.min_likes, filters.max_likes),
+            (reposts, filters.min_reposts, filters.max_reposts),
+            (replies, filters.min_replies, filters.max_replies),
+        ):
+            clauses.append(f"{expr} BETWEEN ? AND ?")
+            params += [low, high]
+
+        type_sets = []
+        if filters.content_type in CONTENT_TYPE_FILTERS:
+            type_sets.append(set(CONTENT_TYPE_FILTERS[filters.content_type]))
+        desired = {ct.lower() for ct in content_types or () if ct}
+        if desired:
+            type_sets.append(desired)
+        if type_sets:
+            types = sorted(set.intersection(*type_sets))
+            if not types:
+                return [], 0
+            clauses.append(f"lower(content_type) IN ({','.join('?' * len(types))})")
+            params += types
+
+        if filters.subject_contains:
+            clauses.append(
+                "(content_type NOT IN ('like', 'repost') "
+                "OR instr(lower(subject_uri), ?) > 0)"
+            )
+            params.append(filters.subject_contains.lower())
+
+        if exclude_empty:
+            clauses.append(
+                "(coalesce(text, '') != '' OR like_count > 0 OR repost_count > 0 "
+                "OR reply_count > 0)"
+            )
+
+        select = list(_ROW_COLUMNS)
+        where = " AND ".join(clauses) or "1"
+        # SQLite sorts NULL lowest, like models.TS_MIN; equal timestamps keep
+        # insertion order as the stable in-memory sort does
+        order = "DESC" if newest_first else "ASC"
+        page_where, page_params = where, list(params)
+        if after is not None:
+            keyset, keyset_params = self._keyset_clause(after, newest_first)
+            page_where = f"{where} AND {keyset}"
+            page_params += keyset_params
+        sql = (
+            f"SELECT {', '.join(select)} FROM items WHERE {page_where} "
+            f"ORDER BY created_ts {order}, rowid"
+        )
+        paged = limit is not None or offset > 0
+        if paged:
+            sql += " LIMIT ? OFFSET ?"
+
+        with self._get_connection() as conn:
+            conn.row_factory = None
+            if not paged:
+                rows = conn.execute(sql, page_params).fetchall()
+                if total is None:
+                    total = len(rows)
+            else:
+                limit = -1 if limit is None else max(0, limit)
+                offset = max(0, offset)
+                rows = conn.execute(sql, page_params + [limit, offset]).fetchall()
+                if total is not None:
+                    pass
+                elif after is None and rows and len(rows) < limit:
+                    total = offset + len(rows)
+                else:
+                    # A separate count lets the page itself stop early via the
+                    # created_ts index
+                    total = conn.execute(
+                        f"SELECT count(*) FROM items WHERE {where}", params
+                    ).fetchone()[0]
+        return self._items_from_rows(rows, select), total
+
+    @staticmethod
+    def _keyset_clause(
+        after: Tuple[Optional[int], str], newest_first: bool
+    ) -> Tuple[str, List[Any]]:
+        """WHERE clause for rows sorting after ``(created_ts, uri)``.
+
+        Mirrors ``ORDER BY created_ts, rowid`` with NULL (undated) lowest.
+        If the URI was deleted meanwhile, rows tied on its timestamp are
+        skipped rather than repeated.
+        """
+        ts, uri = after
+        tie = "rowid > coalesce((SELECT rowid FROM items WHERE uri = ?), 1 << 62)"
+        if ts is None:
+            if newest_first:
+                return f"(created_ts IS NULL AND {tie})", [uri]
+            return f"(created_ts IS NOT NULL OR {tie})", [uri]
+        beyond = "<" if newest_first else ">"
+        clause = f"(created_ts {beyond} ? OR (created_ts = ? AND {tie})"
+        if newest_first:
+            clause += " OR created_ts IS NULL"
+        return clause + ")", [ts, ts, uri]
+
+    def delete_uris(self, uris: Iterable[str]) -> int:
+        """Remove records by URI (e.g. after deleting them on Bluesky)."""
+        with self._get_connection() as conn:
+            cursor = conn.executemany(
+                "DELETE FROM items WHERE uri = ?", [(u,) for u in uris]
+            )
+            conn.commit()
+            deleted: int = cursor.rowcount
+            return deleted
@@ -9,44 +9,50 @@ This module manages all data-related operations including downloading from Blues
 importing/exporting backup files, data processing, and refreshing engagement info.
 """
 
+import contextvars
 import json
 import os
+import shutil
+import threading
 import time
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial, wraps
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from atproto import Client
-from atproto_core.car import CAR
-
-try:
-    # Try new libipld-based approach first (atproto >= 0.0.26)
-    from libipld import decode_dag_cbor
-
-    cbor_decode = decode_dag_cbor
-except ImportError:
-    try:
-        # Fallback to older atproto_core.cbor approach
-        from atproto_core import cbor as at_cbor
-
-        cbor_decode = at_cbor.loads
-    except (ImportError, AttributeError):
-        try:
-            # Last resort: standard cbor2 library
-            import cbor2
-
-            cbor_decode = cbor2.loads
-        except ImportError:
-            cbor_decode = None
 from contextlib import contextmanager
 
 from rich.progress import SpinnerColumn, TextColumn
 from rich.prompt import Prompt
 
 from .auth import AuthManager
+from .car_cache import ParsedCarCache
+from .cbor_export import normalize_export_data
+from .content_store import EXPORT_FILE_SUFFIXES, ContentStore, export_suffix
+from .car_reader import (
+    PARALLEL_DECODE_MIN_RECORDS,
+    RECORD_COLLECTIONS,
+    CarIndex,
+    CarReader,
+    car_quick_stats,
+    cbor_decode,
+    compact_record,
+    decode_entries,
+    decode_entries_parallel,
+    decode_mst_entries,
+    is_commit,
+    is_mst_node,
+)
 from .models import safe_progress
 from .engagement_cache import EngagementCache
+from .export_segments import SegmentedExport
+from .concurrency import pds_call, pds_controller
+from .query_cache import emptiness_flipped, mark_data_changed
+from .rate_budget import BACKGROUND, budget_scope
+from .hydration import hydrate_post_counts
 from .exceptions import (
     APIError,
     DataError,
@@ -59,12 +65,38 @@ from .models import (
     ContentItem,
     UserSettings,
     calculate_engagement_score,
+    compact_raw_data,
     console,
+    created_sort_key,
     merge_content_items,
-    parse_datetime,
+    to_timestamp,
+    US_PER_DAY,
 )
 
 
+# JSON/CBOR exports whose URI -> record index is kept for full_record lookups
+RECORD_INDEX_CACHE_SIZE = 2
+
+
+def _background_api_work(method):
+    """Run a bulk DataManager method's API calls in the background lane.
+
+    Draws are made as the logged-in user, so one user's download or
+    hydration can't take the rate-limit reserve kept for interactive requests.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with budget_scope(
+            BACKGROUND,
+            consumer=getattr(self.auth, "current_handle", None),
+            account=getattr(self.auth, "current_did", None),
+        ):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class DataManager:
     """Manages data operations and file handling."""
 
@@ -86,10 +118,21 @@ class DataManager:
         cache_path = skymarshal_dir / "engagement_cache.db"
         self.engagement_cache = EngagementCache(cache_path)
 
+        # Decoded CAR records, keyed by repo root so repeat imports skip decoding
+        self.car_cache = ParsedCarCache(skymarshal_dir / "car_cache")
+
+        # Background compactions of segmented exports, by export path
+        self._compactions: Dict[Path, Any] = {}
+
+        # URI -> record per JSON/CBOR export, keyed by resolved path and
+        # stamped with the file and segment state it was built from
+        self._record_indexes: "OrderedDict[str, Tuple[Tuple, Dict[str, Dict[str, Any]]]]" = OrderedDict()
+        self._record_indexes_lock = threading.Lock()
+
     def _resolve_handle_to_did(self, handle: str) -> Optional[str]:
         """Resolve a handle to a DID, with fallback methods."""
         try:
-            profile = self.auth.client.get_profile(handle)
+            profile = pds_call(self.auth.client, self.auth.client.get_profile, handle)
             return profile.did
         except Exception as e:
             try:
@@ -116,6 +159,7 @@ class DataManager:
         ) as progress:
             yield progress
 
+    @_background_api_work
     def export_user_data(
         self,
         handle: str,
@@ -170,10 +214,14 @@ class DataManager:
                 def collect(parallel: bool):
                     local_results = {}
                     if parallel and len(ordered_cats) > 1:
-                        worker_count = min(self.settings.category_workers, len(ordered_cats)) or 1
+                        # The PDS controller decides how many listings run at once
+                        controller = pds_controller(self.auth.client)
+                        worker_count = min(controller.max_limit, len(ordered_cats))
                         with ThreadPoolExecutor(max_workers=worker_count) as pool:
                             futs = {
-                                cat: pool.submit(run_fetch, cat) for cat in ordered_cats
+                                # Each worker keeps this thread's budget scope
+                                cat: pool.submit(contextvars.copy_context().run, run_fetch, cat)
+                                for cat in ordered_cats
                             }
                             for cat in ordered_cats:
                                 local_results[cat] = futs[cat].result()
@@ -240,14 +288,11 @@ class DataManager:
             export_data = self._build_export_data(
                 handle, did, posts, likes, reposts, cats
             )
-            export_path = self.json_dir / f"{handle.replace('.', '_')}.json"
-
-            if export_path.exists() and not replace_existing:
-                export_data = self._merge_with_existing(export_path, export_data)
+            export_path = self.export_path_for(handle)
+            self.save_export(
+                export_path, export_data, merge=not replace_existing, primary=True
+            )
 
-            with open(export_path, "w") as f:
-                json.dump(export_data, f, indent=2)
-            
             total_items = len(posts) + len(likes) + len(reposts)
             console.print(f"[green]✓[/] Saved {total_items} items to [cyan]{export_path.name}[/]")
 
@@ -259,6 +304,7 @@ class DataManager:
             )
             return None
 
+    @_background_api_work
     def download_backup(self, handle: str) -> Optional[Path]:
         """Download backup file for a handle and save under ~/.skymarshal/backups."""
         if not self.auth.client:
@@ -271,7 +317,9 @@ class DataManager:
         with console.status("Fetching backup file..."):
             try:
                 resp = self.auth.call_with_reauth(
-                    lambda: self.auth.client.com.atproto.sync.get_repo({"did": did})
+                    lambda: pds_call(
+                        self.auth.client, self.auth.client.com.atproto.sync.get_repo, {"did": did}
+                    )
                 )
                 data = (
                     getattr(resp, "body", None) or getattr(resp, "bytes", None) or resp
@@ -295,6 +343,7 @@ class DataManager:
                 console.print(f"Backup download failed: {e}")
                 return None
 
+    @_background_api_work
     def create_timestamped_backup(self, handle: str) -> Optional[Path]:
         """Download backup file and save with a timestamped filename."""
         if not self.auth.client:
@@ -307,7 +356,9 @@ class DataManager:
         with console.status("Fetching backup file..."):
             try:
                 resp = self.auth.call_with_reauth(
-                    lambda: self.auth.client.com.atproto.sync.get_repo({"did": did})
+                    lambda: pds_call(
+                        self.auth.client, self.auth.client.com.atproto.sync.get_repo, {"did": did}
+                    )
                 )
                 data = (
                     getattr(resp, "body", None) or getattr(resp, "bytes", None) or resp
@@ -341,6 +392,7 @@ class DataManager:
         """Import CAR file replacing existing data - alias for import_backup_replace for compatibility."""
         return self.import_backup_replace(car_path, handle, categories)
 
+    @_background_api_work
     def create_timestamped_backup_with_progress(self, handle: str, progress_callback=None) -> Optional[Path]:
         """Download backup file with progress tracking."""
         if not self.auth.client:
@@ -353,7 +405,9 @@ class DataManager:
         try:
             # Make the API request
             resp = self.auth.call_with_reauth(
-                lambda: self.auth.client.com.atproto.sync.get_repo({"did": did})
+                lambda: pds_call(
+                    self.auth.client, self.auth.client.com.atproto.sync.get_repo, {"did": did}
+                )
             )
             
             # Get response data
@@ -410,23 +464,21 @@ class DataManager:
             console.print(f"Backup failed: {e}")
             return None
 
+    @_background_api_work
     def import_backup_merge(
         self,
         backup_path: Path,
         handle: Optional[str] = None,
         categories: Optional[set] = None,
+        progress_callback=None,
     ) -> Optional[Path]:
         """Import records from a backup file, merge/dedupe into the handle's data export."""
         try:
-            data = Path(backup_path).read_bytes()
-            car = CAR.from_bytes(data)
+            did, records = self._scan_backup(backup_path, categories, progress_callback)
         except Exception as e:
             console.print(f"Failed to read backup: {e}")
             return None
 
-        decoded = self._decode_car_blocks(car)
-        cid_to_path, did = self._extract_backup_metadata(decoded)
-
         if not did:
             # Try to get DID from auth or prompt user
             did = self.auth.current_did
@@ -434,7 +486,7 @@ class DataManager:
                 # Try to resolve DID from handle
                 try:
                     if self.auth.client:
-                        profile = self.auth.client.get_profile(handle)
+                        profile = pds_call(self.auth.client, self.auth.client.get_profile, handle)
                         did = profile.did
                 except Exception:
                     pass
@@ -447,46 +499,13 @@ class DataManager:
 
         if not handle:
             try:
-                prof = self.auth.client.get_profile(did)
+                prof = pds_call(self.auth.client, self.auth.client.get_profile, did)
                 handle = getattr(prof, "handle", None)
             except Exception:
                 handle = did.replace(":", "_")
 
-        safe_name = (handle or "unknown").replace(".", "_")
-        posts, likes, reposts = self._process_backup_records(
-            decoded, cid_to_path, did, handle
-        )
-
-        # If authenticated, hydrate post engagement now so JSON persists counts
-        try:
-            if self.auth.is_authenticated() and posts:
-                temp_items = [
-                    ContentItem(
-                        uri=p.get("uri"),
-                        cid=p.get("cid"),
-                        content_type=p.get("type"),
-                        text=p.get("text"),
-                        created_at=p.get("created_at"),
-                        like_count=0,
-                        repost_count=0,
-                        reply_count=0,
-                        engagement_score=0,
-                        raw_data=None,
-                    )
-                    for p in posts
-                ]
-                self._hydrate_post_engagement(temp_items)
-                for i, it in enumerate(temp_items):
-                    if i < len(posts):
-                        posts[i]["engagement"] = {
-                            "likes": int(it.like_count or 0),
-                            "reposts": int(it.repost_count or 0),
-                            "replies": int(it.reply_count or 0),
-                            "score": float(it.engagement_score or 0.0),
-                        }
-        except Exception:
-            # Best-effort; leave zeros if hydration fails here
-            pass
+        posts, likes, reposts = self._process_backup_records(records, did, handle)
+        self._hydrate_backup_posts(posts)
 
         # Determine which categories to include (CAR paths work with dicts, not ContentItem)
         cats = categories or {"posts", "likes", "reposts"}
@@ -499,14 +518,10 @@ class DataManager:
             "reposts": reposts if "reposts" in cats else [],
         }
 
-        out = self.json_dir / f"{safe_name}.json"
+        out = self.export_path_for(handle or "unknown")
 
         try:
-            if out.exists():
-                export_data = self._merge_backup_with_existing(out, export_data)
-
-            with open(out, "w") as f:
-                json.dump(export_data, f, indent=2)
+            self.save_export(out, export_data, merge=True, primary=True)
 
             console.print(f"Imported and merged backup into {out}")
             return out
@@ -515,29 +530,27 @@ class DataManager:
             console.print(f"Failed to merge backup: {e}")
             return None
 
+    @_background_api_work
     def import_backup_replace(
         self,
         backup_path: Path,
         handle: Optional[str] = None,
         categories: Optional[set] = None,
+        progress_callback=None,
     ) -> Optional[Path]:
         """Import records from a backup and REPLACE the handle's data export (no merge)."""
         try:
-            data = Path(backup_path).read_bytes()
-            car = CAR.from_bytes(data)
+            did, records = self._scan_backup(backup_path, categories, progress_callback)
         except Exception as e:
             console.print(f"Failed to read backup: {e}")
             return None
 
-        decoded = self._decode_car_blocks(car)
-        cid_to_path, did = self._extract_backup_metadata(decoded)
-
         if not did:
             # Try to use current session DID or resolve from handle
             did = self.auth.current_did
             if not did and handle and self.auth.client:
                 try:
-                    prof = self.auth.client.get_profile(handle)
+                    prof = pds_call(self.auth.client, self.auth.client.get_profile, handle)
                     did = getattr(prof, "did", None)
                 except Exception:
                     did = None
@@ -547,17 +560,37 @@ class DataManager:
 
         if not handle:
             try:
-                prof = self.auth.client.get_profile(did)
+                prof = pds_call(self.auth.client, self.auth.client.get_profile, did)
                 handle = getattr(prof, "handle", None)
             except Exception:
                 handle = did.replace(":", "_")
 
-        safe_name = (handle or "unknown").replace(".", "_")
-        posts, likes, reposts = self._process_backup_records(
-            decoded, cid_to_path, did, handle
-        )
+        posts, likes, reposts = self._process_backup_records(records, did, handle)
+        self._hydrate_backup_posts(posts)
+
+        # Determine which categories to include (CAR paths work with dicts, not ContentItem)
+        cats = categories or {"posts", "likes", "reposts"}
+        export_data = {
+            "handle": handle,
+            "did": did,
+            "export_time": datetime.now().isoformat(),
+            "posts": posts if "posts" in cats else [],
+            "likes": likes if "likes" in cats else [],
+            "reposts": reposts if "reposts" in cats else [],
+        }
+
+        out = self.export_path_for(handle or "unknown")
 
-        # If authenticated, hydrate post engagement now so JSON persists counts
+        try:
+            self.save_export(out, export_data, primary=True)
+            console.print(f"Imported backup and replaced {out}")
+            return out
+        except Exception as e:
+            console.print(f"Failed to write data: {e}")
+            return None
+
+    def _hydrate_backup_posts(self, posts: List[Dict[str, Any]]) -> None:
+        """If authenticated, hydrate post engagement now so the export persists counts."""
         try:
             if self.auth.is_authenticated() and posts:
                 temp_items = [
@@ -588,86 +621,212 @@ class DataManager:
             # Best-effort; leave zeros if hydration fails here
             pass
 
-        # Determine which categories to include (CAR paths work with dicts, not ContentItem)
-        cats = categories or {"posts", "likes", "reposts"}
-        export_data = {
-            "handle": handle,
-            "did": did,
-            "export_time": datetime.now().isoformat(),
-            "posts": posts if "posts" in cats else [],
-            "likes": likes if "likes" in cats else [],
-            "reposts": reposts if "reposts" in cats else [],
-        }
-
-        out = self.json_dir / f"{safe_name}.json"
+    def export_path_for(self, handle: str, export_format: Optional[str] = None) -> Path:
+        """Path of the primary export for ``handle`` in the configured export format."""
+        fmt = export_format or getattr(self.settings, "export_format", "sqlite")
+        return self.json_dir / f"{handle.replace('.', '_')}{export_suffix(fmt)}"
 
+    def save_export(
+        self,
+        export_path: Path,
+        export_data: Dict[str, Any],
+        merge: bool = False,
+        primary: bool = False,
+    ) -> None:
+        """Write an export dict in the format implied by ``export_path``'s suffix.
+
+        With ``merge``, records are combined with the existing export by URI (new
+        records win). SQLite stores upsert in place. JSON and CBOR exports get the
+        new records as an append-only segment (see SegmentedExport), which a
+        background compaction later folds into the base file. A new export is
+        seeded from a same-name export in another format (e.g. a legacy JSON
+        export) so switching formats doesn't lose earlier data.
+
+        With ``primary`` (``export_path`` is the handle's export_path_for), the
+        same-name exports in other formats are removed afterwards, so the handle
+        is left with exactly one export.
+        """
+        export_path = Path(export_path)
+        others = self._other_format_exports(export_path)
+        seed_from = (
+            next((p for p in others if p.exists()), None)
+            if merge and not export_path.exists()
+            else None
+        )
+        self._write_export(export_path, export_data, merge, seed_from)
+        if primary:
+            for other in others:
+                self._remove_export(other)
+
+    @staticmethod
+    def _other_format_exports(export_path: Path) -> List[Path]:
+        """Same-name export paths in the other formats, in lookup preference order."""
+        return [
+            export_path.with_suffix(suffix)
+            for suffix in EXPORT_FILE_SUFFIXES
+            if suffix != export_path.suffix
+        ]
+
+    def _remove_export(self, export_path: Path) -> None:
+        """Delete an export file and any pending merge segments of it."""
+        pending = self._compactions.pop(export_path, None)
+        if pending is not None:
+            pending.join()
+        segments = SegmentedExport(export_path).segment_dir
+        if segments.exists():
+            shutil.rmtree(segments, ignore_errors=True)
         try:
-            with open(out, "w") as f:
-                json.dump(export_data, f, indent=2)
-            console.print(f"Imported backup and replaced {out}")
-            return out
-        except Exception as e:
-            console.print(f"Failed to write data: {e}")
-            return None
+            export_path.unlink()
+        except FileNotFoundError:
+            pass
 
-    def load_exported_data(self, export_path: Path) -> List[ContentItem]:
-        """Load data from export file."""
-        with open(export_path, "r") as f:
-            raw_data = json.load(f)
-
-        # Normalize historical export formats
-        if isinstance(raw_data, list):
-            # Flat array format - process all items directly
-            all_items = raw_data
-        elif isinstance(raw_data, dict):
-            # Structured format with separate sections
-            if "posts" not in raw_data and isinstance(raw_data.get("data"), dict):
-                data = raw_data["data"]
+    def _write_export(
+        self,
+        export_path: Path,
+        export_data: Dict[str, Any],
+        merge: bool,
+        seed_from: Optional[Path],
+    ) -> None:
+        """save_export() body: write or merge into ``export_path``, seeding once."""
+        if export_path.suffix == ".db":
+            store = ContentStore(export_path)
+            if seed_from:
+                store.write_export(normalize_export_data(self.read_export(seed_from)))
+            if merge:
+                store.upsert_export(export_data)
             else:
-                data = raw_data
-
-            def _coerce_list(value: Any) -> List[Dict[str, Any]]:
-                if value is None:
-                    return []
-                if isinstance(value, list):
-                    return value
-                if isinstance(value, dict):
-                    return list(value.values())
-                return []
-
-            posts_section = _coerce_list(
-                data.get("posts")
-                or data.get("processed_posts")
-                or data.get("primary_items")
-            )
-            likes_section = _coerce_list(data.get("likes") or data.get("processed_likes"))
-            reposts_section = _coerce_list(
-                data.get("reposts") or data.get("processed_reposts")
-            )
-            
-            # Combine all sections
-            all_items = posts_section + likes_section + reposts_section
+                store.write_export(export_data)
+            return
+
+        segmented = SegmentedExport(export_path, self.settings.fetch_order)
+        if seed_from:
+            segmented.write(self._merge_with_existing(seed_from, export_data))
+        elif merge and export_path.exists():
+            segmented.append(export_data)
+            if segmented.needs_compaction():
+                self._compactions[export_path] = segmented.compact_in_background()
         else:
-            all_items = []
+            segmented.write(export_data)
+
+    def compact_export(self, export_path: Path) -> int:
+        """Fold pending merge segments into a JSON/CBOR export now.
+
+        Returns:
+            Number of segments merged
+        """
+        export_path = Path(export_path)
+        pending = self._compactions.pop(export_path, None)
+        if pending is not None:
+            pending.join()
+        if export_path.suffix == ".db":
+            return 0
+        return SegmentedExport(export_path, self.settings.fetch_order).compact()
 
+    def read_export(self, export_path: Path) -> Any:
+        """Read an export file as its JSON structure.
+
+        SQLite and CBOR exports are converted, and pending merge segments are
+        applied, so callers always see the current data.
+        """
+        export_path = Path(export_path)
+        if export_path.suffix == ".db":
+            return ContentStore(export_path).read_export()
+        return SegmentedExport(export_path, self.settings.fetch_order).read()
+
+    def convert_export(self, source: Path, target: Path) -> Path:
+        """Convert an export between formats (by suffix), normalizing legacy layouts once.
+
+        Typical use is turning an old ``.json`` export into ``.cbor`` or ``.db`` so
+        later loads skip JSON parsing and format normalization entirely.
+        """
+        export_data = normalize_export_data(self.read_export(source))
+        self.save_export(Path(target), export_data)
+        return Path(target)
+
+    def save_items(self, export_path: Path, items: List[ContentItem]) -> None:
+        """Persist ContentItems (e.g. after hydration) to an export file."""
+        export_path = Path(export_path)
+        if export_path.suffix == ".db":
+            ContentStore(export_path).write_items(items)
+            return
+        if export_path.suffix == ".cbor":
+            meta = {}
+            if export_path.exists():
+                try:
+                    meta = self.read_export(export_path)
+                except Exception:
+                    meta = {}
+            by_type = {"like": [], "repost": []}
+            posts = []
+            for item in items:
+                by_type.get(item.content_type, posts).append(item)
+            export_data = self._build_export_data(
+                meta.get("handle"),
+                meta.get("did"),
+                posts,
+                by_type["like"],
+                by_type["repost"],
+                {"posts", "likes", "reposts"},
+            )
+            SegmentedExport(export_path, self.settings.fetch_order).write(export_data)
+            return
+        data = [
+            {
+                "uri": item.uri,
+                "cid": item.cid,
+                "content_type": item.content_type,
+                "text": item.text,
+                "created_at": item.created_at,
+                "like_count": item.like_count,
+                "repost_count": item.repost_count,
+                "reply_count": item.reply_count,
+                "engagement_score": item.engagement_score,
+                "raw_data": item.raw_data,
+            }
+            for item in items
+        ]
+        SegmentedExport(export_path, self.settings.fetch_order).write(data)
+
+    def load_exported_data(
+        self, export_path: Path, columns: Optional[List[str]] = None
+    ) -> List[ContentItem]:
+        """Load data from export file.
+
+        Args:
+            export_path: ``.db`` content store, ``.cbor`` binary export or JSON export
+            columns: ContentItem fields to read; only honoured by content stores,
+                where unlisted columns are never loaded
+        """
+        suffix = Path(export_path).suffix
+        if suffix == ".db":
+            return ContentStore(export_path).load_items(columns)
+
+        # Pending merge segments are applied by read_export
+        data = self.read_export(export_path)
+        if suffix != ".cbor":
+            # Normalize historical export formats (binary exports are written normalized)
+            data = normalize_export_data(data)
+
+        all_items = data["posts"] + data["likes"] + data["reposts"]
         content_items: List[ContentItem] = []
+        # One shared loader; items keep only the raw_data fields callers read
+        loader = partial(self.get_export_record, Path(export_path))
 
         for post_data in all_items:
-            if not isinstance(post_data, dict):
-                continue
-
+            # Nested engagement (CLI exports) or flat counts (web exports)
             engagement = post_data.get("engagement") or {}
             content_item = ContentItem(
                 uri=post_data.get("uri"),
                 cid=post_data.get("cid"),
-                content_type=post_data.get("content_type", "post"),
+                content_type=post_data.get("content_type") or post_data.get("type") or "post",
                 text=post_data.get("text"),
                 created_at=post_data.get("created_at"),
-                like_count=int((engagement or {}).get("likes", 0) or 0),
-                repost_count=int((engagement or {}).get("reposts", 0) or 0),
-                reply_count=int((engagement or {}).get("replies", 0) or 0),
-                engagement_score=float((engagement or {}).get("score", 0) or 0.0),
-                raw_data=post_data.get("raw_data") or post_data,
+                like_count=int(engagement.get("likes", post_data.get("like_count", 0)) or 0),
+                repost_count=int(engagement.get("reposts", post_data.get("repost_count", 0)) or 0),
+                reply_count=int(engagement.get("replies", post_data.get("reply_count", 0)) or 0),
+                engagement_score=float(engagement.get("score", 0) or 0.0),
+                raw_data=compact_raw_data(post_data.get("raw_data") or post_data),
+                record_loader=loader,
             )
             # Always recalculate engagement score to ensure consistency
             content_item.update_engagement_score()
@@ -724,6 +883,44 @@ class DataManager:
 
         return content_items
 
+    def get_export_record(self, export_path: Path, uri: str) -> Optional[Dict[str, Any]]:
+        """Read one record from an export file by URI (backs ContentItem.full_record)."""
+        export_path = Path(export_path)
+        if not export_path.exists():
+            return None
+        if export_path.suffix == ".db":
+            return ContentStore(export_path).get_record(uri)
+        return self._record_index(export_path).get(uri)
+
+    def _record_index(self, export_path: Path) -> Dict[str, Dict[str, Any]]:
+        """URI -> record for a JSON/CBOR export, read once per version of the file.
+
+        The stamp covers the base file and its pending segments, so any
+        write, merge or compaction rebuilds the index on next use.
+        """
+        stat = export_path.stat()
+        segments = SegmentedExport(export_path).segments()
+        stamp = (stat.st_mtime_ns, stat.st_size, tuple(s.name for s in segments))
+        key = str(export_path.resolve())
+        with self._record_indexes_lock:
+            cached = self._record_indexes.get(key)
+            if cached is not None and cached[0] == stamp:
+                self._record_indexes.move_to_end(key)
+                return cached[1]
+
+        data = normalize_export_data(self.read_export(export_path))
+        index: Dict[str, Dict[str, Any]] = {}
+        for category in ("posts", "likes", "reposts"):
+            for record in data[category]:
+                if isinstance(record, dict) and record.get("uri"):
+                    index.setdefault(record["uri"], record)
+        with self._record_indexes_lock:
+            self._record_indexes[key] = (stamp, index)
+            self._record_indexes.move_to_end(key)
+            while len(self._record_indexes) > RECORD_INDEX_CACHE_SIZE:
+                self._record_indexes.popitem(last=False)
+        return index
+
     def get_user_files(self, handle: str, file_type: str = "json") -> List[Path]:
         """Get files belonging to a specific user handle."""
         if not handle:
@@ -742,9 +939,15 @@ class DataManager:
 
         # Find files that match the user's handle
         user_files = []
-        for file_path in directory.glob("*.json" if file_type == "json" else "*.car"):
-            if self._file_belongs_to_user(file_path, handle):
-                user_files.append(file_path)
+        globs = (
+            tuple(f"*{suffix}" for suffix in EXPORT_FILE_SUFFIXES)
+            if file_type == "json"
+            else ("*.car",)
+        )
+        for glob_pattern in globs:
+            for file_path in directory.glob(glob_pattern):
+                if self._file_belongs_to_user(file_path, handle):
+                    user_files.append(file_path)
 
         return sorted(user_files)
 
@@ -774,6 +977,15 @@ class DataManager:
                     )
             except Exception:
                 pass
+        elif file_path.suffix in (".db", ".cbor"):
+            try:
+                file_handle = self.read_export(file_path).get("handle") or ""
+                return (
+                    file_handle == handle
+                    or file_handle.replace(".", "_") == safe_handle
+                )
+            except Exception:
+                pass
 
         return False
 
@@ -800,7 +1012,9 @@ class DataManager:
 
         while len(items) < max_items:
             try:
-                resp = self.auth.client.com.atproto.repo.list_records(
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.com.atproto.repo.list_records,
                     {
                         "repo": did,
                         "collection": "app.bsky.feed.post",
@@ -864,6 +1078,7 @@ class DataManager:
 
         return items
 
+    @_background_api_work
     def hydrate_items(self, items: List[ContentItem]):
         """Update like/repost/reply counts for loaded items when missing (read-only).
 
@@ -1030,7 +1245,9 @@ class DataManager:
 
         while len(items) < max_items:
             try:
-                resp = self.auth.client.com.atproto.repo.list_records(
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.com.atproto.repo.list_records,
                     {
                         "repo": did,
                         "collection": "app.bsky.feed.like",
@@ -1116,7 +1333,9 @@ class DataManager:
 
         while len(items) < max_items:
             try:
-                resp = self.auth.client.com.atproto.repo.list_records(
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.com.atproto.repo.list_records,
                     {
                         "repo": did,
                         "collection": "app.bsky.feed.repost",
@@ -1211,190 +1430,99 @@ class DataManager:
     def _hydrate_post_engagement(
         self, items: List[ContentItem], progress_callback=None
     ):
-        """Fetch like/repost/reply counts for posts/replies via AppView get_posts in parallel batches.
+        """Fetch like/repost/reply counts for posts/replies via AppView getPosts batches.
+
+        Batches run concurrently on the asyncio hydration engine.
 
         Args:
             items: Items to hydrate
             progress_callback: Optional callable taking the cumulative number of hydrated items
         """
+        # URIs whose counts differ from what was loaded
+        changed: List[str] = []
+        # Whether a textless item went between zero and nonzero counts
+        flipped = False
         try:
-            uris = [it.uri for it in items if it.uri]
-            if not uris:
+            index = {it.uri: it for it in items if it.uri}
+            if not index:
                 return
 
-            batch_size = max(1, min(100, self.settings.hydrate_batch_size))
-            uri_batches = [
-                uris[i : i + batch_size] for i in range(0, len(uris), batch_size)
-            ]
-            index = {it.uri: it for it in items if it.uri}
-            
-            # Determine worker count (default to 5 for hydration if not specified, or use category_workers)
-            max_workers = getattr(self.settings, "hydration_workers", 5)
+            counts_by_uri = hydrate_post_counts(
+                self.auth.client,
+                list(index),
+                batch_size=self.settings.hydrate_batch_size,
+                progress_callback=progress_callback,
+            )
 
-            processed_count = 0
-            
-            def process_batch(batch):
-                try:
-                    # Create a new client instance for this thread if needed, or use existing
-                    # Note: Multithreading with a single client can be tricky if the client isn't thread-safe
-                    # But for simple GET requests it usually works. If not, we might need a lock.
-                    # Ideally, AuthManager would give us a thread-local client.
-                    # For now, we'll use the main client and assume thread-safety for read-only ops.
-                    client = self.auth.client
-                    if client is None:
-                        raise AuthenticationError("Authentication required for hydration")
-
-                    resp = client.get_posts(uris=batch)
-
-                    if not resp or not hasattr(resp, "posts"):
-                        return len(batch)
-
-                    posts = getattr(resp, "posts", None)
-                    if not posts:
-                        return len(batch)
-
-                    for p in posts:
-                        if not p or not hasattr(p, "uri"):
-                            continue
-
-                        uri = getattr(p, "uri", None)
-                        if not uri:
-                            continue
-
-                        it = index.get(uri)
-                        if not it:
-                            continue
-
-                        it.like_count = int(getattr(p, "like_count", 0) or 0)
-                        it.repost_count = int(getattr(p, "repost_count", 0) or 0)
-                        it.reply_count = int(getattr(p, "reply_count", 0) or 0)
-                        it.engagement_score = calculate_engagement_score(
-                            int(it.like_count or 0),
-                            int(it.repost_count or 0),
-                            int(it.reply_count or 0),
-                        )
-                    return len(batch)
-                except Exception as e:
-                    # Log error but don't stop everything
-                    # Check for auth errors
-                    error_msg = str(e).lower()
-                    if any(s in error_msg for s in ["auth", "unauthorized", "token", "expired", "forbidden"]):
-                         # Re-raise auth errors to be handled by the caller
-                         raise AuthenticationError("Authentication expired during hydration")
-                    # console.print(f"[yellow]Batch failed: {e}[/]")
-                    return len(batch)
-
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(process_batch, batch) for batch in uri_batches]
-                
-                for future in futures:
-                    try:
-                        count = future.result()
-                        processed_count += count
-                        if callable(progress_callback):
-                            try:
-                                progress_callback(processed_count)
-                            except Exception:
-                                pass
-                    except AuthenticationError:
-                        raise  # Bubbles up to trigger re-auth
-                    except Exception:
-                         # future.result() raises exceptions from the thread
-                         pass
+            for uri, counts in counts_by_uri.items():
+                it = index.get(uri)
+                if not it:
+                    continue
+                if counts != (it.like_count, it.repost_count, it.reply_count):
+                    changed.append(uri)
+                    flipped = flipped or emptiness_flipped(it, counts)
+                it.like_count, it.repost_count, it.reply_count = counts
+                it.engagement_score = calculate_engagement_score(*counts)
 
         except Exception as e:
             if isinstance(e, AuthenticationError):
                 raise
             # console.print(f"[yellow]Hydration error: {e}[/]")
             pass
+        finally:
+            if changed:
+                # Counts changed in place; cached searches and indexes are stale
+                mark_data_changed(changed, emptiness_changed=flipped)
 
     def _hydrate_repost_subject_engagement(
         self, items: List[ContentItem], progress_callback=None
     ):
         """Fetch subject post counters for repost items and attach to raw_data for display.
 
-        Uses parallel batch fetching (like post hydration) for speed.
+        Uses the same concurrent hydration engine as post hydration.
 
         Args:
             items: Repost items whose subjects to hydrate
             progress_callback: Optional callable taking the cumulative number of hydrated items
         """
+        changed: List[str] = []
         try:
-            uris = []
-            index = {}
-
+            index: Dict[str, List[ContentItem]] = {}
             for it in items:
                 subj = (it.raw_data or {}).get("subject_uri")
                 if subj:
-                    uris.append(subj)
-                    index[subj] = it
+                    index.setdefault(subj, []).append(it)
 
-            if not uris:
+            if not index:
                 return
 
-            batch_size = max(1, min(100, self.settings.hydrate_batch_size))
-            uri_batches = [
-                uris[i : i + batch_size] for i in range(0, len(uris), batch_size)
-            ]
-            max_workers = getattr(self.settings, "hydration_workers", 5)
-            processed_count = 0
+            counts_by_uri = hydrate_post_counts(
+                self.auth.client,
+                list(index),
+                batch_size=self.settings.hydrate_batch_size,
+                progress_callback=progress_callback,
+            )
 
-            def process_batch(batch):
-                try:
-                    client = self.auth.client
-                    if client is None:
-                        raise AuthenticationError("Authentication required for repost hydration")
-
-                    resp = client.get_posts(uris=batch)
-                    if not resp or not hasattr(resp, "posts"):
-                        return len(batch)
-
-                    posts = getattr(resp, "posts", None)
-                    if not posts:
-                        return len(batch)
-
-                    for p in posts:
-                        if not p or not hasattr(p, "uri"):
-                            continue
-                        uri = getattr(p, "uri", None)
-                        if not uri:
-                            continue
-                        it = index.get(uri)
-                        if not it:
-                            continue
-
-                        rd = it.raw_data or {}
-                        rd["subject_like_count"] = int(getattr(p, "like_count", 0) or 0)
-                        rd["subject_repost_count"] = int(getattr(p, "repost_count", 0) or 0)
-                        rd["subject_reply_count"] = int(getattr(p, "reply_count", 0) or 0)
-                        it.raw_data = rd
-
-                    return len(batch)
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    if any(s in error_msg for s in ["auth", "unauthorized", "token", "expired", "forbidden"]):
-                        raise AuthenticationError("Authentication expired during repost hydration")
-                    return len(batch)
-
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(process_batch, batch) for batch in uri_batches]
-                for future in futures:
-                    try:
-                        count = future.result()
-                        processed_count += count
-                        if callable(progress_callback):
-                            try:
-                                progress_callback(processed_count)
-                            except Exception:
-                                pass
-                    except AuthenticationError:
-                        raise
-                    except Exception:
-                        pass
+            for uri, (likes, reposts, replies) in counts_by_uri.items():
+                counts = {
+                    "subject_like_count": likes,
+                    "subject_repost_count": reposts,
+                    "subject_reply_count": replies,
+                }
+                for it in index.get(uri, ()):
+                    rd = it.raw_data or {}
+                    if any(rd.get(key) != value for key, value in counts.items()):
+                        changed.append(it.uri)
+                    rd.update(counts)
+                    it.raw_data = rd
 
         except Exception as e:
             if isinstance(e, AuthenticationError):
                 raise
+        finally:
+            if changed:
+                # Subject counts only feed count filters, never the empty check
+                mark_data_changed(changed, emptiness_changed=False)
 
     def _split_by_age(
         self, items: List[ContentItem], max_age_days: int = 30
@@ -1404,22 +1532,15 @@ class DataManager:
         Returns:
             Tuple of (recent_items, old_items)
         """
-        from datetime import timezone
-
-        now = datetime.now(timezone.utc)
+        # Whole days of age, compared on pre-parsed epoch microseconds
+        cutoff = to_timestamp(datetime.now(timezone.utc)) - max_age_days * US_PER_DAY
         recent = []
         old = []
 
         for item in items:
-            dt = parse_datetime(item.created_at)
-            if dt is None:
+            ts = item.created_ts
+            if ts is None or ts > cutoff:
                 recent.append(item)  # Unknown age → treat as recent
-                continue
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            age_days = (now - dt).days
-            if age_days < max_age_days:
-                recent.append(item)
             else:
                 old.append(item)
 
@@ -1427,22 +1548,20 @@ class DataManager:
 
     def _apply_date_filter(self, posts, likes, reposts, date_start, date_end):
         """Apply date filtering to content items."""
-        sd = parse_datetime(date_start)
-        ed = parse_datetime(date_end)
+        sd = to_timestamp(date_start)
+        ed = to_timestamp(date_end)
 
         def within(it: ContentItem):
-            if not (sd or ed):
-                return True
-            dt = parse_datetime(it.created_at)
-            if dt is None:
+            ts = it.created_ts
+            if ts is None:
                 return False
-            if sd and dt < sd:
+            if sd is not None and ts < sd:
                 return False
-            if ed and dt > ed:
+            if ed is not None and ts > ed:
                 return False
             return True
 
-        if sd or ed:
+        if sd is not None or ed is not None:
             posts = [it for it in posts if within(it)]
             likes = [it for it in likes if within(it)]
             reposts = [it for it in reposts if within(it)]
@@ -1452,12 +1571,9 @@ class DataManager:
     def _sort_by_date(self, posts, likes, reposts):
         """Sort items by date according to fetch_order setting."""
 
-        def _to_dt(x):
-            return parse_datetime(x.created_at, datetime.min)
-
-        posts.sort(key=_to_dt)
-        likes.sort(key=_to_dt)
-        reposts.sort(key=_to_dt)
+        posts.sort(key=created_sort_key)
+        likes.sort(key=created_sort_key)
+        reposts.sort(key=created_sort_key)
 
     def _build_export_data(self, handle, did, posts, likes, reposts, cats):
         """Build the export data structure."""
@@ -1479,7 +1595,14 @@ class DataManager:
                             "replies": item.reply_count,
                             "score": item.engagement_score,
                         },
-                        "raw_data": item.raw_data,
+                        # Loaded items point raw_data at their own export record;
+                        # don't nest a second copy of it
+                        "raw_data": (
+                            None
+                            if isinstance(item.raw_data, dict)
+                            and item.raw_data.get("uri") == item.uri
+                            else item.raw_data
+                        ),
                     }
                     for item in posts
                 ]
@@ -1524,8 +1647,9 @@ class DataManager:
     def _merge_with_existing(self, export_path, export_data):
         """Merge export data with existing file."""
         try:
-            with open(export_path, "r") as f:
-                old = json.load(f)
+            old = self.read_export(export_path)
+            if not isinstance(old, dict):
+                old = {}
         except Exception:
             old = {}
 
@@ -1550,110 +1674,185 @@ class DataManager:
 
         return export_data
 
-    def _decode_car_blocks(self, car):
-        """Decode CAR blocks into CBOR."""
-        decoded = {}
-        blocks = getattr(car, "blocks", None)
-        it = []
-
-        # Skip block counting to avoid hanging on large CAR files
-        block_count = "unknown"  # Block counting removed to prevent hanging
-        # console.print(f"Debug: Backup contains {block_count} total objects")
-
-        if isinstance(blocks, dict):
-            it = list(blocks.items())
-        elif hasattr(car, "blocks"):
-            # Backup objects typically have an iterator for blocks
-            # Use car.blocks directly in the processing loop to avoid pre-iteration
-            # This prevents hanging on large CAR files
-            it = car.blocks
-        elif isinstance(blocks, (list, tuple)):
-            for b in blocks:
-                try:
-                    if isinstance(b, tuple) and len(b) == 2:
-                        it.append((b[0], b[1]))
-                    elif hasattr(b, "cid") and hasattr(b, "bytes"):
-                        it.append((getattr(b, "cid"), getattr(b, "bytes")))
-                    elif isinstance(b, dict) and "cid" in b and "bytes" in b:
-                        it.append((b["cid"], b["bytes"]))
-                except Exception:
-                    continue
+    def _scan_backup(
+        self,
+        backup_path: Path,
+        categories: Optional[set] = None,
+        progress_callback=None,
+    ) -> Tuple[Optional[str], List[Tuple[str, Optional[str], str, Dict[str, Any]]]]:
+        """Read the records we import from a CAR backup.
 
-        # console.print(f"Debug: Found {len(it)} path mappings")
+        Collections already decoded from the same repo snapshot are served from
+        the parsed CAR cache. For the rest, when the repo's MST can be walked,
+        only their record blocks are decoded (see CarIndex). Otherwise every
+        block is streamed, decoded and dropped before the next one is read, so
+        peak memory is bounded by the compact record list rather than the repo
+        size.
 
+        Args:
+            backup_path: CAR file to read
+            categories: Export categories to keep (defaults to posts, likes, reposts)
+            progress_callback: Optional callable taking ``(bytes_read, total_bytes)``
+
+        Returns:
+            Tuple of (repo DID or None, list of ``(rtype, path, cid, record)``)
+        """
         if cbor_decode is None:
             console.print(
                 "No CBOR decoder available. Install libipld or cbor2: pip install libipld"
             )
-            return {}
+            return None, []
 
-        # Show progress while decoding blocks
-        with safe_progress(
+        cats = categories or {"posts", "likes", "reposts"}
+        wanted = {RECORD_COLLECTIONS[c] for c in cats if c in RECORD_COLLECTIONS}
+
+        with CarReader(backup_path) as reader, safe_progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True,
             console=console,
         ) as progress:
-            # Use None for total to avoid counting items (prevents hanging)
-            task = progress.add_task(f"Decoding backup blocks...", total=None)
-            processed_count = 0
-            for item in it:
-                processed_count += 1
-                if processed_count % 100 == 0:
-                    progress.update(task, description=f"Decoding backup blocks... ({processed_count} processed)")
-                
+            total_bytes = reader.size
+            total_mb = total_bytes / (1024 * 1024)
+            task = progress.add_task("Reading backup...", total=total_bytes)
+
+            def report(done: int) -> None:
+                progress.update(
+                    task,
+                    completed=done,
+                    description=f"Reading backup... {done / (1024 * 1024):.1f}/{total_mb:.1f} MB",
+                )
+                if progress_callback:
+                    try:
+                        progress_callback(done, total_bytes)
+                    except Exception:
+                        pass
+
+            cache_key = None
+            did, cached = None, {}
+            try:
+                cache_key = ParsedCarCache.cache_key(reader)
+                did, cached = self.car_cache.get(cache_key, wanted)
+            except Exception:
+                pass
+
+            missing = wanted - set(cached)
+            if missing:
                 try:
-                    # Handle different iterator types
-                    if isinstance(item, tuple) and len(item) == 2:
-                        cid, block = item
-                    elif hasattr(item, "cid") and hasattr(item, "data"):
-                        cid, block = item.cid, item.data
-                    elif hasattr(item, "cid") and hasattr(item, "bytes"):
-                        cid, block = item.cid, item.bytes
-                    else:
-                        # console.print(f"Debug: Unknown item format: {type(item)}")
-                        continue
-                    
-                    # Handle different block data formats
-                    if isinstance(block, dict):
-                        decoded[str(cid)] = block
-                    elif isinstance(block, (bytes, bytearray)):
-                        decoded[str(cid)] = cbor_decode(block)
-                    else:
-                        if hasattr(block, "bytes"):
-                            decoded[str(cid)] = cbor_decode(block.bytes)
-                        elif hasattr(block, "data"):
-                            decoded[str(cid)] = cbor_decode(block.data)
-                        else:
-                            # console.print(f"Debug: Unknown block format for {cid}: {type(block)}")
-                            continue
-                except Exception as e:
-                    # console.print(f"Debug: Failed to decode block: {e}")
-                    pass
+                    index = CarIndex.load_or_build(reader)
+                except Exception:
+                    index = None
 
-        return decoded
+                if index is not None:
+                    scanned_did, scanned = self._scan_indexed(reader, index, missing, report)
+                else:
+                    scanned_did, scanned = self._scan_sequential(reader, missing, report)
+                did = scanned_did or did
+
+                decoded = {collection: [] for collection in missing}
+                for record in scanned:
+                    decoded[record[0]].append(record)
+                cached.update(decoded)
+                if cache_key:
+                    try:
+                        self.car_cache.put(cache_key, did, decoded)
+                    except Exception:
+                        pass
+            report(total_bytes)
+
+        records = [record for collection in sorted(wanted) for record in cached[collection]]
+        return did, records
+
+    def _scan_indexed(self, reader: CarReader, index: CarIndex, wanted: set, report):
+        """Decode only the record blocks listed in the MST index for ``wanted``.
+
+        Large repos are decoded across a process pool when ``car_decode_workers``
+        is above 1; any pool failure falls back to decoding in this process.
+        """
+        entries = [entry for collection in sorted(wanted) for entry in index.entries(collection)]
+        # Read in file order so the memory map is walked front to back
+        entries.sort(key=lambda entry: entry[2])
+        total = max(1, len(entries))
 
-    def _extract_backup_metadata(self, decoded):
-        """Extract DID and CID-to-path mapping from backup commit operations."""
-        cid_to_path = {}
+        workers = int(getattr(self.settings, "car_decode_workers", 0) or 0)
+        if workers > 1 and len(entries) >= PARALLEL_DECODE_MIN_RECORDS:
+            try:
+                records = decode_entries_parallel(
+                    reader.path,
+                    entries,
+                    wanted,
+                    workers,
+                    progress=lambda done, _: report(int(reader.size * done / total)),
+                )
+                return index.did, records
+            except Exception as e:
+                console.print(
+                    f"[yellow]Parallel decode unavailable ({e}); decoding in a single process[/yellow]"
+                )
+
+        records: List[Tuple[str, Optional[str], str, Dict[str, Any]]] = []
+        for count, record in enumerate(decode_entries(reader, entries, wanted), 1):
+            records.append(record)
+            if count % 500 == 0:
+                report(int(reader.size * count / total))
+        return index.did, records
+
+    def _scan_sequential(self, reader: CarReader, wanted: set, report):
+        """Decode every block in file order, learning paths from MST nodes as we go."""
         did = None
+        cid_to_path: Dict[str, str] = {}
+        records: List[Tuple[str, Optional[str], str, Dict[str, Any]]] = []
+
+        for count, (cid, block, end_offset) in enumerate(reader.iter_blocks(), 1):
+            try:
+                obj = cbor_decode(block)
+            except Exception:
+                continue
+
+            if isinstance(obj, dict):
+                rtype = obj.get("$type")
+                if rtype in wanted:
+                    records.append(
+                        (rtype, None, cid, compact_record(rtype, obj))
+                    )
+                elif rtype is None and is_mst_node(obj):
+                    for key, value_cid, _ in decode_mst_entries(obj):
+                        cid_to_path[value_cid] = key
+                elif is_commit(obj):
+                    did = obj.get("did") or obj.get("repo") or did
+
+            if count % 500 == 0:
+                report(end_offset)
+
+        records = [
+            (rtype, cid_to_path.get(cid), cid, rec) for rtype, _, cid, rec in records
+        ]
+        return did, records
+
+    def get_backup_stats(self, backup_path: Path) -> Optional[Dict[str, int]]:
+        """Count posts, replies, likes and reposts in a CAR backup without a full import."""
+        try:
+            return car_quick_stats(backup_path)
+        except Exception as e:
+            console.print(f"Failed to read backup stats: {e}")
+            return None
+
+    def get_backup_record(self, backup_path: Path, path: str) -> Optional[Dict[str, Any]]:
+        """Decode a single record (``collection/rkey``) from a CAR backup via its MST index."""
+        try:
+            with CarReader(backup_path) as reader:
+                index = CarIndex.load_or_build(reader)
+                location = index.lookup(path) if index else None
+                if not location:
+                    return None
+                _, offset, length = location
+                return reader.decode_block(offset, length)
+        except Exception as e:
+            console.print(f"Failed to read record {path}: {e}")
+            return None
 
-        for obj in decoded.values():
-            if isinstance(obj, dict) and obj.get("$type") in (
-                "com.atproto.repo.commit",
-                "com.atproto.repo#commit",
-            ):
-                did = obj.get("did") or obj.get("repo") or did
-                for op in obj.get("ops", []) or []:
-                    c = op.get("cid")
-                    p = op.get("path")
-                    if c and p:
-                        cid_to_path[str(c)] = p
-
-        return cid_to_path, did
-
-    def _process_backup_records(self, decoded, cid_to_path, did, handle=None):
-        """Process backup records into posts, likes, and reposts."""
+    def _process_backup_records(self, records, did, handle=None):
+        """Process scanned backup records into posts, likes, and reposts."""
         posts = []
         likes = []
         reposts = []
@@ -1662,7 +1861,7 @@ class DataManager:
         effective_did = did
         if did == "did:plc:unknown" and handle and self.auth.client:
             try:
-                profile = self.auth.client.get_profile(handle)
+                profile = pds_call(self.auth.client, self.auth.client.get_profile, handle)
                 effective_did = profile.did
                 console.print(f"Resolved real DID: {effective_did}")
             except Exception as e:
@@ -1671,119 +1870,57 @@ class DataManager:
         elif not effective_did:
             effective_did = "did:plc:unknown"
 
-        record_types = set(
-            obj.get("$type")
-            for obj in decoded.values()
-            if isinstance(obj, dict) and obj.get("$type")
-        )
-        no_type_count = sum(
-            1
-            for obj in decoded.values()
-            if isinstance(obj, dict) and not obj.get("$type")
-        )
-        no_path_count = sum(
-            1
-            for cid, obj in decoded.items()
-            if isinstance(obj, dict)
-            and obj.get("$type")
-            and not cid_to_path.get(str(cid))
-        )
-        other_types_count = sum(
-            1 for obj in decoded.values() if not isinstance(obj, dict)
-        )
-
-        # console.print(f"Debug: Record types found: {record_types}")
-        # console.print(f"Debug: Skipped - no type: {no_type_count}, no path: {no_path_count}, other types: {other_types_count}")
-
-        if not record_types and len(decoded) > 0:
-            # console.print("Debug: Backup file contains data but no recognizable records")
-            # console.print("Debug: This may be an empty account or a different data format")
-            pass
+        for rtype, path, cid, rec in records:
+            # Handle CAR files without a walkable MST (path mapping)
+            if not path:
+                path = f"{rtype}/{cid}"
+            if "/" not in path:
+                continue
 
-        # Show progress while extracting records
-        total_decoded = len(decoded)
-        with safe_progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            transient=True,
-            console=console,
-        ) as progress:
-            task = progress.add_task(
-                f"Extracting records 0/{total_decoded}", total=total_decoded or 1
-            )
-            for cid, obj in decoded.items():
-                try:
-                    if not isinstance(obj, dict):
-                        continue
-
-                    rtype = obj.get("$type")
-                    path = cid_to_path.get(str(cid))
-
-                    # Handle CAR files without commit records (path mapping)
-                    if not path and rtype:
-                        if rtype == "app.bsky.feed.post":
-                            path = f"app.bsky.feed.post/{str(cid)}"
-                        elif rtype == "app.bsky.feed.like":
-                            path = f"app.bsky.feed.like/{str(cid)}"
-                        elif rtype == "app.bsky.feed.repost":
-                            path = f"app.bsky.feed.repost/{str(cid)}"
-                        else:
-                            continue  # Skip other record types
-
-                    if not path or not rtype or "/" not in path:
-                        continue
-
-                    collection, rkey = path.split("/", 1)
-                    uri = f"at://{effective_did}/{collection}/{rkey}"
-                    created = obj.get("createdAt") or obj.get("created_at")
-
-                    if rtype == "app.bsky.feed.post":
-                        is_reply = bool(obj.get("reply"))
-                        posts.append(
-                            {
-                                "uri": uri,
-                                "cid": cid,
-                                "type": "reply" if is_reply else "post",
-                                "text": obj.get("text"),
-                                "created_at": created,
-                                "engagement": {
-                                    "likes": 0,
-                                    "reposts": 0,
-                                    "replies": 0,
-                                    "score": 0,
-                                },
-                                "raw_data": None,
-                            }
-                        )
-                    elif rtype == "app.bsky.feed.like":
-                        subj = obj.get("subject") or {}
-                        likes.append(
-                            {
-                                "uri": uri,
-                                "cid": cid,
-                                "type": "like",
-                                "created_at": created,
-                                "subject_uri": subj.get("uri"),
-                                "subject_cid": subj.get("cid"),
-                            }
-                        )
-                    elif rtype == "app.bsky.feed.repost":
-                        subj = obj.get("subject") or {}
-                        reposts.append(
-                            {
-                                "uri": uri,
-                                "cid": cid,
-                                "type": "repost",
-                                "created_at": created,
-                                "subject_uri": subj.get("uri"),
-                                "subject_cid": subj.get("cid"),
-                                "self_repost": False,
-                            }
-                        )
-                finally:
-                    progress.advance(task, 1)
+            collection, rkey = path.split("/", 1)
+            uri = f"at://{effective_did}/{collection}/{rkey}"
+            created = rec.get("created_at")
 
-        # console.print(f"Debug: Extracted {len(posts)} posts, {len(likes)} likes, {len(reposts)} reposts")
+            if rtype == "app.bsky.feed.post":
+                posts.append(
+                    {
+                        "uri": uri,
+                        "cid": cid,
+                        "type": "reply" if rec.get("reply") else "post",
+                        "text": rec.get("text"),
+                        "created_at": created,
+                        "engagement": {
+                            "likes": 0,
+                            "reposts": 0,
+                            "replies": 0,
+                            "score": 0,
+                        },
+                        "raw_data": None,
+                    }
+                )
+            elif rtype == "app.bsky.feed.like":
+                likes.append(
+                    {
+                        "uri": uri,
+                        "cid": cid,
+                        "type": "like",
+                        "created_at": created,
+                        "subject_uri": rec.get("subject_uri"),
+                        "subject_cid": rec.get("subject_cid"),
+                    }
+                )
+            elif rtype == "app.bsky.feed.repost":
+                reposts.append(
+                    {
+                        "uri": uri,
+                        "cid": cid,
+                        "type": "repost",
+                        "created_at": created,
+                        "subject_uri": rec.get("subject_uri"),
+                        "subject_cid": rec.get("subject_cid"),
+                        "self_repost": False,
+                    }
+                )
 
         if not posts and not likes and not reposts:
             console.print("This account appears to have no content yet")
@@ -1791,35 +1928,6 @@ class DataManager:
 
         return posts, likes, reposts
 
-    def _merge_backup_with_existing(self, out, export_data):
-        """Merge backup import data with existing data file."""
-        try:
-            with open(out, "r") as f:
-                existing = json.load(f)
-        except Exception:
-            existing = {}
-
-        export_data["posts"] = merge_content_items(
-            "posts",
-            export_data["posts"],
-            existing.get("posts", []),
-            self.settings.fetch_order,
-        )
-        export_data["likes"] = merge_content_items(
-            "likes",
-            export_data["likes"],
-            existing.get("likes", []),
-            self.settings.fetch_order,
-        )
-        export_data["reposts"] = merge_content_items(
-            "reposts",
-            export_data["reposts"],
-            existing.get("reposts", []),
-            self.settings.fetch_order,
-        )
-
-        return export_data
-
     def clear_local_data(self, handle: str) -> int:
         """Delete local data and backup files for a handle. Returns number of files deleted."""
         try:
@@ -1827,15 +1935,27 @@ class DataManager:
                 return 0
             safe = handle.replace(".", "_")
             deleted = 0
-            # Delete JSON
-            json_path = self.json_dir / f"{safe}.json"
-            if json_path.exists():
+            # Delete exports (content store and/or JSON)
+            for json_path in (self.json_dir / f"{safe}{suffix}" for suffix in EXPORT_FILE_SUFFIXES):
+                if not json_path.exists():
+                    continue
+                try:
+                    did = self.read_export(json_path).get("did")
+                    if did:
+                        self.car_cache.remove_did(did)
+                except Exception:
+                    pass
                 try:
                     json_path.unlink()
                     console.print(f"Deleted {json_path}")
                     deleted += 1
                 except Exception as e:
                     console.print(f"Failed to delete {json_path}: {e}")
+                segmented = SegmentedExport(json_path)
+                for segment in segmented.segments():
+                    segment.unlink(missing_ok=True)
+                if segmented.segment_dir.exists():
+                    shutil.rmtree(segmented.segment_dir, ignore_errors=True)
             # Delete backup files (both plain and timestamped)
             for backup_path in list(self.backups_dir.glob(f"{safe}*.car")):
                 try:
@@ -1844,6 +1964,8 @@ class DataManager:
                     deleted += 1
                 except Exception as e:
                     console.print(f"Failed to delete {backup_path}: {e}")
+                # Index sidecars are derived data; remove them silently
+                CarIndex.sidecar_path(backup_path).unlink(missing_ok=True)
             if deleted == 0:
                 console.print("[dim]No data files found to delete[/dim]")
             return deleted
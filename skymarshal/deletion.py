@@ -26,6 +26,8 @@ from rich.rule import Rule
 
 from .auth import AuthManager
 from .models import ContentItem, DeleteMode, UserSettings, console, parse_datetime
+from .concurrency import pds_call
+from .rate_budget import DELETE_POINTS, PDS_WRITES, budget_for
 
 
 # Bluesky's PDS rate limit is roughly 5,000 writes per hour per account.
@@ -54,12 +56,18 @@ def _is_rate_limit_error(exc: BaseException) -> bool:
     return False
 
 
-def _retry_on_rate_limit(call: Callable[[], Any]) -> Any:
-    """Run ``call`` with 429-aware exponential backoff. Re-raises on non-429."""
+def _retry_on_rate_limit(call: Callable[[], Any], account: Optional[str] = None) -> Any:
+    """Run the write ``call`` with 429-aware exponential backoff. Re-raises on non-429.
+
+    Each attempt spends DELETE_POINTS from ``account``'s PDS write budget
+    first, so concurrent deletion runs pace themselves instead of meeting
+    the 429s.
+    """
     last_exc: Optional[BaseException] = None
     for delay in (0, *_RATE_LIMIT_BACKOFF):
         if delay:
             time.sleep(delay)
+        budget_for(PDS_WRITES, account=account).acquire(DELETE_POINTS)
         try:
             return call()
         except Exception as exc:
@@ -108,7 +116,8 @@ class DeletionManager:
                         _retry_on_rate_limit(
                             lambda: self.auth.client.com.atproto.repo.delete_record(
                                 {"repo": did, "collection": collection, "rkey": rkey}
-                            )
+                            ),
+                            account=self.auth.current_did,
                         )
                         deleted += 1
                     else:
@@ -167,7 +176,8 @@ class DeletionManager:
                                             "collection": collection,
                                             "rkey": rkey,
                                         }
-                                    )
+                                    ),
+                                    account=self.auth.current_did,
                                 )
                                 deleted_count += 1
                             except Exception:
@@ -210,7 +220,9 @@ class DeletionManager:
             cursor = None
             per_page = 100
             while True:
-                resp = self.auth.client.com.atproto.repo.list_records(
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.com.atproto.repo.list_records,
                     {
                         "repo": did,
                         "collection": collection,
@@ -240,6 +252,7 @@ class DeletionManager:
                             )
                     if subj == subject_uri:
                         rkey = getattr(rec, "uri", "///").split("/")[-1]
+                        budget_for(PDS_WRITES, account=did).acquire(DELETE_POINTS)
                         self.auth.client.com.atproto.repo.delete_record(
                             {
                                 "repo": did,
@@ -467,7 +480,8 @@ class DeletionManager:
                                 "collection": collection,
                                 "rkey": getattr(rec, "uri", "///").split("/")[-1],
                             }
-                        )
+                        ),
+                        account=self.auth.current_did,
                     )
                     deleted += 1
                 except Exception:
@@ -503,7 +517,9 @@ class DeletionManager:
         if order == "oldest":
             all_recs: List[Any] = []
             while True:
-                resp = self.auth.client.com.atproto.repo.list_records(
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.com.atproto.repo.list_records,
                     {
                         "repo": did,
                         "collection": collection,
@@ -534,7 +550,9 @@ class DeletionManager:
                     if max_items is None
                     else min(per_page, max_items - fetched)
                 )
-                resp = self.auth.client.com.atproto.repo.list_records(
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.com.atproto.repo.list_records,
                     {
                         "repo": did,
                         "collection": collection,
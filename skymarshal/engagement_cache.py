@@ -18,6 +18,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from .models import ContentItem, console, parse_datetime
+from .query_cache import emptiness_flipped, mark_data_changed
 
 
 class EngagementCache:
@@ -353,19 +354,26 @@ class EngagementCache:
         # Split items into cached and uncached
         cached_items = []
         uncached_items = []
+        changed: List[str] = []
+        flipped = False
 
         for item in items:
             if item.uri in cached_data:
                 # Apply cached engagement
                 data = cached_data[item.uri]
-                item.like_count = data["like_count"]
-                item.repost_count = data["repost_count"]
-                item.reply_count = data["reply_count"]
+                counts = (data["like_count"], data["repost_count"], data["reply_count"])
+                if counts != (item.like_count, item.repost_count, item.reply_count):
+                    changed.append(item.uri)
+                    flipped = flipped or emptiness_flipped(item, counts)
+                item.like_count, item.repost_count, item.reply_count = counts
                 item.update_engagement_score()
                 cached_items.append(item)
             else:
                 uncached_items.append(item)
 
+        if changed:
+            # Counts changed in place; cached searches and indexes are stale
+            mark_data_changed(changed, emptiness_changed=flipped)
         return cached_items, uncached_items
 
     def vacuum(self):
@@ -0,0 +1,205 @@
+"""
+Skymarshal Segmented Exports
+
+File Purpose: Incremental, crash-safe updates to JSON and CBOR export files
+Primary Functions/Classes: SegmentedExport
+Inputs and Outputs (I/O): Export dicts in; base export file plus ``<name>.segments/``
+    delta files out
+
+Merging a handful of new records into a large JSON export used to reload,
+re-sort and rewrite the whole file. A SegmentedExport instead writes each merge
+as a small append-only segment next to the base file, and readers apply the
+segments on top of the base. compact() folds the segments back into the base.
+Every file is written to a temporary name and moved into place with
+os.replace, so the base export is always a complete, readable file.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .cbor_export import normalize_export_data, read_cbor_export, write_cbor_export
+from .models import merge_content_items
+
+CATEGORIES = ("posts", "likes", "reposts")
+
+# Compact once this many segments have piled up
+COMPACT_AFTER_SEGMENTS = 8
+
+# One lock per export file so compactions never interleave with each other
+# or with reads in this process
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+class _SegmentVanished(Exception):
+    """A listed segment was folded into the base (by another process) mid-read."""
+
+
+def _lock_for(path: Path) -> threading.Lock:
+    key = str(Path(path).resolve())
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+class SegmentedExport:
+    """A ``.json`` or ``.cbor`` export file with append-only delta segments."""
+
+    def __init__(self, path: Path, fetch_order: str = "newest"):
+        self.path = Path(path)
+        self.fetch_order = fetch_order
+        self.segment_dir = self.path.with_name(self.path.name + ".segments")
+
+    # ------------------------------------------------------------------
+    # File helpers
+    # ------------------------------------------------------------------
+
+    def _read_file(self, path: Path) -> Any:
+        if path.suffix == ".cbor":
+            return read_cbor_export(path)
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _write_file(self, path: Path, data: Dict[str, Any], indent=None) -> None:
+        if path.suffix == ".cbor":
+            write_cbor_export(path, data)
+            return
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=indent, default=str)
+        os.replace(tmp, path)
+
+    def segments(self) -> List[Path]:
+        """Pending segment files, oldest first."""
+        if not self.segment_dir.exists():
+            return []
+        return sorted(self.segment_dir.glob(f"*{self.path.suffix}"))
+
+    # ------------------------------------------------------------------
+    # Reading and writing
+    # ------------------------------------------------------------------
+
+    def read_base(self) -> Any:
+        """The base export exactly as stored (may be a legacy layout)."""
+        return self._read_file(self.path)
+
+    def read(self) -> Any:
+        """Return the export with all pending segments applied.
+
+        Without segments this is the base file as stored, legacy layouts
+        included. With segments the result is a normalized export dict.
+
+        Holds the file's lock so an in-process compact() can't remove segments
+        between listing and reading them. If another process compacts
+        meanwhile, the read starts over from the new base.
+        """
+        with _lock_for(self.path):
+            while True:
+                segments = self.segments()
+                base = self.read_base() if self.path.exists() else {}
+                if not segments:
+                    return base
+                try:
+                    return self._apply(
+                        normalize_export_data(base) if base else {},
+                        segments,
+                        strict=True,
+                    )[0]
+                except _SegmentVanished:
+                    continue
+
+    def _apply(self, data: Dict[str, Any], segments: List[Path], strict: bool = False):
+        """Merge ``segments`` over ``data``; returns (merged, segments actually read).
+
+        With ``strict``, a listed segment that no longer exists raises
+        _SegmentVanished instead of being skipped, since the base read before
+        it may predate the compaction that removed it.
+        """
+        merged = dict(data)
+        for category in CATEGORIES:
+            merged.setdefault(category, [])
+        # Later segments win; collect by URI first so the big list is merged once
+        deltas: Dict[str, Dict[Any, Dict[str, Any]]] = {c: {} for c in CATEGORIES}
+        applied = []
+        for segment in segments:
+            try:
+                delta = self._read_file(segment)
+            except FileNotFoundError:
+                if strict:
+                    raise _SegmentVanished(segment)
+                continue
+            except (OSError, ValueError):
+                # A half-written segment never got renamed into place; skip strays
+                continue
+            for key in ("handle", "did", "export_time"):
+                if delta.get(key) is not None:
+                    merged[key] = delta[key]
+            for category in CATEGORIES:
+                for item in delta.get(category) or []:
+                    if isinstance(item, dict):
+                        deltas[category][item.get("uri")] = item
+            applied.append(segment)
+        for category in CATEGORIES:
+            if deltas[category]:
+                merged[category] = merge_content_items(
+                    category,
+                    list(deltas[category].values()),
+                    merged[category],
+                    self.fetch_order,
+                )
+        return merged, applied
+
+    def write(self, export_data: Dict[str, Any]) -> None:
+        """Replace the export wholesale, discarding pending segments."""
+        with _lock_for(self.path):
+            # Drop segments first: a crash in between leaves the old base intact
+            for segment in self.segments():
+                segment.unlink(missing_ok=True)
+            self._write_file(self.path, export_data, indent=2)
+
+    def append(self, export_data: Dict[str, Any]) -> Path:
+        """Record a merge as a new segment; cost is proportional to the delta."""
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        segment = (
+            self.segment_dir / f"{time.time_ns():020d}-{os.getpid()}{self.path.suffix}"
+        )
+        self._write_file(segment, export_data)
+        return segment
+
+    def needs_compaction(self) -> bool:
+        return len(self.segments()) >= COMPACT_AFTER_SEGMENTS
+
+    def compact(self) -> int:
+        """Fold pending segments into the base file.
+
+        Only the segments read here are removed afterwards, so segments appended
+        while compaction runs are kept for the next pass. Re-applying a segment
+        is harmless (records merge by URI), so a crash between replacing the
+        base and removing segments loses nothing.
+
+        Returns:
+            Number of segments merged
+        """
+        with _lock_for(self.path):
+            segments = self.segments()
+            if not segments:
+                return 0
+            base = self.read_base() if self.path.exists() else {}
+            merged, applied = self._apply(
+                normalize_export_data(base) if base else {}, segments
+            )
+            self._write_file(self.path, merged, indent=2)
+            for segment in applied:
+                segment.unlink(missing_ok=True)
+            return len(applied)
+
+    def compact_in_background(self) -> threading.Thread:
+        """Run :meth:`compact` on a worker thread and return it."""
+        thread = threading.Thread(
+            target=self.compact, name=f"compact-{self.path.name}", daemon=False
+        )
+        thread.start()
+        return thread
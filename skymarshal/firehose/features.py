@@ -6,10 +6,11 @@ Extracts hashtags, mentions, URLs, media info, language, word count.
 
 from __future__ import annotations
 
-import re
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from ..text_features import extract_text_features
+
 
 @dataclass
 class MediaInfo:
@@ -40,12 +41,6 @@ class PostFeatures:
     media: MediaInfo = field(default_factory=MediaInfo)
 
 
-# Regex patterns
-_HASHTAG_RE = re.compile(r"#[\w\u0080-\uFFFF]+")
-_MENTION_RE = re.compile(r"@[\w.]+")
-_URL_RE = re.compile(r"https?://\S+")
-
-
 def extract_features(text: str, record: Optional[Dict[str, Any]] = None) -> PostFeatures:
     """Extract linguistic and structural features from a Bluesky post.
 
@@ -58,10 +53,12 @@ def extract_features(text: str, record: Optional[Dict[str, Any]] = None) -> Post
     """
     record = record or {}
     features = PostFeatures()
+    # Stream texts are seen once, so skip the shared feature memo
+    text_info = extract_text_features(text)
 
     # Character and word count
     features.char_count = len(text)
-    features.word_count = len([w for w in text.split() if w])
+    features.word_count = text_info.word_count
 
     # Hashtags — prefer structured facets, fallback to regex
     if record.get("facets"):
@@ -73,13 +70,13 @@ def extract_features(text: str, record: Optional[Dict[str, Any]] = None) -> Post
                         features.hashtags.append(f"#{tag}")
 
     if not features.hashtags:
-        features.hashtags = _HASHTAG_RE.findall(text)
+        features.hashtags = list(text_info.hashtags)
 
     # Mentions
-    features.mentions = _MENTION_RE.findall(text)
+    features.mentions = list(text_info.mentions)
 
     # URLs
-    features.links = _URL_RE.findall(text)
+    features.links = list(text_info.urls)
 
     # Language from record metadata
     langs = record.get("langs")
@@ -6,7 +6,8 @@ Primary Functions/Classes: FollowerManager
 Inputs and Outputs (I/O): Bluesky API for follower data
 
 This module provides functionality to fetch, rank, and analyze followers.
-It uses ThreadPoolExecutor for concurrent profile fetching to ensure performance.
+It uses ThreadPoolExecutor for concurrent profile fetching to ensure performance;
+the user's PDS concurrency controller decides how many requests run at once.
 """
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -14,6 +15,7 @@ from typing import Dict, List, Optional
 import time
 
 from rich.progress import SpinnerColumn, TextColumn
+from .concurrency import pds_call, pds_controller
 from .models import console, safe_progress
 from .auth import AuthenticationError
 
@@ -58,7 +60,7 @@ class FollowerManager:
                         params["cursor"] = cursor
 
                     # Calling the SDK method
-                    resp = self.auth.client.app.bsky.graph.get_followers(params)
+                    resp = pds_call(self.auth.client, self.auth.client.app.bsky.graph.get_followers, params)
                     
                     batch = getattr(resp, "followers", [])
                     if not batch:
@@ -90,9 +92,15 @@ class FollowerManager:
         # so mostly we just need to batch the calls.
         # However, making multiple network requests in parallel speeds this up.
         
+        controller = pds_controller(self.auth.client)
+
         def fetch_batch(batch_dids):
             try:
-                resp = self.auth.client.app.bsky.actor.get_profiles({"actors": batch_dids})
+                resp = pds_call(
+                    self.auth.client,
+                    self.auth.client.app.bsky.actor.get_profiles,
+                    {"actors": batch_dids},
+                )
                 return getattr(resp, "profiles", [])
             except Exception as e:
                 # console.print(f"[yellow]Warning: Profile batch fetch failed: {e}[/]")
@@ -106,7 +114,7 @@ class FollowerManager:
         ) as progress:
             task = progress.add_task("Fetching detailed profiles...", total=len(batches))
             
-            with ThreadPoolExecutor(max_workers=5) as executor:
+            with ThreadPoolExecutor(max_workers=min(controller.max_limit, len(batches))) as executor:
                 futures = {executor.submit(fetch_batch, batch): batch for batch in batches}
                 
                 for future in as_completed(futures):
@@ -0,0 +1,293 @@
+"""
+Skymarshal Handle Cache
+
+File Purpose: Persistent DID→handle resolution cache for subject-handle filtering
+Primary Functions/Classes: HandleCache, HandleIndex
+Inputs and Outputs (I/O): SQLite database operations, batched profile lookups, DID sets
+
+Filtering likes and reposts by the subject's handle needs a handle for every
+subject DID. HandleCache keeps resolved handles in ~/.skymarshal with a TTL,
+fetches only the DIDs it doesn't know (in concurrent 25-actor batches), and
+answers "which DIDs have a handle containing X" from an in-memory trigram
+index, so a repeat search makes no API calls at all.
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Handles rarely change; a week keeps renames reasonably fresh
+HANDLE_TTL = 7 * 24 * 3600
+
+# DIDs the API returned no profile for (deleted or suspended accounts)
+MISSING_TTL = 24 * 3600
+
+# app.bsky.actor.getProfiles accepts at most this many actors
+PROFILE_BATCH_SIZE = 25
+
+# Concurrent getProfiles calls while resolving
+RESOLVE_WORKERS = 4
+
+# Fetches handles for up to PROFILE_BATCH_SIZE DIDs; DIDs without a profile
+# are left out of the result
+HandleFetcher = Callable[[List[str]], Dict[str, str]]
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class HandleIndex:
+    """Trigram index from lowercase handle substrings to DIDs."""
+
+    def __init__(
+        self, handles: Dict[str, str], expires: Optional[Dict[str, int]] = None
+    ):
+        """Index ``handles``; ``expires`` maps DIDs to when their entry goes stale."""
+        self.handles = {
+            did: handle.lower() for did, handle in handles.items() if handle
+        }
+        self.expires = expires or {}
+        self.postings: Dict[str, Set[str]] = {}
+        for did, handle in self.handles.items():
+            for gram in _trigrams(handle):
+                self.postings.setdefault(gram, set()).add(did)
+
+    def matching(self, substring: str, now: Optional[float] = None) -> Set[str]:
+        """DIDs whose handle contains ``substring`` (case-insensitive).
+
+        With ``now``, DIDs whose entry expired by then are left out.
+        """
+        found = self._matching(substring.lower())
+        if now is None or not self.expires:
+            return found
+        return {did for did in found if self.expires.get(did, now + 1) > now}
+
+    def _matching(self, needle: str) -> Set[str]:
+        if len(needle) < 3:
+            return {did for did, handle in self.handles.items() if needle in handle}
+
+        candidates: Optional[Set[str]] = None
+        for gram in sorted(
+            _trigrams(needle), key=lambda g: len(self.postings.get(g, ()))
+        ):
+            dids = self.postings.get(gram)
+            if not dids:
+                return set()
+            candidates = set(dids) if candidates is None else candidates & dids
+            if not candidates:
+                return set()
+        return {did for did in candidates or () if needle in self.handles[did]}
+
+
+# Handle indexes by database path, shared by every HandleCache in the process
+# (the web app opens one per request); each is tagged with the table state
+# (row count, latest update) it was built from. Rows only expire with time,
+# which doesn't change that state, so expiry is checked when matching
+_indexes: Dict[Path, Tuple[Tuple[int, int], HandleIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+class HandleCache:
+    """SQLite-based DID→handle cache with TTL support."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """Initialize handle cache.
+
+        Args:
+            db_path: Path to SQLite database file.
+                Defaults to ~/.skymarshal/handle_cache.db
+        """
+        if db_path is None:
+            db_path = Path.home() / ".skymarshal" / "handle_cache.db"
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema if not exists."""
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS handles (
+                    did TEXT PRIMARY KEY,
+                    handle TEXT NOT NULL,
+                    last_updated INTEGER NOT NULL,
+                    ttl INTEGER NOT NULL
+                )
+            """)
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_batch(self, dids: Iterable[str]) -> Dict[str, str]:
+        """Get fresh cached handles for DIDs.
+
+        Returns:
+            Dict mapping DID to handle; "" marks a DID known to have no profile
+        """
+        dids = list(dids)
+        results: Dict[str, str] = {}
+        current_time = int(time.time())
+
+        with self._get_connection() as conn:
+            # SQLite has a limit on the number of parameters, so batch the queries
+            batch_size = 999
+            for i in range(0, len(dids), batch_size):
+                batch = dids[i : i + batch_size]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"""
+                    SELECT did, handle FROM handles
+                    WHERE did IN ({placeholders}) AND last_updated + ttl > ?
+                """,
+                    batch + [current_time],
+                ).fetchall()
+                for row in rows:
+                    results[row["did"]] = row["handle"]
+
+        return results
+
+    def missing(self, dids: Iterable[str]) -> List[str]:
+        """DIDs without a fresh cache entry, in input order."""
+        dids = list(dict.fromkeys(dids))
+        known = self.get_batch(dids)
+        return [did for did in dids if did not in known]
+
+    def set_batch(self, handles: Dict[str, str], ttl: int = HANDLE_TTL):
+        """Cache handles; empty handles are stored with MISSING_TTL instead."""
+        if not handles:
+            return
+
+        current_time = int(time.time())
+        with self._get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO handles (did, handle, last_updated, ttl)
+                VALUES (?, ?, ?, ?)
+            """,
+                [
+                    (did, handle or "", current_time, ttl if handle else MISSING_TTL)
+                    for did, handle in handles.items()
+                ],
+            )
+            conn.commit()
+        self._drop_index()
+
+    def _drop_index(self):
+        with _indexes_lock:
+            _indexes.pop(self.db_path, None)
+
+    def resolve(
+        self,
+        dids: Iterable[str],
+        fetch: HandleFetcher,
+        max_workers: int = RESOLVE_WORKERS,
+    ) -> Dict[str, str]:
+        """Fetch and cache handles for ``dids`` that aren't cached yet.
+
+        Batches run concurrently; a failed batch is skipped and not cached,
+        so its DIDs are retried by the next call.
+
+        Returns:
+            Handles resolved by this call ("" for DIDs without a profile)
+        """
+        missing = self.missing(dids)
+        if not missing:
+            return {}
+
+        batches = [
+            missing[i : i + PROFILE_BATCH_SIZE]
+            for i in range(0, len(missing), PROFILE_BATCH_SIZE)
+        ]
+
+        def fetch_batch(batch: List[str]) -> Dict[str, str]:
+            try:
+                found = fetch(batch)
+            except Exception:
+                return {}
+            return {did: found.get(did, "") for did in batch}
+
+        resolved: Dict[str, str] = {}
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(batches)))
+        ) as pool:
+            for result in pool.map(fetch_batch, batches):
+                resolved.update(result)
+
+        self.set_batch(resolved)
+        return resolved
+
+    def matching_dids(
+        self, substring: str, within: Optional[Iterable[str]] = None
+    ) -> Set[str]:
+        """DIDs with a fresh cached handle containing ``substring``.
+
+        Args:
+            within: Only return DIDs from this collection (None for all)
+        """
+        with self._get_connection() as conn:
+            stamp = tuple(
+                conn.execute(
+                    "SELECT count(*), coalesce(max(last_updated), 0) FROM handles"
+                ).fetchone()
+            )
+            with _indexes_lock:
+                entry = _indexes.get(self.db_path)
+            if entry is not None and entry[0] == stamp:
+                index = entry[1]
+            else:
+                rows = conn.execute(
+                    "SELECT did, handle, last_updated + ttl AS expires "
+                    "FROM handles WHERE handle != ''"
+                ).fetchall()
+                index = HandleIndex(
+                    {row["did"]: row["handle"] for row in rows},
+                    {row["did"]: row["expires"] for row in rows},
+                )
+                with _indexes_lock:
+                    _indexes[self.db_path] = (stamp, index)
+
+        found = index.matching(substring, now=int(time.time()))
+        if within is not None:
+            found &= set(within)
+        return found
+
+    def clear_expired(self) -> int:
+        """Remove expired cache entries.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM handles WHERE (last_updated + ttl) <= ?",
+                (int(time.time()),),
+            )
+            deleted: int = cursor.rowcount
+            conn.commit()
+        self._drop_index()
+        return deleted
+
+    def clear_all(self):
+        """Clear all cache entries."""
+        with self._get_connection() as conn:
+            conn.execute("DELETE FROM handles")
+            conn.commit()
+        self._drop_index()
+
+    def __repr__(self) -> str:
+        return f"HandleCache(db={self.db_path})"
@@ -0,0 +1,405 @@
+"""
+Skymarshal Hydration Engine
+
+File Purpose: Asyncio engagement hydration over one pooled (HTTP/2 when available) httpx
+    client
+Primary Functions/Classes: HydrationEngine, SessionAuth, hydrate_post_counts, PostCounts
+Inputs and Outputs (I/O): Post URIs and the authenticated atproto Client in; per-URI
+    like/repost/reply counts out
+
+Engagement hydration used to run client.get_posts batches on a thread pool
+sharing one atproto Client, which isn't documented as thread-safe and tops
+out at a handful of blocking requests. HydrationEngine keeps many
+app.bsky.feed.getPosts batches in flight on a single event loop over one
+pooled httpx.AsyncClient. How many are in flight is decided by the shared
+ConcurrencyController of the client's PDS host, which grows the limit while
+the PDS keeps up and backs off on 429s and rate-limit headers. With the
+optional ``h2`` package installed
+(``pip install skymarshal[http2]``) they are multiplexed over one HTTP/2
+connection; without it the pool falls back to keep-alive HTTP/1.1.
+
+The engine only reads the session from the atproto Client. Token refresh
+happens in one place, SessionAuth.refresh, which serializes concurrent
+refreshes and delegates to the Client so its saved session stays current.
+That relies on private Client members (CLIENT_INTERNALS); SessionAuth
+refuses a Client without them, and the unit tests check them against the
+installed atproto, so an upgrade that drops one fails loudly.
+Results are returned as counts by URI; callers write them into ContentItems.
+Batches that still fail after their retries are logged and their URIs kept
+in HydrationEngine.failed_uris rather than counted as hydrated.
+A batch already in flight from another engine (say, a second web session
+hydrating the same posts) is awaited instead of fetched again.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+
+from .concurrency import ConcurrencyController, account_did, pds_controller
+from .exceptions import APIError, AuthenticationError
+from .rate_budget import budget_scope
+from .single_flight import POST_BATCHES, flight_group
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except ImportError:
+    h2 = None
+
+HAS_HTTP2 = h2 is not None
+
+logger = logging.getLogger(__name__)
+
+# app.bsky.feed.getPosts accepts at most this many URIs
+GET_POSTS_MAX_URIS = 25
+
+# Retries per batch after a 429, 5xx or transport error
+HYDRATION_RETRIES = 2
+
+# Seconds to wait before a retry (doubled per attempt; rate-limit pauses
+# come from the concurrency controller)
+RETRY_BACKOFF = 1.0
+
+HYDRATION_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+DEFAULT_BASE_URL = "https://bsky.social/xrpc"
+
+GET_POSTS_NSID = "app.bsky.feed.getPosts"
+
+# XRPC error names that mean the access token must be refreshed
+EXPIRED_TOKEN_ERRORS = {"ExpiredToken", "InvalidToken"}
+
+# Private atproto Client members SessionAuth reads (atproto has no public
+# API for the raw access token or a locked refresh)
+CLIENT_INTERNALS = (
+    "_base_url",
+    "_session",
+    "_refresh_lock",
+    "_should_refresh_session",
+    "_refresh_and_set_session",
+)
+
+# (like_count, repost_count, reply_count)
+PostCounts = Tuple[int, int, int]
+
+T = TypeVar("T")
+
+
+class _BatchFailed(Exception):
+    """A getPosts batch still failed (429, 5xx, transport) after its retries."""
+
+
+def missing_client_internals(client: Any) -> List[str]:
+    """CLIENT_INTERNALS that ``client`` lacks (empty for a supported atproto)."""
+    return [name for name in CLIENT_INTERNALS if not hasattr(client, name)]
+
+
+class SessionAuth:
+    """Bearer credentials taken from an atproto Client, refreshed in one place."""
+
+    def __init__(self, client: Any):
+        if client is None:
+            raise AuthenticationError("Authentication required for hydration")
+        missing = missing_client_internals(client)
+        if missing:
+            raise APIError(
+                "Unsupported atproto Client for hydration (missing "
+                + ", ".join(missing)
+                + "); install a supported atproto version"
+            )
+        self.client = client
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def base_url(self) -> str:
+        return str(self.client._base_url or DEFAULT_BASE_URL).rstrip("/")
+
+    @property
+    def access_token(self) -> Optional[str]:
+        return getattr(self.client._session, "access_jwt", None)
+
+    def headers(self) -> Dict[str, str]:
+        token = self.access_token
+        if not token:
+            raise AuthenticationError("Authentication required for hydration")
+        return {"Authorization": f"Bearer {token}"}
+
+    def _refresh_sync(self, force: bool) -> None:
+        # The Client's own lock, so a refresh can't race its other callers
+        with self.client._refresh_lock or nullcontext():
+            if not force and not self.client._should_refresh_session():
+                return
+            self.client._refresh_and_set_session()
+
+    async def refresh(self, stale_token: Optional[str] = None) -> None:
+        """Refresh the session once, however many batches saw it expire.
+
+        Args:
+            stale_token: Token the caller was rejected with; None refreshes
+                only if the Client considers the token close to expiry
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if stale_token is not None and self.access_token != stale_token:
+                return  # another batch already refreshed
+            try:
+                await asyncio.to_thread(self._refresh_sync, stale_token is not None)
+            except Exception as e:
+                raise AuthenticationError(
+                    "Authentication expired during hydration"
+                ) from e
+
+
+def _counts(post: Dict[str, Any]) -> PostCounts:
+    return (
+        int(post.get("likeCount") or 0),
+        int(post.get("repostCount") or 0),
+        int(post.get("replyCount") or 0),
+    )
+
+
+def _is_expired(response: httpx.Response) -> bool:
+    if response.status_code == 401:
+        return True
+    if response.status_code != 400:
+        return False
+    try:
+        return response.json().get("error") in EXPIRED_TOKEN_ERRORS
+    except ValueError:
+        return False
+
+
+class HydrationEngine:
+    """Concurrent getPosts batches on one event loop and one pooled connection."""
+
+    def __init__(
+        self,
+        auth: SessionAuth,
+        controller: Optional[ConcurrencyController] = None,
+        batch_size: int = GET_POSTS_MAX_URIS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """Initialize the engine.
+
+        Args:
+            auth: Session credentials
+            controller: Limits batches in flight; defaults to the shared
+                controller of the client's PDS host
+            batch_size: URIs per batch (capped at GET_POSTS_MAX_URIS)
+            transport: httpx transport override (tests)
+        """
+        self.auth = auth
+        self.controller = controller or pds_controller(auth.client)
+        self.batch_size = max(1, min(GET_POSTS_MAX_URIS, batch_size))
+        self.transport = transport
+        # URIs of batches that failed after their retries, across fetch_counts calls
+        self.failed_uris: List[str] = []
+
+    def _http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.auth.base_url,
+            http2=HAS_HTTP2 and self.transport is None,
+            limits=httpx.Limits(
+                max_connections=self.controller.max_limit,
+                max_keepalive_connections=self.controller.max_limit,
+            ),
+            timeout=HYDRATION_TIMEOUT,
+            transport=self.transport,
+        )
+
+    async def _get_posts(
+        self, http: httpx.AsyncClient, batch: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Posts for one batch, shared with identical batches in flight anywhere."""
+        key = (self.auth.base_url, tuple(batch))
+        return await flight_group(POST_BATCHES).do_async(
+            key, lambda: self._fetch_posts(http, batch)
+        )
+
+    async def _fetch_posts(
+        self, http: httpx.AsyncClient, batch: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Posts for one batch; [] if the PDS rejects it outright.
+
+        Raises:
+            _BatchFailed: 429s, 5xx or transport errors outlasted the retries
+        """
+        refreshed = False
+        attempt = 0
+        while True:
+            token = self.auth.access_token
+            headers = self.auth.headers()
+            response: Optional[httpx.Response] = None
+            await self.controller.acquire_async()
+            start = time.monotonic()
+            try:
+                response = await http.get(
+                    f"/{GET_POSTS_NSID}", params={"uris": batch}, headers=headers
+                )
+            except httpx.TransportError:
+                pass
+            finally:
+                self.controller.release(
+                    time.monotonic() - start,
+                    status=response.status_code if response is not None else None,
+                    headers=response.headers if response is not None else None,
+                    error=response is None,
+                )
+            if response is not None:
+                if _is_expired(response):
+                    if refreshed:
+                        raise AuthenticationError(
+                            "Authentication expired during hydration"
+                        )
+                    await self.auth.refresh(stale_token=token)
+                    refreshed = True
+                    continue
+                if response.status_code == 200:
+                    try:
+                        return list(response.json().get("posts") or [])
+                    except ValueError:
+                        return []
+                if response.status_code != 429 and response.status_code < 500:
+                    return []
+
+            if attempt >= HYDRATION_RETRIES:
+                status = (
+                    response.status_code if response is not None else "transport error"
+                )
+                raise _BatchFailed(status)
+            await asyncio.sleep(RETRY_BACKOFF * (2**attempt))
+            attempt += 1
+
+    async def fetch_counts(
+        self,
+        uris: Sequence[str],
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, PostCounts]:
+        """Engagement counts for ``uris`` (URIs without a post view are left out).
+
+        Args:
+            uris: AT URIs of posts
+            progress_callback: Optional callable taking the cumulative number
+                of URIs processed; called on the event loop thread. URIs of
+                failed batches aren't counted; they go to failed_uris
+
+        Raises:
+            AuthenticationError: If the session can't be refreshed
+        """
+        uris = list(dict.fromkeys(uri for uri in uris if uri))
+        if not uris:
+            return {}
+        batches = [
+            uris[i : i + self.batch_size] for i in range(0, len(uris), self.batch_size)
+        ]
+
+        await self.auth.refresh()
+        failed_before = len(self.failed_uris)
+        with budget_scope(account=account_did(self.auth.client)):
+            results = await self._fetch_batches(batches, progress_callback)
+        failed = len(self.failed_uris) - failed_before
+        if failed:
+            logger.warning(
+                "Hydration: %d of %d URIs not hydrated; their batches kept failing",
+                failed,
+                len(uris),
+            )
+        return results
+
+    async def _fetch_batches(
+        self,
+        batches: List[List[str]],
+        progress_callback: Optional[Callable[[int], None]],
+    ) -> Dict[str, PostCounts]:
+        # Tasks created here inherit the account's budget scope
+        results: Dict[str, PostCounts] = {}
+        processed = 0
+        # Caps the tasks waiting on the controller; it decides how many run
+        semaphore = asyncio.Semaphore(self.controller.max_limit)
+
+        async with self._http_client() as http:
+
+            async def run(batch: List[str]) -> int:
+                async with semaphore:
+                    try:
+                        posts = await self._get_posts(http, batch)
+                    except _BatchFailed as e:
+                        logger.debug(
+                            "getPosts batch of %d URIs failed: %s", len(batch), e
+                        )
+                        self.failed_uris.extend(batch)
+                        return 0
+                for post in posts:
+                    uri = post.get("uri") if isinstance(post, dict) else None
+                    if uri:
+                        results[uri] = _counts(post)
+                return len(batch)
+
+            tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    processed += await finished
+                    if callable(progress_callback):
+                        try:
+                            progress_callback(processed)
+                        except Exception:
+                            pass
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        return results
+
+
+def _run(coro_factory: Callable[[], Coroutine[Any, Any, T]]) -> T:
+    """Run a coroutine to completion from synchronous code.
+
+    Uses a private thread when the caller is already inside an event loop;
+    the caller's context (budget_scope) is carried over to it.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro_factory())
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(context.run, lambda: asyncio.run(coro_factory())).result()
+
+
+def hydrate_post_counts(
+    client: Any,
+    uris: Sequence[str],
+    batch_size: int = GET_POSTS_MAX_URIS,
+    controller: Optional[ConcurrencyController] = None,
+    progress_callback: Optional[Callable[[int], None]] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, PostCounts]:
+    """Fetch engagement counts for ``uris`` with a HydrationEngine (blocking).
+
+    Raises:
+        AuthenticationError: If there's no session or it can't be refreshed
+    """
+    engine = HydrationEngine(
+        SessionAuth(client),
+        controller=controller,
+        batch_size=batch_size,
+        transport=transport,
+    )
+    return _run(lambda: engine.fetch_counts(uris, progress_callback))
@@ -0,0 +1,217 @@
+"""
+Skymarshal Keyword Index
+
+File Purpose: Token-level inverted index that narrows keyword searches before regex
+    matching
+Primary Functions/Classes: KeywordIndex, keyword_index_for, parse_search_terms
+Inputs and Outputs (I/O): ContentItem lists in, candidate item sets out
+
+A KeywordIndex is built once per loaded dataset and maps every lowercase word
+token of an item's text to the positions of the items containing it. A keyword
+search first intersects posting lists to find the items that could possibly
+match, and SearchManager then runs the exact operator regexes on just those.
+The index only ever over-approximates, so results are the same as a full scan.
+"""
+
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .models import ContentItem
+from .text_features import TOKEN_RE, text_features
+
+# Below this many items a plain regex scan is cheaper than building an index
+INDEX_MIN_ITEMS = 2000
+
+# Datasets kept indexed at once (e.g. one per account open in the web UI)
+INDEX_CACHE_SIZE = 4
+
+# A search term as parsed by SearchManager: (mode, text), mode being
+# "phrase" (case-sensitive), "word" (\bword\b) or "substring"
+SearchTerm = Tuple[str, str]
+
+
+def _parse_keyword(keyword: str) -> SearchTerm:
+    """Split one keyword into its (mode, text) search term."""
+    if keyword.startswith('"') and keyword.endswith('"') and len(keyword) > 2:
+        return ("phrase", keyword[1:-1])
+    if keyword.startswith("\\b") and keyword.endswith("\\b") and len(keyword) > 4:
+        return ("word", keyword[2:-2])
+    return ("substring", keyword)
+
+
+def parse_search_terms(
+    keywords: Sequence[str],
+) -> Tuple[List[SearchTerm], List[SearchTerm], List[SearchTerm]]:
+    """Parse search keywords into (positive, negative, required) terms.
+
+    ``-keyword`` negates, ``+keyword`` requires; either prefix combines with
+    ``"exact phrase"`` and ``\\bword\\b``.
+    """
+    positive, negative, required = [], [], []
+    for keyword in keywords or []:
+        keyword = keyword.strip()
+        if not keyword:
+            continue
+        if keyword.startswith("-") and len(keyword) > 1:
+            negative.append(_parse_keyword(keyword[1:]))
+        elif keyword.startswith("+") and len(keyword) > 1:
+            required.append(_parse_keyword(keyword[1:]))
+        else:
+            positive.append(_parse_keyword(keyword))
+    return positive, negative, required
+
+
+def term_pattern(term: SearchTerm) -> Tuple[str, int]:
+    """Regex source and flags for a search term."""
+    mode, text = term
+    if mode == "phrase":
+        return re.escape(text), 0
+    if mode == "word":
+        return r"\b" + re.escape(text) + r"\b", re.IGNORECASE
+    return re.escape(text), re.IGNORECASE
+
+
+class KeywordIndex:
+    """Inverted index over the ``text`` of a list of ContentItems."""
+
+    def __init__(self, items: Sequence[ContentItem]):
+        self.source = items
+        self.size = len(items)
+        self.items: List[ContentItem] = list(items)
+
+        postings: Dict[str, List[int]] = {}
+        # A few letters ("İ", "ı", "ſ") match ASCII under re.IGNORECASE but
+        # don't lowercase to it; items containing them are always checked
+        always: List[int] = []
+        for pos, item in enumerate(self.items):
+            text = item.text
+            if not text:
+                continue
+            # Shared with cleanup and analytics through the feature memo
+            features = text_features(text)
+            lowered = features.lowered
+            if len(lowered) != len(text) or "ı" in lowered or "ſ" in lowered:
+                always.append(pos)
+            for token in set(features.tokens):
+                postings.setdefault(token, []).append(pos)
+
+        self.postings: Dict[str, array] = {
+            token: array("I", positions) for token, positions in postings.items()
+        }
+        self.always = frozenset(always)
+
+    def is_current(self, items: Sequence[ContentItem]) -> bool:
+        """Whether this index was built from ``items`` as they are now."""
+        return self.source is items and self.size == len(items)
+
+    def select(
+        self, items: Sequence[ContentItem], positions: Iterable[int]
+    ) -> List[ContentItem]:
+        """Return the indexed items at ``positions`` in the order of ``items``.
+
+        Positions are those at build time; if the list has since been
+        reordered in place, fall back to matching items by identity.
+        """
+        ordered = sorted(positions)
+        snapshot = self.items
+        if all(items[pos] is snapshot[pos] for pos in ordered):
+            return [snapshot[pos] for pos in ordered]
+        wanted = {id(snapshot[pos]) for pos in ordered}
+        return [item for item in items if id(item) in wanted]
+
+    def _containing(self, fragment: str) -> Set[int]:
+        """Positions of items with a token containing ``fragment`` ("cat", "concat")."""
+        found: Set[int] = set()
+        for token, positions in self.postings.items():
+            if fragment in token:
+                found.update(positions)
+        return found
+
+    def term_candidates(self, term: SearchTerm) -> Optional[Set[int]]:
+        """Positions that may match ``term``, or None if the index can't narrow it."""
+        mode, text = term
+        if not text.isascii():
+            # str.lower() and re.IGNORECASE disagree on some non-ASCII letters
+            return None
+        lowered = text.lower()
+        tokens = TOKEN_RE.findall(lowered)
+        if not tokens:
+            return None
+
+        if mode == "word" and TOKEN_RE.fullmatch(lowered):
+            found = set(self.postings.get(lowered, ()))
+        else:
+            # A substring match implies every word fragment of the keyword sits
+            # inside some token of the text (the ends may be partial tokens)
+            words = sorted(set(tokens), key=len, reverse=True)
+            found = self._containing(words[0])
+            for token in words[1:]:
+                if not found:
+                    break
+                found = found & self._containing(token)
+        return found | self.always
+
+    def candidates(
+        self, positive: Sequence[SearchTerm], required: Sequence[SearchTerm]
+    ) -> Optional[Set[int]]:
+        """Positions that may satisfy all ``required`` and any ``positive`` term.
+
+        Returns:
+            Set of positions into :attr:`items`, or None when every item has
+            to be checked (e.g. negation-only searches)
+        """
+        result: Optional[Set[int]] = None
+        for term in required:
+            found = self.term_candidates(term)
+            if found is None:
+                continue
+            result = found if result is None else result & found
+            if not result:
+                return result
+
+        if positive:
+            union: Set[int] = set()
+            for term in positive:
+                found = self.term_candidates(term)
+                if found is None:
+                    break  # some positive term can't be narrowed
+                union |= found
+            else:
+                result = union if result is None else result & union
+        return result
+
+
+_cache: "OrderedDict[int, KeywordIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def keyword_index_for(items: Sequence[ContentItem]) -> KeywordIndex:
+    """Return the cached index for ``items``, building it on first use.
+
+    Indexes are keyed by list identity, so the same loaded dataset (e.g. a
+    ContentService cache entry) is tokenized once however many searches run
+    against it. Growing or shrinking the list triggers a rebuild.
+    """
+    key = id(items)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None and index.is_current(items):
+            _cache.move_to_end(key)
+            return index
+
+    index = KeywordIndex(items)
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def clear_keyword_indexes() -> None:
+    """Drop all cached indexes."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,174 @@
+"""
+Skymarshal Keyword Plans
+
+File Purpose: Process-wide LRU of compiled keyword search plans shared across search
+    requests
+Primary Functions/Classes: KeywordPlan, PlanCache, keyword_plan_for, normalize_keywords,
+    keyword_plan_stats
+Inputs and Outputs (I/O): Search keywords in; compiled operator regexes and term
+    matchers out
+
+Every search used to recompile its keyword operators, even when a web user
+only paged or re-sorted, and popular terms were recompiled for every
+session of the API server. A KeywordPlan holds everything a keyword search
+needs (parsed terms, the operator regexes, and a TermMatcher for large term
+sets); plans are cached process-wide, keyed by the normalized keyword list,
+behind a lock so the threaded Flask-SocketIO server can share them.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .keyword_index import SearchTerm, parse_search_terms, term_pattern
+from .term_matcher import MATCHER_MIN_TERMS, TermMatcher
+
+# Distinct keyword lists kept compiled
+PLAN_CACHE_SIZE = 256
+
+
+def normalize_keywords(keywords: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Stripped, de-duplicated, ordered keywords.
+
+    The operators don't depend on keyword order, so reordered or repeated
+    keywords share one plan (the same rule as query_cache.filters_key).
+    """
+    return tuple(sorted({k.strip() for k in keywords or () if k and k.strip()}))
+
+
+@dataclass(frozen=True)
+class KeywordPlan:
+    """Compiled form of one keyword list."""
+
+    keywords: Tuple[str, ...]
+    positive: Tuple[SearchTerm, ...]
+    negative: Tuple[SearchTerm, ...]
+    required: Tuple[SearchTerm, ...]
+    positive_regexes: Dict[str, "re.Pattern"]
+    negative_regexes: List["re.Pattern"]
+    required_regexes: List["re.Pattern"]
+    # Single-pass matcher, set once the plan has MATCHER_MIN_TERMS terms
+    matcher: Optional[TermMatcher]
+
+    @property
+    def regexes(
+        self,
+    ) -> Tuple[Dict[str, "re.Pattern"], List["re.Pattern"], List["re.Pattern"]]:
+        """(positive, negative, required) regexes in the form SearchManager uses."""
+        return self.positive_regexes, self.negative_regexes, self.required_regexes
+
+    @property
+    def term_count(self) -> int:
+        return len(self.positive) + len(self.negative) + len(self.required)
+
+
+def compile_keyword_plan(keywords: Sequence[str]) -> KeywordPlan:
+    """Compile keyword operators without consulting the cache."""
+    keywords = normalize_keywords(keywords)
+    positive, negative, required = parse_search_terms(keywords)
+
+    # Plain and word terms share one case-insensitive alternation, phrases
+    # one case-sensitive alternation
+    case_sensitive_patterns = []
+    case_insensitive_patterns = []
+    for term in positive:
+        pattern, flags = term_pattern(term)
+        if flags:
+            case_insensitive_patterns.append(pattern)
+        else:
+            case_sensitive_patterns.append(pattern)
+
+    positive_regexes = {}
+    if case_sensitive_patterns:
+        positive_regexes["case_sensitive"] = re.compile(
+            "|".join(case_sensitive_patterns), 0
+        )
+    if case_insensitive_patterns:
+        positive_regexes["case_insensitive"] = re.compile(
+            "|".join(case_insensitive_patterns), re.IGNORECASE
+        )
+
+    matcher = None
+    if len(positive) + len(negative) + len(required) >= MATCHER_MIN_TERMS:
+        matcher = TermMatcher(positive, negative, required)
+
+    return KeywordPlan(
+        keywords=keywords,
+        positive=tuple(positive),
+        negative=tuple(negative),
+        required=tuple(required),
+        positive_regexes=positive_regexes,
+        negative_regexes=[re.compile(*term_pattern(term)) for term in negative],
+        required_regexes=[re.compile(*term_pattern(term)) for term in required],
+        matcher=matcher,
+    )
+
+
+class PlanCache:
+    """Thread-safe LRU of normalized keyword lists to KeywordPlans."""
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, ...], KeywordPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, keywords: Sequence[str]) -> KeywordPlan:
+        """Cached plan for ``keywords``, compiling it on a miss."""
+        key = normalize_keywords(keywords)
+        with self._lock:
+            plan = self._entries.get(key)
+            if plan is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        # Compile outside the lock; a concurrent miss on the same key just
+        # compiles twice and keeps one
+        plan = compile_keyword_plan(key)
+        with self._lock:
+            plan = self._entries.setdefault(key, plan)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        """Drop all plans (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+_plans = PlanCache()
+
+
+def keyword_plan_for(keywords: Optional[Sequence[str]]) -> Optional[KeywordPlan]:
+    """Shared compiled plan for ``keywords``, or None if there are no terms."""
+    key = normalize_keywords(keywords)
+    if not key:
+        return None
+    return _plans.get(key)
+
+
+def keyword_plan_stats() -> Dict[str, int]:
+    """Hit/miss counters of the process-wide plan cache."""
+    return _plans.stats()
+
+
+def clear_keyword_plans() -> None:
+    """Drop all cached plans."""
+    _plans.clear()
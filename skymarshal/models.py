@@ -10,10 +10,10 @@ for representing Bluesky content, user preferences, search criteria, and operati
 """
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
 
 import sys
 from contextlib import contextmanager
@@ -86,20 +86,148 @@ class ContentType(Enum):
     LIKES = "likes"
 
 
-@dataclass
+# content_type values each ContentType filter keeps (ALL keeps everything)
+CONTENT_TYPE_FILTERS = {
+    ContentType.POSTS: ("post",),
+    ContentType.REPLIES: ("reply",),
+    ContentType.COMMENTS: ("reply",),
+    ContentType.REPOSTS: ("repost",),
+    ContentType.LIKES: ("like",),
+}
+
+
+# raw_data keys anything outside the loader reads; everything else in a stored
+# record is reachable through ContentItem.full_record()
+RAW_DATA_FIELDS = (
+    "subject_uri",
+    "subject_cid",
+    "self_repost",
+    "subject_like_count",
+    "subject_repost_count",
+    "subject_reply_count",
+    "has_media",
+)
+
+
+def compact_raw_data(raw: Any) -> Optional[Dict]:
+    """Reduce a stored record or raw_data dict to :data:`RAW_DATA_FIELDS`.
+
+    Loaders used to keep the whole export record as raw_data, which roughly
+    doubled the memory held per item. Media embeds collapse to a boolean
+    ``has_media`` flag. Returns None when nothing is worth keeping.
+    """
+    if not isinstance(raw, dict):
+        return None
+    compact = {key: raw[key] for key in RAW_DATA_FIELDS if raw.get(key) is not None}
+    if raw.get("embed") or raw.get("image"):
+        compact["has_media"] = True
+    return compact or None
+
+
 class ContentItem:
-    """Represents a piece of content from Bluesky."""
-
-    uri: str
-    cid: str
-    content_type: str
-    text: Optional[str] = None
-    created_at: Optional[str] = None
-    reply_count: int = 0
-    repost_count: int = 0
-    like_count: int = 0
-    engagement_score: float = 0.0
-    raw_data: Optional[Dict] = None
+    """Represents a piece of content from Bluesky.
+
+    A plain slotted class rather than a dataclass: accounts with hundreds of
+    thousands of records keep one of these per record in memory, and slots
+    avoid a per-instance ``__dict__``. ``content_type`` is interned.
+    """
+
+    __slots__ = (
+        "uri",
+        "cid",
+        "content_type",
+        "text",
+        "_created_at",
+        "created_ts",
+        "reply_count",
+        "repost_count",
+        "like_count",
+        "engagement_score",
+        "raw_data",
+        "_record_loader",
+    )
+
+    _FIELDS = (
+        "uri",
+        "cid",
+        "content_type",
+        "text",
+        "created_at",
+        "reply_count",
+        "repost_count",
+        "like_count",
+        "engagement_score",
+        "raw_data",
+    )
+
+    def __init__(
+        self,
+        uri: str,
+        cid: str,
+        content_type: str,
+        text: Optional[str] = None,
+        created_at: Optional[str] = None,
+        reply_count: int = 0,
+        repost_count: int = 0,
+        like_count: int = 0,
+        engagement_score: float = 0.0,
+        raw_data: Optional[Dict] = None,
+        record_loader: Optional[Callable[[str], Optional[Dict]]] = None,
+    ):
+        self.uri = uri
+        self.cid = cid
+        self.content_type = sys.intern(content_type) if content_type else content_type
+        self.text = text
+        self.created_at = created_at
+        self.reply_count = reply_count
+        self.repost_count = repost_count
+        self.like_count = like_count
+        self.engagement_score = engagement_score
+        self.raw_data = raw_data
+        self._record_loader = record_loader
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return self._created_at
+
+    @created_at.setter
+    def created_at(self, value: Optional[str]) -> None:
+        # Parsed once here; filters, sorts and buckets compare created_ts
+        self._created_at = value
+        self.created_ts = to_timestamp(value)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._FIELDS)
+        return f"ContentItem({fields})"
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+
+    __hash__: ClassVar[None] = None  # type: ignore[assignment]
+
+    def __getstate__(self):
+        # The loader usually closes over a DataManager; don't drag it along
+        return tuple(getattr(self, name) for name in self._FIELDS)
+
+    def __setstate__(self, state):
+        for name, value in zip(self._FIELDS, state):
+            setattr(self, name, value)
+        self._record_loader = None
+
+    def full_record(self) -> Optional[Dict]:
+        """Return the complete stored record, read from disk on demand.
+
+        Items from load_exported_data keep only :data:`RAW_DATA_FIELDS` in
+        ``raw_data``; this fetches everything else from the export file. For
+        items with no backing file it returns ``raw_data``.
+        """
+        if self._record_loader is not None:
+            record = self._record_loader(self.uri)
+            if record is not None:
+                return record
+        return self.raw_data
 
     def update_engagement_score(self) -> float:
         """Update and return the cached engagement score."""
@@ -119,7 +247,10 @@ class UserSettings:
     )
     records_page_size: int = 100
     hydrate_batch_size: int = 100
+    # Above 1, categories are listed in parallel (the PDS controller sizes the pool)
     category_workers: int = 3
+    # Worker processes for decoding large CAR backups (0 or 1 decodes in-process)
+    car_decode_workers: int = 0
     # Cache settings
     engagement_cache_enabled: bool = True
     engagement_cache_ttl_recent: int = 3600  # 1 hour for posts < 7 days old
@@ -129,6 +260,11 @@ class UserSettings:
     high_engagement_threshold: int = 20
     use_subject_engagement_for_reposts: bool = True
     fetch_order: str = "newest"
+    # Local export format: "sqlite" (<handle>.db content store), "cbor" or "json"
+    export_format: str = "sqlite"
+    # Web search: "auto" queries a .db store directly unless the data is
+    # already in memory, "sqlite" always prefers the store, "memory" never does
+    search_backend: str = "auto"
     # Derived metrics (updated at runtime after data load)
     avg_likes_per_post: float = 0.0
     avg_engagement_per_post: float = 0.0
@@ -138,7 +274,7 @@ class UserSettings:
 class SearchFilters:
     """Search and filter criteria."""
 
-    keywords: List[str] = None
+    keywords: Optional[List[str]] = None
     min_engagement: int = 0
     max_engagement: int = 999999
     min_likes: int = 0
@@ -153,6 +289,19 @@ class SearchFilters:
     subject_contains: Optional[str] = None
     subject_handle_contains: Optional[str] = None
 
+    def timestamp_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """Start and end dates as inclusive epoch-microsecond bounds.
+
+        Date-only values are UTC days; an end date covers its whole day.
+        """
+        sd = parse_datetime(self.start_date)
+        ed = parse_datetime(self.end_date)
+        if sd and sd.tzinfo is None:
+            sd = sd.replace(tzinfo=timezone.utc)
+        if ed and ed.tzinfo is None:
+            ed = ed.replace(hour=23, minute=59, second=59, microsecond=999999, tzinfo=timezone.utc)
+        return to_timestamp(sd), to_timestamp(ed)
+
 
 def parse_datetime(
     date_str: Optional[str], default_on_error: Optional[datetime] = None
@@ -185,6 +334,50 @@ def parse_datetime(
         return default_on_error
 
 
+# Sort key for records without a usable date: older than any real timestamp
+TS_MIN = -(1 << 63)
+
+US_PER_HOUR = 3_600_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_timestamp(value: Any) -> Optional[int]:
+    """Convert an ISO8601 string or datetime to integer epoch microseconds.
+
+    Naive values are taken as UTC. Integer microseconds compare exactly like
+    the datetimes they came from, without re-parsing or timezone checks.
+
+    Returns:
+        Epoch microseconds, or None if the value is missing or unparseable
+    """
+    dt = value if isinstance(value, datetime) else parse_datetime(value)
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+def from_timestamp(ts: int) -> datetime:
+    """Convert epoch microseconds back to an aware UTC datetime."""
+    return _EPOCH + timedelta(microseconds=ts)
+
+
+def utc_hour_and_weekday(ts: int) -> Tuple[int, int]:
+    """UTC hour of day and weekday (Monday is 0) of an epoch-microsecond timestamp."""
+    # 1970-01-01 was a Thursday
+    return ts // US_PER_HOUR % 24, (ts // US_PER_DAY + 3) % 7
+
+
+def created_sort_key(item: "ContentItem") -> int:
+    """Sort key ordering items by creation time, undated items first."""
+    ts = item.created_ts
+    return TS_MIN if ts is None else ts
+
+
 def merge_content_items(
     category: str,
     new_items: List[Dict],
@@ -216,8 +409,9 @@ def merge_content_items(
     # Sort by creation date if applicable - optimized single-pass categorization
     if category in ("posts", "likes", "reposts"):
 
-        def to_dt(s):
-            return parse_datetime(s) or datetime.min
+        def to_ts(s):
+            ts = to_timestamp(s)
+            return TS_MIN if ts is None else ts
 
         # Single pass to separate items with/without dates
         items_with_dates = []
@@ -230,7 +424,7 @@ def merge_content_items(
 
         # Sort items with dates
         items_with_dates.sort(
-            key=lambda it: to_dt(it.get("created_at")),
+            key=lambda it: to_ts(it.get("created_at")),
             reverse=(fetch_order == "newest"),
         )
 
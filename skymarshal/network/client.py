@@ -7,12 +7,15 @@ Uses sync requests (eventlet-compatible) instead of async httpx.
 from __future__ import annotations
 
 import logging
-import threading
 import time
 from typing import Any, Dict, Iterable, List, Optional
 
 import requests
 
+from skymarshal.concurrency import PUBLIC_API, ConcurrencyController, controller_for
+from skymarshal.rate_budget import BACKGROUND, RateLimiter, budget_for  # noqa: F401 (RateLimiter re-exported)
+from skymarshal.single_flight import PROFILE_LOOKUPS, flight_group
+
 logger = logging.getLogger(__name__)
 
 # Bluesky public API base URL
@@ -25,73 +28,16 @@ DEFAULT_TIMEOUT = 30
 DEFAULT_MAX_RETRIES = 3
 
 
-class RateLimiter:
-    """Points-based rate limiter for Bluesky API.
-
-    Bluesky uses 3000 points/hour for unauthenticated, 5000 for authenticated.
-    Thread-safe via threading.Lock (eventlet-compatible).
-    """
-
-    def __init__(
-        self,
-        max_points: int = DEFAULT_MAX_POINTS,
-        window_seconds: int = DEFAULT_WINDOW_SECONDS,
-    ) -> None:
-        self.max_points = max_points
-        self.window_seconds = window_seconds
-        self._requests: List[tuple] = []  # (timestamp, points_cost)
-        self._lock = threading.Lock()
-
-    def acquire(self, points_cost: int = 1) -> None:
-        """Block until we can safely make a request without exceeding rate limit."""
-        with self._lock:
-            now = time.time()
-            cutoff = now - self.window_seconds
-            self._requests = [
-                (ts, cost) for ts, cost in self._requests if ts > cutoff
-            ]
-            current_points = sum(cost for _, cost in self._requests)
-
-            if current_points + points_cost > self.max_points:
-                if self._requests:
-                    oldest_ts = self._requests[0][0]
-                    wait_time = (oldest_ts + self.window_seconds) - now + 1
-                    if wait_time > 0:
-                        logger.warning(
-                            "Rate limit approaching (%d/%d points). Waiting %.1fs...",
-                            current_points,
-                            self.max_points,
-                            wait_time,
-                        )
-                        # Release lock during sleep so other threads aren't blocked
-                        self._lock.release()
-                        try:
-                            time.sleep(wait_time)
-                        finally:
-                            self._lock.acquire()
-                        # Retry after waiting
-                        return self.acquire(points_cost)
-
-            self._requests.append((now, points_cost))
-
-    def get_usage_stats(self) -> Dict[str, int]:
-        """Return current rate limit usage statistics."""
-        now = time.time()
-        cutoff = now - self.window_seconds
-        recent = [(ts, cost) for ts, cost in self._requests if ts > cutoff]
-        total_points = sum(cost for _, cost in recent)
-        return {
-            "points_used": total_points,
-            "points_remaining": max(0, self.max_points - total_points),
-            "max_points": self.max_points,
-            "requests_in_window": len(recent),
-        }
-
-
 class BlueskyClient:
     """Sync wrapper around the Bluesky public XRPC API.
 
-    Uses requests.Session with rate limiting and exponential backoff.
+    Uses requests.Session with rate limiting and exponential backoff. Every
+    attempt takes a slot from the shared public-API concurrency controller,
+    which adapts to latency, 429/5xx responses and rate-limit headers, and
+    spends its points from the process-wide public-API rate budget. Clients
+    default to the background lane; ``consumer`` names whose share of the
+    budget the client spends (e.g. the web user who started a job).
+    Identical profile lookups in flight from any client share one request.
     """
 
     def __init__(
@@ -100,10 +46,17 @@ class BlueskyClient:
         base_url: str = BLUESKY_API_BASE,
         timeout: int = DEFAULT_TIMEOUT,
         max_points: int = DEFAULT_MAX_POINTS,
+        concurrency: Optional[ConcurrencyController] = None,
+        lane: str = BACKGROUND,
+        consumer: Optional[str] = None,
     ) -> None:
         self._base_url = base_url.rstrip("/")
+        # max_points only applies if this client is the first to use the budget
+        self._budget = budget_for(PUBLIC_API, max_points=max_points)
+        self.concurrency = concurrency or controller_for(PUBLIC_API, initial=8)
+        self.lane = lane
+        self.consumer = consumer
         self._timeout = timeout
-        self._rate_limiter = RateLimiter(max_points=max_points)
         self._session = requests.Session()
         self._session.headers.update(
             {
@@ -117,7 +70,7 @@ class BlueskyClient:
         self._session.close()
 
     def get_rate_limit_stats(self) -> Dict[str, int]:
-        return self._rate_limiter.get_usage_stats()
+        return self._budget.get_usage_stats()
 
     def _request(
         self,
@@ -127,13 +80,15 @@ class BlueskyClient:
         max_retries: int = DEFAULT_MAX_RETRIES,
     ) -> Dict[str, Any]:
         """Make a request with rate limiting and exponential backoff."""
-        self._rate_limiter.acquire(points_cost)
-
         last_exception: Optional[Exception] = None
         for attempt in range(max_retries):
             try:
                 url = f"{self._base_url}{endpoint}"
-                response = self._session.get(url, params=params, timeout=self._timeout)
+                if self.concurrency.budget is None:
+                    self._budget.acquire(points_cost, self.lane, self.consumer)
+                with self.concurrency.slot(points_cost, self.lane, self.consumer) as slot:
+                    response = self._session.get(url, params=params, timeout=self._timeout)
+                    slot.observe(response.status_code, response.headers)
                 response.raise_for_status()
                 return response.json()
 
@@ -194,6 +149,18 @@ class BlueskyClient:
             raise last_exception
         raise RuntimeError(f"Request to {endpoint} failed after {max_retries} retries")
 
+    def _shared_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """_request, coalesced with identical requests in flight from any client.
+
+        The response is shared between callers and must not be modified.
+        """
+        key = (
+            self._base_url,
+            endpoint,
+            tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in params.items())),
+        )
+        return flight_group(PROFILE_LOOKUPS).do(key, self._request, endpoint, params=params)
+
     # -----------------------------------------------------------------------
     # Profile endpoints
     # -----------------------------------------------------------------------
@@ -201,7 +168,7 @@ class BlueskyClient:
     def get_profile(self, handle: str) -> Optional[Dict[str, Any]]:
         """Return profile info for a handle."""
         try:
-            return self._request(
+            return self._shared_request(
                 "/app.bsky.actor.getProfile", params={"actor": handle}
             )
         except requests.HTTPError as exc:
@@ -216,7 +183,7 @@ class BlueskyClient:
         if not handle_list:
             return []
         try:
-            data = self._request(
+            data = self._shared_request(
                 "/app.bsky.actor.getProfiles", params={"actors": handle_list}
             )
         except requests.HTTPError:
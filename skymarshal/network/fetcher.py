@@ -34,11 +34,13 @@ class NetworkFetcher:
         client: BlueskyClient,
         *,
         analytics: GraphAnalytics | None = None,
-        max_workers: int = 8,
+        max_workers: Optional[int] = None,
     ) -> None:
         self._client = client
         self._analytics = analytics
-        self._max_workers = max_workers
+        # Threads available to the client's concurrency controller, which
+        # decides how many of them have a request in flight
+        self._max_workers = max_workers or client.concurrency.max_limit
 
     def fetch_network(
         self,
@@ -0,0 +1,318 @@
+"""
+Skymarshal Query Cache
+
+File Purpose: LRU cache of ordered search results keyed by normalized filters and
+    dataset version
+Primary Functions/Classes: QueryCache, filters_key, dataset_version, counts_version,
+    bump_dataset_version, mark_data_changed, Cursor, encode_cursor, decode_cursor,
+    resume_position
+Inputs and Outputs (I/O): SearchFilters and dataset identity in; cached ordered URI
+    tuples and page cursors out
+
+Web clients page through the same result set ("show more", next page) with
+identical filters, and every request used to rerun the full filter and sort.
+A QueryCache keeps the ordered URIs of recent searches so a page is a slice.
+Keys include the version of the dataset searched, so stale results are
+never served. Versions are kept per dataset (the owning account's DID, the
+host of every at:// URI in it), so one user's load or delete doesn't retire
+everyone's searches. Loading and deleting bump the dataset version.
+Hydration changes only engagement counts, which don't affect the date
+ordering; it bumps a separate counts version that only searches filtering
+on counts include, unless it changed whether a textless item counts as
+empty (which every search filters on).
+
+Paged endpoints hand out opaque cursors: URL-safe base64 of a small JSON
+object holding a hash of the query, the dataset version, the next position,
+the last item's sort key and URI, and the total. While the version matches,
+the next page is a slice of the cached URIs. After the data changed, the
+page resumes after the last URI seen (or, if that item is gone, after its
+sort key), so infinite scroll neither repeats nor skips items.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+from .exceptions import ValidationError
+from .models import TS_MIN, SearchFilters
+from .range_index import clear_range_indexes
+
+# Distinct searches kept per cache
+QUERY_CACHE_SIZE = 32
+
+# One counter hands out every version, so versions of any kind only grow
+_counter = 0
+_all_version = 0  # last change to every dataset at once
+_dataset_versions: Dict[str, int] = {}
+_counts_versions: Dict[str, int] = {}
+_version_lock = threading.Lock()
+
+_COUNT_FILTERS = (
+    "min_engagement",
+    "max_engagement",
+    "min_likes",
+    "max_likes",
+    "min_reposts",
+    "max_reposts",
+    "min_replies",
+    "max_replies",
+)
+_DEFAULT_FILTERS = SearchFilters()
+
+
+def dataset_of(uri: str) -> str:
+    """Dataset (owning DID) of an at:// record URI."""
+    parts = uri.split("/", 3)
+    return parts[2] if len(parts) > 2 and uri.startswith("at://") else ""
+
+
+def dataset_version(dataset: Optional[str] = None) -> int:
+    """Version of ``dataset``'s membership; part of every cache key.
+
+    With no dataset, the version of changes made to every dataset at once.
+    """
+    with _version_lock:
+        return max(_all_version, _dataset_versions.get(dataset or "", 0))
+
+
+def counts_version(dataset: Optional[str] = None) -> int:
+    """dataset_version, also bumped when engagement counts change in place."""
+    with _version_lock:
+        key = dataset or ""
+        return max(
+            _all_version, _dataset_versions.get(key, 0), _counts_versions.get(key, 0)
+        )
+
+
+def filters_use_counts(filters: SearchFilters) -> bool:
+    """Whether ``filters`` bound engagement counts (so hydration can change results)."""
+    return any(
+        getattr(filters, name) != getattr(_DEFAULT_FILTERS, name)
+        for name in _COUNT_FILTERS
+    )
+
+
+def _next_version(
+    versions: Optional[Dict[str, int]], datasets: Iterable[Optional[str]]
+) -> int:
+    global _counter, _all_version
+    with _version_lock:
+        _counter += 1
+        if versions is None:
+            _all_version = _counter
+        else:
+            for dataset in datasets:
+                versions[dataset or ""] = _counter
+        return _counter
+
+
+def bump_dataset_version(dataset: Optional[str] = None) -> int:
+    """Retire cached searches of ``dataset`` (after loading, replacing or deleting).
+
+    Args:
+        dataset: Owning DID; None retires every dataset's searches
+
+    Returns:
+        The new dataset version
+    """
+    if dataset is None:
+        return _next_version(None, ())
+    return _next_version(_dataset_versions, (dataset,))
+
+
+def mark_data_changed(
+    uris: Optional[Iterable[str]] = None, emptiness_changed: bool = True
+) -> int:
+    """Record that loaded items changed in place (hydrated counts).
+
+    Drops the cached range indexes, whose columns hold the old counts, and
+    bumps the versions of the datasets owning ``uris`` (every dataset if
+    None). Pass ``emptiness_changed=False`` when no textless item went
+    between zero and nonzero counts: only searches that filter on counts
+    are retired then.
+
+    Returns:
+        The new version
+    """
+    clear_range_indexes()
+    if uris is None:
+        return _next_version(None, ())
+    datasets = {dataset_of(uri) for uri in uris}
+    return _next_version(
+        _dataset_versions if emptiness_changed else _counts_versions, datasets
+    )
+
+
+def emptiness_flipped(item: Any, counts: Tuple[int, int, int]) -> bool:
+    """Whether giving ``item`` ``counts`` changes if it is filtered out as empty."""
+    if item.text:
+        return False
+    before = (
+        (item.like_count or 0) > 0
+        or (item.repost_count or 0) > 0
+        or (item.reply_count or 0) > 0
+    )
+    return before != any(c > 0 for c in counts)
+
+
+def filters_key(filters: SearchFilters) -> Tuple[Any, ...]:
+    """Hashable, normalized form of ``filters``.
+
+    Keywords are stripped and ordered (their operators don't depend on
+    order) and dates are compared as the timestamps the search uses, so
+    equivalent requests share a cache entry.
+    """
+    keywords = tuple(
+        sorted({k.strip() for k in filters.keywords or () if k and k.strip()})
+    )
+    return (
+        keywords,
+        filters.content_type.value,
+        filters.timestamp_range(),
+        filters.min_engagement,
+        filters.max_engagement,
+        filters.min_likes,
+        filters.max_likes,
+        filters.min_reposts,
+        filters.max_reposts,
+        filters.min_replies,
+        filters.max_replies,
+        filters.subject_contains or None,
+        filters.subject_handle_contains or None,
+    )
+
+
+class QueryCache:
+    """Thread-safe LRU of search keys to ordered URI tuples."""
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, ...]]:
+        """Cached URIs for ``key``, counting the hit or miss."""
+        with self._lock:
+            uris = self._entries.get(key)
+            if uris is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return uris
+
+    def put(self, key: Hashable, uris: Sequence[str]) -> Tuple[str, ...]:
+        """Store the ordered ``uris`` for ``key`` and return them as a tuple."""
+        uris = tuple(uris)
+        with self._lock:
+            self._entries[key] = uris
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return uris
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def query_hash(query: Hashable) -> str:
+    """Short stable digest of a query key (without the dataset version)."""
+    return hashlib.sha256(repr(query).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Decoded position in a paged search."""
+
+    query: str
+    version: Any
+    position: int
+    sort_key: Optional[int]
+    last_uri: str
+    total: int
+
+
+_CURSOR_FIELDS = {
+    "query": "q",
+    "version": "v",
+    "position": "p",
+    "sort_key": "k",
+    "last_uri": "u",
+    "total": "t",
+}
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Opaque URL-safe token for ``cursor``."""
+    payload = {_CURSOR_FIELDS[name]: value for name, value in asdict(cursor).items()}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, query: str) -> Cursor:
+    """Parse a token from :func:`encode_cursor` issued for ``query``.
+
+    Raises:
+        ValidationError: The token is malformed or belongs to another query
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        cursor = Cursor(**{name: payload[key] for name, key in _CURSOR_FIELDS.items()})
+        if not isinstance(cursor.position, int) or cursor.position < 0:
+            raise ValueError("bad position")
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationError("Invalid search cursor", original_error=e) from e
+    if cursor.query != query:
+        raise ValidationError("Search cursor does not match this query")
+    return cursor
+
+
+def resume_position(
+    cursor: Cursor,
+    uris: Sequence[str],
+    version: Any,
+    sort_key: Callable[[str], Optional[int]],
+    newest_first: bool = True,
+) -> int:
+    """Index in ``uris`` where the page after ``cursor`` starts.
+
+    Args:
+        cursor: Cursor returned with the previous page
+        uris: Current ordered result URIs
+        version: Current dataset version
+        sort_key: created_ts of a result URI (None if undated)
+        newest_first: Whether ``uris`` are sorted newest first
+    """
+    if cursor.version == version:
+        return min(cursor.position, len(uris))
+    try:
+        return uris.index(cursor.last_uri) + 1
+    except ValueError:
+        pass
+    # The last item is gone: continue with the first one sorting after it
+    last = TS_MIN if cursor.sort_key is None else cursor.sort_key
+    for pos, uri in enumerate(uris):
+        key = sort_key(uri)
+        key = TS_MIN if key is None else key
+        if (key < last) if newest_first else (key > last):
+            return pos
+    return len(uris)
@@ -0,0 +1,211 @@
+"""
+Skymarshal Range Index
+
+File Purpose: Sorted per-field indexes that answer date and engagement range filters by
+    bisection
+Primary Functions/Classes: RangeIndex, range_index_for, clear_range_indexes,
+    engagement_counts
+Inputs and Outputs (I/O): ContentItem lists in, matching positions in date order out
+
+A RangeIndex keeps, for created_ts and each engagement counter, the item
+positions sorted by that value. A min/max filter is then two bisects and a
+slice instead of a pass over every item, several ranges intersect starting
+from the narrowest, and the created_ts order doubles as the result order so
+matches come out date-sorted without a re-sort.
+
+Counts are mutated in place when engagement is hydrated, so the hydration
+paths call query_cache.mark_data_changed() (which clears these indexes)
+once they are done.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .keyword_index import INDEX_CACHE_SIZE
+from .models import TS_MIN, ContentItem, calculate_engagement_score
+
+# Indexed fields; "created_ts" holds models.TS_MIN for undated items
+FIELDS = ("created_ts", "likes", "reposts", "replies", "engagement")
+
+# A range filter as (field, low, high); either bound may be None (open)
+FieldRange = Tuple[str, Optional[float], Optional[float]]
+
+# Codes stored in RangeIndex.types (0 for anything else)
+TYPE_CODES = {"post": 1, "reply": 2, "repost": 3, "like": 4}
+
+
+def engagement_counts(
+    item: ContentItem, use_subject_engagement: bool
+) -> Tuple[int, int, int]:
+    """(likes, reposts, replies) a search judges ``item`` by.
+
+    Reposts are judged by their subject post's counts when
+    ``use_subject_engagement`` is set.
+    """
+    if item.content_type == "repost" and use_subject_engagement:
+        rd = item.raw_data or {}
+        return (
+            int(rd.get("subject_like_count", 0) or 0),
+            int(rd.get("subject_repost_count", 0) or 0),
+            int(rd.get("subject_reply_count", 0) or 0),
+        )
+    return (
+        int(item.like_count or 0),
+        int(item.repost_count or 0),
+        int(item.reply_count or 0),
+    )
+
+
+class RangeIndex:
+    """Per-field sorted positions over a list of ContentItems."""
+
+    def __init__(
+        self, items: Sequence[ContentItem], use_subject_engagement: bool = True
+    ):
+        self.source = items
+        self.size = len(items)
+        self.items: List[ContentItem] = list(items)
+        self.use_subject_engagement = use_subject_engagement
+
+        created, likes, reposts, replies, engagement = [], [], [], [], []
+        types = []
+        type_code = TYPE_CODES.get
+        for item in self.items:
+            ts = item.created_ts
+            created.append(TS_MIN if ts is None else ts)
+            l, r, rp = engagement_counts(item, use_subject_engagement)
+            likes.append(l)
+            reposts.append(r)
+            replies.append(rp)
+            engagement.append(calculate_engagement_score(l, r, rp))
+            types.append(type_code(item.content_type, 0))
+
+        self.columns: Dict[str, array] = {
+            "created_ts": array("q", created),
+            "likes": array("q", likes),
+            "reposts": array("q", reposts),
+            "replies": array("q", replies),
+            "engagement": array("d", engagement),
+        }
+        self.types = array("B", types)
+        # Sorted orders are built per field on first use
+        self._order: Dict[str, array] = {}
+        self._sorted_values: Dict[str, array] = {}
+        self._newest_order: Optional[array] = None
+
+    def is_current(self, items: Sequence[ContentItem]) -> bool:
+        """Whether this index was built from ``items`` as they are now."""
+        return self.source is items and self.size == len(items)
+
+    def order(self, field: str) -> array:
+        """All positions sorted by ``field``; ties keep list order (a stable sort)."""
+        order = self._order.get(field)
+        if order is None:
+            column = self.columns[field]
+            order = array("I", sorted(range(self.size), key=column.__getitem__))
+            self._sorted_values[field] = array(
+                column.typecode, (column[pos] for pos in order)
+            )
+            self._order[field] = order
+        return order
+
+    def _bounds(
+        self, field: str, low: Optional[float], high: Optional[float]
+    ) -> Tuple[int, int]:
+        """Slice of :meth:`order` holding values within [low, high]."""
+        self.order(field)
+        values = self._sorted_values[field]
+        start = 0 if low is None else bisect_left(values, low)
+        end = self.size if high is None else bisect_right(values, high)
+        return start, max(start, end)
+
+    def matching(self, ranges: Sequence[FieldRange]) -> Optional[Set[int]]:
+        """Positions satisfying every range, or None if all items do.
+
+        The narrowest range is expanded from its sorted slice; the others are
+        checked against the column values of just those positions.
+        """
+        active = []
+        for field, low, high in ranges:
+            start, end = self._bounds(field, low, high)
+            if end - start < self.size:
+                active.append((end - start, field, start, end, low, high))
+        if not active:
+            return None
+        active.sort(key=lambda entry: entry[0])
+
+        _, field, start, end, _, _ = active[0]
+        positions: Sequence[int] = self.order(field)[start:end]
+        for _, field, _, _, low, high in active[1:]:
+            column = self.columns[field]
+            positions = [
+                pos
+                for pos in positions
+                if (low is None or column[pos] >= low)
+                and (high is None or column[pos] <= high)
+            ]
+            if not positions:
+                break
+        return set(positions)
+
+    def date_order(self, newest_first: bool = True) -> array:
+        """All positions sorted by created_ts, undated items oldest."""
+        if not newest_first:
+            return self.order("created_ts")
+        if self._newest_order is None:
+            column = self.columns["created_ts"]
+            self._newest_order = array(
+                "I", sorted(range(self.size), key=column.__getitem__, reverse=True)
+            )
+        return self._newest_order
+
+    def in_date_order(
+        self, positions: Optional[Set[int]], newest_first: bool = True
+    ) -> List[int]:
+        """``positions`` (None for all) sorted as :meth:`date_order` would."""
+        if positions is None:
+            return list(self.date_order(newest_first))
+        if len(positions) * 8 < self.size:
+            # Small result: sorting it beats walking the full order
+            column = self.columns["created_ts"]
+            return sorted(
+                sorted(positions), key=column.__getitem__, reverse=newest_first
+            )
+        return [pos for pos in self.date_order(newest_first) if pos in positions]
+
+
+_cache: "OrderedDict[Tuple[int, bool], RangeIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def range_index_for(
+    items: Sequence[ContentItem], use_subject_engagement: bool = True
+) -> RangeIndex:
+    """Return the cached index for ``items``, building it on first use.
+
+    Like keyword_index_for, indexes are keyed by list identity (and the repost
+    engagement mode) and rebuilt when the list grows or shrinks.
+    """
+    key = (id(items), bool(use_subject_engagement))
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None and index.is_current(items):
+            _cache.move_to_end(key)
+            return index
+
+    index = RangeIndex(items, use_subject_engagement)
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def clear_range_indexes() -> None:
+    """Drop all cached indexes (call after changing counts or dates in place)."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,644 @@
+"""
+Skymarshal Rate Budgets
+
+File Purpose: Process-wide (optionally cross-process) API rate-limit budgets with
+    priority lanes
+Primary Functions/Classes: RateLimiter, FileRateLimiter, RateBudget, budget_for,
+    budget_scope, rate_budget_stats
+Inputs and Outputs (I/O): Point draws from API callers in; waits, ~/.skymarshal budget
+    files and usage stats out
+
+Every BlueskyClient used to build its own RateLimiter, so concurrent network
+jobs each believed they owned the whole 3000-point window, while record
+listing, hydration, profile lookups and deletions didn't pace themselves at
+all. There is now one RateBudget per service per process, and every
+outbound call draws its points from it before it is sent (through the
+service's ConcurrencyController, or directly for writes). Bluesky limits
+PDS reads and writes per account, so those budgets are kept per account
+DID; the public AppView budget is per client IP and shared by everyone.
+
+Two rules keep one caller from starving the rest:
+
+- lanes: background work (network jobs, bulk fetches) may only spend up to
+  ``1 - INTERACTIVE_RESERVE`` of the window; the remainder is kept for
+  interactive requests
+- consumers: while more than one consumer (e.g. web user) is spending from
+  a budget, none may hold more than CONSUMER_SHARE of the window
+
+Bulk work (downloads, hydration, network jobs) runs inside
+``budget_scope(BACKGROUND, consumer=handle, account=did)``, which sets the
+lane, consumer and account for every draw made in that thread or task.
+Callers that must wait queue per lane and consumer and are served in
+arrival order, threads and coroutines alike.
+
+With SKYMARSHAL_RATE_BUDGET_DIR set (or configure_rate_budgets called),
+the window is kept in a file under that directory and guarded by an
+exclusive file lock, so the CLI, the web app and any workers on one host
+share it. File locking needs fcntl; elsewhere budgets stay per-process.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Service names shared with the concurrency controllers: the user's PDS
+# (authenticated atproto Client calls), its write budget, and the public
+# AppView used by the network explorer
+AUTHENTICATED_API = "pds"
+PDS_WRITES = "pds_writes"
+PUBLIC_API = "public_api"
+
+# (points, window seconds) per service, from Bluesky's published limits
+BUDGETS: Dict[str, Tuple[int, int]] = {
+    PUBLIC_API: (3000, 3600),
+    AUTHENTICATED_API: (3000, 300),
+    PDS_WRITES: (5000, 3600),
+}
+
+# Services Bluesky limits per account rather than per client IP
+ACCOUNT_SERVICES = frozenset({AUTHENTICATED_API, PDS_WRITES})
+
+# Points one deleteRecord costs against PDS_WRITES
+DELETE_POINTS = 1
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# Share of each window only the interactive lane may spend
+INTERACTIVE_RESERVE = 0.2
+
+# Most of a window one consumer may hold while others are spending
+CONSUMER_SHARE = 0.5
+
+# Longest wait for a consumer held back by its share before re-checking,
+# since other consumers going idle lifts the share early
+MAX_WAIT_SLICE = 1.0
+
+SHARED_DIR_ENV = "SKYMARSHAL_RATE_BUDGET_DIR"
+
+# Lane and consumer for draws that don't name them (see budget_scope)
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "rate_budget_lane", default=INTERACTIVE
+)
+_consumer: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "rate_budget_consumer", default=None
+)
+_account: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "rate_budget_account", default=None
+)
+
+
+class RateLimiter:
+    """Points-based sliding-window rate limiter for Bluesky API.
+
+    Bluesky uses 3000 points/hour for unauthenticated, 5000 for authenticated.
+    Spends are kept oldest-first in a deque with a running total, so acquire,
+    reserve and get_usage_stats cost O(1) amortized however full the window
+    is. Blocked acquire() calls queue on their own Condition and are woken
+    one at a time in arrival order. Thread-safe (eventlet-compatible).
+    """
+
+    def __init__(
+        self,
+        max_points: int = 3000,
+        window_seconds: int = 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_points = max_points
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._spends: Deque[Tuple[float, int]] = deque()  # (timestamp, points_cost)
+        self._points = 0  # sum of costs in _spends
+        self._lock = threading.Lock()
+        # Blocked acquire() calls, first come first served
+        self._waiters: Deque[threading.Condition] = deque()
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        spends = self._spends
+        while spends and spends[0][0] <= cutoff:
+            self._points -= spends.popleft()[1]
+
+    def _wait_time(self, now: float, points_cost: int, ceiling: float) -> float:
+        """0.0 if ``points_cost`` fits under ``ceiling``, else seconds until it will."""
+        self._expire(now)
+        # A spend larger than the ceiling goes through on an empty window
+        if self._points + points_cost <= ceiling or not self._spends:
+            return 0.0
+        return max(0.001, self._spends[0][0] + self.window_seconds - now)
+
+    def _spend(self, now: float, points_cost: int) -> None:
+        self._spends.append((now, points_cost))
+        self._points += points_cost
+
+    def acquire(self, points_cost: int = 1) -> None:
+        """Block until we can safely make a request without exceeding rate limit."""
+        with self._lock:
+            now = self._clock()
+            if not self._waiters and not self._wait_time(
+                now, points_cost, self.max_points
+            ):
+                self._spend(now, points_cost)
+                return
+
+            turn = threading.Condition(self._lock)
+            self._waiters.append(turn)
+            try:
+                warned = False
+                while True:
+                    if self._waiters[0] is not turn:
+                        turn.wait()
+                        continue
+                    now = self._clock()
+                    wait_time = self._wait_time(now, points_cost, self.max_points)
+                    if not wait_time:
+                        self._spend(now, points_cost)
+                        return
+                    if not warned:
+                        logger.warning(
+                            "Rate limit approaching (%d/%d points). Waiting %.1fs...",
+                            self._points,
+                            self.max_points,
+                            wait_time,
+                        )
+                        warned = True
+                    # Lock is released while waiting so other threads aren't blocked
+                    turn.wait(wait_time)
+            finally:
+                # Hand the head of the queue to the next waiter
+                head = self._waiters[0] is turn
+                self._waiters.remove(turn)
+                if head and self._waiters:
+                    self._waiters[0].notify()
+
+    def reserve(
+        self, points_cost: int = 1, limit: Optional[float] = None, record: bool = True
+    ) -> float:
+        """Spend ``points_cost`` now if it fits under ``limit`` (default max_points).
+
+        Never jumps ahead of blocked acquire() calls.
+
+        Returns:
+            0.0 if the points were spent (or only checked, with record=False),
+            otherwise seconds until the oldest spend leaves the window
+        """
+        ceiling = self.max_points if limit is None else limit
+        with self._lock:
+            now = self._clock()
+            wait_time = self._wait_time(now, points_cost, ceiling)
+            if self._waiters and not wait_time:
+                # The queue head is waiting for the oldest spend to expire
+                wait_time = (
+                    self._spends[0][0] + self.window_seconds - now
+                    if self._spends
+                    else 0
+                )
+                wait_time = max(0.001, wait_time)
+            if wait_time:
+                return wait_time
+            if record:
+                self._spend(now, points_cost)
+            return 0.0
+
+    def get_usage_stats(self) -> Dict[str, int]:
+        """Return current rate limit usage statistics."""
+        with self._lock:
+            self._expire(self._clock())
+            total_points = self._points
+            requests_in_window = len(self._spends)
+        return {
+            "points_used": total_points,
+            "points_remaining": max(0, self.max_points - total_points),
+            "max_points": self.max_points,
+            "requests_in_window": requests_in_window,
+        }
+
+
+class FileRateLimiter:
+    """RateLimiter whose window lives in a file shared by every process on the host.
+
+    Spends are kept as per-second point buckets in a JSON file and every
+    read-modify-write holds an exclusive fcntl lock on a sidecar lock file.
+    """
+
+    def __init__(self, path: Path, max_points: int = 3000, window_seconds: int = 3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_points = max_points
+        self.window_seconds = window_seconds
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        # fcntl locks are per process; threads still need their own lock
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked_buckets(self) -> Iterator[Dict[str, Any]]:
+        with self._thread_lock, open(self._lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path, "r") as f:
+                        buckets = json.load(f)
+                except (OSError, ValueError):
+                    buckets = {}
+                cutoff = time.time() - self.window_seconds
+                state = {
+                    "buckets": {k: v for k, v in buckets.items() if float(k) > cutoff}
+                }
+                yield state
+                if state.get("dirty"):
+                    tmp = self.path.with_name(self.path.name + ".tmp")
+                    with open(tmp, "w") as f:
+                        json.dump(state["buckets"], f)
+                    os.replace(tmp, self.path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def reserve(
+        self, points_cost: int = 1, limit: Optional[float] = None, record: bool = True
+    ) -> float:
+        """Same contract as RateLimiter.reserve, across processes."""
+        ceiling = self.max_points if limit is None else limit
+        with self._locked_buckets() as state:
+            buckets = state["buckets"]
+            now = time.time()
+            current_points = sum(buckets.values())
+            if current_points + points_cost > ceiling and buckets:
+                oldest = min(float(k) for k in buckets)
+                return max(0.001, oldest + 1 + self.window_seconds - now)
+            if record:
+                key = str(int(now))
+                buckets[key] = buckets.get(key, 0) + points_cost
+                state["dirty"] = True
+            return 0.0
+
+    def get_usage_stats(self) -> Dict[str, int]:
+        with self._locked_buckets() as state:
+            total_points = sum(state["buckets"].values())
+        return {
+            "points_used": total_points,
+            "points_remaining": max(0, self.max_points - total_points),
+            "max_points": self.max_points,
+            "requests_in_window": total_points,
+        }
+
+
+class _Waiter:
+    """One blocked RateBudget.acquire (thread) or acquire_async (coroutine)."""
+
+    __slots__ = ("condition", "loop", "event")
+
+    def __init__(
+        self,
+        condition: Optional[threading.Condition] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        event: Optional[asyncio.Event] = None,
+    ):
+        self.condition = condition
+        self.loop = loop
+        self.event = event
+
+    def wake(self) -> None:
+        """Tell the waiter it has reached the head of its queue (budget lock held)."""
+        if self.condition is not None:
+            self.condition.notify()
+        elif self.loop is not None and self.event is not None:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+
+class RateBudget:
+    """One service's rate-limit window, shared by every caller in the process."""
+
+    def __init__(
+        self,
+        name: str,
+        max_points: int,
+        window_seconds: int,
+        shared_dir: Optional[Path] = None,
+    ):
+        """Initialize the budget.
+
+        Args:
+            name: Budget name (also names the shared file)
+            max_points: Points per window
+            window_seconds: Window length
+            shared_dir: Directory for a cross-process window (needs fcntl)
+        """
+        self.name = name
+        self.max_points = max_points
+        self.window_seconds = window_seconds
+        self.window: Union[RateLimiter, FileRateLimiter]
+        if shared_dir is not None and fcntl is not None:
+            self.window = FileRateLimiter(
+                Path(shared_dir) / f"{name.replace(':', '_')}.json",
+                max_points,
+                window_seconds,
+            )
+        else:
+            self.window = RateLimiter(max_points, window_seconds)
+        self.shared = isinstance(self.window, FileRateLimiter)
+        self._consumers: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+        # Blocked acquires by (lane, consumer), first come first served
+        self._queues: Dict[Tuple[str, Optional[str]], Deque[_Waiter]] = {}
+        self.spent = {lane: 0 for lane in LANES}
+        self.waits = {lane: 0 for lane in LANES}
+
+    def _ceiling(self, lane: str) -> float:
+        if lane == BACKGROUND:
+            return self.max_points * (1 - INTERACTIVE_RESERVE)
+        return self.max_points
+
+    def _consumer_wait(self, consumer: str, points: int) -> float:
+        """Seconds ``consumer`` must wait to stay in its share (0 if it may spend)."""
+        window = self._consumers.get(consumer)
+        if window is None:
+            window = self._consumers[consumer] = RateLimiter(
+                self.max_points, self.window_seconds
+            )
+        # Forget consumers whose spends have all left the window
+        idle = [
+            name
+            for name, w in self._consumers.items()
+            if name != consumer and w.get_usage_stats()["points_used"] == 0
+        ]
+        for name in idle:
+            del self._consumers[name]
+        if len(self._consumers) < 2:
+            return 0.0
+        return window.reserve(
+            points, limit=self.max_points * CONSUMER_SHARE, record=False
+        )
+
+    def _reserve_locked(self, points: int, lane: str, consumer: Optional[str]) -> float:
+        if consumer is not None:
+            wait = self._consumer_wait(consumer, points)
+            if wait:
+                return min(wait, MAX_WAIT_SLICE)
+        wait = self.window.reserve(points, limit=self._ceiling(lane))
+        if wait:
+            return wait
+        if consumer is not None:
+            self._consumers[consumer].reserve(points, limit=math.inf)
+        self.spent[lane if lane in self.spent else INTERACTIVE] += points
+        return 0.0
+
+    def reserve(
+        self,
+        points: int = 1,
+        lane: Optional[str] = None,
+        consumer: Optional[str] = None,
+    ) -> float:
+        """Spend ``points`` now if the lane and consumer rules allow it.
+
+        Doesn't queue: callers that can wait should use acquire().
+
+        Returns:
+            0.0 if spent, otherwise seconds to wait before trying again
+        """
+        lane = lane or _lane.get()
+        consumer = consumer if consumer is not None else _consumer.get()
+        with self._lock:
+            return self._reserve_locked(points, lane, consumer)
+
+    def _join(
+        self, points: int, lane: str, consumer: Optional[str], waiter: _Waiter
+    ) -> Optional[Deque[_Waiter]]:
+        """Spend now if nobody is queued ahead, else queue ``waiter`` (lock held).
+
+        Returns:
+            None if the points were spent, otherwise the queue joined
+        """
+        queue = self._queues.get((lane, consumer))
+        if not queue and not self._reserve_locked(points, lane, consumer):
+            return None
+        if queue is None:
+            queue = self._queues[(lane, consumer)] = deque()
+        queue.append(waiter)
+        self.waits[lane if lane in self.waits else INTERACTIVE] += 1
+        logger.debug(
+            "Rate budget %s: %s lane queued (%d waiting)", self.name, lane, len(queue)
+        )
+        return queue
+
+    def _turn(
+        self,
+        points: int,
+        lane: str,
+        consumer: Optional[str],
+        queue: Deque[_Waiter],
+        waiter: _Waiter,
+    ) -> Optional[float]:
+        """0.0 once ``waiter`` has spent, else seconds to wait (None if not at head).
+
+        Called with the lock held.
+        """
+        if queue[0] is not waiter:
+            return None
+        return self._reserve_locked(points, lane, consumer)
+
+    def _leave(
+        self, lane: str, consumer: Optional[str], queue: Deque[_Waiter], waiter: _Waiter
+    ) -> None:
+        """Remove ``waiter`` and wake the new head of its queue (lock held)."""
+        head = queue[0] is waiter
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[(lane, consumer)]
+        elif head:
+            queue[0].wake()
+
+    def acquire(
+        self,
+        points: int = 1,
+        lane: Optional[str] = None,
+        consumer: Optional[str] = None,
+    ) -> None:
+        """Block until ``points`` can be spent, then spend them.
+
+        Blocked callers queue per lane and consumer and are served first come,
+        first served: only the head of a queue checks the window, sleeping
+        until its oldest spend expires. Lane and consumer default to the
+        enclosing budget_scope.
+        """
+        lane = lane or _lane.get()
+        consumer = consumer if consumer is not None else _consumer.get()
+        with self._lock:
+            condition = threading.Condition(self._lock)
+            waiter = _Waiter(condition=condition)
+            queue = self._join(points, lane, consumer, waiter)
+            if queue is None:
+                return
+            try:
+                while True:
+                    wait = self._turn(points, lane, consumer, queue, waiter)
+                    if wait == 0.0:
+                        return
+                    condition.wait(wait)
+            finally:
+                self._leave(lane, consumer, queue, waiter)
+
+    async def acquire_async(
+        self,
+        points: int = 1,
+        lane: Optional[str] = None,
+        consumer: Optional[str] = None,
+    ) -> None:
+        """acquire() for coroutines; shares the queues with blocking callers."""
+        lane = lane or _lane.get()
+        consumer = consumer if consumer is not None else _consumer.get()
+        event = asyncio.Event()
+        waiter = _Waiter(loop=asyncio.get_running_loop(), event=event)
+        with self._lock:
+            queue = self._join(points, lane, consumer, waiter)
+        if queue is None:
+            return
+        try:
+            while True:
+                with self._lock:
+                    wait = self._turn(points, lane, consumer, queue, waiter)
+                    event.clear()
+                if wait == 0.0:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                self._leave(lane, consumer, queue, waiter)
+
+    def get_usage_stats(self) -> Dict[str, int]:
+        """Window usage in RateLimiter.get_usage_stats form."""
+        return self.window.get_usage_stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Window usage, per-lane spends, waits and queue lengths, consumer usage."""
+        with self._lock:
+            consumers = {
+                name: window.get_usage_stats()["points_used"]
+                for name, window in self._consumers.items()
+            }
+            lanes = {
+                lane: {
+                    "spent": self.spent[lane],
+                    "waits": self.waits[lane],
+                    "queued": sum(
+                        len(q) for (l, _), q in self._queues.items() if l == lane
+                    ),
+                }
+                for lane in LANES
+            }
+        return {
+            **self.get_usage_stats(),
+            "window_seconds": self.window_seconds,
+            "shared": self.shared,
+            "lanes": lanes,
+            "consumers": consumers,
+        }
+
+    def __repr__(self) -> str:
+        return f"RateBudget({self.name!r}, {self.max_points}/{self.window_seconds}s)"
+
+
+_budgets: Dict[Tuple[str, Optional[str]], RateBudget] = {}
+_budgets_lock = threading.Lock()
+_shared_dir: Optional[Path] = None
+
+
+def configure_rate_budgets(shared_dir: Optional[Path]) -> None:
+    """Share budgets created from now on across processes through ``shared_dir``.
+
+    None keeps them per-process (the default unless SKYMARSHAL_RATE_BUDGET_DIR is set).
+    """
+    global _shared_dir
+    _shared_dir = Path(shared_dir) if shared_dir else None
+
+
+def _configured_dir() -> Optional[Path]:
+    if _shared_dir is not None:
+        return _shared_dir
+    env = os.environ.get(SHARED_DIR_ENV)
+    return Path(env).expanduser() if env else None
+
+
+def has_budget(name: str) -> bool:
+    return name in BUDGETS
+
+
+def budget_for(
+    name: str, max_points: Optional[int] = None, account: Optional[str] = None
+) -> RateBudget:
+    """The process-wide budget for service ``name``.
+
+    Args:
+        max_points: Overrides BUDGETS when this call creates the budget
+        account: Account DID for ACCOUNT_SERVICES (default: the enclosing
+            budget_scope's); ignored for other services
+    """
+    account = (account or _account.get()) if name in ACCOUNT_SERVICES else None
+    with _budgets_lock:
+        budget = _budgets.get((name, account))
+        if budget is None:
+            points, window = BUDGETS.get(name, BUDGETS[PUBLIC_API])
+            budget = _budgets[(name, account)] = RateBudget(
+                f"{name}:{account}" if account else name,
+                max_points or points,
+                window,
+                shared_dir=_configured_dir(),
+            )
+        return budget
+
+
+@contextmanager
+def budget_scope(
+    lane: Optional[str] = None,
+    consumer: Optional[str] = None,
+    account: Optional[str] = None,
+) -> Iterator[None]:
+    """Default lane, consumer and account for draws made inside the block.
+
+    Applies to this thread or task; work handed to a thread pool needs
+    ``contextvars.copy_context().run`` to carry it along.
+    """
+    tokens: List[Tuple[contextvars.ContextVar, contextvars.Token]] = []
+    if lane is not None:
+        tokens.append((_lane, _lane.set(lane)))
+    if consumer is not None:
+        tokens.append((_consumer, _consumer.set(consumer)))
+    if account is not None:
+        tokens.append((_account, _account.set(account)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def rate_budget_stats() -> Dict[str, Dict[str, Any]]:
+    """stats() of every budget, by budget name (``service:did`` for account budgets)."""
+    with _budgets_lock:
+        budgets = list(_budgets.values())
+    return {b.name: b.stats() for b in budgets}
+
+
+def clear_rate_budgets() -> None:
+    """Forget all budgets (their spends start over)."""
+    with _budgets_lock:
+        _budgets.clear()
@@ -9,33 +9,77 @@ This module provides sophisticated search and filtering capabilities for Bluesky
 including keyword matching, engagement-based filtering, date ranges, and content type filtering.
 """
 
-import re
-from datetime import datetime
-from typing import List, Optional
+import operator
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 from rich.progress import SpinnerColumn, TextColumn
 from rich.prompt import Confirm, Prompt
 from rich.rule import Rule
 
 from .auth import AuthManager
+from .concurrency import pds_call
+from .handle_cache import HandleCache
+from .keyword_index import (
+    INDEX_MIN_ITEMS,
+    KeywordIndex,
+    keyword_index_for,
+    parse_search_terms,
+)
+from .keyword_plan import keyword_plan_for, normalize_keywords
 from .models import safe_progress
 from .models import (
+    CONTENT_TYPE_FILTERS,
+    TS_MIN,
     ContentItem,
     ContentType,
     SearchFilters,
     UserSettings,
     calculate_engagement_score,
     console,
-    parse_datetime,
+    created_sort_key,
+)
+from .range_index import (
+    TYPE_CODES,
+    FieldRange,
+    engagement_counts,
+    range_index_for,
+)
+from .term_matcher import MATCHER_MIN_TERMS, TermMatcher
+from .vector_filters import (
+    HAS_NUMPY,
+    engagement_stats,
+    mask_positions,
+    ordered_positions,
+    positions_mask,
+    range_mask,
+    vector_columns_for,
 )
 
 
+# Items between progress bar updates; per-item updates cost more than the filters
+PROGRESS_STEP = 1000
+
+
 class SearchManager:
     """Manages content search and filtering operations."""
 
-    def __init__(self, auth_manager: AuthManager, settings: UserSettings):
+    def __init__(
+        self,
+        auth_manager: AuthManager,
+        settings: UserSettings,
+        handle_cache: Optional[HandleCache] = None,
+    ):
         self.auth = auth_manager
         self.settings = settings
+        # Opened on the first subject-handle search
+        self._handle_cache = handle_cache
+
+    @property
+    def handle_cache(self) -> HandleCache:
+        """Persistent DID→handle cache for subject-handle filtering."""
+        if self._handle_cache is None:
+            self._handle_cache = HandleCache()
+        return self._handle_cache
 
     def build_search_filters(self, ui_manager=None) -> Optional[SearchFilters]:
         """Interactive filter builder."""
@@ -182,54 +226,53 @@ class SearchManager:
         self, content_items: List[ContentItem], filters: SearchFilters
     ) -> List[ContentItem]:
         """Search content using filters."""
-        filtered_items = content_items.copy()
-
-        # Determine whether to show progress based on dataset size
-        show_progress = len(filtered_items) >= 1000
-
-        from datetime import timezone
+        # Items carry pre-parsed epoch timestamps; compare against the same
+        sd_ts, ed_ts = filters.timestamp_range()
 
-        sd = parse_datetime(getattr(filters, "start_date", None))
-        ed = parse_datetime(getattr(filters, "end_date", None))
+        use_subject = self.settings.use_subject_engagement_for_reposts
 
-        # Make filter dates timezone-aware to match content item dates
-        # HTML date inputs provide naive dates (YYYY-MM-DD), but content dates are UTC
-        if sd and sd.tzinfo is None:
-            sd = sd.replace(tzinfo=timezone.utc)
-        if ed and ed.tzinfo is None:
-            # For end date, set to end of day (23:59:59.999999)
-            from datetime import time
-            ed = ed.replace(hour=23, minute=59, second=59, microsecond=999999, tzinfo=timezone.utc)
+        # Compiled keyword operators, shared across requests; large term sets
+        # (pasted blocklists) go through one multi-term automaton instead
+        keyword_regexes: Tuple[dict, List, List] = ({}, [], [])
+        matcher = None
+        plan = keyword_plan_for(filters.keywords)
+        if plan is not None:
+            keyword_regexes = plan.regexes
+            matcher = plan.matcher
+        has_keywords = plan is not None
+
+        if len(content_items) >= INDEX_MIN_ITEMS:
+            indexed = self._indexed_search(
+                content_items,
+                filters,
+                sd_ts,
+                ed_ts,
+                keyword_regexes if has_keywords else None,
+                matcher,
+            )
+            if indexed is not None:
+                # Already in date order; the subject filters keep that order
+                return self._filter_subject(indexed, filters)
 
-        use_subject = self.settings.use_subject_engagement_for_reposts
+        filtered_items = content_items.copy()
 
-        def counts_for(it: ContentItem):
-            if it.content_type == "repost" and use_subject:
-                rd = it.raw_data or {}
-                l = int(rd.get("subject_like_count", 0) or 0)
-                r = int(rd.get("subject_repost_count", 0) or 0)
-                rp = int(rd.get("subject_reply_count", 0) or 0)
-                return l, r, rp
-            else:
-                return (
-                    int(it.like_count or 0),
-                    int(it.repost_count or 0),
-                    int(it.reply_count or 0),
-                )
+        # Determine whether to show progress based on dataset size
+        show_progress = len(filtered_items) >= 1000
 
         def passes(it: ContentItem) -> bool:
-            l, r, rp = counts_for(it)
-            eng = calculate_engagement_score(l, r, rp)
-
-            if sd or ed:
-                dt = parse_datetime(it.created_at)
-                if dt is None:
+            # Cheap integer date check first so out-of-range items skip the rest
+            if sd_ts is not None or ed_ts is not None:
+                ts = it.created_ts
+                if ts is None:
                     return False
-                if sd and dt < sd:
+                if sd_ts is not None and ts < sd_ts:
                     return False
-                if ed and dt > ed:
+                if ed_ts is not None and ts > ed_ts:
                     return False
 
+            l, r, rp = engagement_counts(it, use_subject)
+            eng = calculate_engagement_score(l, r, rp)
+
             return (
                 filters.min_engagement <= eng <= filters.max_engagement
                 and filters.min_likes <= l <= filters.max_likes
@@ -237,12 +280,10 @@ class SearchManager:
                 and filters.min_replies <= rp <= filters.max_replies
             )
 
-        # Keyword regex precompute with search operators
-        positive_regexes = {}
-        negative_regexes = []
-        required_regexes = []
-        if filters.keywords:
-            positive_regexes, negative_regexes, required_regexes = self._compile_search_patterns(filters.keywords)
+        if has_keywords:
+            filtered_items = self._keyword_filter(
+                content_items, filters.keywords, *keyword_regexes, matcher=matcher
+            )
 
         if show_progress:
             with safe_progress(
@@ -251,53 +292,106 @@ class SearchManager:
                 transient=True,
                 console=console,
             ) as progress:
-                # Step 1: Keyword filter (optional)
-                if positive_regexes or negative_regexes or required_regexes:
-                    task_kw = progress.add_task(
-                        f"Applying keyword filter 0/{len(filtered_items)}",
-                        total=len(filtered_items),
-                    )
-                    tmp = []
-                    for it in filtered_items:
-                        if self._passes_keyword_filters(it.text, positive_regexes, negative_regexes, required_regexes):
-                            tmp.append(it)
-                        progress.advance(task_kw, 1)
-                    filtered_items = tmp
-
                 # Step 2: Criteria pass
                 task_criteria = progress.add_task(
                     f"Evaluating filters 0/{len(filtered_items)}",
                     total=max(1, len(filtered_items)),
                 )
                 tmp2 = []
-                for it in filtered_items:
+                for n, it in enumerate(filtered_items, 1):
                     if passes(it):
                         tmp2.append(it)
-                    progress.advance(task_criteria, 1)
+                    if n % PROGRESS_STEP == 0:
+                        progress.advance(task_criteria, PROGRESS_STEP)
+                progress.update(task_criteria, completed=len(filtered_items))
                 filtered_items = tmp2
         else:
-            if positive_regexes or negative_regexes or required_regexes:
-                filtered_items = [
-                    it for it in filtered_items 
-                    if self._passes_keyword_filters(it.text, positive_regexes, negative_regexes, required_regexes)
-                ]
             filtered_items = [it for it in filtered_items if passes(it)]
 
-        if filters.content_type != ContentType.ALL:
-
-            def _matches_type(it: ContentItem) -> bool:
-                if filters.content_type in (ContentType.REPLIES, ContentType.COMMENTS):
-                    return it.content_type == "reply"
-                if filters.content_type == ContentType.POSTS:
-                    return it.content_type == "post"
-                if filters.content_type == ContentType.REPOSTS:
-                    return it.content_type == "repost"
-                if filters.content_type == ContentType.LIKES:
-                    return it.content_type == "like"
-                return True
+        filtered_items = self._filter_content_type(filtered_items, filters)
+        filtered_items = self._filter_subject(filtered_items, filters)
+
+        order = self.settings.fetch_order
+
+        filtered_items.sort(key=created_sort_key, reverse=(order == "newest"))
 
-            filtered_items = [it for it in filtered_items if _matches_type(it)]
+        return filtered_items
+
+    def _indexed_search(
+        self,
+        items: List[ContentItem],
+        filters: SearchFilters,
+        sd_ts: Optional[int],
+        ed_ts: Optional[int],
+        keyword_regexes: Optional[Tuple[dict, List, List]],
+        matcher: Optional[TermMatcher] = None,
+    ) -> Optional[List[ContentItem]]:
+        """Apply the range, type and keyword filters through the cached indexes.
+
+        With NumPy the engagement, date and type predicates are one boolean
+        mask over the dataset's RangeIndex columns; without it each bound is
+        bisected on the RangeIndex. Keywords are narrowed by the KeywordIndex
+        and matches are returned in fetch order without sorting. Returns None
+        if ``items`` was reordered in place since indexing, so the caller
+        scans instead.
+        """
+        newest_first = self.settings.fetch_order == "newest"
+        wanted_types = CONTENT_TYPE_FILTERS.get(filters.content_type)
+        index = range_index_for(items, self.settings.use_subject_engagement_for_reposts)
+
+        if HAS_NUMPY:
+            view = vector_columns_for(index)
+            mask = range_mask(view, filters, sd_ts, ed_ts, wanted_types)
+            positions = mask_positions(mask) if keyword_regexes is not None else None
+        else:
+            ranges: List[FieldRange] = [
+                ("engagement", filters.min_engagement, filters.max_engagement),
+                ("likes", filters.min_likes, filters.max_likes),
+                ("reposts", filters.min_reposts, filters.max_reposts),
+                ("replies", filters.min_replies, filters.max_replies),
+            ]
+            if sd_ts is not None or ed_ts is not None:
+                # Undated items never pass a date filter
+                ranges.append(("created_ts", TS_MIN + 1 if sd_ts is None else sd_ts, ed_ts))
+            positions = index.matching(ranges)
+
+        if keyword_regexes is not None:
+            kindex = keyword_index_for(items)
+            positions = self._keyword_positions(
+                kindex, filters.keywords, *keyword_regexes, within=positions, matcher=matcher
+            )
+            if any(kindex.items[pos] is not index.items[pos] for pos in positions):
+                return None
+            if HAS_NUMPY:
+                mask = positions_mask(view, positions)
 
+        if HAS_NUMPY:
+            ordered = ordered_positions(view, mask, newest_first)
+        else:
+            ordered = index.in_date_order(positions, newest_first)
+            if wanted_types:
+                codes = {TYPE_CODES[t] for t in wanted_types}
+                types = index.types
+                ordered = [pos for pos in ordered if types[pos] in codes]
+
+        result = list(map(index.items.__getitem__, ordered))
+        if not all(map(operator.is_, map(items.__getitem__, ordered), result)):
+            return None
+        return result
+
+    def _filter_content_type(
+        self, filtered_items: List[ContentItem], filters: SearchFilters
+    ) -> List[ContentItem]:
+        """Apply the content type filter, keeping order."""
+        wanted = CONTENT_TYPE_FILTERS.get(filters.content_type)
+        if not wanted:
+            return filtered_items
+        return [it for it in filtered_items if it.content_type in wanted]
+
+    def _filter_subject(
+        self, filtered_items: List[ContentItem], filters: SearchFilters
+    ) -> List[ContentItem]:
+        """Apply the subject URI and subject handle filters, keeping order."""
         subj_sub = getattr(filters, "subject_contains", None)
         if subj_sub:
             sub_lower = subj_sub.lower()
@@ -316,21 +410,6 @@ class SearchManager:
                 filtered_items, subj_handle_sub
             )
 
-        order = self.settings.fetch_order
-
-        def sort_dt(it: ContentItem):
-            s = it.created_at
-            try:
-                return (
-                    datetime.fromisoformat(s.replace("Z", "+00:00"))
-                    if isinstance(s, str)
-                    else datetime.min
-                )
-            except Exception:
-                return datetime.min
-
-        filtered_items.sort(key=sort_dt, reverse=(order == "newest"))
-
         return filtered_items
 
     def sort_results(
@@ -338,9 +417,6 @@ class SearchManager:
     ) -> List[ContentItem]:
         """Sort search results by specified criteria."""
 
-        def key_dt(it: ContentItem):
-            return parse_datetime(it.created_at, datetime.min)
-
         def key_eng(it: ContentItem):
             return (
                 int(it.like_count or 0)
@@ -358,9 +434,9 @@ class SearchManager:
             return int(it.repost_count or 0)
 
         if sort_mode == "newest":
-            filtered_items.sort(key=key_dt, reverse=True)
+            filtered_items.sort(key=created_sort_key, reverse=True)
         elif sort_mode == "oldest":
-            filtered_items.sort(key=key_dt)
+            filtered_items.sort(key=created_sort_key)
         elif sort_mode == "eng_desc":
             filtered_items.sort(key=key_eng, reverse=True)
         elif sort_mode == "eng_asc":
@@ -604,42 +680,45 @@ class SearchManager:
     def _filter_by_subject_handle(
         self, filtered_items: List[ContentItem], subj_handle_sub: str
     ) -> List[ContentItem]:
-        """Filter items by subject handle containing substring."""
-        need = [it for it in filtered_items if it.content_type in ("like", "repost")]
+        """Filter items by subject handle containing substring.
+
+        Subject DIDs are resolved through the persistent handle cache; only
+        DIDs it doesn't know yet are fetched, so repeat searches stay offline.
+        """
         dids = set()
+        for it in filtered_items:
+            if it.content_type in ("like", "repost"):
+                did = self._subject_did(it)
+                if did:
+                    dids.add(did)
 
-        for it in need:
-            subj = (it.raw_data or {}).get("subject_uri")
-            if subj and subj.startswith("at://"):
-                parts = subj.split("/")
-                if len(parts) >= 3:
-                    dids.add(parts[2])
-
-        did_to_handle = {}
-        if dids and self.auth.ensure_authentication():
-            try:
-                actors = list(dids)
-                for i in range(0, len(actors), 25):
-                    batch = actors[i : i + 25]
-                    resp = self.auth.client.get_profiles(actors=batch)
-                    for p in getattr(resp, "profiles", []) or []:
-                        did_to_handle[getattr(p, "did", "")] = getattr(p, "handle", "")
-            except Exception:
-                pass
-
-        subh_lower = subj_handle_sub.lower()
+        cache = self.handle_cache
+        if dids and cache.missing(dids) and self.auth.ensure_authentication():
+            cache.resolve(dids, self._fetch_handles)
+        matching = cache.matching_dids(subj_handle_sub, within=dids) if dids else set()
 
         def _subj_handle_match(it: ContentItem) -> bool:
             if it.content_type not in ("like", "repost"):
                 return True
-            subj = (it.raw_data or {}).get("subject_uri")
-            if not subj or not subj.startswith("at://"):
-                return False
-            did = subj.split("/")[2]
-            handle = did_to_handle.get(did, "")
-            return bool(handle and subh_lower in handle.lower())
+            return self._subject_did(it) in matching
 
         return [it for it in filtered_items if _subj_handle_match(it)]
+
+    @staticmethod
+    def _subject_did(it: ContentItem) -> Optional[str]:
+        subj = (it.raw_data or {}).get("subject_uri")
+        if not subj or not subj.startswith("at://"):
+            return None
+        parts = subj.split("/")
+        return parts[2] if len(parts) >= 3 else None
+
+    def _fetch_handles(self, dids: List[str]) -> Dict[str, str]:
+        """Handles for one getProfiles batch of DIDs."""
+        resp = pds_call(self.auth.client, self.auth.client.get_profiles, actors=dids)
+        return {
+            getattr(p, "did", ""): getattr(p, "handle", "")
+            for p in getattr(resp, "profiles", []) or []
+        }
     
     def _compile_search_patterns(self, keywords: List[str]):
         """Compile search patterns with support for basic operators.
@@ -650,86 +729,112 @@ class SearchManager:
         - -keyword - Negation (exclude content containing keyword)
         - +keyword - Required (content must contain keyword)
         - Plain keyword - Case-insensitive substring matching
+
+        Compiled patterns come from the process-wide keyword plan cache.
         
         Returns:
             tuple: (positive_regexes_dict, negative_regexes, required_regexes)
         """
-        case_sensitive_patterns = []
-        case_insensitive_patterns = []
-        negative_patterns = []
-        required_patterns = []
-        
-        for keyword in keywords:
-            keyword = keyword.strip()
-            if not keyword:
-                continue
-                
-            # Handle negation (-keyword)
-            if keyword.startswith('-') and len(keyword) > 1:
-                neg_keyword = keyword[1:]
-                if neg_keyword.startswith('"') and neg_keyword.endswith('"') and len(neg_keyword) > 2:
-                    # Exact phrase negation: -"exact phrase"
-                    exact_phrase = neg_keyword[1:-1]
-                    negative_patterns.append(('case_sensitive', re.escape(exact_phrase)))
-                elif neg_keyword.startswith('\\b') and neg_keyword.endswith('\\b'):
-                    # Word boundary negation: -\\bword\\b
-                    word = neg_keyword[2:-2]
-                    negative_patterns.append(('case_insensitive', r'\\b' + re.escape(word) + r'\\b'))
-                else:
-                    # Regular negation: -keyword (case-insensitive)
-                    negative_patterns.append(('case_insensitive', re.escape(neg_keyword)))
-                continue
-            
-            # Handle required keywords (+keyword)
-            if keyword.startswith('+') and len(keyword) > 1:
-                req_keyword = keyword[1:]
-                if req_keyword.startswith('"') and req_keyword.endswith('"') and len(req_keyword) > 2:
-                    # Required exact phrase: +"exact phrase"
-                    exact_phrase = req_keyword[1:-1]
-                    required_patterns.append(('case_sensitive', re.escape(exact_phrase)))
-                elif req_keyword.startswith('\\b') and req_keyword.endswith('\\b'):
-                    # Required word boundary: +\\bword\\b
-                    word = req_keyword[2:-2]
-                    required_patterns.append(('case_insensitive', r'\\b' + re.escape(word) + r'\\b'))
-                else:
-                    # Required keyword: +keyword (case-insensitive)
-                    required_patterns.append(('case_insensitive', re.escape(req_keyword)))
-                continue
-            
-            # Handle exact phrase matching ("exact phrase")
-            if keyword.startswith('"') and keyword.endswith('"') and len(keyword) > 2:
-                exact_phrase = keyword[1:-1]
-                case_sensitive_patterns.append(re.escape(exact_phrase))
-                continue
-            
-            # Handle word boundary matching (\\bword\\b)
-            if keyword.startswith('\\b') and keyword.endswith('\\b'):
-                word = keyword[2:-2]
-                case_insensitive_patterns.append(r'\\b' + re.escape(word) + r'\\b')
-                continue
-            
-            # Regular keyword (case-insensitive)
-            case_insensitive_patterns.append(re.escape(keyword))
-        
-        # Compile main regexes
-        positive_regexes = {}
-        if case_sensitive_patterns:
-            positive_regexes['case_sensitive'] = re.compile('|'.join(case_sensitive_patterns), 0)
-        if case_insensitive_patterns:
-            positive_regexes['case_insensitive'] = re.compile('|'.join(case_insensitive_patterns), re.IGNORECASE)
-        
-        negative_regexes = []
-        for case_type, pattern in negative_patterns:
-            flags = 0 if case_type == 'case_sensitive' else re.IGNORECASE
-            negative_regexes.append(re.compile(pattern, flags))
-        
-        required_regexes = []
-        for case_type, pattern in required_patterns:
-            flags = 0 if case_type == 'case_sensitive' else re.IGNORECASE
-            required_regexes.append(re.compile(pattern, flags))
-        
-        return positive_regexes, negative_regexes, required_regexes
-    
+        plan = keyword_plan_for(keywords)
+        if plan is None:
+            return {}, [], []
+        return plan.regexes
+
+    def _keyword_filter(
+        self,
+        items: List[ContentItem],
+        keywords: Optional[Sequence[str]],
+        positive_regexes: dict,
+        negative_regexes: List,
+        required_regexes: List,
+        matcher: Optional[TermMatcher] = None,
+    ) -> List[ContentItem]:
+        """Keep items whose text passes the keyword operators, in input order.
+
+        Large datasets go through the cached inverted index first, so the
+        regexes only run on items that share tokens with the query. A
+        ``matcher`` replaces the regexes for large term sets.
+        """
+        if len(items) < INDEX_MIN_ITEMS:
+            if matcher is not None:
+                return [it for it in items if matcher.passes(it.text)]
+            return [
+                it
+                for it in items
+                if self._passes_keyword_filters(
+                    it.text, positive_regexes, negative_regexes, required_regexes
+                )
+            ]
+
+        index = keyword_index_for(items)
+        positions = self._keyword_positions(
+            index,
+            keywords,
+            positive_regexes,
+            negative_regexes,
+            required_regexes,
+            matcher=matcher,
+        )
+        return index.select(items, positions)
+
+    def _keyword_positions(
+        self,
+        index: KeywordIndex,
+        keywords: Optional[Sequence[str]],
+        positive_regexes: dict,
+        negative_regexes: List,
+        required_regexes: List,
+        within: Optional[Set[int]] = None,
+        matcher: Optional[TermMatcher] = None,
+    ) -> Set[int]:
+        """Positions in ``index`` whose text passes the keyword operators.
+
+        Args:
+            within: Only consider these positions (None for all)
+            matcher: Multi-term matcher used instead of the regexes
+        """
+        # Same term order as the compiled plan the regexes come from
+        positive, negative, required = parse_search_terms(normalize_keywords(keywords))
+
+        candidates = None
+        # Narrowing costs a vocabulary scan per term; past the matcher
+        # threshold a single matcher pass over every item is cheaper
+        if matcher is None or len(positive) + len(required) < MATCHER_MIN_TERMS:
+            candidates = index.candidates(positive, required)
+        if candidates is None:
+            candidates = set(range(index.size)) if within is None else within
+        elif within is not None:
+            candidates = candidates & within
+
+        snapshot = index.items
+        if matcher is not None:
+            return {pos for pos in candidates if matcher.passes(snapshot[pos].text)}
+
+        # Only items sharing tokens with a negated term can be excluded by it
+        excluded: Set[int] = set()
+        for term, regex in zip(negative, negative_regexes):
+            term_candidates = index.term_candidates(term)
+            if term_candidates is None:
+                break
+            excluded.update(
+                pos
+                for pos in term_candidates & candidates
+                if regex.search(index.items[pos].text or "")
+            )
+        else:
+            negative_regexes = []
+
+        pool = candidates - excluded if excluded else candidates
+        if not (positive_regexes or negative_regexes or required_regexes):
+            return set(pool)
+        return {
+            pos
+            for pos in pool
+            if self._passes_keyword_filters(
+                snapshot[pos].text, positive_regexes, negative_regexes, required_regexes
+            )
+        }
+
     def _passes_keyword_filters(self, text: Optional[str], positive_regexes: dict, negative_regexes: List, required_regexes: List) -> bool:
         """Check if text passes all keyword filter criteria."""
         if not text:
@@ -777,79 +882,29 @@ class SearchManager:
                 }
             }
         
-        # Separate content by type
-        posts = [item for item in items if item.content_type == "post"]
-        replies = [item for item in items if item.content_type == "reply"]
-        repost_items = [item for item in items if item.content_type == "repost"]
-        like_items = [item for item in items if item.content_type == "like"]
-        
-        # Posts and replies (content that can have engagement)
-        pr_items = posts + replies
-        
-        # Calculate totals
-        total_likes = sum(int(item.like_count or 0) for item in pr_items)
-        total_reposts = sum(int(item.repost_count or 0) for item in pr_items)
-        total_replies = sum(int(item.reply_count or 0) for item in pr_items)
-        total_engagement = sum(
-            calculate_engagement_score(
-                int(item.like_count or 0),
-                int(item.repost_count or 0),
-                int(item.reply_count or 0)
-            ) for item in pr_items
+        # Totals over posts/replies; categories relative to the runtime average
+        # likes when one is known. Vectorized when NumPy is installed.
+        stats = engagement_stats(
+            range_index_for(items, self.settings.use_subject_engagement_for_reposts),
+            baseline_likes=getattr(self.settings, "avg_likes_per_post", None),
         )
-        
-        # Calculate averages
-        denom = max(1, len(pr_items))
-        avg_likes = total_likes / denom
-        avg_engagement = total_engagement / denom
-        
-        # Use runtime average if available, otherwise calculate from data
-        avg_likes_runtime = (
-            getattr(self.settings, "avg_likes_per_post", avg_likes) or avg_likes
-        )
-        
-        # Calculate engagement thresholds
-        high_engagement_threshold = max(10.0, avg_engagement * 2.0)
-        half = max(0.0, avg_likes_runtime * 0.5)
-        one_half = max(1.0, avg_likes_runtime * 1.5)
-        double = max(1.0, avg_likes_runtime * 2.0)
-        
-        # Categorize posts by engagement
-        high_engagement = [
-            item for item in pr_items 
-            if calculate_engagement_score(
-                int(item.like_count or 0),
-                int(item.repost_count or 0),
-                int(item.reply_count or 0)
-            ) >= high_engagement_threshold
-        ]
-        
-        # Dead threads: posts and replies with 0 engagement
-        dead_threads = [item for item in pr_items if (item.like_count or 0) == 0]
-        
-        # Performance categories: posts only
-        posts_only = [item for item in pr_items if item.content_type == "post"]
-        bomber_posts = [item for item in posts_only if 0 < (item.like_count or 0) <= half]
-        mid_posts = [item for item in posts_only if half < (item.like_count or 0) <= one_half]
-        banger_posts = [item for item in posts_only if (item.like_count or 0) >= double]
-        viral_posts = [item for item in posts_only if (item.like_count or 0) >= 2000]
-        
+
         return {
-            'total_posts': len(posts),
-            'total_likes': total_likes,
-            'total_reposts': total_reposts,
-            'total_replies': total_replies,
-            'top_posts': len(high_engagement),
-            'average_posts': len(mid_posts),
-            'low_engagement': len(bomber_posts),
-            'dead_threads': len(dead_threads),
+            'total_posts': stats['posts'],
+            'total_likes': stats['total_likes'],
+            'total_reposts': stats['total_reposts'],
+            'total_replies': stats['total_replies'],
+            'top_posts': stats['high_engagement'],
+            'average_posts': stats['mid'],
+            'low_engagement': stats['bombers'],
+            'dead_threads': stats['dead_threads'],
             'engagement_thresholds': {
-                'top': int(high_engagement_threshold),
-                'average': int(one_half),
-                'low': int(half)
+                'top': int(stats['high_engagement_threshold']),
+                'average': int(stats['one_half']),
+                'low': int(stats['half'])
             },
-            'banger_posts': len(banger_posts),
-            'viral_posts': len(viral_posts),
-            'avg_likes_per_post': avg_likes,
-            'avg_engagement_per_post': avg_engagement
+            'banger_posts': stats['bangers'],
+            'viral_posts': stats['viral'],
+            'avg_likes_per_post': stats['avg_likes'],
+            'avg_engagement_per_post': stats['avg_engagement']
         }
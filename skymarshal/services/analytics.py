@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-import re
+import calendar
 from collections import Counter
-from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
-from ..models import ContentItem
+from ..models import ContentItem, utc_hour_and_weekday
+from ..text_features import text_features
 
 
 class ContentAnalytics:
@@ -41,8 +41,8 @@ class ContentAnalytics:
         if not text:
             return {"score": 0.0, "positive": 0, "negative": 0, "neutral": 1}
 
-        # Normalize text
-        words = re.findall(r'\b\w+\b', text.lower())
+        # Lowercase word tokens, memoized per text
+        words = text_features(text).tokens
 
         positive_count = sum(1 for word in words if word in ContentAnalytics.POSITIVE_WORDS)
         negative_count = sum(1 for word in words if word in ContentAnalytics.NEGATIVE_WORDS)
@@ -123,31 +123,26 @@ class ContentAnalytics:
         day_engagement = {}
 
         for item in posts_and_replies:
-            if not item.created_at:
+            # Timestamps are parsed once at load time
+            if item.created_ts is None:
                 continue
 
-            try:
-                # Parse ISO timestamp
-                dt = datetime.fromisoformat(item.created_at.replace('Z', '+00:00'))
-                hour = dt.hour
-                day = dt.strftime('%A')  # Monday, Tuesday, etc.
+            hour, weekday = utc_hour_and_weekday(item.created_ts)
+            day = calendar.day_name[weekday]  # Monday, Tuesday, etc.
 
-                hour_counts[hour] += 1
-                day_counts[day] += 1
+            hour_counts[hour] += 1
+            day_counts[day] += 1
 
-                # Track engagement by time
-                engagement = (item.like_count or 0) + (item.repost_count or 0) + (item.reply_count or 0)
-
-                if hour not in hour_engagement:
-                    hour_engagement[hour] = []
-                hour_engagement[hour].append(engagement)
+            # Track engagement by time
+            engagement = (item.like_count or 0) + (item.repost_count or 0) + (item.reply_count or 0)
 
-                if day not in day_engagement:
-                    day_engagement[day] = []
-                day_engagement[day].append(engagement)
+            if hour not in hour_engagement:
+                hour_engagement[hour] = []
+            hour_engagement[hour].append(engagement)
 
-            except (ValueError, AttributeError):
-                continue
+            if day not in day_engagement:
+                day_engagement[day] = []
+            day_engagement[day].append(engagement)
 
         # Calculate average engagement by time
         hour_avg_engagement = {
@@ -195,7 +190,7 @@ class ContentAnalytics:
 
         for item in posts_and_replies:
             engagement = (item.like_count or 0) + (item.repost_count or 0) + (item.reply_count or 0)
-            words = re.findall(r'\b\w+\b', item.text.lower())
+            words = text_features(item.text).tokens
 
             # Skip very short words and common words
             stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "from", "as", "is", "was", "are", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should", "may", "might", "must", "can", "this", "that", "these", "those", "i", "you", "he", "she", "it", "we", "they", "me", "him", "her", "us", "them", "my", "your", "his", "its", "our", "their"}
@@ -247,8 +242,7 @@ class ContentAnalytics:
 
         all_words = []
         for item in posts_and_replies:
-            words = re.findall(r'\b\w+\b', item.text.lower())
-            all_words.extend(words)
+            all_words.extend(text_features(item.text).tokens)
 
         # Common stop words to exclude
         stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "from", "as", "is", "was", "are", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should", "may", "might", "must", "can", "this", "that", "these", "those", "i", "you", "he", "she", "it", "we", "they", "me", "him", "her", "us", "them", "my", "your", "his", "its", "our", "their", "so", "just", "now", "out", "up", "get", "got", "like", "one", "two"}
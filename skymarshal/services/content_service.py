@@ -11,11 +11,14 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TypedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, TypedDict
 
 from ..auth import AuthManager
+from ..car_reader import CarIndex
+from ..content_store import EXPORT_FILE_SUFFIXES, ContentStore
 from ..data_manager import DataManager
 from ..deletion import DeletionManager
+from ..keyword_plan import keyword_plan_stats
 from ..models import (
     ContentItem,
     ContentType,
@@ -24,6 +27,20 @@ from ..models import (
     bulk_update_engagement_scores,
     calculate_engagement_score,
 )
+from ..query_cache import (
+    Cursor,
+    QueryCache,
+    bump_dataset_version,
+    counts_version,
+    dataset_of,
+    dataset_version,
+    decode_cursor,
+    encode_cursor,
+    filters_key,
+    filters_use_counts,
+    query_hash,
+    resume_position,
+)
 from ..search import SearchManager
 from ..settings import SettingsManager
 
@@ -64,6 +81,7 @@ class SearchRequest:
     min_replies: Optional[int] = None
     max_replies: Optional[int] = None
     limit: int = 250
+    offset: int = 0
 
 
 class ContentService:
@@ -102,6 +120,9 @@ class ContentService:
 
         self._content_cache: Dict[str, List[ContentItem]] = {}
         self._content_files: Dict[str, Path] = {}
+        # Ordered result URIs of recent in-memory searches, for cheap paging
+        self.query_cache = QueryCache()
+        self._uri_maps: Dict[str, Tuple[int, Dict[str, ContentItem]]] = {}
         env_pref = _env_flag("SKYMARSHAL_USE_CAR", default=True)
         self._prefer_car_backup = env_pref if prefer_car_backup is None else prefer_car_backup
 
@@ -180,6 +201,7 @@ class ContentService:
 
         self._content_cache[handle] = items
         self._content_files[handle] = export_path
+        bump_dataset_version(self._dataset(items))
         return items
 
     def _export_via_api(
@@ -215,10 +237,11 @@ class ContentService:
                     set(categories),
                 )
             finally:
-                try:
-                    Path(backup_path).unlink()
-                except OSError:
-                    pass
+                for path in (Path(backup_path), CarIndex.sidecar_path(backup_path)):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
             return export_path
         except Exception:
             return None
@@ -227,12 +250,17 @@ class ContentService:
         """Locate the most recent cached export for a handle."""
 
         safe_name = handle.replace('.', '_')
-        primary = self._json_dir / f"{safe_name}.json"
-        if primary.exists():
-            return primary
+        for suffix in EXPORT_FILE_SUFFIXES:
+            primary = self._json_dir / f"{safe_name}{suffix}"
+            if primary.exists():
+                return primary
 
         candidates = sorted(
-            self._json_dir.glob(f"{safe_name}_*.json"),
+            [
+                path
+                for suffix in EXPORT_FILE_SUFFIXES
+                for path in self._json_dir.glob(f"{safe_name}_*{suffix}")
+            ],
             key=lambda p: p.stat().st_mtime,
             reverse=True,
         )
@@ -242,17 +270,123 @@ class ContentService:
     # Search utilities
     # ------------------------------------------------------------------
 
+    def _search_store(self) -> Optional[ContentStore]:
+        """Return the SQLite store to search directly, per the search_backend setting."""
+
+        backend = (self._settings.search_backend or "auto").lower()
+        handle = self.auth.current_handle
+        if backend == "memory" or not handle:
+            return None
+        if backend == "auto" and handle in self._content_cache:
+            # Already in memory: the in-memory index is faster still
+            return None
+        path = self._content_files.get(handle) or self._find_existing_export(handle)
+        if path is None or Path(path).suffix != ".db":
+            return None
+        return ContentStore(path)
+
     def search(self, request: SearchRequest) -> Tuple[List[SearchResult], int]:
         """Return filtered content and total count for the current user."""
 
-        items = self.ensure_content_loaded()
-        filters = self._build_filters(request)
-        filtered = self.search_manager.search_content_with_filters(items, filters)
+        results, total, _ = self.search_page(request)
+        return results, total
 
-        # Apply multi-type filtering manually when needed
+    def search_page(
+        self,
+        request: SearchRequest,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[SearchResult], int, Optional[str]]:
+        """Return one page of results, the total, and a cursor for the next page.
+
+        Without ``cursor`` the page starts at ``request.offset``. A cursor is
+        only valid for the same request; the next page is a slice of the
+        cached result (in memory) or a keyset query (SQLite), and the total
+        is carried in the cursor rather than recounted.
+
+        Raises:
+            ValidationError: ``cursor`` is malformed or from another query
+        """
+
+        filters = self._build_filters(request)
         desired_types = {
             ct.lower() for ct in (request.content_types or []) if ct
         }
+        newest_first = self._settings.fetch_order == "newest"
+        query = (
+            self.auth.current_handle,
+            filters_key(filters),
+            tuple(sorted(desired_types)),
+            newest_first,
+            bool(self._settings.use_subject_engagement_for_reposts),
+        )
+        qhash = query_hash(query)
+        state = decode_cursor(cursor, qhash) if cursor else None
+        limit = request.limit if request.limit > 0 else None
+
+        store = self._search_store()
+        if store is not None:
+            page, total = store.search(
+                filters,
+                content_types=request.content_types,
+                exclude_empty=True,
+                use_subject_engagement=self._settings.use_subject_engagement_for_reposts,
+                newest_first=newest_first,
+                limit=limit,
+                offset=0 if state else max(0, request.offset),
+                after=(state.sort_key, state.last_uri) if state else None,
+                total=state.total if state else None,
+            )
+            version = None
+            start = state.position if state else max(0, request.offset)
+        else:
+            items = self.ensure_content_loaded()
+            dataset = self._dataset(items)
+            # Hydrated counts can only change searches that filter on them
+            if filters_use_counts(filters):
+                version = counts_version(dataset)
+            else:
+                version = dataset_version(dataset)
+            uris = self._search_uris(items, filters, desired_types, (version,) + query)
+            by_uri = self._items_by_uri(items)
+            if state:
+                start = resume_position(
+                    state,
+                    uris,
+                    version,
+                    lambda uri: by_uri[uri].created_ts,
+                    newest_first,
+                )
+            else:
+                start = max(0, request.offset)
+            end = start + limit if limit is not None else None
+            page = [by_uri[uri] for uri in uris[start:end]]
+            total = len(uris)
+
+        next_cursor = None
+        position = start + len(page)
+        if page and position < total:
+            last = page[-1]
+            next_cursor = encode_cursor(
+                Cursor(qhash, version, position, last.created_ts, last.uri, total)
+            )
+        return [self._to_search_result(item) for item in page], total, next_cursor
+
+    def _search_uris(
+        self,
+        items: List[ContentItem],
+        filters: SearchFilters,
+        desired_types: Set[str],
+        key: Tuple,
+    ) -> Tuple[str, ...]:
+        """Ordered URIs of every match, from the query cache when possible."""
+
+        uris = self.query_cache.get(key)
+        if uris is not None:
+            return uris
+
+        filtered = self.search_manager.search_content_with_filters(items, filters)
+
+        # Apply multi-type filtering manually when needed
         if desired_types:
             filtered = [
                 item
@@ -266,13 +400,29 @@ class ContentService:
             for item in filtered
             if item.text or (item.like_count or 0) > 0 or (item.repost_count or 0) > 0 or (item.reply_count or 0) > 0
         ]
+        return self.query_cache.put(key, [item.uri for item in filtered])
 
-        total = len(filtered)
+    def _dataset(self, items: List[ContentItem]) -> str:
+        """query_cache dataset of the loaded items: the DID that owns them."""
 
-        limit_value = request.limit if request.limit > 0 else len(filtered)
-        limited = filtered[: min(limit_value, len(filtered))]
-        results = [self._to_search_result(item) for item in limited]
-        return results, total
+        return dataset_of(items[0].uri) if items else (self.auth.current_did or "")
+
+    def _items_by_uri(self, items: List[ContentItem]) -> Dict[str, ContentItem]:
+        """URI lookup for the current user's items, rebuilt per dataset version."""
+
+        handle = self.auth.current_handle or ""
+        version = dataset_version(self._dataset(items))
+        cached = self._uri_maps.get(handle)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        by_uri = {item.uri: item for item in items}
+        self._uri_maps[handle] = (version, by_uri)
+        return by_uri
+
+    def search_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the search result and keyword plan caches."""
+
+        return {**self.query_cache.stats(), "keyword_plans": keyword_plan_stats()}
 
     def _build_filters(self, request: SearchRequest) -> SearchFilters:
         """Create SearchFilters object from the incoming request."""
@@ -306,7 +456,7 @@ class ContentService:
         """Serialize a content item for presentation layers."""
 
         raw = item.raw_data or {}
-        has_media = bool(raw.get("embed") or raw.get("image"))
+        has_media = bool(raw.get("has_media") or raw.get("embed") or raw.get("image"))
         text = item.text or ""
         likes = int(item.like_count or 0)
         reposts = int(item.repost_count or 0)
@@ -345,7 +495,13 @@ class ContentService:
             remaining = [
                 item for item in self._content_cache[handle] if item.uri not in uris
             ]
+            bump_dataset_version(self._dataset(self._content_cache[handle]))
             self._content_cache[handle] = remaining
+        if deleted and handle:
+            # Keep a directly-searched store in step with the in-memory cache
+            path = self._content_files.get(handle) or self._find_existing_export(handle)
+            if path is not None and Path(path).suffix == ".db":
+                ContentStore(path).delete_uris(uris)
         return deleted, errors
 
     # ------------------------------------------------------------------
@@ -10,6 +10,7 @@ menus, validation of user inputs, and default value management for the applicati
 """
 
 import json
+import os
 from pathlib import Path
 from typing import Any
 
@@ -51,10 +52,13 @@ class SettingsManager:
                 "records_page_size": self.settings.records_page_size,
                 "hydrate_batch_size": self.settings.hydrate_batch_size,
                 "category_workers": self.settings.category_workers,
+                "car_decode_workers": self.settings.car_decode_workers,
                 "file_list_page_size": self.settings.file_list_page_size,
                 "high_engagement_threshold": self.settings.high_engagement_threshold,
                 "use_subject_engagement_for_reposts": self.settings.use_subject_engagement_for_reposts,
                 "fetch_order": self.settings.fetch_order,
+                "export_format": self.settings.export_format,
+                "search_backend": self.settings.search_backend,
                 "engagement_cache_enabled": self.settings.engagement_cache_enabled,
                 "engagement_cache_ttl_recent": self.settings.engagement_cache_ttl_recent,
                 "engagement_cache_ttl_medium": self.settings.engagement_cache_ttl_medium,
@@ -102,6 +106,11 @@ class SettingsManager:
                     "category_workers",
                     str(self.settings.category_workers),
                 ),
+                (
+                    "CAR decode worker processes (0 = off)",
+                    "car_decode_workers",
+                    str(self.settings.car_decode_workers),
+                ),
                 (
                     "File picker page size",
                     "file_list_page_size",
@@ -122,6 +131,16 @@ class SettingsManager:
                     "fetch_order",
                     self.settings.fetch_order,
                 ),
+                (
+                    "Local data format (sqlite|cbor|json)",
+                    "export_format",
+                    self.settings.export_format,
+                ),
+                (
+                    "Search backend (auto|sqlite|memory)",
+                    "search_backend",
+                    self.settings.search_backend,
+                ),
                 (
                     "Engagement cache enabled",
                     "engagement_cache_enabled",
@@ -182,6 +201,9 @@ class SettingsManager:
         console.print(
             "• **Category Workers**: Parallel downloads for faster processing"
         )
+        console.print(
+            "• **CAR Decode Workers**: Processes used to decode very large backups (0 = off)"
+        )
         console.print()
         console.print("**Display Settings:**")
         console.print("• **File List Page Size**: Files shown per page in file picker")
@@ -189,6 +211,12 @@ class SettingsManager:
             "• **High Engagement Threshold**: Score to consider content 'high engagement'"
         )
         console.print("• **Fetch Order**: Whether to download newest or oldest first")
+        console.print(
+            "• **Local Data Format**: sqlite (queryable), cbor (compact binary) or json (human-readable)"
+        )
+        console.print(
+            "• **Search Backend**: auto/sqlite run web searches in the .db store without loading it"
+        )
         console.print()
         console.print("**Content Settings:**")
         console.print(
@@ -208,6 +236,7 @@ class SettingsManager:
             "records_page_size",
             "hydrate_batch_size",
             "category_workers",
+            "car_decode_workers",
             "file_list_page_size",
             "high_engagement_threshold",
         ):
@@ -216,6 +245,8 @@ class SettingsManager:
                 val = max(1, min(100, val))
             if key == "hydrate_batch_size":
                 val = max(1, min(100, val))
+            if key == "car_decode_workers":
+                val = max(0, min(os.cpu_count() or 1, val))
             setattr(self.settings, key, val)
         elif key == "default_categories":
             parts = [p.strip().lower() for p in new_val.split(",") if p.strip()]
@@ -242,6 +273,16 @@ class SettingsManager:
             if val not in ("newest", "oldest"):
                 raise ValueError("must be 'newest' or 'oldest'")
             self.settings.fetch_order = val
+        elif key == "export_format":
+            val = new_val.strip().lower()
+            if val not in ("sqlite", "cbor", "json"):
+                raise ValueError("must be 'sqlite', 'cbor' or 'json'")
+            self.settings.export_format = val
+        elif key == "search_backend":
+            val = new_val.strip().lower()
+            if val not in ("auto", "sqlite", "memory"):
+                raise ValueError("must be 'auto', 'sqlite' or 'memory'")
+            self.settings.search_backend = val
         elif key == "engagement_cache_enabled":
             val = new_val.strip().lower()
             self.settings.engagement_cache_enabled = val in (
@@ -0,0 +1,145 @@
+"""
+Skymarshal Single-Flight Calls
+
+File Purpose: Coalesce identical in-flight lookups into one upstream call
+Primary Functions/Classes: SingleFlight, flight_group, single_flight_stats
+Inputs and Outputs (I/O): Keyed calls in; one shared result (or exception) per key out
+
+Several web sessions often ask for the same thing at the same moment: the
+profile of a popular handle, engagement for the same post batch. Without
+coordination each of them pays for its own upstream request and rate-limit
+points. A SingleFlight group lets the first caller for a key (the leader)
+run the call while everyone arriving before it finishes waits for, and
+receives, the same result or exception. Nothing is kept once the call
+completes; caching stays with the existing caches.
+
+Waiting works from threads (do) and from coroutines on any event loop
+(do_async). If a leader is cancelled its followers don't inherit the
+cancellation: one of them takes over and runs the call itself.
+
+Shared results are handed to every caller as the same object, so callers
+must treat them as read-only.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar, cast
+
+T = TypeVar("T")
+
+# Group names shared by the call sites that coalesce with each other
+PROFILE_LOOKUPS = "profiles"
+POST_BATCHES = "post_batches"
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """The in-flight future for ``key`` and whether the caller must run it."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.calls += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future) -> None:
+        # Later callers start a fresh call rather than reuse a finished one
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """``fn(*args, **kwargs)``, shared with concurrent callers using ``key``."""
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return cast(T, future.result())
+                except CancelledError:
+                    continue  # the leader was cancelled; take over
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                self._finish(key, future)
+                future.set_exception(exc)
+                raise
+            self._finish(key, future)
+            future.set_result(result)
+            return result
+
+    async def do_async(
+        self, key: Hashable, coro_factory: Callable[[], Awaitable[T]]
+    ) -> T:
+        """``await coro_factory()``, shared with concurrent callers using ``key``."""
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                # wait() rather than await, so only our own cancellation raises
+                await asyncio.wait([asyncio.wrap_future(future)])
+                if future.cancelled():
+                    continue
+                return cast(T, future.result())
+            try:
+                result = await coro_factory()
+            except asyncio.CancelledError:
+                self._finish(key, future)
+                future.cancel()
+                raise
+            except BaseException as exc:
+                self._finish(key, future)
+                future.set_exception(exc)
+                raise
+            self._finish(key, future)
+            future.set_result(result)
+            return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Upstream calls made, callers served by another's call, calls in flight."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def flight_group(name: str) -> SingleFlight:
+    """The process-wide SingleFlight group ``name``, created on first use."""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """stats() of every group, by name."""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
+
+
+def clear_single_flight_groups() -> None:
+    """Forget all groups (calls already in flight still finish)."""
+    with _groups_lock:
+        _groups.clear()
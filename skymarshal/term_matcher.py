@@ -0,0 +1,201 @@
+"""
+Skymarshal Term Matcher
+
+File Purpose: Single-pass multi-term keyword matching for large keyword and blocklist
+    queries
+Primary Functions/Classes: TermMatcher, MATCHER_MIN_TERMS
+Inputs and Outputs (I/O): Search keywords in; per-text pass/fail decisions out
+
+SearchManager compiles each negated and required keyword to its own regex, so
+a pasted blocklist of hundreds of terms rescans every text hundreds of times.
+A TermMatcher puts every term into an Aho-Corasick automaton instead and
+finds all positive, negated and required terms in one walk over the text, so
+the cost per text stays flat in the number of terms.
+
+Matching follows the regex semantics exactly: phrases are case-sensitive,
+other terms compare against the lowercased text, and ``\\bword\\b`` terms are
+checked for word boundaries at each hit. Terms whose case folding str.lower()
+can't reproduce (non-ASCII letters with case), and texts containing "İ", "ı"
+or "ſ", are decided by the term regexes.
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .keyword_index import SearchTerm, parse_search_terms, term_pattern
+
+# Below this many terms the per-term regexes are cheaper than the automaton walk
+MATCHER_MIN_TERMS = 16
+
+POSITIVE, NEGATIVE, REQUIRED = 0, 1, 2
+
+
+def _foldable(text: str) -> bool:
+    """Whether str.lower() matches ``text`` the way re.IGNORECASE does.
+
+    True for ASCII and for characters without case (digits, CJK, emoji).
+    """
+    return all(ch.isascii() or ch.lower() == ch == ch.upper() for ch in text)
+
+
+def _needs_regex(text: str, lowered: str) -> bool:
+    """Texts with letters that re.IGNORECASE folds to ASCII but str.lower() doesn't."""
+    return len(lowered) != len(text) or "ı" in lowered or "ſ" in lowered
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class _Automaton:
+    """Aho-Corasick automaton over a set of literal patterns."""
+
+    def __init__(self, patterns: Sequence[Tuple[str, int]]):
+        # patterns: (literal, term id); states are list indexes, 0 is the root
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Tuple[int, ...]] = [()]
+
+        outputs: List[List[int]] = [[]]
+        for literal, tid in patterns:
+            state = 0
+            for ch in literal:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(tid)
+
+        # Breadth-first so every failure target is finished before it's used
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                outputs[nxt].extend(outputs[self.fail[nxt]])
+        self.out = [tuple(ids) for ids in outputs]
+
+    def hits(self, text: str):
+        """Yield ``(end, term ids)`` for every position where a pattern ends."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for end, ch in enumerate(text, 1):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                yield end, out[state]
+
+
+class TermMatcher:
+    """All keyword operators of one query, matched in a single pass per text."""
+
+    def __init__(
+        self,
+        positive: Sequence[SearchTerm],
+        negative: Sequence[SearchTerm],
+        required: Sequence[SearchTerm],
+    ):
+        self.terms: List[SearchTerm] = [*positive, *negative, *required]
+        self.roles: List[int] = (
+            [POSITIVE] * len(positive)
+            + [NEGATIVE] * len(negative)
+            + [REQUIRED] * len(required)
+        )
+        self.has_positive = bool(positive)
+        self.required_count = len(required)
+        self.regexes = [re.compile(*term_pattern(term)) for term in self.terms]
+
+        exact: List[Tuple[str, int]] = []
+        folded: List[Tuple[str, int]] = []
+        # Terms the automata can't decide; their regexes run on every text
+        self.regex_terms: List[int] = []
+        self.word_terms = set()
+        self.lengths: List[int] = []
+        for tid, (mode, text) in enumerate(self.terms):
+            self.lengths.append(len(text))
+            if not text:
+                self.regex_terms.append(tid)
+            elif mode == "phrase":
+                exact.append((text, tid))
+            elif _foldable(text):
+                folded.append((text.lower(), tid))
+                if mode == "word":
+                    self.word_terms.add(tid)
+            else:
+                self.regex_terms.append(tid)
+        self.exact = _Automaton(exact) if exact else None
+        self.folded = _Automaton(folded) if folded else None
+
+    @classmethod
+    def from_keywords(cls, keywords: Sequence[str]) -> "TermMatcher":
+        return cls(*parse_search_terms(keywords))
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _word_hit(self, text: str, tid: int, end: int) -> bool:
+        """Whether word term ``tid``'s hit ending at ``end`` has \\b on both sides."""
+        start = end - self.lengths[tid]
+        before = start > 0 and _is_word(text[start - 1])
+        after = end < len(text) and _is_word(text[end])
+        return before != _is_word(text[start]) and after != _is_word(text[end - 1])
+
+    def _decide(self, found: set) -> bool:
+        roles = self.roles
+        required = sum(1 for tid in found if roles[tid] == REQUIRED)
+        if required < self.required_count:
+            return False
+        return not self.has_positive or any(roles[tid] == POSITIVE for tid in found)
+
+    def _regex_passes(self, text: str) -> bool:
+        found = set()
+        for tid, regex in enumerate(self.regexes):
+            if regex.search(text):
+                if self.roles[tid] == NEGATIVE:
+                    return False
+                found.add(tid)
+        return self._decide(found)
+
+    def passes(self, text: Optional[str]) -> bool:
+        """Same result as SearchManager's per-term regex check for ``text``."""
+        if not text:
+            # Positive and required terms need some text to match
+            return not self.has_positive and not self.required_count
+
+        lowered = text.lower()
+        if _needs_regex(text, lowered):
+            return self._regex_passes(text)
+
+        roles = self.roles
+        found = set()
+        for automaton, haystack in ((self.exact, text), (self.folded, lowered)):
+            if automaton is None:
+                continue
+            for end, ids in automaton.hits(haystack):
+                for tid in ids:
+                    if tid in found:
+                        continue
+                    if tid in self.word_terms and not self._word_hit(text, tid, end):
+                        continue
+                    if roles[tid] == NEGATIVE:
+                        return False
+                    found.add(tid)
+        for tid in self.regex_terms:
+            if self.regexes[tid].search(text):
+                if roles[tid] == NEGATIVE:
+                    return False
+                found.add(tid)
+        return self._decide(found)
@@ -0,0 +1,152 @@
+"""
+Skymarshal Text Features
+
+File Purpose: Per-text features computed once and shared by search, cleanup and
+    analytics
+Primary Functions/Classes: TextFeatures, text_features, extract_text_features
+Inputs and Outputs (I/O): Post text in; URLs, hashtags, mentions, tokens and word counts
+    out
+
+Cleanup and bot heuristics, word analytics and the keyword index each used
+to rescan post text with their own regexes. text_features() extracts all of
+those fields once per distinct text and memoizes them, so a cleanup scan
+after a search (or a second analytics pass) reuses the work. The memo is
+keyed by the text itself, which serves ContentItems and the loners' export
+dicts alike. Each field is computed the first time something reads it, so
+the keyword index doesn't pay for URL or hashtag extraction.
+
+Tokens are kept as a tuple of interned strings and turned into a set on
+demand; a frozenset per item would cost several times the memory of the text.
+"""
+
+import re
+import sys
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+URL_RE = re.compile(r"https?://\S+")
+# \w already matches non-ASCII letters; anything wider would swallow trailing
+# punctuation ("#launch…") and change the loners' hashtag counts
+HASHTAG_RE = re.compile(r"#\w+")
+MENTION_RE = re.compile(r"@[\w.]+")
+
+# Distinct texts kept memoized (a few loaded accounts' worth)
+FEATURE_CACHE_SIZE = 1 << 18
+
+
+class TextFeatures:
+    """Derived fields of one text, each computed on first use and kept."""
+
+    __slots__ = (
+        "text",
+        "_lowered",
+        "_word_stats",
+        "_urls",
+        "_hashtags",
+        "_mentions",
+        "_tokens",
+    )
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lowered: Optional[str] = None
+        self._word_stats: Optional[Tuple[int, int]] = None
+        self._urls: Optional[Tuple[str, ...]] = None
+        self._hashtags: Optional[Tuple[str, ...]] = None
+        self._mentions: Optional[Tuple[str, ...]] = None
+        self._tokens: Optional[Tuple[str, ...]] = None
+
+    @property
+    def lowered(self) -> str:
+        if self._lowered is None:
+            self._lowered = self.text.lower()
+        return self._lowered
+
+    @property
+    def normalized(self) -> str:
+        """Duplicate detection key (stripped, lowercased)."""
+        return self.lowered.strip()
+
+    def _words(self) -> Tuple[int, int]:
+        if self._word_stats is None:
+            words = self.text.split()
+            self._word_stats = (len(words), len(set(words)))
+        return self._word_stats
+
+    @property
+    def word_count(self) -> int:
+        """Whitespace-separated words."""
+        return self._words()[0]
+
+    @property
+    def distinct_words(self) -> int:
+        """Distinct whitespace-separated words (case-sensitive)."""
+        return self._words()[1]
+
+    @property
+    def urls(self) -> Tuple[str, ...]:
+        if self._urls is None:
+            self._urls = tuple(URL_RE.findall(self.text))
+        return self._urls
+
+    @property
+    def url_count(self) -> int:
+        return len(self.urls)
+
+    @property
+    def hashtags(self) -> Tuple[str, ...]:
+        if self._hashtags is None:
+            self._hashtags = tuple(HASHTAG_RE.findall(self.text))
+        return self._hashtags
+
+    @property
+    def mentions(self) -> Tuple[str, ...]:
+        if self._mentions is None:
+            self._mentions = tuple(MENTION_RE.findall(self.text))
+        return self._mentions
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        """Lowercase ``\\w+`` tokens in text order."""
+        if self._tokens is None:
+            self._tokens = tuple(map(sys.intern, TOKEN_RE.findall(self.lowered)))
+        return self._tokens
+
+    @property
+    def token_set(self) -> FrozenSet[str]:
+        return frozenset(self.tokens)
+
+    def __repr__(self) -> str:
+        return f"TextFeatures({self.text[:30]!r})"
+
+
+def extract_text_features(text: Optional[str]) -> TextFeatures:
+    """Features of ``text`` without memoizing (one-off streams like the firehose)."""
+    return TextFeatures(text or "")
+
+
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def _memoized(text: str) -> TextFeatures:
+    return TextFeatures(text)
+
+
+def text_features(text: Optional[str]) -> TextFeatures:
+    """Memoized features of ``text`` (None counts as empty)."""
+    return _memoized(text or "")
+
+
+def clear_text_features() -> None:
+    """Drop all memoized features."""
+    _memoized.cache_clear()
+
+
+def text_feature_stats() -> dict:
+    """Hit/miss counters of the feature memo."""
+    info = _memoized.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
@@ -36,6 +36,8 @@ from .models import (
     calculate_engagement_score,
     console,
 )
+from .range_index import range_index_for
+from .vector_filters import engagement_stats
 
 
 class UIManager:
@@ -126,46 +128,19 @@ class UIManager:
             task = progress.add_task("Computing statistics...", total=1)
 
             total_items = len(current_data)
-            posts = [item for item in current_data if item.content_type == "post"]
-            replies = [item for item in current_data if item.content_type == "reply"]
-            repost_items = [
-                item for item in current_data if item.content_type == "repost"
-            ]
-            like_items = [item for item in current_data if item.content_type == "like"]
-
-            pr_items = posts + replies
-
-            # Compute totals only over posts/replies
-            total_likes = sum(int(it.like_count or 0) for it in pr_items)
-            total_reposts = sum(int(it.repost_count or 0) for it in pr_items)
-            total_replies = sum(int(it.reply_count or 0) for it in pr_items)
-            total_engagement = sum(
-                calculate_engagement_score(
-                    int(it.like_count or 0),
-                    int(it.repost_count or 0),
-                    int(it.reply_count or 0),
-                )
-                for it in pr_items
+            # Counts, totals and categories in one (vectorized with NumPy) pass
+            stats = engagement_stats(
+                range_index_for(current_data, self.settings.use_subject_engagement_for_reposts),
+                baseline_likes=getattr(self.settings, "avg_likes_per_post", None),
+                high_engagement_threshold=high_engagement_threshold,
             )
-
-            # Averages are per post/reply, not per total items
-            avg_engagement = (total_engagement / len(pr_items)) if pr_items else 0
-            avg_likes = (total_likes / len(pr_items)) if pr_items else 0
-            dead_threads = [
-                it
-                for it in pr_items
-                if it.like_count == 0 and it.repost_count == 0 and it.reply_count == 0
-            ]
-            high_engagement = [
-                it
-                for it in pr_items
-                if calculate_engagement_score(
-                    int(it.like_count or 0),
-                    int(it.repost_count or 0),
-                    int(it.reply_count or 0),
-                )
-                >= high_engagement_threshold
-            ]
+            pr_count = stats["posts_and_replies"]
+            total_likes = stats["total_likes"]
+            total_reposts = stats["total_reposts"]
+            total_replies = stats["total_replies"]
+            total_engagement = stats["total_engagement"]
+            avg_engagement = stats["avg_engagement"]
+            avg_likes = stats["avg_likes"]
 
             progress.update(task, completed=1)
 
@@ -179,17 +154,17 @@ class UIManager:
             table.add_column("Details", style="dim", width=25)
 
             table.add_row("Total Items", str(total_items), "All content")
-            table.add_row("Posts", str(len(posts)), "Original posts")
-            table.add_row("Replies", str(len(replies)), "Comments/replies")
-            table.add_row("Reposts", str(len(repost_items)), "Your repost actions")
-            table.add_row("Likes", str(len(like_items)), "Your like actions")
+            table.add_row("Posts", str(stats["posts"]), "Original posts")
+            table.add_row("Replies", str(stats["replies"]), "Comments/replies")
+            table.add_row("Reposts", str(stats["reposts"]), "Your repost actions")
+            table.add_row("Likes", str(stats["likes"]), "Your like actions")
 
-            if pr_items:
+            if pr_count:
                 table.add_row("", "", "")
                 table.add_row(
                     "Avg Engagement",
                     f"{avg_engagement:.1f}",
-                    f"Across {len(pr_items)} posts/replies",
+                    f"Across {pr_count} posts/replies",
                 )
                 table.add_row(
                     "Avg Likes (posts/replies)",
@@ -198,10 +173,10 @@ class UIManager:
                 )
                 table.add_row(
                     "High Engagement",
-                    str(len(high_engagement)),
+                    str(stats["high_engagement"]),
                     f"{high_engagement_threshold}+ engagement score",
                 )
-                table.add_row("Dead Threads", str(len(dead_threads)), "0 engagement")
+                table.add_row("Dead Threads", str(stats["no_engagement"]), "0 engagement")
 
             console.print(table)
 
@@ -215,16 +190,16 @@ class UIManager:
 
             # Basic counts
             stats_table.add_row("Total Items", str(total_items), "Everything")
-            stats_table.add_row("Posts", str(len(posts)), "Posts")
-            stats_table.add_row("Replies", str(len(replies)), "Comments/replies")
+            stats_table.add_row("Posts", str(stats["posts"]), "Posts")
+            stats_table.add_row("Replies", str(stats["replies"]), "Comments/replies")
             stats_table.add_row(
-                "Reposts", str(len(repost_items)), "Your repost actions"
+                "Reposts", str(stats["reposts"]), "Your repost actions"
             )
-            stats_table.add_row("Likes", str(len(like_items)), "Your like actions")
+            stats_table.add_row("Likes", str(stats["likes"]), "Your like actions")
 
             # Engagement totals
             stats_table.add_row("", "", "")
-            denom = max(1, len(pr_items))
+            denom = max(1, pr_count)
             stats_table.add_row(
                 "Total Likes",
                 str(total_likes),
@@ -255,38 +230,24 @@ class UIManager:
             stats_table.add_row("", "", "")
             stats_table.add_row(
                 "High Engagement",
-                str(len(high_engagement)),
+                str(stats["high_engagement"]),
                 f"{high_engagement_threshold}+ engagement score",
             )
 
             # Likes-based categories (based on runtime avg) - only for posts, not replies
-            avg_likes_runtime = (
-                getattr(self.settings, "avg_likes_per_post", avg_likes) or avg_likes
-            )
-            # Clamp thresholds to sensible minimums when average is near zero
-            half = max(0.0, avg_likes_runtime * 0.5)
-            one_half = max(1.0, avg_likes_runtime * 1.5)
-            double = max(1.0, avg_likes_runtime * 2.0)
-            
-            # Dead threads: posts and replies with 0 engagement
-            cat_dead = [it for it in pr_items if (it.like_count or 0) == 0]
-            
-            # Performance categories: posts only
-            posts_only = [it for it in pr_items if it.content_type == "post"]
-            cat_bomber = [it for it in posts_only if 0 < (it.like_count or 0) <= half]
-            cat_mid = [it for it in posts_only if half < (it.like_count or 0) <= one_half]
-            cat_banger = [it for it in posts_only if (it.like_count or 0) >= double]
-            cat_viral = [it for it in posts_only if (it.like_count or 0) >= 2000]
+            avg_likes_runtime = stats["baseline_likes"]
+            half = stats["half"]
+            double = stats["double"]
             stats_table.add_row("", "", "")
-            stats_table.add_row("Dead Threads", str(len(cat_dead)), "0 likes")
-            stats_table.add_row("Bombers (posts)", str(len(cat_bomber)), f"≤ {half:.1f} likes")
+            stats_table.add_row("Dead Threads", str(stats["dead_threads"]), "0 likes")
+            stats_table.add_row("Bombers (posts)", str(stats["bombers"]), f"≤ {half:.1f} likes")
             stats_table.add_row(
-                "Mid (posts)", str(len(cat_mid)), f"~ avg ({avg_likes_runtime:.1f})"
+                "Mid (posts)", str(stats["mid"]), f"~ avg ({avg_likes_runtime:.1f})"
             )
             stats_table.add_row(
-                "Bangers (posts)", str(len(cat_banger)), f"≥ {double:.1f} likes"
+                "Bangers (posts)", str(stats["bangers"]), f"≥ {double:.1f} likes"
             )
-            stats_table.add_row("Viral (posts)", str(len(cat_viral)), "≥ 2000 likes")
+            stats_table.add_row("Viral (posts)", str(stats["viral"]), "≥ 2000 likes")
 
             console.print(stats_table)
             console.print()
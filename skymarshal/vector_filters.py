@@ -0,0 +1,256 @@
+"""
+Skymarshal Vectorized Filters
+
+File Purpose: NumPy evaluation of search ranges and engagement statistics over whole
+    datasets
+Primary Functions/Classes: VectorColumns, vector_columns_for, range_mask,
+    ordered_positions, engagement_stats
+Inputs and Outputs (I/O): RangeIndex columns in; boolean masks, date-ordered positions
+    and stat dicts out
+
+The RangeIndex already holds one packed array per field (likes, reposts,
+replies and engagement with the repost subject substitution applied,
+created_ts, content type). With NumPy installed these are viewed without
+copying, and every non-keyword SearchFilters predicate becomes one boolean
+mask over the dataset. engagement_stats computes the totals and the
+dead/bomber/mid/banger/viral category counts the same way.
+
+NumPy is optional: without it engagement_stats falls back to plain loops
+over the same columns, and SearchManager uses RangeIndex bisection.
+"""
+
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment, unused-ignore]
+
+from .models import TS_MIN, SearchFilters
+from .range_index import TYPE_CODES, RangeIndex
+
+# Likes at which a post counts as viral, whatever the account's average
+VIRAL_LIKES = 2000
+
+HAS_NUMPY = np is not None
+
+
+class VectorColumns:
+    """Zero-copy NumPy views over a RangeIndex's columns."""
+
+    def __init__(self, index: RangeIndex):
+        columns = index.columns
+        self.size = index.size
+        self.created_ts = np.frombuffer(columns["created_ts"], dtype=np.int64)
+        self.likes = np.frombuffer(columns["likes"], dtype=np.int64)
+        self.reposts = np.frombuffer(columns["reposts"], dtype=np.int64)
+        self.replies = np.frombuffer(columns["replies"], dtype=np.int64)
+        self.engagement = np.frombuffer(columns["engagement"], dtype=np.float64)
+        self.types = np.frombuffer(index.types, dtype=np.uint8)
+        self._orders: Dict[bool, "np.ndarray"] = {}
+
+    def date_order(self, newest_first: bool = True) -> "np.ndarray":
+        """Positions sorted by created_ts with ties in list order."""
+        order = self._orders.get(newest_first)
+        if order is None:
+            # ~ts reverses the order without overflowing on TS_MIN
+            keys = ~self.created_ts if newest_first else self.created_ts
+            order = np.argsort(keys, kind="stable")
+            self._orders[newest_first] = order
+        return order
+
+
+_views: "weakref.WeakKeyDictionary[RangeIndex, VectorColumns]" = (
+    weakref.WeakKeyDictionary()
+)
+_views_lock = threading.Lock()
+
+
+def vector_columns_for(index: RangeIndex) -> VectorColumns:
+    """Return the NumPy views for ``index``, kept for as long as the index lives."""
+    with _views_lock:
+        view = _views.get(index)
+        if view is None:
+            view = VectorColumns(index)
+            _views[index] = view
+        return view
+
+
+def range_mask(
+    view: VectorColumns,
+    filters: SearchFilters,
+    start_ts: Optional[int] = None,
+    end_ts: Optional[int] = None,
+    content_types: Optional[Sequence[str]] = None,
+) -> "np.ndarray":
+    """Boolean mask of items passing the engagement, date and type filters."""
+    mask = (view.engagement >= filters.min_engagement) & (
+        view.engagement <= filters.max_engagement
+    )
+    for column, low, high in (
+        (view.likes, filters.min_likes, filters.max_likes),
+        (view.reposts, filters.min_reposts, filters.max_reposts),
+        (view.replies, filters.min_replies, filters.max_replies),
+    ):
+        mask &= column >= low
+        mask &= column <= high
+    if start_ts is not None or end_ts is not None:
+        # Undated items never pass a date filter
+        mask &= view.created_ts > TS_MIN
+        if start_ts is not None:
+            mask &= view.created_ts >= start_ts
+        if end_ts is not None:
+            mask &= view.created_ts <= end_ts
+    if content_types is not None:
+        codes = [TYPE_CODES[t] for t in content_types if t in TYPE_CODES]
+        mask &= np.isin(view.types, codes)
+    return mask
+
+
+def mask_positions(mask: "np.ndarray") -> Optional[Set[int]]:
+    """Positions set in ``mask``, or None if every position is."""
+    if mask.all():
+        return None
+    return set(np.flatnonzero(mask).tolist())
+
+
+def positions_mask(view: VectorColumns, positions: Iterable[int]) -> "np.ndarray":
+    """Boolean mask with just ``positions`` set."""
+    mask = np.zeros(view.size, dtype=bool)
+    mask[np.fromiter(positions, dtype=np.int64)] = True
+    return mask
+
+
+def ordered_positions(
+    view: VectorColumns, mask: "np.ndarray", newest_first: bool = True
+) -> List[int]:
+    """Positions where ``mask`` is set, in created_ts order."""
+    order = view.date_order(newest_first)
+    positions: List[int] = order[mask[order]].tolist()
+    return positions
+
+
+def engagement_stats(
+    index: RangeIndex,
+    baseline_likes: Optional[float] = None,
+    high_engagement_threshold: Optional[float] = None,
+    category_types: Sequence[str] = ("post",),
+) -> Dict[str, float]:
+    """Totals, averages and like-based categories for a dataset.
+
+    Totals and averages cover posts and replies. Categories are relative to
+    ``baseline_likes`` (the account's average likes, defaulting to the one
+    computed here): dead threads have no likes, bombers at most half the
+    baseline, mid up to 1.5x, bangers at least 2x and viral at least
+    :data:`VIRAL_LIKES` likes; bombers through viral count only
+    ``category_types``.
+
+    Args:
+        index: RangeIndex of the dataset (posts and replies carry their own counts)
+        baseline_likes: Average likes the categories are relative to
+        high_engagement_threshold: Engagement score counted as high
+            (default: twice the average engagement, at least 10)
+        category_types: Content types the bomber..viral categories cover
+
+    Returns:
+        Dict of counts per content type, totals, averages, thresholds and
+        category counts
+    """
+    post, reply = TYPE_CODES["post"], TYPE_CODES["reply"]
+    category_codes = [TYPE_CODES[t] for t in category_types if t in TYPE_CODES]
+
+    if HAS_NUMPY:
+        view = vector_columns_for(index)
+        type_counts: List[int] = np.bincount(
+            view.types, minlength=max(TYPE_CODES.values()) + 1
+        ).tolist()
+        pr = (view.types == post) | (view.types == reply)
+        likes = view.likes[pr]
+        reposts = view.reposts[pr]
+        replies = view.replies[pr]
+        engagement = view.engagement[pr]
+        in_categories = np.isin(view.types[pr], category_codes)
+        totals = [
+            int(likes.sum()),
+            int(reposts.sum()),
+            int(replies.sum()),
+            float(engagement.sum()),
+        ]
+        pr_count = int(pr.sum())
+    else:
+        type_counts = [0] * (max(TYPE_CODES.values()) + 1)
+        for code in index.types:
+            type_counts[code] += 1
+        columns = index.columns
+        rows = [
+            (
+                columns["likes"][pos],
+                columns["reposts"][pos],
+                columns["replies"][pos],
+                columns["engagement"][pos],
+                index.types[pos] in category_codes,
+            )
+            for pos, code in enumerate(index.types)
+            if code == post or code == reply
+        ]
+        totals = [sum(row[i] for row in rows) for i in range(4)]
+        pr_count = len(rows)
+
+    denom = max(1, pr_count)
+    avg_likes = totals[0] / denom
+    avg_engagement = totals[3] / denom
+    baseline = baseline_likes or avg_likes
+    half = max(0.0, baseline * 0.5)
+    one_half = max(1.0, baseline * 1.5)
+    double = max(1.0, baseline * 2.0)
+    if high_engagement_threshold is None:
+        high_engagement_threshold = max(10.0, avg_engagement * 2.0)
+
+    if HAS_NUMPY:
+        cat_likes = likes[in_categories]
+        counts = {
+            "high_engagement": int((engagement >= high_engagement_threshold).sum()),
+            "dead_threads": int((likes == 0).sum()),
+            "no_engagement": int(
+                ((likes == 0) & (reposts == 0) & (replies == 0)).sum()
+            ),
+            "bombers": int(((cat_likes > 0) & (cat_likes <= half)).sum()),
+            "mid": int(((cat_likes > half) & (cat_likes <= one_half)).sum()),
+            "bangers": int((cat_likes >= double).sum()),
+            "viral": int((cat_likes >= VIRAL_LIKES).sum()),
+        }
+    else:
+        cat_likes = [row[0] for row in rows if row[4]]
+        counts = {
+            "high_engagement": sum(
+                1 for row in rows if row[3] >= high_engagement_threshold
+            ),
+            "dead_threads": sum(1 for row in rows if row[0] == 0),
+            "no_engagement": sum(1 for row in rows if row[0] == row[1] == row[2] == 0),
+            "bombers": sum(1 for n in cat_likes if 0 < n <= half),
+            "mid": sum(1 for n in cat_likes if half < n <= one_half),
+            "bangers": sum(1 for n in cat_likes if n >= double),
+            "viral": sum(1 for n in cat_likes if n >= VIRAL_LIKES),
+        }
+
+    return {
+        "posts": int(type_counts[post]),
+        "replies": int(type_counts[reply]),
+        "reposts": int(type_counts[TYPE_CODES["repost"]]),
+        "likes": int(type_counts[TYPE_CODES["like"]]),
+        "posts_and_replies": pr_count,
+        "total_likes": totals[0],
+        "total_reposts": totals[1],
+        "total_replies": totals[2],
+        "total_engagement": totals[3],
+        "avg_likes": avg_likes,
+        "avg_engagement": avg_engagement,
+        "baseline_likes": baseline,
+        "half": half,
+        "one_half": one_half,
+        "double": double,
+        "high_engagement_threshold": high_engagement_threshold,
+        **counts,
+    }
@@ -22,10 +22,27 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from skymarshal.auth import AuthManager
+from skymarshal.content_store import EXPORT_FILE_SUFFIXES
 from skymarshal.data_manager import DataManager
 from skymarshal.search import SearchManager
 from skymarshal.deletion import DeletionManager
-from skymarshal.models import ContentType, SearchFilters, DeleteMode, UserSettings, console, calculate_engagement_score
+from skymarshal.models import ContentType, SearchFilters, DeleteMode, UserSettings, console
+from skymarshal.query_cache import (
+    Cursor,
+    QueryCache,
+    decode_cursor,
+    encode_cursor,
+    filters_key,
+    query_hash,
+    resume_position,
+)
+from skymarshal.exceptions import ValidationError
+from skymarshal.concurrency import concurrency_stats
+from skymarshal.rate_budget import rate_budget_stats
+from skymarshal.single_flight import single_flight_stats
+from skymarshal.keyword_plan import keyword_plan_stats
+from skymarshal.range_index import range_index_for
+from skymarshal.vector_filters import engagement_stats
 from skymarshal.settings import SettingsManager
 from skymarshal.cleanup import FollowingCleaner, PostImporter
 from skymarshal.web.share_manager import SharedPostManager
@@ -74,6 +91,9 @@ share_manager = SharedPostManager(share_db_path)
 cleaner_storage = {}
 analyzer_storage = {}
 
+# Ordered result URIs of recent searches, keyed by export file state and filters
+search_cache = QueryCache()
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -152,11 +172,11 @@ def get_json_path():
                 
             json_dir = Path.home() / '.skymarshal' / 'json'
             if json_dir.exists():
-                # Look for JSON files matching the user's handle
+                # Look for export files (content stores, CBOR or JSON) matching the user's handle
                 patterns = [
-                    f"{handle}_*.json",
-                    f"*{handle.split('.')[0]}*.json",
-                    "*.json"  # Any JSON file as last resort
+                    *(f"{handle}_*{suffix}" for suffix in EXPORT_FILE_SUFFIXES),
+                    *(f"*{handle.split('.')[0]}*{suffix}" for suffix in EXPORT_FILE_SUFFIXES),
+                    *(f"*{suffix}" for suffix in EXPORT_FILE_SUFFIXES)  # Any export file as last resort
                 ]
                 
                 json_files = []
@@ -190,152 +210,25 @@ def format_bytes(bytes_val):
 def get_car_quick_stats(car_path):
     """Get quick statistics from a CAR file without full processing"""
     try:
-        from atproto_core.car import CAR
-        from skymarshal.data_manager import cbor_decode
-        
-        stats = {
-            'posts': 0,
-            'replies': 0,
-            'likes': 0, 
-            'reposts': 0,
-            'other': 0,
-            'total': 0
-        }
-        
-        debug_info = {
-            'file_size': 0,
-            'total_blocks': 0,
-            'decoded_blocks': 0,
-            'record_types': set(),
-            'sample_records': []
-        }
-        
-        # Get file size for debugging
-        import os
-        debug_info['file_size'] = os.path.getsize(car_path)
-        
-        if cbor_decode is None:
-            print("WARNING: No CBOR decoder available, cannot parse CAR file contents")
-            return {
-                'posts': '?',
-                'replies': '?',
-                'likes': '?',
-                'reposts': '?', 
-                'total': f'{debug_info["file_size"] // 1024}KB',
-                'error': 'No CBOR decoder available'
-            }
-        
-        # Read the CAR file and decode blocks like DataManager does
-        with open(car_path, 'rb') as f:
-            car = CAR.from_bytes(f.read())
-            debug_info['total_blocks'] = len(car.blocks)
-            
-            # Decode all blocks first (like DataManager._decode_car_blocks)
-            decoded = {}
-            
-            # Handle different CAR block access patterns
-            if isinstance(car.blocks, dict):
-                # car.blocks is a dict mapping CID -> block data
-                blocks_iter = car.blocks.items()
-            else:
-                # car.blocks might be another iterator
-                blocks_iter = car.blocks
-            
-            for item in blocks_iter:
-                try:
-                    # Handle different iterator types
-                    if isinstance(item, tuple) and len(item) == 2:
-                        cid, block = item
-                    elif hasattr(item, "cid") and hasattr(item, "data"):
-                        cid, block = item.cid, item.data
-                    elif hasattr(item, "cid") and hasattr(item, "bytes"):
-                        cid, block = item.cid, item.bytes
-                    else:
-                        continue
-                    
-                    # Handle different block data formats
-                    if isinstance(block, dict):
-                        decoded[str(cid)] = block
-                    elif isinstance(block, (bytes, bytearray)):
-                        decoded[str(cid)] = cbor_decode(block)
-                    else:
-                        if hasattr(block, "bytes"):
-                            decoded[str(cid)] = cbor_decode(block.bytes)
-                        elif hasattr(block, "data"):
-                            decoded[str(cid)] = cbor_decode(block.data)
-                        else:
-                            continue
-                    
-                    debug_info['decoded_blocks'] += 1
-                        
-                except Exception as decode_error:
-                    # Skip records that can't be decoded
-                    continue
-            
-            # Now count records by type (like DataManager._process_backup_records)
-            for cid, obj in decoded.items():
-                try:
-                    if not isinstance(obj, dict):
-                        continue
+        from skymarshal.car_reader import car_quick_stats
 
-                    rtype = obj.get("$type")
-                    if not rtype:
-                        continue
-                        
-                    debug_info['record_types'].add(rtype)
-                    
-                    # Store sample for debugging (first 3 records)
-                    if len(debug_info['sample_records']) < 3:
-                        debug_info['sample_records'].append({
-                            'type': rtype,
-                            'has_text': 'text' in obj,
-                            'has_reply': 'reply' in obj,
-                            'text_preview': obj.get('text', '')[:50] if obj.get('text') else ''
-                        })
+        # Counts come from the repo's MST index; only post blocks are peeked at
+        # (to tell replies apart) and results are cached per file size + mtime
+        stats = car_quick_stats(car_path)
 
-                    if rtype == "app.bsky.feed.post":
-                        is_reply = bool(obj.get("reply"))
-                        if is_reply:
-                            stats['replies'] += 1
-                        else:
-                            stats['posts'] += 1
-                        stats['total'] += 1
-                    elif rtype == "app.bsky.feed.like":
-                        stats['likes'] += 1
-                        stats['total'] += 1
-                    elif rtype == "app.bsky.feed.repost":
-                        stats['reposts'] += 1
-                        stats['total'] += 1
-                    else:
-                        stats['other'] += 1
-                        
-                except Exception as record_error:
-                    # Skip records that can't be processed
-                    continue
-        
         # Store in session for use in facts
         session['car_stats'] = {
             'posts': stats['posts'],
-            'replies': stats['replies'], 
+            'replies': stats['replies'],
             'likes': stats['likes'],
             'reposts': stats['reposts'],
             'total': stats['total']
         }
-        
-        # Add debug info to stats for troubleshooting
-        stats['debug'] = debug_info
-        
-        # Log debug info for troubleshooting
-        print(f"CAR Stats Debug - File: {car_path}")
-        print(f"File size: {debug_info['file_size']} bytes")
-        print(f"Total blocks: {debug_info['total_blocks']}")
-        print(f"Decoded blocks: {debug_info['decoded_blocks']}")
-        print(f"Record types found: {debug_info['record_types']}")
-        print(f"Sample records: {debug_info['sample_records']}")
-        print(f"Final stats: posts={stats['posts']}, replies={stats['replies']}, likes={stats['likes']}, reposts={stats['reposts']}, total={stats['total']}")
-        
+
+        print(f"CAR Stats - File: {car_path}: posts={stats['posts']}, replies={stats['replies']}, likes={stats['likes']}, reposts={stats['reposts']}, total={stats['total']}")
+
         return stats
-        
+
     except Exception as e:
         print(f"Error parsing CAR file {car_path}: {e}")
         import traceback
@@ -999,29 +892,11 @@ def process_data():
                         
                         yield f"data: {json.dumps({'status': 'processing', 'message': 'Engagement data updated successfully!', 'progress': 69})}\n\n"
                         
-                        # Save the hydrated data back to JSON file
+                        # Save the hydrated data back to the export file
                         yield f"data: {json.dumps({'status': 'processing', 'message': 'Saving hydrated data...', 'progress': 70})}\n\n"
                         
-                        # Export the hydrated items to ensure persistence
-                        export_data = []
-                        for item in items:
-                            export_data.append({
-                                'uri': item.uri,
-                                'cid': item.cid,
-                                'content_type': item.content_type,
-                                'text': item.text,
-                                'created_at': item.created_at,
-                                'like_count': item.like_count,
-                                'repost_count': item.repost_count,
-                                'reply_count': item.reply_count,
-                                'engagement_score': item.engagement_score,
-                                'raw_data': item.raw_data
-                            })
-                        
-                        # Overwrite the existing JSON with hydrated data
-                        import json as json_lib
-                        with open(json_path, 'w') as f:
-                            json_lib.dump(export_data, f, indent=2, default=str)
+                        # Overwrite the existing export with hydrated data
+                        data_manager.save_items(json_path, items)
                             
                     except Exception as e:
                         # Log the full error for debugging but show user-friendly message
@@ -1073,42 +948,14 @@ def process_data():
                 if any(limits.values()):
                     yield f"data: {json.dumps({'status': 'processing', 'message': 'Saving filtered data...', 'progress': 85})}\n\n"
                     
-                    # Create a new JSON file with filtered data
-                    import tempfile
-                    import json as json_lib
-                    
-                    yield f"data: {json.dumps({'status': 'processing', 'message': 'Preparing export data...', 'progress': 87})}\n\n"
-                    
-                    export_data = []
-                    for i, item in enumerate(filtered_items):
-                        export_data.append({
-                            'uri': item.uri,
-                            'cid': item.cid,
-                            'content_type': item.content_type,
-                            'text': item.text,
-                            'created_at': item.created_at,
-                            'like_count': item.like_count,
-                            'repost_count': item.repost_count,
-                            'reply_count': item.reply_count,
-                            'engagement_score': item.engagement_score,
-                            'raw_data': item.raw_data
-                        })
-                        
-                        # Update progress during export preparation
-                        if i % 100 == 0 and i > 0:
-                            progress = 87 + (i / len(filtered_items)) * 8
-                            yield f"data: {json.dumps({'status': 'processing', 'message': f'Prepared {i}/{len(filtered_items)} items...', 'progress': int(progress)})}\n\n"
-                    
-                    yield f"data: {json.dumps({'status': 'processing', 'message': 'Writing data to file...', 'progress': 95})}\n\n"
-                    
-                    # Save filtered data
+                    # Save filtered data next to the full export, in the same format
                     export_dir = Path.home() / '.skymarshal' / 'json'
                     export_dir.mkdir(parents=True, exist_ok=True)
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filtered_path = export_dir / f"{handle}_web_filtered_{timestamp}.json"
+                    filtered_path = export_dir / f"{handle}_web_filtered_{timestamp}{Path(json_path).suffix}"
                     
-                    with open(filtered_path, 'w') as f:
-                        json_lib.dump(export_data, f, indent=2, default=str)
+                    yield f"data: {json.dumps({'status': 'processing', 'message': 'Writing data to file...', 'progress': 95})}\n\n"
+                    data_manager.save_items(filtered_path, filtered_items)
                     
                     yield f"data: {json.dumps({'status': 'processing', 'message': f'Saved filtered data to {filtered_path.name}', 'progress': 98})}\n\n"
                     
@@ -1227,44 +1074,30 @@ def dashboard():
     # Calculate statistics following stats.py pattern
     print(f"DEBUG: Calculating statistics for {len(items)} items")
     
-    # Follow the pattern from stats.py:119-202 show_basic_stats
+    # Follow the pattern from stats.py:119-202 show_basic_stats; counts, totals
+    # and likes-based categories come from one (NumPy-vectorized) pass
     total_items = len(items)
-    posts = [item for item in items if item.content_type == 'post']
-    replies = [item for item in items if item.content_type == 'reply']
-    repost_items = [item for item in items if item.content_type == 'repost']
-    like_items = [item for item in items if item.content_type == 'like']
-    
-    pr_items = posts + replies  # Posts and replies for engagement calculations
-    
-    # Compute totals only over posts/replies (like stats.py)
-    total_likes = sum(int(it.like_count or 0) for it in pr_items)
-    total_reposts = sum(int(it.repost_count or 0) for it in pr_items)
-    total_replies_count = sum(int(it.reply_count or 0) for it in pr_items)
-    total_engagement = sum(calculate_engagement_score(int(it.like_count or 0), int(it.repost_count or 0), int(it.reply_count or 0)) for it in pr_items)
-    
-    # Averages are per post/reply, not per total items
-    avg_engagement = (total_engagement / len(pr_items)) if pr_items else 0
-    avg_likes = (total_likes / len(pr_items)) if pr_items else 0
-    dead_threads = [it for it in pr_items if it.like_count == 0 and it.repost_count == 0 and it.reply_count == 0]
-    high_engagement = [it for it in pr_items if calculate_engagement_score(int(it.like_count or 0), int(it.repost_count or 0), int(it.reply_count or 0)) >= settings.high_engagement_threshold]
-    
-    # Likes-based categories (based on runtime avg like stats.py)
-    avg_likes_runtime = avg_likes
-    half = max(0.0, avg_likes_runtime * 0.5)
-    one_half = max(1.0, avg_likes_runtime * 1.5)
-    double = max(1.0, avg_likes_runtime * 2.0)
-    cat_dead = [it for it in pr_items if (it.like_count or 0) == 0]
-    cat_bomber = [it for it in pr_items if 0 < (it.like_count or 0) <= half]
-    cat_mid = [it for it in pr_items if half < (it.like_count or 0) <= one_half]
-    cat_banger = [it for it in pr_items if (it.like_count or 0) >= double]
-    cat_viral = [it for it in pr_items if (it.like_count or 0) >= 2000]
-    
+    summary = engagement_stats(
+        range_index_for(items, settings.use_subject_engagement_for_reposts),
+        high_engagement_threshold=settings.high_engagement_threshold,
+        category_types=("post", "reply"),
+    )
+    total_likes = summary['total_likes']
+    total_reposts = summary['total_reposts']
+    total_replies_count = summary['total_replies']
+    total_engagement = summary['total_engagement']
+    avg_engagement = summary['avg_engagement']
+    avg_likes = summary['avg_likes']
+    half = summary['half']
+    one_half = summary['one_half']
+    double = summary['double']
+
     # Create stats structure for template
     stats = {
-        'total_posts': len(posts),
-        'total_replies': len(replies),
-        'total_likes': len(like_items),  # This is the count of like actions
-        'total_reposts': len(repost_items),  # This is the count of repost actions
+        'total_posts': summary['posts'],
+        'total_replies': summary['replies'],
+        'total_likes': summary['likes'],  # This is the count of like actions
+        'total_reposts': summary['reposts'],  # This is the count of repost actions
         'total_items': total_items,
         'engagement_stats': {
             'total_likes_received': total_likes,  # Likes received on posts
@@ -1275,12 +1108,12 @@ def dashboard():
             'avg_likes': round(avg_likes, 1),
         },
         'categories': {
-            'dead_threads': len(cat_dead),
-            'bombers': len(cat_bomber),
-            'mid': len(cat_mid),
-            'bangers': len(cat_banger),
-            'viral': len(cat_viral),
-            'high_engagement': len(high_engagement)
+            'dead_threads': summary['dead_threads'],
+            'bombers': summary['bombers'],
+            'mid': summary['mid'],
+            'bangers': summary['bangers'],
+            'viral': summary['viral'],
+            'high_engagement': summary['high_engagement']
         },
         'thresholds': {
             'half': round(half, 1),
@@ -1374,13 +1207,44 @@ def search():
         max_engagement=data.get('max_engagement') or 999999
     )
     
-    # Search
-    search_manager = SearchManager(auth_manager=auth_manager or AuthManager(), settings=settings)
-    results = search_manager.search_content_with_filters(items, filters)
+    # Search, or page through the cached result of an identical earlier search
+    stat = Path(json_path).stat()
+    version = [stat.st_mtime_ns, stat.st_size]
+    newest_first = settings.fetch_order == 'newest'
+    query = (
+        str(json_path),
+        filters_key(filters),
+        newest_first,
+        bool(settings.use_subject_engagement_for_reposts),
+    )
+    qhash = query_hash(query)
+    cache_key = query + tuple(version)
+    uris = search_cache.get(cache_key)
+    if uris is None:
+        search_manager = SearchManager(auth_manager=auth_manager or AuthManager(), settings=settings)
+        results = search_manager.search_content_with_filters(items, filters)
+        uris = search_cache.put(cache_key, [item.uri for item in results])
+    
+    by_uri = {item.uri: item for item in items}
+    try:
+        if data.get('cursor'):
+            cursor = decode_cursor(data['cursor'], qhash)
+            offset = resume_position(cursor, uris, version, lambda uri: by_uri[uri].created_ts, newest_first)
+        else:
+            offset = max(0, int(data.get('offset') or 0))
+    except (ValidationError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': getattr(e, 'message', str(e))}), 400
+    page = [by_uri[uri] for uri in uris[offset:offset + 100]]  # Limit to 100 for performance
+    next_cursor = None
+    if page and offset + len(page) < len(uris):
+        last = page[-1]
+        next_cursor = encode_cursor(
+            Cursor(qhash, version, offset + len(page), last.created_ts, last.uri, len(uris))
+        )
     
     # Convert results for JSON serialization
     serialized_results = []
-    for item in results[:100]:  # Limit to 100 for performance
+    for item in page:
         # Handle content_type - ensure consistent string representation
         content_type_value = item.content_type
         if hasattr(content_type_value, 'value'):
@@ -1403,7 +1267,9 @@ def search():
     return jsonify({
         'success': True,
         'results': serialized_results,
-        'total': len(results)
+        'total': len(uris),
+        'next_cursor': next_cursor,
+        'cache': {**search_cache.stats(), 'keyword_plans': keyword_plan_stats()}
     })
 
 
@@ -2234,7 +2100,14 @@ def api_stats():
                 'total_engagement': 0
             }
         
-        return jsonify({'success': True, 'stats': stats})
+        return jsonify({
+            'success': True,
+            'stats': stats,
+            'cache': {**search_cache.stats(), 'keyword_plans': keyword_plan_stats()},
+            'concurrency': concurrency_stats(),
+            'rate_budgets': rate_budget_stats(),
+            'single_flight': single_flight_stats()
+        })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
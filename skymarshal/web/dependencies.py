@@ -19,6 +19,7 @@ from typing import Optional
 from flask import g, session, current_app
 
 from ..auth import AuthManager
+from ..content_store import EXPORT_FILE_SUFFIXES
 from ..data_manager import DataManager
 from ..deletion import DeletionManager
 from ..models import UserSettings
@@ -206,16 +207,17 @@ def get_json_path() -> Optional[Path]:
     
     # Try exact match
     safe_handle = handle.replace('.', '_')
-    primary = json_dir / f"{safe_handle}.json"
-    if primary.exists():
-        # Update session
-        user_session.json_path = primary
-        get_session_manager().save_session(user_session)
-        return primary
-    
-    # Try timestamped files
+    for suffix in EXPORT_FILE_SUFFIXES:
+        primary = json_dir / f"{safe_handle}{suffix}"
+        if primary.exists():
+            # Update session
+            user_session.json_path = primary
+            get_session_manager().save_session(user_session)
+            return primary
+    
+    # Try timestamped files (content stores or JSON)
     candidates = sorted(
-        json_dir.glob(f"{safe_handle}_*.json"),
+        [p for suffix in EXPORT_FILE_SUFFIXES for p in json_dir.glob(f"{safe_handle}_*{suffix}")],
         key=lambda p: p.stat().st_mtime,
         reverse=True
     )
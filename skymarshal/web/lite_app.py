@@ -23,6 +23,7 @@ from flask import (
 )
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+from skymarshal.exceptions import ValidationError
 from skymarshal.services import ContentService, SearchRequest
 from skymarshal.services.analytics import ContentAnalytics
 from skymarshal.web.share_manager import SharedPostManager
@@ -261,10 +262,11 @@ def search():
         min_replies=_get_int("min_replies"),
         max_replies=_get_int("max_replies"),
         limit=_get_int("limit") or 250,
+        offset=_get_int("offset") or 0,
     )
 
     try:
-        results, total = service.search(request_obj)
+        results, total, next_cursor = service.search_page(request_obj, payload.get("cursor") or None)
 
         # Hydrate ONLY the search results (not all 50k items)
         # This dramatically improves performance for large accounts
@@ -294,13 +296,22 @@ def search():
                 except Exception as hydrate_error:
                     current_app.logger.warning(f"Could not hydrate search results: {hydrate_error}")
 
+    except ValidationError as exc:
+        return jsonify({"success": False, "error": exc.message}), 400
     except RuntimeError as exc:
         return jsonify({"success": False, "error": str(exc)}), 400
 
     # Get updated summary after data load
     summary = service.summarize()
 
-    return jsonify({"success": True, "results": results, "total": total, "summary": summary})
+    return jsonify({
+        "success": True,
+        "results": results,
+        "total": total,
+        "next_cursor": next_cursor,
+        "summary": summary,
+        "cache": service.search_cache_stats(),
+    })
 
 
 @app.post("/delete")
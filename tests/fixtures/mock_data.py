@@ -252,3 +252,90 @@ def create_large_dataset(post_count: int = 1000, like_count: int = 500, repost_c
     items.extend(create_mock_reposts_dataset(repost_count))
 
     return items
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _dag_cbor_with_links(obj: Any, links: List[bytes]) -> bytes:
+    """Encode ``obj`` as DAG-CBOR, turning the given CID byte strings into tag-42 links."""
+    import libipld
+
+    encoded = libipld.encode_dag_cbor(obj)
+    for cid in links:
+        as_bytes = bytes([0x58, len(cid) + 1, 0x00]) + cid
+        as_link = bytes([0xD8, 0x2A]) + as_bytes
+        encoded = encoded.replace(as_bytes, as_link)
+    return encoded
+
+
+def _cid_for(block: bytes) -> bytes:
+    import hashlib
+
+    return bytes([0x01, 0x71, 0x12, 0x20]) + hashlib.sha256(block).digest()
+
+
+def create_mock_car_bytes(
+    did: str = "did:plc:test123",
+    records: List[Dict[str, Any]] = None,
+) -> bytes:
+    """Build a minimal but well-formed repo CAR: commit, single MST node, records.
+
+    Each record dict needs ``collection`` and ``rkey`` plus the record body fields.
+    """
+    import libipld
+
+    if records is None:
+        records = [
+            {"collection": "app.bsky.feed.post", "rkey": "3kpost1", "text": "Hello world",
+             "createdAt": "2023-01-01T10:00:00Z"},
+            {"collection": "app.bsky.feed.post", "rkey": "3kpost2", "text": "A reply",
+             "createdAt": "2023-01-02T10:00:00Z",
+             "reply": {"root": {"uri": "at://did:plc:other/app.bsky.feed.post/r", "cid": "bafyroot"},
+                       "parent": {"uri": "at://did:plc:other/app.bsky.feed.post/r", "cid": "bafyroot"}}},
+            {"collection": "app.bsky.feed.like", "rkey": "3klike1", "createdAt": "2023-01-03T10:00:00Z",
+             "subject": {"uri": "at://did:plc:other/app.bsky.feed.post/x", "cid": "bafyx"}},
+            {"collection": "app.bsky.feed.repost", "rkey": "3krepost1", "createdAt": "2023-01-04T10:00:00Z",
+             "subject": {"uri": "at://did:plc:other/app.bsky.feed.post/y", "cid": "bafyy"}},
+        ]
+
+    record_blocks = []
+    for rec in records:
+        body = {k: v for k, v in rec.items() if k not in ("collection", "rkey")}
+        body["$type"] = rec["collection"]
+        block = libipld.encode_dag_cbor(body)
+        record_blocks.append((f"{rec['collection']}/{rec['rkey']}", _cid_for(block), block))
+
+    entries = []
+    last_key = b""
+    for key, cid, _ in sorted(record_blocks, key=lambda r: r[0]):
+        key_bytes = key.encode("utf-8")
+        prefix = 0
+        while prefix < min(len(last_key), len(key_bytes)) and last_key[prefix] == key_bytes[prefix]:
+            prefix += 1
+        entries.append({"p": prefix, "k": key_bytes[prefix:], "v": b"\x00" + cid, "t": None})
+        last_key = key_bytes
+    mst_block = _dag_cbor_with_links({"l": None, "e": entries}, [cid for _, cid, _ in record_blocks])
+    mst_cid = _cid_for(mst_block)
+
+    commit_obj = {"did": did, "version": 3, "data": b"\x00" + mst_cid, "rev": "3k000", "prev": None,
+                  "sig": b"\x01" * 64}
+    commit_block = _dag_cbor_with_links(commit_obj, [mst_cid])
+    commit_cid = _cid_for(commit_block)
+
+    header = _dag_cbor_with_links({"version": 1, "roots": [b"\x00" + commit_cid]}, [commit_cid])
+    out = bytearray(_encode_varint(len(header)) + header)
+    for cid, block in [(commit_cid, commit_block), (mst_cid, mst_block)] + [
+        (cid, block) for _, cid, block in record_blocks
+    ]:
+        out += _encode_varint(len(cid) + len(block)) + cid + block
+    return bytes(out)
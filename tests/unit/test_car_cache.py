@@ -0,0 +1,176 @@
+"""
+Unit tests for the parsed CAR record cache.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal.car_cache import ParsedCarCache
+from skymarshal.car_reader import CarIndex, CarReader
+from skymarshal.data_manager import DataManager
+from skymarshal.models import UserSettings
+from tests.fixtures.mock_data import create_mock_car_bytes
+
+POST = "app.bsky.feed.post"
+LIKE = "app.bsky.feed.like"
+
+
+def _key(name: str) -> str:
+    return "sha256-" + hashlib.sha256(name.encode()).hexdigest()
+
+
+def _with_roots(car: bytes, roots) -> bytes:
+    """``car`` with its header replaced by one listing ``roots``."""
+    import libipld
+
+    header_len, pos = 0, 0
+    for shift in range(0, 64, 7):
+        byte = car[pos]
+        pos += 1
+        header_len |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+    header = libipld.encode_dag_cbor({"version": 1, "roots": roots})
+    return bytes([len(header)]) + header + car[pos + header_len :]
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ParsedCarCache:
+    return ParsedCarCache(tmp_path / "car_cache")
+
+
+@pytest.fixture
+def car_path(tmp_path: Path) -> Path:
+    path = tmp_path / "test_bsky_social.car"
+    path.write_bytes(create_mock_car_bytes())
+    return path
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> DataManager:
+    auth = Mock()
+    auth.client = Mock()
+    auth.current_did = "did:plc:test123"
+    auth.is_authenticated.return_value = False
+    (tmp_path / "backups").mkdir()
+    (tmp_path / "json").mkdir()
+    return DataManager(
+        auth, UserSettings(), tmp_path, tmp_path / "backups", tmp_path / "json"
+    )
+
+
+class TestParsedCarCache:
+    def test_round_trip_by_collection(self, cache):
+        record = (
+            POST,
+            f"{POST}/a",
+            "bafya",
+            {"text": "hi", "created_at": None, "reply": False},
+        )
+        cache.put(_key("a"), "did:plc:x", {POST: [record], LIKE: []})
+
+        did, found = cache.get(_key("a"), {POST, LIKE, "app.bsky.feed.repost"})
+        assert did == "did:plc:x"
+        assert found == {POST: [record], LIKE: []}
+
+    def test_miss_returns_empty(self, cache):
+        assert cache.get(_key("missing"), {POST}) == (None, {})
+
+    def test_key_is_file_digest(self, cache, car_path):
+        with CarReader(car_path) as reader:
+            key = cache.cache_key(reader)
+        assert key == "sha256-" + hashlib.sha256(car_path.read_bytes()).hexdigest()
+
+    def test_rejects_keys_that_are_not_digests(self, cache):
+        for key in ("../escaped", "bafyroot", "sha256-../../x"):
+            with pytest.raises(ValueError):
+                cache.put(key, None, {POST: []})
+            with pytest.raises(ValueError):
+                cache.get(key, {POST})
+
+    def test_header_root_does_not_pick_the_entry(self, tmp_path, cache):
+        honest = tmp_path / "honest.car"
+        honest.write_bytes(create_mock_car_bytes())
+        forged = tmp_path / "forged.car"
+        forged.write_bytes(
+            _with_roots(create_mock_car_bytes(did="did:plc:evil"), ["../escaped"])
+        )
+        with CarReader(honest) as reader:
+            root = reader.root
+        spoofed = tmp_path / "spoofed.car"
+        spoofed.write_bytes(
+            _with_roots(create_mock_car_bytes(did="did:plc:evil"), [root])
+        )
+
+        keys = set()
+        for path in (honest, forged, spoofed):
+            with CarReader(path) as reader:
+                keys.add(cache.cache_key(reader))
+        assert len(keys) == 3
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ParsedCarCache(tmp_path / "lru")
+        old, new, newest = _key("old"), _key("new"), _key("newest")
+        cache.put(old, None, {POST: []})
+        cache.put(new, None, {POST: []})
+        os.utime(cache._entry_path(old), (1, 1))
+        os.utime(cache._entry_path(new), (2, 2))
+        cache.get(old, {POST})  # touch: "old" is now the most recently used
+
+        cache.max_bytes = cache._entry_path(old).stat().st_size * 2 + 10
+        cache.put(newest, None, {POST: []})
+
+        remaining = {p.stem for p in cache.cache_dir.glob("*.json")}
+        assert remaining == {old, newest}
+
+    def test_remove_did(self, cache):
+        cache.put(_key("a"), "did:plc:one", {POST: []})
+        cache.put(_key("b"), "did:plc:two", {POST: []})
+        assert cache.remove_did("did:plc:one") == 1
+        assert cache.stats()["entries"] == 1
+
+
+class TestImportUsesCache:
+    def test_repeat_import_skips_decoding(self, manager, car_path, monkeypatch):
+        first = manager.read_export(
+            manager.import_backup_replace(car_path, "test.bsky.social")
+        )
+
+        def fail(*_args, **_kwargs):
+            raise AssertionError("cached import should not decode the CAR")
+
+        monkeypatch.setattr(CarIndex, "load_or_build", classmethod(fail))
+        monkeypatch.setattr(manager, "_scan_sequential", fail)
+        second = manager.read_export(
+            manager.import_backup_replace(car_path, "test.bsky.social")
+        )
+
+        assert second["posts"] == first["posts"]
+        assert second["likes"] == first["likes"]
+
+    def test_category_change_decodes_only_new_collections(self, manager, car_path):
+        manager.import_backup_replace(car_path, "test.bsky.social", {"likes"})
+        with CarReader(car_path) as reader:
+            key = ParsedCarCache.cache_key(reader)
+        assert set(manager.car_cache.get(key, {POST, LIKE})[1]) == {LIKE}
+
+        out = manager.import_backup_replace(
+            car_path, "test.bsky.social", {"likes", "posts"}
+        )
+        data = manager.read_export(out)
+        assert len(data["posts"]) == 2 and len(data["likes"]) == 1
+        assert set(manager.car_cache.get(key, {POST, LIKE})[1]) == {POST, LIKE}
+
+    def test_malicious_root_stays_inside_the_cache(self, manager, tmp_path):
+        car = tmp_path / "evil.car"
+        car.write_bytes(_with_roots(create_mock_car_bytes(), ["../escaped"]))
+        manager.import_backup_replace(car, "test.bsky.social")
+
+        cache_dir = manager.car_cache.cache_dir
+        assert not (cache_dir.parent / "escaped.json").exists()
+        entries = [p.stem for p in cache_dir.glob("*.json")]
+        assert len(entries) == 1 and entries[0].startswith("sha256-")
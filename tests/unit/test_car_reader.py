@@ -0,0 +1,274 @@
+"""
+Unit tests for the streaming CAR reader and DataManager backup import.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import car_reader
+from skymarshal import data_manager as data_manager_module
+from skymarshal.car_reader import (
+    CarIndex,
+    CarReader,
+    car_quick_stats,
+    chunk_entries,
+    cid_to_str,
+    decode_entries_parallel,
+    decode_mst_entries,
+    record_has_key,
+)
+from skymarshal.data_manager import DataManager
+from skymarshal.exceptions import FileError
+from skymarshal.models import UserSettings
+from tests.fixtures.mock_data import create_mock_car_bytes
+
+
+@pytest.fixture
+def car_path(tmp_path: Path) -> Path:
+    path = tmp_path / "test_bsky_social.car"
+    path.write_bytes(create_mock_car_bytes())
+    return path
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> DataManager:
+    auth = Mock()
+    auth.client = Mock()
+    auth.current_did = "did:plc:test123"
+    auth.is_authenticated.return_value = False
+    backups_dir = tmp_path / "backups"
+    json_dir = tmp_path / "json"
+    backups_dir.mkdir()
+    json_dir.mkdir()
+    return DataManager(auth, UserSettings(), tmp_path, backups_dir, json_dir)
+
+
+class TestCarReader:
+    def test_reads_header_and_sections(self, car_path):
+        with CarReader(car_path) as reader:
+            sections = list(reader.iter_sections())
+            assert reader.root == sections[0][0]
+            assert len(sections) == 6
+            assert all(cid.startswith("bafy") for cid, _, _ in sections)
+
+    def test_cid_strings_match_atproto(self, car_path):
+        from atproto_core.car import CAR
+
+        car = CAR.from_bytes(car_path.read_bytes())
+        with CarReader(car_path) as reader:
+            assert [cid for cid, _, _ in reader.iter_sections()] == [
+                str(cid) for cid in car.blocks
+            ]
+            assert reader.root == str(car.root)
+
+    def test_decode_mst_entries_expands_prefixes(self, car_path):
+        with CarReader(car_path) as reader:
+            sections = list(reader.iter_sections())
+            node = reader.decode_block(*sections[1][1:])
+        keys = [key for key, _, _ in decode_mst_entries(node)]
+        assert keys == [
+            "app.bsky.feed.like/3klike1",
+            "app.bsky.feed.post/3kpost1",
+            "app.bsky.feed.post/3kpost2",
+            "app.bsky.feed.repost/3krepost1",
+        ]
+
+    def test_cid_to_str_strips_identity_prefix(self):
+        raw = bytes([0x01, 0x71, 0x12, 0x20]) + b"\x00" * 32
+        assert cid_to_str(b"\x00" + raw) == cid_to_str(raw)
+
+    def test_empty_file_rejected(self, tmp_path):
+        empty = tmp_path / "empty.car"
+        empty.write_bytes(b"")
+        with pytest.raises(FileError):
+            CarReader(empty)
+
+    def test_bad_header_closes_file(self, tmp_path, monkeypatch):
+        bad = tmp_path / "bad.car"
+        bad.write_bytes(b"\x7f" + b"\x00" * 8)  # header length past end of file
+        opened = []
+        real_open = open
+        monkeypatch.setattr(
+            "builtins.open",
+            lambda *a, **k: opened.append(real_open(*a, **k)) or opened[-1],
+        )
+        with pytest.raises(FileError):
+            CarReader(bad)
+        assert opened and opened[0].closed
+
+
+class TestCarIndex:
+    def test_build_maps_paths_to_blocks(self, car_path):
+        with CarReader(car_path) as reader:
+            index = CarIndex.build(reader)
+            assert index.did == "did:plc:test123"
+            assert index.collections() == {
+                "app.bsky.feed.post": 2,
+                "app.bsky.feed.like": 1,
+                "app.bsky.feed.repost": 1,
+            }
+            cid, offset, length = index.lookup("app.bsky.feed.post/3kpost1")
+            assert reader.decode_block(offset, length)["text"] == "Hello world"
+
+    def test_sidecar_written_and_reused(self, car_path, monkeypatch):
+        with CarReader(car_path) as reader:
+            CarIndex.load_or_build(reader)
+        sidecar = CarIndex.sidecar_path(car_path)
+        assert sidecar.exists()
+
+        def fail(_reader):
+            raise AssertionError("index should come from the sidecar")
+
+        monkeypatch.setattr(CarIndex, "build", classmethod(lambda cls, r: fail(r)))
+        with CarReader(car_path) as reader:
+            index = CarIndex.load_or_build(reader)
+        assert len(index.entries("app.bsky.feed.post")) == 2
+
+    def test_stale_sidecar_is_rebuilt(self, car_path):
+        with CarReader(car_path) as reader:
+            CarIndex.load_or_build(reader)
+        sidecar = CarIndex.sidecar_path(car_path)
+        data = json.loads(sidecar.read_text())
+        data["collections"] = {}
+        data["car_size"] = 1
+        sidecar.write_text(json.dumps(data))
+
+        with CarReader(car_path) as reader:
+            index = CarIndex.load_or_build(reader)
+        assert len(index.records) == 4
+
+    def test_get_backup_record(self, manager, car_path):
+        record = manager.get_backup_record(car_path, "app.bsky.feed.like/3klike1")
+        assert record["subject"]["cid"] == "bafyx"
+        assert manager.get_backup_record(car_path, "app.bsky.feed.like/missing") is None
+
+
+class TestQuickStats:
+    def test_record_has_key_reads_only_keys(self):
+        import libipld
+
+        block = libipld.encode_dag_cbor(
+            {"text": "x" * 300, "reply": {"root": {"uri": "a"}}, "langs": ["en"]}
+        )
+        assert record_has_key(block, "reply")
+        assert not record_has_key(block, "embed")
+        assert not record_has_key(libipld.encode_dag_cbor({"reply": None}), "reply")
+        assert not record_has_key(b"\xff", "reply")
+
+    def test_counts_from_index(self, car_path):
+        stats = car_quick_stats(car_path)
+        assert stats == {
+            "posts": 1,
+            "replies": 1,
+            "likes": 1,
+            "reposts": 1,
+            "other": 0,
+            "total": 4,
+        }
+
+    def test_stats_cached_by_size_and_mtime(self, car_path, monkeypatch):
+        car_quick_stats(car_path)
+        car_reader._QUICK_STATS_CACHE.clear()
+
+        def fail(*_args):
+            raise AssertionError("post blocks should not be re-read")
+
+        # Second call in a fresh process state is answered from the sidecar
+        monkeypatch.setattr(car_reader, "record_has_key", fail)
+        assert car_quick_stats(car_path)["replies"] == 1
+        assert (
+            json.loads(CarIndex.sidecar_path(car_path).read_text())["stats"]["total"]
+            == 4
+        )
+
+    def test_memory_cache_is_bounded(self, car_path, tmp_path, monkeypatch):
+        monkeypatch.setattr(car_reader, "QUICK_STATS_CACHE_SIZE", 2)
+        car_reader._QUICK_STATS_CACHE.clear()
+        copies = []
+        for n in range(3):
+            copy = tmp_path / f"copy{n}.car"
+            copy.write_bytes(car_path.read_bytes())
+            copies.append(copy)
+            car_quick_stats(copy)
+        cached = [key[0] for key in car_reader._QUICK_STATS_CACHE]
+        assert cached == [str(copies[1].resolve()), str(copies[2].resolve())]
+
+
+class TestParallelDecode:
+    def test_chunk_entries_keeps_file_order(self):
+        entries = [(f"c/{i}", f"cid{i}", i * 10, 10) for i in range(10)]
+        chunks = chunk_entries(entries, 3)
+        assert len(chunks) == 3
+        assert [e for chunk in chunks for e in chunk] == entries
+        assert chunk_entries([], 4) == []
+
+    def test_parallel_matches_serial(self, car_path):
+        wanted = {"app.bsky.feed.post", "app.bsky.feed.like", "app.bsky.feed.repost"}
+        with CarReader(car_path) as reader:
+            index = CarIndex.build(reader)
+        entries = sorted(
+            (e for c in sorted(wanted) for e in index.entries(c)), key=lambda e: e[2]
+        )
+        seen = []
+        records = decode_entries_parallel(
+            car_path,
+            entries,
+            wanted,
+            workers=2,
+            progress=lambda d, t: seen.append((d, t)),
+        )
+        assert [r[1] for r in records] == [e[0] for e in entries]
+        assert seen[-1] == (len(entries), len(entries))
+
+    def test_import_uses_worker_setting(self, manager, car_path, monkeypatch):
+        monkeypatch.setattr(data_manager_module, "PARALLEL_DECODE_MIN_RECORDS", 1)
+        manager.settings.car_decode_workers = 2
+        out = manager.import_backup_replace(car_path, "test.bsky.social")
+        data = manager.read_export(out)
+        assert len(data["posts"]) == 2 and len(data["likes"]) == 1
+
+
+class TestBackupImport:
+    def test_import_replace_uses_mst_paths(self, manager, car_path):
+        out = manager.import_backup_replace(car_path, "test.bsky.social")
+        data = manager.read_export(out)
+
+        assert data["did"] == "did:plc:test123"
+        uris = sorted(p["uri"] for p in data["posts"])
+        assert uris == [
+            "at://did:plc:test123/app.bsky.feed.post/3kpost1",
+            "at://did:plc:test123/app.bsky.feed.post/3kpost2",
+        ]
+        assert {p["type"] for p in data["posts"]} == {"post", "reply"}
+        assert (
+            data["likes"][0]["subject_uri"] == "at://did:plc:other/app.bsky.feed.post/x"
+        )
+        assert data["reposts"][0]["uri"].endswith("/app.bsky.feed.repost/3krepost1")
+
+    def test_import_reports_progress_in_bytes(self, manager, car_path):
+        seen = []
+        manager.import_backup_replace(
+            car_path,
+            "test.bsky.social",
+            progress_callback=lambda done, total: seen.append((done, total)),
+        )
+        size = car_path.stat().st_size
+        assert seen[-1] == (size, size)
+
+    def test_sequential_scan_without_index(self, manager, car_path, monkeypatch):
+        monkeypatch.setattr(CarIndex, "load_or_build", classmethod(lambda cls, r: None))
+        out = manager.import_backup_replace(car_path, "test.bsky.social")
+        data = manager.read_export(out)
+        assert sorted(p["uri"].rsplit("/", 1)[1] for p in data["posts"]) == [
+            "3kpost1",
+            "3kpost2",
+        ]
+
+    def test_import_filters_categories(self, manager, car_path):
+        out = manager.import_backup_replace(car_path, "test.bsky.social", {"likes"})
+        data = manager.read_export(out)
+        assert data["posts"] == [] and data["reposts"] == []
+        assert len(data["likes"]) == 1
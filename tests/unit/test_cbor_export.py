@@ -0,0 +1,120 @@
+"""
+Unit tests for the DAG-CBOR binary export format.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal.cbor_export import (
+    normalize_export_data,
+    read_cbor_export,
+    write_cbor_export,
+)
+from skymarshal.data_manager import DataManager
+from skymarshal.exceptions import DataError
+from skymarshal.models import ContentItem, UserSettings
+
+POST = {
+    "uri": "at://did:plc:test123/app.bsky.feed.post/1",
+    "cid": "bafypost1",
+    "type": "post",
+    "text": "Hello world",
+    "created_at": "2024-01-01T10:00:00Z",
+    "engagement": {"likes": 5, "reposts": 2, "replies": 1, "score": 12.5},
+    "raw_data": None,
+}
+LIKE = {
+    "uri": "at://did:plc:test123/app.bsky.feed.like/1",
+    "cid": "bafylike1",
+    "type": "like",
+    "created_at": "2024-01-02T10:00:00Z",
+    "subject_uri": "at://did:plc:other/app.bsky.feed.post/x",
+    "subject_cid": "bafyx",
+}
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> DataManager:
+    auth = Mock()
+    auth.client = Mock()
+    auth.current_did = "did:plc:test123"
+    auth.is_authenticated.return_value = False
+    (tmp_path / "backups").mkdir()
+    (tmp_path / "json").mkdir()
+    return DataManager(
+        auth, UserSettings(), tmp_path, tmp_path / "backups", tmp_path / "json"
+    )
+
+
+class TestNormalize:
+    def test_legacy_section_names(self):
+        data = normalize_export_data(
+            {"data": {"processed_posts": {"a": POST}, "processed_likes": [LIKE]}}
+        )
+        assert data["posts"] == [POST]
+        assert data["likes"] == [LIKE]
+        assert data["reposts"] == []
+
+    def test_flat_list_sorted_by_type(self):
+        data = normalize_export_data([POST, LIKE, "junk"])
+        assert data["posts"] == [POST] and data["likes"] == [LIKE]
+
+
+class TestCborExport:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "x.cbor"
+        export = {
+            "handle": "test.bsky.social",
+            "posts": [POST],
+            "likes": [LIKE],
+            "reposts": [],
+        }
+        write_cbor_export(path, export)
+        data = read_cbor_export(path)
+        assert data["posts"] == [POST] and data["likes"] == [LIKE]
+        assert data["handle"] == "test.bsky.social"
+
+    def test_rejects_foreign_cbor(self, tmp_path):
+        import libipld
+
+        path = tmp_path / "other.cbor"
+        path.write_bytes(libipld.encode_dag_cbor({"posts": []}))
+        with pytest.raises(DataError):
+            read_cbor_export(path)
+
+    def test_convert_legacy_json_and_load(self, manager):
+        legacy = manager.json_dir / "test_bsky_social.json"
+        legacy.write_text(
+            json.dumps({"primary_items": [POST], "likes": [LIKE]}, indent=2)
+        )
+
+        target = manager.convert_export(
+            legacy, manager.json_dir / "test_bsky_social.cbor"
+        )
+        from_cbor = manager.load_exported_data(target)
+        from_json = manager.load_exported_data(legacy)
+
+        assert [(i.uri, i.content_type, i.like_count) for i in from_cbor] == [
+            (i.uri, i.content_type, i.like_count) for i in from_json
+        ]
+        assert target.stat().st_size < legacy.stat().st_size
+
+    def test_save_items_keeps_metadata(self, manager):
+        path = manager.json_dir / "test_bsky_social.cbor"
+        manager.save_export(
+            path,
+            {"handle": "test.bsky.social", "did": "did:plc:test123", "posts": [POST]},
+        )
+        item = ContentItem(uri=POST["uri"], cid="c", content_type="post", like_count=9)
+        manager.save_items(path, [item])
+
+        data = read_cbor_export(path)
+        assert data["handle"] == "test.bsky.social"
+        assert data["posts"][0]["engagement"]["likes"] == 9
+
+    def test_export_format_setting(self, manager):
+        manager.settings.export_format = "cbor"
+        assert manager.export_path_for("a.bsky.social").suffix == ".cbor"
@@ -0,0 +1,192 @@
+"""
+Unit tests for the adaptive (AIMD) concurrency controller.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from skymarshal import concurrency
+from skymarshal.concurrency import (
+    ConcurrencyController,
+    clear_concurrency_controllers,
+    concurrency_stats,
+    controller_for,
+    pds_controller,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def controller(clock):
+    return ConcurrencyController("test", initial=4, max_limit=16, clock=clock)
+
+
+def _run_round(controller, clock, latency=0.1, **outcome):
+    """Fill every slot, then complete them all with the same outcome."""
+    taken = 0
+    while controller.try_acquire():
+        taken += 1
+    clock.now += latency
+    for _ in range(taken):
+        controller.release(latency, **outcome)
+    return taken
+
+
+class TestConcurrencyController:
+    def test_grows_a_slot_every_two_busy_rounds(self, controller, clock):
+        for _ in range(10):
+            _run_round(controller, clock, status=200)
+        assert controller.limit == 9
+        assert controller.stats()["increases"] == 5
+
+    def test_does_not_grow_when_not_saturated(self, controller, clock):
+        for _ in range(20):
+            controller.acquire()
+            controller.release(0.1, status=200)
+        assert controller.limit == 4
+
+    def test_rate_limit_halves_once_per_round(self, controller, clock):
+        for _ in range(8):
+            _run_round(controller, clock, status=200)
+        assert controller.limit == 8
+        _run_round(controller, clock, status=429, headers={})
+        assert controller.limit == 4
+        assert [d["action"] for d in controller.stats()["decisions"][-2:]] == [
+            "pause",
+            "decrease",
+        ]
+
+    def test_server_errors_back_off_to_min(self, controller, clock):
+        for _ in range(5):
+            clock.now += 1
+            controller.acquire()
+            controller.release(0.1, status=503)
+        assert controller.limit == 1
+
+    def test_exhausted_budget_pauses_until_reset(self, controller, clock):
+        controller.acquire()
+        controller.release(
+            0.1,
+            status=200,
+            headers={
+                "ratelimit-remaining": "0",
+                "ratelimit-reset": str(time.time() + 30),
+            },
+        )
+        assert not controller.try_acquire()
+        assert 29 <= controller.stats()["paused_for"] <= 30
+        clock.now += 31
+        assert controller.try_acquire()
+
+    def test_low_remaining_budget_caps_limit(self, controller, clock):
+        controller.acquire()
+        controller.release(0.1, status=200, headers={"RateLimit-Remaining": "2"})
+        assert controller.limit == 2
+
+    def test_latency_rise_trims_limit(self, controller, clock):
+        for _ in range(3):
+            _run_round(controller, clock, latency=0.1, status=200)
+        before = controller.limit
+        for _ in range(10):
+            _run_round(controller, clock, latency=1.0, status=200)
+        assert controller.limit < before
+
+    def test_transport_errors_trim_after_error_rate_limit(self, controller, clock):
+        controller.acquire()
+        controller.release(0.1, error=True)
+        assert controller.limit == 4
+        controller.acquire()
+        controller.release(0.1, error=True)
+        assert controller.stats()["error_rate"] > concurrency.ERROR_RATE_LIMIT
+        assert controller.limit == 3
+
+    def test_slot_records_exceptions(self, controller):
+        with pytest.raises(HTTPError):
+            with controller.slot():
+                raise HTTPError(429)
+        assert controller.in_flight == 0
+        assert controller.stats()["pauses"] == 1
+
+    def test_call_retries_server_errors(self, controller, monkeypatch):
+        monkeypatch.setattr(concurrency, "RETRY_BACKOFF", 0)
+        responses = [HTTPError(502), HTTPError(503), "ok"]
+
+        def fetch():
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        assert controller.call(fetch) == "ok"
+        with pytest.raises(HTTPError):
+            controller.call(lambda: (_ for _ in ()).throw(HTTPError(400)))
+
+    def test_threads_never_exceed_limit(self):
+        controller = ConcurrencyController("threads", initial=3, max_limit=3)
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def work():
+            with controller.slot() as slot:
+                with lock:
+                    active[0] += 1
+                    active[1] = max(active[1], active[0])
+                time.sleep(0.005)
+                with lock:
+                    active[0] -= 1
+                slot.observe(200)
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert active[1] == 3
+        assert controller.in_flight == 0
+
+
+class TestSharedControllers:
+    def test_controllers_are_shared_by_name(self):
+        clear_concurrency_controllers()
+        first = controller_for("svc", initial=2)
+        assert controller_for("svc") is first
+        assert concurrency_stats()["svc"]["limit"] == 2
+
+    def test_pds_controllers_are_keyed_by_host(self):
+        clear_concurrency_controllers()
+        first = pds_controller(
+            SimpleNamespace(_base_url="https://pds.one.example/xrpc")
+        )
+        second = pds_controller(
+            SimpleNamespace(_base_url="https://pds.two.example/xrpc")
+        )
+        assert first is not second
+        assert first is pds_controller(
+            SimpleNamespace(_base_url="https://PDS.one.example")
+        )
+        assert pds_controller(None).name == "pds:bsky.social"
+        # A 429 from one PDS leaves the other host's limit alone
+        first.acquire()
+        first.release(0.1, status=429, headers={})
+        assert first.limit < second.limit
@@ -6,6 +6,7 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from skymarshal.exceptions import ValidationError
 from skymarshal.models import ContentItem
 from skymarshal.services import ContentService, SearchRequest
 
@@ -175,3 +176,78 @@ def test_summarize_counts_items(service: ContentService, content_items: List[Con
     assert summary["likes"] == 1
     assert summary["reposts"] == 1
     assert summary["total"] == 3
+
+
+def _text_items(count: int) -> List[ContentItem]:
+    return [
+        ContentItem(
+            uri=f"at://did:plc:test/app.bsky.feed.post/{n}",
+            cid=str(n),
+            content_type="post",
+            text=f"post {n}",
+            created_at="2024-01-01T00:00:00Z",
+        )
+        for n in range(count)
+    ]
+
+
+def test_search_pages_from_cached_result(service: ContentService) -> None:
+    items = _text_items(5)
+    service._content_cache[service.auth.current_handle] = items
+    service.search_manager.search_content_with_filters.side_effect = lambda items, filters: list(items)
+
+    first, total = service.search(SearchRequest(keyword="post", limit=2))
+    second, second_total = service.search(SearchRequest(keyword="post", limit=2, offset=2))
+
+    assert total == second_total == 5
+    assert [r["uri"] for r in first + second] == [item.uri for item in items[:4]]
+    assert service.search_manager.search_content_with_filters.call_count == 1
+    stats = service.search_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_delete_invalidates_cached_searches(service: ContentService) -> None:
+    items = _text_items(3)
+    service._content_cache[service.auth.current_handle] = items
+    service.search_manager.search_content_with_filters.side_effect = lambda items, filters: list(items)
+    service.deletion_manager.delete_records_by_uri.return_value = (1, [])
+
+    service.search(SearchRequest())
+    service.delete([items[0].uri])
+    results, total = service.search(SearchRequest())
+
+    assert total == 2
+    assert items[0].uri not in {r["uri"] for r in results}
+    assert service.search_manager.search_content_with_filters.call_count == 2
+
+
+def test_search_page_cursor_walks_every_result(service: ContentService) -> None:
+    items = _text_items(5)
+    service._content_cache[service.auth.current_handle] = items
+    service.search_manager.search_content_with_filters.side_effect = lambda items, filters: list(items)
+
+    seen, cursor = [], None
+    while True:
+        results, total, cursor = service.search_page(SearchRequest(limit=2), cursor)
+        seen += [r["uri"] for r in results]
+        assert total == 5
+        if cursor is None:
+            break
+    assert seen == [item.uri for item in items]
+
+    with pytest.raises(ValidationError):
+        service.search_page(SearchRequest(keyword="other", limit=2), service.search_page(SearchRequest(limit=2))[2])
+
+
+def test_search_page_cursor_survives_deletion(service: ContentService) -> None:
+    items = _text_items(6)
+    service._content_cache[service.auth.current_handle] = items
+    service.search_manager.search_content_with_filters.side_effect = lambda items, filters: list(items)
+    service.deletion_manager.delete_records_by_uri.return_value = (1, [])
+
+    first, _, cursor = service.search_page(SearchRequest(limit=3))
+    service.delete([items[0].uri])
+    second, total, _ = service.search_page(SearchRequest(limit=3), cursor)
+
+    assert total == 5
+    assert [r["uri"] for r in second] == [item.uri for item in items[3:6]]
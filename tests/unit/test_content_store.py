@@ -0,0 +1,338 @@
+"""
+Unit tests for the SQLite content store and DataManager's format dispatch.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import content_store
+from skymarshal.content_store import ContentStore, export_suffix
+from skymarshal.data_manager import DataManager
+from skymarshal.models import ContentItem, ContentType, SearchFilters, UserSettings
+from skymarshal.search import SearchManager
+
+
+def _export(posts=None, likes=None, reposts=None):
+    return {
+        "handle": "test.bsky.social",
+        "did": "did:plc:test123",
+        "export_time": "2024-01-01T00:00:00",
+        "posts": posts or [],
+        "likes": likes or [],
+        "reposts": reposts or [],
+    }
+
+
+POST = {
+    "uri": "at://did:plc:test123/app.bsky.feed.post/1",
+    "cid": "bafypost1",
+    "type": "post",
+    "text": "Hello world",
+    "created_at": "2024-01-01T10:00:00Z",
+    "engagement": {"likes": 5, "reposts": 2, "replies": 1, "score": 0},
+    "raw_data": None,
+}
+LIKE = {
+    "uri": "at://did:plc:test123/app.bsky.feed.like/1",
+    "cid": "bafylike1",
+    "type": "like",
+    "created_at": "2024-01-02T10:00:00Z",
+    "subject_uri": "at://did:plc:other/app.bsky.feed.post/x",
+    "subject_cid": "bafyx",
+}
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> ContentStore:
+    return ContentStore(tmp_path / "test_bsky_social.db")
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> DataManager:
+    auth = Mock()
+    auth.client = Mock()
+    auth.current_did = "did:plc:test123"
+    auth.is_authenticated.return_value = False
+    (tmp_path / "backups").mkdir()
+    (tmp_path / "json").mkdir()
+    return DataManager(
+        auth, UserSettings(), tmp_path, tmp_path / "backups", tmp_path / "json"
+    )
+
+
+class TestContentStore:
+    def test_export_round_trip(self, store):
+        store.write_export(_export(posts=[POST], likes=[LIKE]))
+        data = store.read_export()
+        assert data["handle"] == "test.bsky.social"
+        assert data["posts"] == [POST]
+        assert data["likes"] == [LIKE]
+        assert data["reposts"] == []
+
+    def test_load_items_matches_json_loader(self, store, manager, tmp_path):
+        export = _export(posts=[POST], likes=[LIKE])
+        store.write_export(export)
+        json_path = tmp_path / "json" / "legacy.json"
+        json_path.write_text(json.dumps(export))
+
+        from_store = store.load_items()
+        from_json = manager.load_exported_data(json_path)
+        assert [
+            (i.uri, i.content_type, i.like_count, i.engagement_score)
+            for i in from_store
+        ] == [
+            (i.uri, i.content_type, i.like_count, i.engagement_score) for i in from_json
+        ]
+        assert from_store[1].raw_data == {
+            "subject_uri": LIKE["subject_uri"],
+            "subject_cid": LIKE["subject_cid"],
+        }
+        assert from_store[0].raw_data is None and from_json[0].raw_data is None
+        assert from_store[0].full_record() == POST
+        assert from_json[0].full_record() == POST
+
+    def test_column_projection(self, store):
+        store.write_export(_export(posts=[POST], likes=[LIKE]))
+        items = store.load_items(columns=["created_at"], categories=["posts"])
+        assert len(items) == 1
+        assert items[0].created_at == POST["created_at"]
+        assert items[0].text is None and items[0].raw_data is None
+        with pytest.raises(ValueError):
+            store.load_items(columns=["nope"])
+
+    def test_upsert_replaces_by_uri(self, store):
+        store.write_export(_export(posts=[POST]))
+        updated = dict(POST, text="Edited")
+        new = dict(POST, uri=POST["uri"] + "2", text="Second")
+        store.upsert_export(_export(posts=[updated, new]))
+        assert sorted(p["text"] for p in store.read_export()["posts"]) == [
+            "Edited",
+            "Second",
+        ]
+
+    def test_write_items_keeps_hydrated_counts(self, store):
+        item = ContentItem(uri=POST["uri"], cid="c", content_type="post", like_count=9)
+        store.write_items([item], handle="test.bsky.social")
+        loaded = store.load_items()
+        assert loaded[0].like_count == 9
+        assert store.meta()["handle"] == "test.bsky.social"
+        assert store.counts() == {"post": 1}
+
+
+def _search_posts():
+    texts = [
+        "Learning Python today",
+        "the cat sat on the mat",
+        "concatenate strings in rust",
+        "Coffee and rust, a good morning",
+        "İstanbul trip photos",
+        "",
+        "python snakes are not Python code",
+    ]
+    posts = []
+    for n, text in enumerate(texts):
+        posts.append(
+            {
+                **POST,
+                "uri": f"at://did:plc:test123/app.bsky.feed.post/{n}",
+                "type": "reply" if n % 3 == 0 else "post",
+                "text": text,
+                "created_at": f"2024-01-{n % 4 + 1:02d}T10:00:00Z" if n != 2 else None,
+                "engagement": {"likes": n, "reposts": n % 2, "replies": 0, "score": 0},
+            }
+        )
+    repost = {
+        "uri": "at://did:plc:test123/app.bsky.feed.repost/1",
+        "cid": "bafyrepost1",
+        "type": "repost",
+        "created_at": "2024-01-03T10:00:00Z",
+        "subject_uri": "at://did:plc:other/app.bsky.feed.post/y",
+        "subject_cid": "bafyy",
+        "raw_data": {
+            "subject_uri": "at://did:plc:other/app.bsky.feed.post/y",
+            "subject_like_count": 9,
+        },
+    }
+    return posts, [repost]
+
+
+SEARCHES = [
+    SearchFilters(keywords=["python"]),
+    SearchFilters(keywords=['"Python"']),
+    SearchFilters(keywords=["\\bcat\\b"]),
+    SearchFilters(keywords=["+rust", "coffee"]),
+    SearchFilters(keywords=["-cat"]),
+    SearchFilters(keywords=["istanbul"]),
+    SearchFilters(keywords=["at"]),
+    SearchFilters(start_date="2024-01-02", end_date="2024-01-03"),
+    SearchFilters(min_likes=3, max_likes=5),
+    SearchFilters(min_engagement=8),
+    SearchFilters(content_type=ContentType.REPLIES),
+    SearchFilters(subject_contains="OTHER"),
+    SearchFilters(),
+]
+
+
+class TestStoreSearch:
+    @pytest.fixture
+    def searchable(self, store):
+        posts, reposts = _search_posts()
+        store.write_export(_export(posts=posts, likes=[LIKE], reposts=reposts))
+        return store
+
+    @pytest.mark.parametrize("filters", SEARCHES)
+    def test_matches_in_memory_search(self, searchable, filters):
+        expected = SearchManager(Mock(), UserSettings()).search_content_with_filters(
+            searchable.load_items(), filters
+        )
+        items, total = searchable.search(filters)
+        assert [i.uri for i in items] == [i.uri for i in expected]
+        assert total == len(expected)
+
+    def test_blocklist_matches_in_memory_search(self, searchable):
+        blocklist = [f"-zz{n}qx" for n in range(50)] + ["-cat", "+rust"]
+        filters = SearchFilters(keywords=blocklist)
+        expected = SearchManager(Mock(), UserSettings()).search_content_with_filters(
+            searchable.load_items(), filters
+        )
+        items, total = searchable.search(filters)
+        assert [i.uri for i in items] == [i.uri for i in expected]
+        assert total == len(expected) > 0
+
+    def test_pagination_reports_total(self, searchable):
+        everything, total = searchable.search(SearchFilters())
+        page, page_total = searchable.search(SearchFilters(), limit=3, offset=2)
+        assert page_total == total == 9
+        assert [i.uri for i in page] == [i.uri for i in everything[2:5]]
+        assert searchable.search(SearchFilters(), limit=3, offset=50) == ([], 9)
+
+    @pytest.mark.parametrize("newest_first", [True, False])
+    def test_keyset_pages_match_full_result(self, searchable, newest_first):
+        everything, total = searchable.search(
+            SearchFilters(), newest_first=newest_first
+        )
+        pages, after = [], None
+        while True:
+            page, page_total = searchable.search(
+                SearchFilters(), newest_first=newest_first, limit=2, after=after
+            )
+            assert page_total == total
+            if not page:
+                break
+            pages += page
+            after = (page[-1].created_ts, page[-1].uri)
+        assert [i.uri for i in pages] == [i.uri for i in everything]
+
+    def test_deleted_rows_leave_text_index(self, searchable):
+        uri = "at://did:plc:test123/app.bsky.feed.post/0"
+        assert searchable.delete_uris([uri]) == 1
+        items, _ = searchable.search(SearchFilters(keywords=["python"]))
+        assert [i.uri for i in items] == ["at://did:plc:test123/app.bsky.feed.post/6"]
+
+    def test_subject_handle_needs_memory_search(self, searchable):
+        with pytest.raises(ValueError):
+            searchable.search(SearchFilters(subject_handle_contains="alice"))
+
+    def test_version_1_store_is_migrated(self, tmp_path):
+        path = tmp_path / "old.db"
+        ContentStore(path).write_export(_export(posts=[POST]))
+        with sqlite3.connect(path) as conn:
+            for trigger in ("insert", "delete", "update"):
+                conn.execute(f"DROP TRIGGER items_fts_{trigger}")
+            conn.execute("DROP TABLE items_fts")
+            conn.execute("DROP INDEX idx_items_created_ts")
+            conn.execute("ALTER TABLE items DROP COLUMN created_ts")
+            conn.execute("UPDATE meta SET value = '1' WHERE key = 'schema_version'")
+
+        store = ContentStore(path)
+        items, total = store.search(
+            SearchFilters(keywords=["hello"], start_date="2024-01-01")
+        )
+        assert total == 1 and items[0].uri == POST["uri"]
+
+    def test_current_store_is_opened_without_writes(self, tmp_path, monkeypatch):
+        path = tmp_path / "current.db"
+        ContentStore(path).write_export(_export(posts=[POST]))
+        content_store._ready_stores.clear()
+        mtime = path.stat().st_mtime_ns
+
+        def migrate(self, conn):
+            raise AssertionError("migrated a current store")
+
+        monkeypatch.setattr(ContentStore, "_migrate", migrate)
+        store = ContentStore(path)
+        assert store.has_fts
+        assert store.get_record(POST["uri"])["text"] == "Hello world"
+        assert ContentStore(path).has_fts
+        assert path.stat().st_mtime_ns == mtime
+
+
+class TestDataManagerFormats:
+    def test_export_path_follows_setting(self, manager):
+        assert manager.export_path_for("a.bsky.social").name == "a_bsky_social.db"
+        manager.settings.export_format = "json"
+        assert manager.export_path_for("a.bsky.social").name == "a_bsky_social.json"
+        assert export_suffix("unknown") == ".db"
+
+    def test_merge_seeds_store_from_legacy_json(self, manager):
+        legacy = manager.json_dir / "test_bsky_social.json"
+        legacy.write_text(json.dumps(_export(posts=[POST])))
+        out = manager.export_path_for("test.bsky.social")
+
+        manager.save_export(out, _export(likes=[LIKE]), merge=True, primary=True)
+        data = manager.read_export(out)
+        assert len(data["posts"]) == 1 and len(data["likes"]) == 1
+        assert not legacy.exists()
+
+    def test_replace_import_leaves_one_primary_export(self, manager, tmp_path):
+        from tests.fixtures.mock_data import create_mock_car_bytes
+
+        legacy = manager.json_dir / "test_bsky_social.json"
+        legacy.write_text(json.dumps(_export(posts=[POST])))
+        manager.settings.export_format = "json"
+        manager.save_export(legacy, _export(likes=[LIKE]), merge=True)
+        manager.settings.export_format = "sqlite"
+        car = tmp_path / "backup.car"
+        car.write_bytes(create_mock_car_bytes())
+
+        out = manager.import_backup_replace(car, "test.bsky.social")
+
+        files = manager.get_user_files("test.bsky.social", "json")
+        assert files == [out] and out.suffix == ".db"
+        assert not legacy.with_name(legacy.name + ".segments").exists()
+
+    def test_convert_keeps_the_source(self, manager):
+        source = manager.json_dir / "test_bsky_social.json"
+        source.write_text(json.dumps(_export(posts=[POST])))
+        manager.convert_export(source, manager.export_path_for("test.bsky.social"))
+        assert source.exists()
+
+    def test_user_files_include_stores(self, manager):
+        manager.save_export(
+            manager.export_path_for("test.bsky.social"), _export(posts=[POST])
+        )
+        files = manager.get_user_files("test.bsky.social", "json")
+        assert [f.name for f in files] == ["test_bsky_social.db"]
+
+    def test_full_record_reads_json_export_once(self, manager, monkeypatch):
+        manager.settings.export_format = "json"
+        path = manager.export_path_for("test.bsky.social")
+        manager.save_export(path, _export(posts=[POST], likes=[LIKE]))
+        items = manager.load_exported_data(path)
+        reads = []
+        read_export = manager.read_export
+        monkeypatch.setattr(
+            manager, "read_export", lambda p: reads.append(p) or read_export(p)
+        )
+
+        assert [i.full_record()["uri"] for i in items] == [POST["uri"], LIKE["uri"]]
+        assert len(reads) == 1
+        # A merge changes the export, so the index is rebuilt
+        edited = dict(POST, text="edited")
+        manager.save_export(path, _export(posts=[edited]), merge=True)
+        assert items[0].full_record()["text"] == "edited"
+        assert len(reads) == 2
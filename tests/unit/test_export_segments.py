@@ -0,0 +1,137 @@
+"""
+Unit tests for append-only export segments and compaction.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import export_segments
+from skymarshal.cbor_export import normalize_export_data
+from skymarshal.data_manager import DataManager
+from skymarshal.export_segments import SegmentedExport
+from skymarshal.models import UserSettings
+
+
+def _post(n, text="post", created="2024-01-01T00:00:00Z"):
+    return {
+        "uri": f"at://did:plc:test123/app.bsky.feed.post/{n}",
+        "cid": f"bafy{n}",
+        "type": "post",
+        "text": text,
+        "created_at": created,
+        "engagement": {"likes": 0, "reposts": 0, "replies": 0, "score": 0},
+        "raw_data": None,
+    }
+
+
+def _export(posts):
+    return {
+        "handle": "test.bsky.social",
+        "did": "did:plc:test123",
+        "posts": posts,
+        "likes": [],
+        "reposts": [],
+    }
+
+
+@pytest.fixture(params=[".json", ".cbor"])
+def export(tmp_path: Path, request) -> SegmentedExport:
+    seg = SegmentedExport(tmp_path / f"test_bsky_social{request.param}")
+    seg.write(_export([_post(1), _post(2)]))
+    return seg
+
+
+@pytest.fixture
+def manager(tmp_path: Path) -> DataManager:
+    auth = Mock()
+    auth.client = Mock()
+    auth.current_did = "did:plc:test123"
+    auth.is_authenticated.return_value = False
+    (tmp_path / "backups").mkdir()
+    (tmp_path / "json").mkdir()
+    settings = UserSettings()
+    settings.export_format = "json"
+    return DataManager(
+        auth, settings, tmp_path, tmp_path / "backups", tmp_path / "json"
+    )
+
+
+class TestSegmentedExport:
+    def test_append_leaves_base_untouched(self, export):
+        before = export.path.read_bytes()
+        export.append(_export([_post(2, "edited"), _post(3)]))
+
+        assert export.path.read_bytes() == before
+        data = export.read()
+        texts = {p["uri"][-1]: p["text"] for p in data["posts"]}
+        assert texts == {"1": "post", "2": "edited", "3": "post"}
+
+    def test_compact_folds_segments(self, export):
+        export.append(_export([_post(3)]))
+        export.append(_export([_post(3, "later")]))
+        assert export.compact() == 2
+        assert export.segments() == []
+        base = export.read_base()
+        assert len(base["posts"]) == 3
+        assert [p["text"] for p in base["posts"] if p["uri"].endswith("/3")] == [
+            "later"
+        ]
+
+    def test_write_discards_segments(self, export):
+        export.append(_export([_post(3)]))
+        export.write(_export([_post(9)]))
+        assert export.segments() == []
+        assert [p["uri"][-1] for p in export.read()["posts"]] == ["9"]
+
+    def test_stray_partial_segment_is_ignored(self, export):
+        export.append(_export([_post(3)]))
+        stray = export.segment_dir / f"99999999999999999999-1{export.path.suffix}"
+        stray.write_bytes(b"{not valid")
+        assert len(export.read()["posts"]) == 3
+
+    def test_read_restarts_when_another_process_compacts(self, export, monkeypatch):
+        export.append(_export([_post(3)]))
+        read_base = SegmentedExport.read_base
+        compacted = []
+
+        def racing_read_base(self):
+            base = read_base(self)
+            if not compacted:
+                # Another process folds the segment in right after our base read
+                merged, applied = self._apply(
+                    normalize_export_data(base), self.segments()
+                )
+                self._write_file(self.path, merged)
+                for segment in applied:
+                    segment.unlink()
+                compacted.extend(applied)
+            return base
+
+        monkeypatch.setattr(SegmentedExport, "read_base", racing_read_base)
+        assert len(export.read()["posts"]) == 3
+        assert compacted
+
+
+class TestDataManagerMerge:
+    def test_merge_appends_segment(self, manager):
+        path = manager.export_path_for("test.bsky.social")
+        manager.save_export(path, _export([_post(1)]))
+        manager.save_export(path, _export([_post(2)]), merge=True)
+
+        assert json.loads(path.read_text())["posts"] == [_post(1)]
+        assert len(SegmentedExport(path).segments()) == 1
+        assert {i.uri[-1] for i in manager.load_exported_data(path)} == {"1", "2"}
+
+    def test_background_compaction_after_threshold(self, manager, monkeypatch):
+        monkeypatch.setattr(export_segments, "COMPACT_AFTER_SEGMENTS", 2)
+        path = manager.export_path_for("test.bsky.social")
+        manager.save_export(path, _export([_post(1)]))
+        manager.save_export(path, _export([_post(2)]), merge=True)
+        manager.save_export(path, _export([_post(3)]), merge=True)
+
+        manager.compact_export(path)
+        assert SegmentedExport(path).segments() == []
+        assert len(json.loads(path.read_text())["posts"]) == 3
@@ -0,0 +1,122 @@
+"""
+Unit tests for the persistent DID→handle cache behind subject-handle filtering.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import handle_cache
+from skymarshal.handle_cache import HandleCache, HandleIndex
+from skymarshal.models import ContentItem, SearchFilters, UserSettings
+from skymarshal.search import SearchManager
+
+HANDLES = {f"did:plc:{n}": f"user{n}.bsky.social" for n in range(60)}
+HANDLES["did:plc:alice"] = "Alice.example.com"
+
+
+def _like(n, did):
+    return ContentItem(
+        uri=f"at://did:plc:me/app.bsky.feed.like/{n}",
+        cid="c",
+        content_type="like",
+        raw_data={"subject_uri": f"at://{did}/app.bsky.feed.post/x"},
+    )
+
+
+def _get_profiles(actors):
+    return SimpleNamespace(
+        profiles=[
+            SimpleNamespace(did=did, handle=HANDLES[did])
+            for did in actors
+            if did in HANDLES
+        ]
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HandleCache(tmp_path / "handle_cache.db")
+
+
+@pytest.fixture
+def manager(cache):
+    auth = Mock()
+    auth.ensure_authentication.return_value = True
+    auth.client.get_profiles.side_effect = _get_profiles
+    return SearchManager(auth, UserSettings(), handle_cache=cache)
+
+
+class TestHandleIndex:
+    def test_substring_lookup(self):
+        index = HandleIndex({"a": "Alice.example.com", "b": "bob.bsky.social", "c": ""})
+        assert index.matching("ALICE") == {"a"}
+        assert index.matching(".") == {"a", "b"}
+        assert index.matching("bsky.soc") == {"b"}
+        assert index.matching("zzz") == set()
+
+
+class TestHandleCache:
+    def test_resolve_fetches_only_missing(self, cache):
+        fetch = Mock(
+            side_effect=lambda batch: {
+                did: HANDLES[did] for did in batch if did in HANDLES
+            }
+        )
+        dids = list(HANDLES)[:30] + ["did:plc:gone"]
+        resolved = cache.resolve(dids, fetch)
+        assert resolved["did:plc:gone"] == ""
+        assert fetch.call_count == 2
+        assert cache.resolve(dids, fetch) == {}
+        assert fetch.call_count == 2
+        assert cache.get_batch(["did:plc:0"]) == {"did:plc:0": "user0.bsky.social"}
+
+    def test_failed_batches_are_retried(self, cache):
+        cache.resolve(["did:plc:1"], Mock(side_effect=RuntimeError("down")))
+        assert cache.missing(["did:plc:1"]) == ["did:plc:1"]
+
+    def test_expired_entries_are_missing(self, cache):
+        cache.set_batch({"did:plc:1": "user1.bsky.social"}, ttl=-1)
+        assert cache.missing(["did:plc:1"]) == ["did:plc:1"]
+        assert cache.matching_dids("user1") == set()
+        assert cache.clear_expired() == 1
+
+    def test_indexed_entries_expire_without_writes(self, cache, monkeypatch):
+        cache.set_batch({"did:plc:1": "user1.bsky.social"}, ttl=60)
+        assert cache.matching_dids("user1") == {"did:plc:1"}
+        now = time.time()
+        monkeypatch.setattr(handle_cache.time, "time", lambda: now + 61)
+        assert cache.matching_dids("user1") == set()
+
+    def test_index_sees_writes_from_other_instances(self, cache, tmp_path):
+        assert cache.matching_dids("alice") == set()
+        HandleCache(tmp_path / "handle_cache.db").set_batch(
+            {"did:plc:alice": "alice.test"}
+        )
+        assert cache.matching_dids("alice") == {"did:plc:alice"}
+
+
+class TestSubjectHandleSearch:
+    def test_repeat_search_makes_no_api_calls(self, manager):
+        items = [_like(n, did) for n, did in enumerate(HANDLES)]
+        items.append(
+            ContentItem(
+                uri="at://did:plc:me/app.bsky.feed.post/1", cid="c", content_type="post"
+            )
+        )
+        filters = SearchFilters(subject_handle_contains="alice")
+
+        found = manager.search_content_with_filters(items, filters)
+        assert sorted(it.uri for it in found) == [
+            "at://did:plc:me/app.bsky.feed.like/60",
+            "at://did:plc:me/app.bsky.feed.post/1",
+        ]
+        assert manager.auth.client.get_profiles.call_count == 3
+
+        manager.auth.reset_mock()
+        again = manager.search_content_with_filters(items, filters)
+        assert [it.uri for it in again] == [it.uri for it in found]
+        manager.auth.client.get_profiles.assert_not_called()
+        manager.auth.ensure_authentication.assert_not_called()
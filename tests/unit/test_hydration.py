@@ -0,0 +1,235 @@
+"""
+Unit tests for the asyncio engagement hydration engine.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import httpx
+import pytest
+
+from skymarshal import hydration
+from skymarshal.concurrency import ConcurrencyController, clear_concurrency_controllers
+from skymarshal.exceptions import APIError, AuthenticationError
+from skymarshal.hydration import GET_POSTS_MAX_URIS, hydrate_post_counts
+from skymarshal.models import ContentItem, UserSettings
+from skymarshal.single_flight import clear_single_flight_groups
+
+
+def _uri(n):
+    return f"at://did:plc:me/app.bsky.feed.post/{n}"
+
+
+class FakeClient:
+    """The parts of atproto's Client the engine reads."""
+
+    def __init__(self, token="t0"):
+        self._base_url = "https://pds.example/xrpc"
+        self._session = SimpleNamespace(access_jwt=token)
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+
+    def _should_refresh_session(self):
+        return False
+
+    def _refresh_and_set_session(self):
+        self.refreshes += 1
+        self._session = SimpleNamespace(access_jwt=f"t{self.refreshes}")
+
+
+class FakeAppView:
+    """getPosts handler recording concurrency and the tokens it saw."""
+
+    def __init__(self, valid_token="t0", missing=(), fail=()):
+        self.valid_token = valid_token
+        self.missing = set(missing)
+        self.fail = set(fail)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        assert request.url.path == "/xrpc/app.bsky.feed.getPosts"
+        self.calls += 1
+        if request.headers["authorization"] != f"Bearer {self.valid_token}":
+            return httpx.Response(400, json={"error": "ExpiredToken"})
+        uris = request.url.params.get_list("uris")
+        assert len(uris) <= GET_POSTS_MAX_URIS
+        if self.fail & set(uris):
+            return httpx.Response(502)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        posts = [
+            {"uri": uri, "likeCount": n, "repostCount": 1, "replyCount": 2}
+            for n, uri in enumerate(uris)
+            if uri not in self.missing
+        ]
+        return httpx.Response(200, json={"posts": posts})
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(hydration, "RETRY_BACKOFF", 0)
+    clear_concurrency_controllers()
+    clear_single_flight_groups()
+
+
+class TestHydrationEngine:
+    def test_counts_for_all_batches(self):
+        appview = FakeAppView(missing={_uri(3)})
+        progress = []
+        uris = [_uri(n) for n in range(200)]
+        counts = hydrate_post_counts(
+            FakeClient(),
+            uris + uris[:5],
+            batch_size=100,
+            controller=ConcurrencyController("test", initial=4, max_limit=4),
+            progress_callback=progress.append,
+            transport=httpx.MockTransport(appview),
+        )
+        assert len(counts) == 199
+        assert counts[_uri(0)] == (0, 1, 2)
+        assert _uri(3) not in counts
+        assert appview.calls == 8
+        assert 1 < appview.max_in_flight <= 4
+        assert progress[-1] == 200
+
+    def test_expired_token_refreshes_once(self):
+        client = FakeClient(token="old")
+        appview = FakeAppView(valid_token="t1")
+        counts = hydrate_post_counts(
+            client,
+            [_uri(n) for n in range(100)],
+            transport=httpx.MockTransport(appview),
+        )
+        assert len(counts) == 100
+        assert client.refreshes == 1
+
+    def test_rejected_refresh_raises(self):
+        appview = FakeAppView(valid_token="never")
+        with pytest.raises(AuthenticationError):
+            hydrate_post_counts(
+                FakeClient(), [_uri(1)], transport=httpx.MockTransport(appview)
+            )
+
+    def test_failed_batches_are_reported(self):
+        appview = FakeAppView(fail={_uri(0)})
+        engine = hydration.HydrationEngine(
+            hydration.SessionAuth(FakeClient()), transport=httpx.MockTransport(appview)
+        )
+        progress = []
+        uris = [_uri(n) for n in range(50)]
+        counts = asyncio.run(engine.fetch_counts(uris, progress.append))
+        assert sorted(counts) == sorted(uris[25:])
+        assert appview.calls == 2 + hydration.HYDRATION_RETRIES
+        assert engine.failed_uris == uris[:25]
+        assert progress[-1] == 25
+
+    def test_client_internals_present_in_installed_atproto(self):
+        # SessionAuth relies on these private members; an atproto upgrade
+        # that renames one must fail here rather than break token refresh
+        from atproto import Client
+
+        assert hydration.missing_client_internals(Client()) == []
+
+    def test_client_without_internals_is_refused(self):
+        with pytest.raises(APIError):
+            hydration.SessionAuth(SimpleNamespace(_base_url="https://pds.example/xrpc"))
+
+    def test_rate_limit_pauses_and_retries(self):
+        responses = [
+            httpx.Response(429, headers={"retry-after": "0"}),
+            httpx.Response(200, json={"posts": [{"uri": _uri(1), "likeCount": 3}]}),
+        ]
+        controller = ConcurrencyController("test")
+        counts = hydrate_post_counts(
+            FakeClient(),
+            [_uri(1)],
+            controller=controller,
+            transport=httpx.MockTransport(lambda request: responses.pop(0)),
+        )
+        assert counts == {_uri(1): (3, 0, 0)}
+        assert controller.stats()["pauses"] == 1
+
+    def test_identical_batches_in_flight_are_fetched_once(self):
+        appview = FakeAppView()
+        uris = [_uri(n) for n in range(25)]
+
+        async def two_sessions():
+            engines = [
+                hydration.HydrationEngine(
+                    hydration.SessionAuth(FakeClient()),
+                    transport=httpx.MockTransport(appview),
+                )
+                for _ in range(2)
+            ]
+            return await asyncio.gather(
+                *(engine.fetch_counts(uris) for engine in engines)
+            )
+
+        first, second = asyncio.run(two_sessions())
+        assert first == second
+        assert len(first) == 25
+        assert appview.calls == 1
+
+    def test_no_client(self):
+        with pytest.raises(AuthenticationError):
+            hydrate_post_counts(None, [_uri(1)])
+
+    def test_runs_inside_event_loop(self):
+        appview = FakeAppView()
+
+        async def caller():
+            return hydrate_post_counts(
+                FakeClient(), [_uri(1)], transport=httpx.MockTransport(appview)
+            )
+
+        assert asyncio.run(caller()) == {_uri(1): (0, 1, 2)}
+
+
+class TestDataManagerHydration:
+    @pytest.fixture
+    def data_manager(self, monkeypatch, tmp_path):
+        from skymarshal import data_manager as dm
+
+        appview = FakeAppView()
+        real = dm.hydrate_post_counts
+        monkeypatch.setattr(
+            dm,
+            "hydrate_post_counts",
+            lambda *a, **kw: real(*a, transport=httpx.MockTransport(appview), **kw),
+        )
+        auth = Mock()
+        auth.client = FakeClient()
+        return dm.DataManager(auth, UserSettings(), tmp_path, tmp_path, tmp_path)
+
+    def test_post_counts_written_back(self, data_manager):
+        items = [
+            ContentItem(uri=_uri(n), cid="c", content_type="post") for n in range(30)
+        ]
+        data_manager._hydrate_post_engagement(items)
+        assert (
+            items[26].like_count,
+            items[26].repost_count,
+            items[26].reply_count,
+        ) == (1, 1, 2)
+        assert items[26].engagement_score > 0
+
+    def test_repost_subjects_written_back(self, data_manager):
+        items = [
+            ContentItem(
+                uri=f"at://did:plc:me/app.bsky.feed.repost/{n}",
+                cid="c",
+                content_type="repost",
+                raw_data={"subject_uri": _uri(7)},
+            )
+            for n in range(2)
+        ]
+        data_manager._hydrate_repost_subject_engagement(items)
+        for it in items:
+            assert it.raw_data["subject_like_count"] == 0
+            assert it.raw_data["subject_reply_count"] == 2
@@ -0,0 +1,98 @@
+"""
+Unit tests for the inverted keyword index behind SearchManager.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import search
+from skymarshal.keyword_index import (
+    KeywordIndex,
+    clear_keyword_indexes,
+    keyword_index_for,
+)
+from skymarshal.models import ContentItem, SearchFilters, UserSettings
+from skymarshal.search import SearchManager
+
+TEXTS = [
+    "Learning Python today",
+    "the cat sat on the mat",
+    "concatenate strings in rust",
+    "Coffee and rust, a good morning",
+    "İstanbul trip photos",
+    "ſtuff happens",
+    "cat_food is not a cat",
+    None,
+    "Nothing to see here",
+    "python snakes are not Python code",
+]
+
+QUERIES = [
+    ["python"],
+    ['"Python"'],
+    ["cat"],
+    ["\\bcat\\b"],
+    ["+rust", "coffee"],
+    ["-cat"],
+    ["-\\bcat\\b", "+the"],
+    ["-the", "-python"],
+    ["istanbul"],
+    ["stuff"],
+    ["at co"],
+    ["!!!"],
+    ["zzz"],
+]
+
+
+@pytest.fixture
+def items():
+    clear_keyword_indexes()
+    return [
+        ContentItem(uri=f"u{i}", cid="c", content_type="post", text=text)
+        for i, text in enumerate(TEXTS)
+    ]
+
+
+@pytest.fixture
+def manager():
+    return SearchManager(Mock(), UserSettings())
+
+
+def _search(manager, items, keywords):
+    return [
+        it.uri
+        for it in manager.search_content_with_filters(
+            items, SearchFilters(keywords=keywords)
+        )
+    ]
+
+
+class TestKeywordIndex:
+    @pytest.mark.parametrize("keywords", QUERIES)
+    def test_index_matches_full_scan(self, manager, items, keywords, monkeypatch):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 10**9)
+        scanned = _search(manager, items, keywords)
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        assert _search(manager, items, keywords) == scanned
+
+    def test_word_boundary_operator(self, manager, items, monkeypatch):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        assert set(_search(manager, items, ["\\bcat\\b"])) == {"u1", "u6"}
+
+    def test_unicode_case_folding_is_always_checked(self, manager, items, monkeypatch):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        assert _search(manager, items, ["istanbul"]) == ["u4"]
+        assert _search(manager, items, ["stuff"]) == ["u5"]
+
+    def test_index_cached_per_list(self, items):
+        index = keyword_index_for(items)
+        assert keyword_index_for(items) is index
+        items.append(ContentItem(uri="new", cid="c", content_type="post", text="cat"))
+        assert keyword_index_for(items) is not index
+
+    def test_select_survives_reordering(self, items):
+        index = KeywordIndex(items)
+        items.reverse()
+        picked = index.select(items, [0, 1])
+        assert [it.uri for it in picked] == ["u1", "u0"]
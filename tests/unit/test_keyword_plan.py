@@ -0,0 +1,58 @@
+"""
+Unit tests for the process-wide compiled keyword plan cache.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from skymarshal.keyword_plan import (
+    PlanCache,
+    clear_keyword_plans,
+    keyword_plan_for,
+    keyword_plan_stats,
+    normalize_keywords,
+)
+from skymarshal.term_matcher import MATCHER_MIN_TERMS
+
+
+class TestKeywordPlans:
+    def test_equivalent_keyword_lists_share_a_plan(self):
+        clear_keyword_plans()
+        plan = keyword_plan_for(["python", " -cat"])
+        assert keyword_plan_for(["-cat", "python", "python"]) is plan
+        assert normalize_keywords(["python", " -cat", ""]) == ("-cat", "python")
+        assert keyword_plan_for(["", "  "]) is None
+
+    def test_plan_contents(self):
+        plan = keyword_plan_for(['"Exact"', "+rust", "-\\bcat\\b", "plain"])
+        assert plan.positive == (("phrase", "Exact"), ("substring", "plain"))
+        assert plan.negative == (("word", "cat"),)
+        assert plan.required == (("substring", "rust"),)
+        assert set(plan.positive_regexes) == {"case_sensitive", "case_insensitive"}
+        assert plan.matcher is None
+        large = keyword_plan_for([f"-term{n}" for n in range(MATCHER_MIN_TERMS)])
+        assert len(large.matcher) == MATCHER_MIN_TERMS
+
+    def test_counts_hits_and_evicts(self):
+        cache = PlanCache(maxsize=2)
+        first = cache.get(["a"])
+        assert cache.get(["a"]) is first
+        cache.get(["b"])
+        cache.get(["c"])
+        assert cache.get(["a"]) is not first
+        assert cache.stats() == {"hits": 1, "misses": 4, "size": 2, "maxsize": 2}
+
+    def test_shared_across_threads(self):
+        clear_keyword_plans()
+        before = keyword_plan_stats()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            plans = set(
+                map(
+                    id,
+                    pool.map(
+                        lambda _: keyword_plan_for(["thread", "-safe"]), range(64)
+                    ),
+                )
+            )
+        after = keyword_plan_stats()
+        assert len(plans) == 1
+        assert after["hits"] + after["misses"] - before["hits"] - before["misses"] == 64
@@ -4,11 +4,14 @@ Unit tests for Skymarshal data models and utility functions.
 Tests core data structures, enums, and utility functions that form
 the foundation of the application.
 """
+import sys
+
 import pytest
 from datetime import datetime
 from skymarshal.models import (
     ContentItem, UserSettings, SearchFilters, DeleteMode, ContentType,
-    parse_datetime, merge_content_items
+    compact_raw_data, created_sort_key, parse_datetime, merge_content_items,
+    to_timestamp, utc_hour_and_weekday
 )
 
 
@@ -51,6 +54,50 @@ class TestContentItem:
         assert item.engagement_score == 0.0
         assert item.raw_data is None
 
+    def test_content_item_is_slotted(self):
+        """Items carry no per-instance __dict__ and intern their type."""
+        item = ContentItem(uri="u", cid="c", content_type="".join(["po", "st"]))
+        assert not hasattr(item, "__dict__")
+        assert item.content_type is sys.intern("post")
+        with pytest.raises(AttributeError):
+            item.unknown_field = 1
+
+    def test_content_item_equality(self):
+        """Items compare by field values like the old dataclass."""
+        assert ContentItem("u", "c", "post", like_count=1) == ContentItem("u", "c", "post", like_count=1)
+        assert ContentItem("u", "c", "post") != ContentItem("u", "c", "reply")
+
+    def test_full_record_uses_loader(self):
+        """full_record fetches the stored record lazily through the loader."""
+        calls = []
+
+        def loader(uri):
+            calls.append(uri)
+            return {"uri": uri, "text": "full"}
+
+        item = ContentItem("u", "c", "post", raw_data=None, record_loader=loader)
+        assert calls == []
+        assert item.full_record() == {"uri": "u", "text": "full"}
+        assert calls == ["u"]
+        assert ContentItem("u", "c", "like", raw_data={"a": 1}).full_record() == {"a": 1}
+
+    def test_compact_raw_data(self):
+        """Only the fields readers use survive; embeds collapse to a flag."""
+        record = {
+            "uri": "at://x",
+            "text": "hi",
+            "subject_uri": "at://y",
+            "subject_cid": "bafy",
+            "embed": {"$type": "app.bsky.embed.images", "images": [{}]},
+        }
+        assert compact_raw_data(record) == {
+            "subject_uri": "at://y",
+            "subject_cid": "bafy",
+            "has_media": True,
+        }
+        assert compact_raw_data({"uri": "at://x", "text": "hi"}) is None
+        assert compact_raw_data(None) is None
+
 
 class TestUserSettings:
     """Test UserSettings dataclass."""
@@ -184,6 +231,42 @@ class TestParseDatetime:
         assert result == default
 
 
+class TestTimestamps:
+    """Test pre-parsed epoch timestamps on content items."""
+
+    def test_to_timestamp_matches_datetime_order(self):
+        """Offsets and naive values land on the same UTC microsecond scale."""
+        assert to_timestamp("1970-01-01T00:00:00Z") == 0
+        assert to_timestamp("2023-12-25T15:30:45.123Z") == to_timestamp(
+            "2023-12-25T16:30:45.123+01:00"
+        )
+        assert to_timestamp("2023-12-25") == to_timestamp("2023-12-25T00:00:00Z")
+        assert to_timestamp("not-a-date") is None
+        assert to_timestamp(None) is None
+
+    def test_created_ts_follows_created_at(self):
+        """Setting created_at re-parses the timestamp."""
+        item = ContentItem("u", "c", "post", created_at="2023-12-25T15:30:45Z")
+        assert item.created_ts == to_timestamp("2023-12-25T15:30:45Z")
+        item.created_at = None
+        assert item.created_ts is None
+
+    def test_sort_key_puts_undated_first(self):
+        """Undated items sort before dated ones instead of raising."""
+        items = [
+            ContentItem("b", "c", "post", created_at="2023-01-02T00:00:00Z"),
+            ContentItem("x", "c", "post"),
+            ContentItem("a", "c", "post", created_at="2023-01-01T00:00:00+00:00"),
+        ]
+        assert [i.uri for i in sorted(items, key=created_sort_key)] == ["x", "a", "b"]
+
+    def test_utc_hour_and_weekday(self):
+        """Bucketing matches datetime.hour / weekday() in UTC."""
+        ts = to_timestamp("2023-12-25T15:30:45Z")  # a Monday
+        assert utc_hour_and_weekday(ts) == (15, 0)
+        assert utc_hour_and_weekday(to_timestamp("1969-12-31T23:00:00Z")) == (23, 2)
+
+
 class TestMergeContentItems:
     """Test merge_content_items utility function."""
 
@@ -0,0 +1,139 @@
+"""
+Unit tests for the search result cache and dataset versioning.
+"""
+
+import pytest
+
+from skymarshal.exceptions import ValidationError
+from skymarshal.models import ContentItem, ContentType, SearchFilters
+from skymarshal.query_cache import (
+    Cursor,
+    QueryCache,
+    bump_dataset_version,
+    counts_version,
+    dataset_version,
+    decode_cursor,
+    emptiness_flipped,
+    encode_cursor,
+    filters_key,
+    filters_use_counts,
+    mark_data_changed,
+    resume_position,
+)
+from skymarshal.range_index import _cache as range_cache
+from skymarshal.range_index import range_index_for
+
+
+def _token_for(query):
+    return encode_cursor(Cursor(query, 0, 0, None, "u", 1))
+
+
+class TestQueryCache:
+    def test_counts_hits_and_misses(self):
+        cache = QueryCache()
+        assert cache.get("a") is None
+        assert cache.put("a", ["u1", "u2"]) == ("u1", "u2")
+        assert cache.get("a") == ("u1", "u2")
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = QueryCache(maxsize=2)
+        cache.put("a", ["u1"])
+        cache.put("b", ["u2"])
+        cache.get("a")
+        cache.put("c", ["u3"])
+        assert cache.get("b") is None
+        assert cache.get("a") == ("u1",)
+        assert cache.get("c") == ("u3",)
+
+
+class TestFiltersKey:
+    def test_equivalent_filters_share_a_key(self):
+        a = SearchFilters(keywords=["cats", " dogs"], start_date="2024-01-01")
+        b = SearchFilters(
+            keywords=["dogs", "cats", ""], start_date="2024-01-01T00:00:00"
+        )
+        assert filters_key(a) == filters_key(b)
+
+    def test_different_filters_differ(self):
+        base = filters_key(SearchFilters())
+        assert filters_key(SearchFilters(min_likes=1)) != base
+        assert filters_key(SearchFilters(content_type=ContentType.POSTS)) != base
+        assert filters_key(SearchFilters(keywords=["-cats"])) != filters_key(
+            SearchFilters(keywords=["cats"])
+        )
+
+
+class TestDatasetVersion:
+    def test_bumps_are_monotonic(self):
+        before = dataset_version()
+        bumped = bump_dataset_version()
+        assert before < bumped < mark_data_changed() == dataset_version()
+
+    def test_versions_are_per_dataset(self):
+        alice, bob = dataset_version("did:plc:alice"), dataset_version("did:plc:bob")
+        bump_dataset_version("did:plc:alice")
+        assert dataset_version("did:plc:alice") > alice
+        assert dataset_version("did:plc:bob") == bob
+        mark_data_changed(["at://did:plc:bob/app.bsky.feed.post/1"])
+        assert dataset_version("did:plc:bob") > bob
+
+    def test_count_only_changes_keep_dataset_version(self):
+        uri = "at://did:plc:carol/app.bsky.feed.post/1"
+        version, counts = dataset_version("did:plc:carol"), counts_version(
+            "did:plc:carol"
+        )
+        mark_data_changed([uri], emptiness_changed=False)
+        assert dataset_version("did:plc:carol") == version
+        assert counts_version("did:plc:carol") > counts
+
+    def test_filters_use_counts(self):
+        assert not filters_use_counts(
+            SearchFilters(keywords=["cats"], start_date="2024-01-01")
+        )
+        assert filters_use_counts(SearchFilters(min_likes=1))
+
+    def test_emptiness_flipped(self):
+        textless = ContentItem(uri="u", cid="c", content_type="repost")
+        assert emptiness_flipped(textless, (1, 0, 0))
+        assert not emptiness_flipped(textless, (0, 0, 0))
+        post = ContentItem(uri="u", cid="c", content_type="post", text="hi")
+        assert not emptiness_flipped(post, (3, 0, 0))
+
+    def test_mark_data_changed_drops_range_indexes(self):
+        range_index_for([])
+        assert range_cache
+        mark_data_changed()
+        assert not range_cache
+
+
+class TestCursor:
+    def _cursor(self, **changes):
+        fields = dict(
+            query="q1", version=3, position=2, sort_key=50, last_uri="u1", total=5
+        )
+        fields.update(changes)
+        return Cursor(**fields)
+
+    def test_round_trip(self):
+        cursor = self._cursor(version=[10, 20], sort_key=None)
+        assert decode_cursor(encode_cursor(cursor), "q1") == cursor
+
+    @pytest.mark.parametrize("token", ["not base64!", "e30", _token_for("q2")])
+    def test_rejects_bad_or_foreign_tokens(self, token):
+        with pytest.raises(ValidationError):
+            decode_cursor(token, "q1")
+
+    def test_resume_position(self):
+        uris = ["u0", "u1", "u2", "u3"]
+        keys = {"u0": 80, "u1": 50, "u2": 50, "u3": None}
+        assert resume_position(self._cursor(), uris, 3, keys.get) == 2
+        # After a data change: continue after the last URI, wherever it moved
+        assert resume_position(self._cursor(), ["u9"] + uris, 4, keys.get) == 3
+        # ... or after its sort key when it is gone
+        assert resume_position(self._cursor(), ["u0", "u2", "u3"], 4, keys.get) == 2
+        assert (
+            resume_position(self._cursor(sort_key=60), ["u2", "u0"], 4, keys.get, False)
+            == 1
+        )
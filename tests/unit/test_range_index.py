@@ -0,0 +1,108 @@
+"""
+Unit tests for the sorted date/engagement indexes behind SearchManager.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import search
+from skymarshal.models import ContentItem, ContentType, SearchFilters, UserSettings
+from skymarshal.range_index import RangeIndex, clear_range_indexes, range_index_for
+from skymarshal.search import SearchManager
+
+
+def _item(n):
+    content_type = ("post", "reply", "repost", "like")[n % 4]
+    created = (
+        None if n % 11 == 0 else f"2024-{n % 12 + 1:02d}-{n % 5 + 1:02d}T10:00:00Z"
+    )
+    raw = None
+    if content_type in ("repost", "like"):
+        raw = {
+            "subject_uri": f"at://did:plc:s{n % 3}/p/{n}",
+            "subject_like_count": n % 9,
+        }
+    item = ContentItem(
+        uri=f"u{n}",
+        cid="c",
+        content_type=content_type,
+        text=f"note {n} about cats" if n % 2 else None,
+        created_at=created,
+        like_count=n % 7,
+        repost_count=n % 3,
+        reply_count=n % 2,
+        raw_data=raw,
+    )
+    item.update_engagement_score()
+    return item
+
+
+SEARCHES = [
+    SearchFilters(),
+    SearchFilters(max_likes=0, max_engagement=0),
+    SearchFilters(min_likes=5),
+    SearchFilters(min_likes=2, max_likes=3, min_replies=1),
+    SearchFilters(min_engagement=9.5),
+    SearchFilters(start_date="2024-03-01", end_date="2024-05-02"),
+    SearchFilters(end_date="2024-02-01"),
+    SearchFilters(keywords=["cats"], min_reposts=2),
+    SearchFilters(keywords=["-cats"], start_date="2024-06-01"),
+    SearchFilters(content_type=ContentType.REPOSTS, min_likes=4),
+    SearchFilters(subject_contains="plc:s1", max_engagement=5),
+]
+
+
+@pytest.fixture
+def items():
+    clear_range_indexes()
+    return [_item(n) for n in range(120)]
+
+
+def _search(items, filters, order="newest", use_subject=True):
+    settings = UserSettings()
+    settings.fetch_order = order
+    settings.use_subject_engagement_for_reposts = use_subject
+    return [
+        it.uri
+        for it in SearchManager(Mock(), settings).search_content_with_filters(
+            items, filters
+        )
+    ]
+
+
+class TestRangeIndex:
+    @pytest.mark.parametrize("order", ["newest", "oldest"])
+    @pytest.mark.parametrize("use_subject", [True, False])
+    @pytest.mark.parametrize("filters", SEARCHES)
+    def test_index_matches_full_scan(
+        self, items, filters, order, use_subject, monkeypatch
+    ):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 10**9)
+        scanned = _search(items, filters, order, use_subject)
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        assert _search(items, filters, order, use_subject) == scanned
+
+    def test_matching_bisects_ranges(self, items):
+        index = RangeIndex(items, use_subject_engagement=False)
+        assert index.matching([("likes", 0, 999999)]) is None
+        expected = {n for n in range(120) if n % 7 == 6 and n % 3 == 2}
+        assert index.matching([("likes", 6, None), ("reposts", 2, 2)]) == expected
+
+    def test_cleared_after_counts_change(self, items, monkeypatch):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        filters = SearchFilters(min_likes=100)
+        assert _search(items, filters) == []
+        items[0].like_count = 100
+        clear_range_indexes()
+        assert _search(items, filters) == ["u0"]
+
+    def test_reordered_list_falls_back_to_scan(self, items, monkeypatch):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        range_index_for(items)
+        items.reverse()
+        filters = SearchFilters(min_likes=6)
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 10**9)
+        scanned = _search(items, filters)
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        assert _search(items, filters) == scanned
@@ -0,0 +1,305 @@
+"""
+Unit tests for the shared, lane-aware API rate budgets.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from skymarshal import rate_budget
+from skymarshal.concurrency import (
+    clear_concurrency_controllers,
+    controller_for,
+    pds_call,
+)
+from skymarshal.rate_budget import (
+    AUTHENTICATED_API,
+    BACKGROUND,
+    INTERACTIVE,
+    PUBLIC_API,
+    FileRateLimiter,
+    RateBudget,
+    RateLimiter,
+    budget_for,
+    budget_scope,
+    clear_rate_budgets,
+    configure_rate_budgets,
+    rate_budget_stats,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_budgets():
+    clear_rate_budgets()
+    clear_concurrency_controllers()
+    configure_rate_budgets(None)
+    yield
+    clear_rate_budgets()
+    clear_concurrency_controllers()
+
+
+def _spend(budget, points, **kwargs):
+    """Spend one point at a time until the budget refuses; returns points spent."""
+    spent = 0
+    while spent < points and budget.reserve(1, **kwargs) == 0.0:
+        spent += 1
+    return spent
+
+
+class TestRateLimiter:
+    def test_window_slides(self):
+        clock = FakeClock()
+        limiter = RateLimiter(3, 60, clock=clock)
+        assert limiter.reserve(2) == 0.0
+        clock.now += 30
+        assert limiter.reserve(1) == 0.0
+        assert limiter.reserve(1) == pytest.approx(30)
+        clock.now += 30
+        assert limiter.reserve(1) == 0.0
+        stats = limiter.get_usage_stats()
+        assert stats["points_used"] == 2
+        assert stats["requests_in_window"] == 2
+
+    def test_oversized_spend_goes_through_on_empty_window(self):
+        limiter = RateLimiter(3, 60, clock=FakeClock())
+        limiter.acquire(5)
+        assert limiter.get_usage_stats()["points_remaining"] == 0
+
+    def test_blocked_acquires_are_served_in_arrival_order(self):
+        limiter = RateLimiter(1, 0.1)
+        limiter.acquire()
+        order = []
+
+        def acquire(n):
+            limiter.acquire()
+            order.append(n)
+
+        threads = []
+        for n in range(5):
+            thread = threading.Thread(target=acquire, args=(n,))
+            thread.start()
+            threads.append(thread)
+            # Queue the threads one at a time so arrival order is known
+            while len(limiter._waiters) < n + 1 and not order:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join(5)
+        assert order == [0, 1, 2, 3, 4]
+        assert not limiter._waiters
+
+    def test_reserve_does_not_jump_the_queue(self):
+        limiter = RateLimiter(1, 0.2)
+        limiter.acquire()
+        waiter = threading.Thread(target=limiter.acquire)
+        waiter.start()
+        while not limiter._waiters:
+            time.sleep(0.001)
+        assert limiter.reserve(1, limit=10) > 0
+        waiter.join(5)
+
+    @pytest.mark.performance
+    def test_acquire_cost_stays_flat_as_window_fills(self):
+        """Micro-benchmark: acquire() costs the same on a full window as on empty."""
+
+        def time_acquires(limiter, n=2000):
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                for _ in range(n):
+                    limiter.acquire()
+                best = min(best, time.perf_counter() - start)
+            return best
+
+        empty = time_acquires(RateLimiter(10**9, 3600))
+        full = RateLimiter(10**9, 3600)
+        for _ in range(50_000):
+            full.acquire()
+        # The list-rebuilding limiter was ~1000x slower at this fill
+        assert time_acquires(full) < empty * 5 + 0.01
+
+
+class TestRateBudget:
+    def test_background_lane_leaves_interactive_reserve(self):
+        budget = RateBudget("svc", 10, 60)
+        assert _spend(budget, 20, lane=BACKGROUND) == 8
+        assert budget.reserve(1, lane=BACKGROUND) > 0
+        assert _spend(budget, 20, lane=INTERACTIVE) == 2
+        stats = budget.stats()
+        assert stats["points_remaining"] == 0
+        assert stats["lanes"][BACKGROUND]["spent"] == 8
+
+    def test_consumer_share_applies_only_under_contention(self):
+        budget = RateBudget("svc", 10, 60)
+        assert _spend(budget, 6, consumer="alice") == 6
+        # bob's arrival caps alice at CONSUMER_SHARE of the window
+        assert _spend(budget, 1, consumer="bob") == 1
+        assert budget.reserve(1, consumer="alice") > 0
+        assert _spend(budget, 3, consumer="bob") == 3
+        assert budget.stats()["consumers"] == {"alice": 6, "bob": 4}
+
+    def test_budget_scope_sets_defaults(self):
+        budget = RateBudget("svc", 10, 60)
+        with budget_scope(lane=BACKGROUND, consumer="alice"):
+            budget.acquire()
+        budget.acquire()
+        stats = budget.stats()
+        assert stats["lanes"][BACKGROUND]["spent"] == 1
+        assert stats["lanes"][INTERACTIVE]["spent"] == 1
+        assert stats["consumers"] == {"alice": 1}
+
+    def test_acquire_waits_for_window(self):
+        budget = RateBudget("svc", 2, 0.1)
+        budget.acquire(2)
+        start = time.monotonic()
+        budget.acquire()
+        assert time.monotonic() - start >= 0.05
+        assert budget.stats()["lanes"][INTERACTIVE]["waits"] == 1
+
+    def test_acquire_async(self):
+        budget = RateBudget("svc", 5, 60)
+        asyncio.run(budget.acquire_async(3))
+        assert budget.get_usage_stats()["points_used"] == 3
+
+    def test_blocked_acquires_are_served_in_arrival_order(self):
+        budget = RateBudget("svc", 1, 0.1)
+        budget.acquire()
+        order = []
+
+        def acquire(n):
+            budget.acquire()
+            order.append(n)
+
+        threads = []
+        for n in range(5):
+            thread = threading.Thread(target=acquire, args=(n,))
+            thread.start()
+            threads.append(thread)
+            # Queue the threads one at a time so arrival order is known
+            while budget.stats()["lanes"][INTERACTIVE]["queued"] < n + 1 and not order:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join(5)
+        assert order == [0, 1, 2, 3, 4]
+        assert budget.stats()["lanes"][INTERACTIVE]["queued"] == 0
+
+    def test_async_and_thread_waiters_share_the_queue(self):
+        budget = RateBudget("svc", 1, 0.1)
+        budget.acquire()
+        order = []
+
+        async def main():
+            first = asyncio.ensure_future(budget.acquire_async())
+            while not budget.stats()["lanes"][INTERACTIVE]["queued"]:
+                await asyncio.sleep(0.001)
+            second = asyncio.get_running_loop().run_in_executor(None, budget.acquire)
+            await first
+            order.append("coroutine")
+            await second
+            order.append("thread")
+
+        asyncio.run(main())
+        assert order == ["coroutine", "thread"]
+        assert budget.get_usage_stats()["points_used"] == 1
+
+    @pytest.mark.performance
+    def test_blocked_acquire_sleeps_until_the_window_frees(self):
+        """Micro-benchmark: blocked acquires finish at the window rate, no polling."""
+        budget = RateBudget("svc", 5, 0.2)
+        _spend(budget, 5)
+        threads = [threading.Thread(target=budget.acquire) for _ in range(10)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        elapsed = time.monotonic() - start
+        # Two further windows; polling in MAX_WAIT_SLICE steps took over 2s
+        assert elapsed < 0.2 * 2 + 0.3
+        assert budget.stats()["lanes"][INTERACTIVE]["waits"] == 10
+
+
+@pytest.mark.skipif(rate_budget.fcntl is None, reason="needs fcntl")
+class TestSharedBudgets:
+    def test_file_limiter_is_shared_by_path(self, tmp_path):
+        first = FileRateLimiter(tmp_path / "svc.json", max_points=3, window_seconds=60)
+        second = FileRateLimiter(tmp_path / "svc.json", max_points=3, window_seconds=60)
+        assert first.reserve(2) == 0.0
+        assert second.reserve(1) == 0.0
+        assert second.reserve(1) > 0
+        assert first.get_usage_stats()["points_used"] == 3
+
+    def test_configured_dir_makes_budgets_shared(self, tmp_path):
+        configure_rate_budgets(tmp_path)
+        budget = budget_for(PUBLIC_API)
+        budget.acquire()
+        assert budget.shared
+        assert (tmp_path / f"{PUBLIC_API}.json").exists()
+
+
+class TestSharedRegistry:
+    def test_budgets_are_shared_by_name(self):
+        assert budget_for(PUBLIC_API) is budget_for(PUBLIC_API)
+        assert PUBLIC_API in rate_budget_stats()
+
+    def test_shared_controller_draws_from_budget(self):
+        controller = controller_for(PUBLIC_API)
+        with controller.slot(points=3) as slot:
+            slot.observe(200)
+        assert controller.budget is budget_for(PUBLIC_API)
+        assert budget_for(PUBLIC_API).get_usage_stats()["points_used"] == 3
+
+    def test_unbudgeted_controller_has_no_budget(self):
+        assert controller_for("svc").budget is None
+
+
+class TestAccountBudgets:
+    def test_pds_budgets_are_per_account(self):
+        alice = budget_for(AUTHENTICATED_API, account="did:plc:alice")
+        assert alice is not budget_for(AUTHENTICATED_API, account="did:plc:bob")
+        assert alice.name == "pds:did:plc:alice"
+        with budget_scope(account="did:plc:alice"):
+            assert budget_for(AUTHENTICATED_API) is alice
+            # The public AppView budget is per IP, whoever is asking
+            assert budget_for(PUBLIC_API) is budget_for(
+                PUBLIC_API, account="did:plc:bob"
+            )
+
+    def test_pds_call_spends_from_the_clients_account(self):
+        client = SimpleNamespace(
+            _base_url="https://pds.example/xrpc",
+            me=SimpleNamespace(did="did:plc:alice"),
+        )
+        assert pds_call(client, lambda n: n * 2, 21) == 42
+        stats = rate_budget_stats()
+        assert stats["pds:did:plc:alice"]["points_used"] == 1
+        assert "pds:did:plc:bob" not in stats
+
+    def test_data_manager_bulk_work_runs_in_background_lane(self):
+        from skymarshal.data_manager import _background_api_work
+
+        class Manager:
+            auth = SimpleNamespace(
+                current_handle="alice.test", current_did="did:plc:alice"
+            )
+
+            @_background_api_work
+            def download(self):
+                return (
+                    rate_budget._lane.get(),
+                    rate_budget._consumer.get(),
+                    budget_for(AUTHENTICATED_API).name,
+                )
+
+        assert Manager().download() == (BACKGROUND, "alice.test", "pds:did:plc:alice")
+        assert rate_budget._lane.get() == INTERACTIVE
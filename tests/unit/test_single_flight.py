@@ -0,0 +1,221 @@
+"""
+Unit tests for single-flight coalescing of identical in-flight calls.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from skymarshal.concurrency import ConcurrencyController
+from skymarshal.network.client import BlueskyClient
+from skymarshal.rate_budget import clear_rate_budgets
+from skymarshal.single_flight import (
+    PROFILE_LOOKUPS,
+    SingleFlight,
+    clear_single_flight_groups,
+    flight_group,
+    single_flight_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_groups():
+    clear_single_flight_groups()
+    clear_rate_budgets()
+    yield
+    clear_single_flight_groups()
+    clear_rate_budgets()
+
+
+def _run_concurrently(n, target):
+    results = [None] * n
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, target()))
+        for i in range(n)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        group = SingleFlight("test")
+        release = threading.Event()
+        calls = []
+
+        def lookup():
+            calls.append(1)
+            release.wait(5)
+            return {"handle": "alice"}
+
+        threads, results = _run_concurrently(5, lambda: group.do("alice", lookup))
+        while group.stats()["calls"] + group.stats()["shared"] < 5:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert group.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+    def test_finished_calls_are_not_reused(self):
+        group = SingleFlight("test")
+        assert group.do("k", lambda: 1) == 1
+        assert group.do("k", lambda: 2) == 2
+        assert group.stats()["calls"] == 2
+
+    def test_exception_is_shared(self):
+        group = SingleFlight("test")
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            release.wait(5)
+            raise ValueError("boom")
+
+        def caller():
+            try:
+                group.do("k", failing)
+            except ValueError as exc:
+                errors.append(exc)
+
+        threads, _ = _run_concurrently(3, caller)
+        while group.stats()["calls"] + group.stats()["shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert len(errors) == 3
+        assert group.stats()["calls"] == 1
+
+    def test_async_callers_share_one_call(self):
+        group = SingleFlight("test")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [1, 2]
+
+        async def main():
+            return await asyncio.gather(*(group.do_async("k", fetch) for _ in range(4)))
+
+        assert asyncio.run(main()) == [[1, 2]] * 4
+        assert len(calls) == 1
+
+    def test_follower_takes_over_from_cancelled_leader(self):
+        group = SingleFlight("test")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            leader = asyncio.ensure_future(group.do_async("k", fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(group.do_async("k", fetch))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(main()) == "done"
+        assert len(calls) == 2
+
+    def test_groups_are_shared_by_name(self):
+        assert flight_group(PROFILE_LOOKUPS) is flight_group(PROFILE_LOOKUPS)
+        assert PROFILE_LOOKUPS in single_flight_stats()
+
+
+class TestBlueskyClientCoalescing:
+    def test_identical_profile_lookups_share_a_request(self):
+        release = threading.Event()
+        requests_made = []
+
+        def fake_get(url, params=None, timeout=None):
+            requests_made.append(params)
+            release.wait(5)
+            return SimpleNamespace(
+                status_code=200,
+                headers={},
+                raise_for_status=lambda: None,
+                json=lambda: {"handle": params["actor"]},
+            )
+
+        clients = []
+        for _ in range(3):
+            client = BlueskyClient(
+                concurrency=ConcurrencyController("test", max_limit=8)
+            )
+            client._session.get = fake_get
+            clients.append(client)
+
+        results = [None] * 3
+        threads = [
+            threading.Thread(
+                target=lambda i=i: results.__setitem__(
+                    i, clients[i].get_profile("alice")
+                )
+            )
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        group = flight_group(PROFILE_LOOKUPS)
+        while group.stats()["calls"] + group.stats()["shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert results == [{"handle": "alice"}] * 3
+        assert len(requests_made) == 1
+
+
+class TestProfileApiCoalescing:
+    def _client(self, did, release, calls):
+        def get_profile(actor):
+            calls.append((did, actor))
+            release.wait(5)
+            return SimpleNamespace(did=f"did:plc:{actor}", viewer={"following": did})
+
+        return SimpleNamespace(
+            _base_url="https://pds.example/xrpc",
+            me=SimpleNamespace(did=did),
+            get_profile=get_profile,
+        )
+
+    def test_lookups_are_shared_only_within_an_account(self):
+        from skymarshal.api.profile import _lookup_profile
+
+        release = threading.Event()
+        calls = []
+        clients = [
+            self._client("did:plc:alice", release, calls),
+            self._client("did:plc:alice", release, calls),
+            self._client("did:plc:bob", release, calls),
+        ]
+        results = [None] * 3
+        threads = [
+            threading.Thread(
+                target=lambda i=i: results.__setitem__(
+                    i, _lookup_profile(clients[i], "carol")
+                )
+            )
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        group = flight_group(PROFILE_LOOKUPS)
+        while group.stats()["calls"] + group.stats()["shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert sorted(calls) == [("did:plc:alice", "carol"), ("did:plc:bob", "carol")]
+        assert results[0] is results[1]
+        assert results[2].viewer == {"following": "did:plc:bob"}
@@ -0,0 +1,116 @@
+"""
+Unit tests for the multi-term keyword matcher used for large keyword sets.
+"""
+
+import random
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import search
+from skymarshal.keyword_index import clear_keyword_indexes
+from skymarshal.models import ContentItem, SearchFilters, UserSettings
+from skymarshal.search import SearchManager
+from skymarshal.term_matcher import MATCHER_MIN_TERMS, TermMatcher
+
+TEXTS = [
+    "Learning Python today",
+    "the cat sat on the mat",
+    "concatenate strings in rust",
+    "Coffee and rust, a good morning",
+    "İstanbul trip photos",
+    "ſtuff happens",
+    "cat_food is not a cat",
+    None,
+    "",
+    "Café culture, naïve CAFÉ",
+    "she sells sea shells 🐚 by the shore",
+    "python snakes are not Python code",
+    "hers and his, ushers",
+]
+
+# Blocklist padding so every query below takes the matcher path
+FILLER = [f"-zz{n}qx" for n in range(MATCHER_MIN_TERMS)]
+
+QUERIES = [
+    ["python"],
+    ['"Python"'],
+    ["\\bcat\\b"],
+    ["+rust", "coffee"],
+    ["-cat"],
+    ["-\\bcat\\b", "+the"],
+    ["istanbul"],
+    ["stuff"],
+    ["café"],
+    ["🐚", "+sea"],
+    ["he", "she", "his", "hers"],
+    ["-he", "+s"],
+    ["\\bhis\\b", "-ushers"],
+    ["\\b, \\b"],
+    ["\\b🐚\\b"],
+]
+
+
+def _regex_passes(manager, keywords, text):
+    return manager._passes_keyword_filters(
+        text, *manager._compile_search_patterns(keywords)
+    )
+
+
+@pytest.fixture
+def manager():
+    return SearchManager(Mock(), UserSettings())
+
+
+class TestTermMatcher:
+    @pytest.mark.parametrize("keywords", QUERIES)
+    def test_matches_regex_semantics(self, manager, keywords):
+        matcher = TermMatcher.from_keywords(keywords)
+        for text in TEXTS:
+            assert matcher.passes(text) == _regex_passes(manager, keywords, text), text
+
+    def test_random_terms_match_regex_semantics(self, manager):
+        rng = random.Random(7)
+        alphabet = "abAB _.İıſé"
+        texts = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            for _ in range(200)
+        ]
+        for _ in range(100):
+            keywords = []
+            for _ in range(rng.randint(1, 6)):
+                word = "".join(rng.choice("abAB _é") for _ in range(rng.randint(1, 3)))
+                keywords.append(
+                    rng.choice(["", "-", "+"])
+                    + rng.choice(["{}", '"{}"', "\\b{}\\b"]).format(word)
+                )
+            matcher = TermMatcher.from_keywords(keywords)
+            for text in texts:
+                assert matcher.passes(text) == _regex_passes(manager, keywords, text), (
+                    keywords,
+                    text,
+                )
+
+
+class TestSearchWithMatcher:
+    @pytest.fixture
+    def items(self):
+        clear_keyword_indexes()
+        return [
+            ContentItem(uri=f"u{i}", cid="c", content_type="post", text=text)
+            for i, text in enumerate(TEXTS)
+        ]
+
+    @pytest.mark.parametrize("keywords", QUERIES)
+    @pytest.mark.parametrize("index_min_items", [0, 10**9])
+    def test_blocklist_search_matches_regex_search(
+        self, manager, items, keywords, index_min_items, monkeypatch
+    ):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", index_min_items)
+        expected = [
+            it.uri for it in items if _regex_passes(manager, keywords + FILLER, it.text)
+        ]
+        found = manager.search_content_with_filters(
+            items, SearchFilters(keywords=keywords + FILLER)
+        )
+        assert sorted(it.uri for it in found) == sorted(expected)
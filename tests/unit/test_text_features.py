@@ -0,0 +1,73 @@
+"""
+Unit tests for the memoized per-text features shared by search, cleanup and analytics.
+"""
+
+from skymarshal.firehose.features import extract_features
+from skymarshal.keyword_index import KeywordIndex
+from skymarshal.models import ContentItem
+from skymarshal.services.analytics import ContentAnalytics
+from skymarshal.text_features import (
+    clear_text_features,
+    extract_text_features,
+    text_feature_stats,
+    text_features,
+)
+
+TEXT = (
+    "  Great news #Launch #café via @alice.bsky.social "
+    "https://a.example/x http://b.example go go GO "
+)
+
+
+class TestTextFeatures:
+    def test_fields(self):
+        features = extract_text_features(TEXT)
+        assert features.urls == ("https://a.example/x", "http://b.example")
+        assert features.url_count == 2
+        assert features.hashtags == ("#Launch", "#café")
+        assert features.mentions == ("@alice.bsky.social",)
+        assert features.word_count == 11
+        assert features.distinct_words == 10
+        assert features.normalized == TEXT.strip().lower()
+        assert features.tokens[:3] == ("great", "news", "launch")
+        assert "go" in features.token_set
+
+    def test_hashtags_stop_at_punctuation(self):
+        # Same matches as the loners' original r"#\w+" scans
+        features = extract_text_features("Out now #Launch… #café! #—")
+        assert features.hashtags == ("#Launch", "#café")
+
+    def test_empty_and_missing_text(self):
+        for text in (None, ""):
+            features = text_features(text)
+            assert features.word_count == 0
+            assert features.tokens == ()
+            assert features.urls == ()
+
+    def test_memoized_per_text(self):
+        clear_text_features()
+        first = text_features("hello world")
+        again = text_features("hello " + "world")
+        assert again is first
+        stats = text_feature_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    def test_index_and_analytics_share_features(self):
+        clear_text_features()
+        items = [
+            ContentItem(uri=f"u{i}", cid="c", content_type="post", text=text)
+            for i, text in enumerate(["good post", "bad post", "good post"])
+        ]
+        KeywordIndex(items)
+        misses = text_feature_stats()["misses"]
+        frequency = ContentAnalytics.analyze_word_frequency(items)
+        assert frequency["total_words"] == 6
+        assert text_feature_stats()["misses"] == misses
+
+    def test_firehose_features_match(self):
+        features = extract_features(TEXT)
+        assert features.links == ["https://a.example/x", "http://b.example"]
+        assert features.hashtags == ["#Launch", "#café"]
+        assert features.mentions == ["@alice.bsky.social"]
+        assert features.word_count == 11
+        assert features.has_link
@@ -0,0 +1,98 @@
+"""
+Unit tests for the NumPy filter engine and engagement statistics.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from skymarshal import search, vector_filters
+from skymarshal.models import UserSettings
+from skymarshal.range_index import RangeIndex, clear_range_indexes
+from skymarshal.search import SearchManager
+
+from .test_range_index import SEARCHES, _item, _search
+
+
+@pytest.fixture
+def items():
+    clear_range_indexes()
+    return [_item(n) for n in range(120)]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def numpy_mode(request, monkeypatch):
+    if request.param:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(search, "HAS_NUMPY", request.param)
+    monkeypatch.setattr(vector_filters, "HAS_NUMPY", request.param)
+    return request.param
+
+
+def _naive_stats(items, baseline=None, high=None, category_types=("post",)):
+    pr = [it for it in items if it.content_type in ("post", "reply")]
+    likes = [it.like_count for it in pr]
+    engagement = [
+        it.like_count + 2 * it.repost_count + 2.5 * it.reply_count for it in pr
+    ]
+    avg_likes = sum(likes) / max(1, len(pr))
+    avg_engagement = sum(engagement) / max(1, len(pr))
+    baseline = baseline or avg_likes
+    half, one_half, double = (
+        max(0.0, baseline * 0.5),
+        max(1.0, baseline * 1.5),
+        max(1.0, baseline * 2.0),
+    )
+    high = max(10.0, avg_engagement * 2.0) if high is None else high
+    cats = [it.like_count for it in pr if it.content_type in category_types]
+    return {
+        "posts": sum(1 for it in items if it.content_type == "post"),
+        "likes": sum(1 for it in items if it.content_type == "like"),
+        "total_likes": sum(likes),
+        "avg_engagement": avg_engagement,
+        "high_engagement": sum(1 for e in engagement if e >= high),
+        "dead_threads": likes.count(0),
+        "bombers": sum(1 for n in cats if 0 < n <= half),
+        "mid": sum(1 for n in cats if half < n <= one_half),
+        "bangers": sum(1 for n in cats if n >= double),
+    }
+
+
+class TestVectorSearch:
+    @pytest.mark.parametrize("order", ["newest", "oldest"])
+    @pytest.mark.parametrize("filters", SEARCHES)
+    def test_matches_full_scan(self, items, filters, order, numpy_mode, monkeypatch):
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 10**9)
+        scanned = _search(items, filters, order)
+        monkeypatch.setattr(search, "INDEX_MIN_ITEMS", 0)
+        assert _search(items, filters, order) == scanned
+
+
+class TestEngagementStats:
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{}, {"baseline": 4.0, "high": 6}, {"category_types": ("post", "reply")}],
+    )
+    def test_matches_naive_counts(self, items, kwargs, numpy_mode):
+        expected = _naive_stats(items, **kwargs)
+        stats = vector_filters.engagement_stats(
+            RangeIndex(items),
+            baseline_likes=kwargs.get("baseline"),
+            high_engagement_threshold=kwargs.get("high"),
+            category_types=kwargs.get("category_types", ("post",)),
+        )
+        for key, value in expected.items():
+            assert stats[key] == pytest.approx(value), key
+
+    def test_calculate_statistics_uses_runtime_average(self, items, numpy_mode):
+        settings = UserSettings()
+        settings.avg_likes_per_post = 4.0
+        result = SearchManager(Mock(), settings)._calculate_statistics(items)
+        expected = _naive_stats(items, baseline=4.0)
+        assert result["average_posts"] == expected["mid"]
+        assert result["low_engagement"] == expected["bombers"]
+        assert result["engagement_thresholds"]["low"] == 2
+
+    def test_empty_dataset(self, numpy_mode):
+        stats = vector_filters.engagement_stats(RangeIndex([]))
+        assert stats["posts"] == 0 and stats["avg_likes"] == 0 and stats["viral"] == 0